@@ -1,16 +1,28 @@
 import { NextResponse } from 'next/server';
-import { connectToDatabase } from '@/lib/supabase-db';
-import { hashPassword, verifyPassword, generateToken, getUserFromToken } from '@/lib/auth';
-import { MealSuggestionService } from '@/lib/llm-service';
+import { connectToDatabase, withDbRoundTrips } from '@/lib/supabase-db';
+import { hashPassword, verifyPassword, needsRehash, generateToken, getUserFromToken } from '@/lib/auth';
+import { passwordPool, PoolBusyError } from '@/lib/password-pool';
+import { getMealSuggestionService } from '@/lib/llm-service';
+import { suggestionCache, suggestionCacheKey } from '@/lib/suggestion-cache';
+import { llmLimiter, LimiterBusyError, DeadlineExceededError } from '@/lib/llm-limiter';
+import { rateLimiter, rateLimitHeaders, clientIp } from '@/lib/rate-limit';
+import { collectionCache } from '@/lib/collection-cache';
+import { exportResponse, importNdjson, ImportError } from '@/lib/user-data';
+import { withTrafficCapture } from '@/lib/traffic-capture';
+import { runtimeStatsEnabled, operatorAuthorized, runtimeSnapshot, heapSnapshotResponse } from '@/lib/runtime-stats';
 import cloudinary from '@/lib/cloudinary';
+import { storeMealImage, imageUploadStats } from '@/lib/image-upload';
 import { v4 as uuidv4 } from 'uuid';
 import { runLookupChain, runDiagnosis } from '@/lib/barcode-lookup';
+import { tokenize, ingredientLines, indexIngredients, coveredLines, rankByCoverage } from '@/lib/ingredient-index';
+import { PARSER_VERSION, parseIngredientLine, parseIngredients, aggregateIngredients } from '@/lib/ingredient-parser';
 
 // CORS headers
 const corsHeaders = {
   'Access-Control-Allow-Origin': '*',
   'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
   'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+  'Access-Control-Expose-Headers': 'RateLimit-Limit, RateLimit-Remaining, RateLimit-Reset, RateLimit-Policy, Retry-After',
 };
 
 // Handle OPTIONS request for CORS
@@ -34,28 +46,393 @@ function withCors(response) {
  * comparing back to the input.
  *
  * Used by the pantry endpoints for `expiresAt`; safe to reuse anywhere
- * we accept an ISO date without a time component.
+ * we accept an ISO date without a time component (pass the field name
+ * for the error message).
  */
-function validateIsoDate(input) {
+function validateIsoDate(input, field = 'expiresAt') {
   if (typeof input !== 'string' || !/^\d{4}-\d{2}-\d{2}$/.test(input)) {
-    return 'expiresAt must be YYYY-MM-DD';
+    return `${field} must be YYYY-MM-DD`;
   }
   // Parse in UTC to avoid the classic "-1 day" surprise when the
   // server timezone is west of UTC.
   const d = new Date(input + 'T00:00:00Z');
   if (Number.isNaN(d.getTime()) || d.toISOString().slice(0, 10) !== input) {
-    return 'expiresAt is not a valid calendar date';
+    return `${field} is not a valid calendar date`;
   }
   return null;
 }
 
+/** Today's date as `YYYY-MM-DD` (UTC, matching how expiresAt is compared). */
+function todayIso() {
+  return new Date().toISOString().slice(0, 10);
+}
+
+/** `YYYY-MM-DD` shifted by `days` (may be negative). */
+function addDaysIso(iso, days) {
+  const d = new Date(`${iso}T00:00:00Z`);
+  d.setUTCDate(d.getUTCDate() + days);
+  return d.toISOString().slice(0, 10);
+}
+
+/** Whole days from `from` to `to` (both `YYYY-MM-DD`). */
+function daysBetweenIso(from, to) {
+  return Math.round((Date.parse(`${to}T00:00:00Z`) - Date.parse(`${from}T00:00:00Z`)) / 86400000);
+}
+
+const MEAL_TYPES = ['breakfast', 'lunch', 'dinner'];
+
+// POST /api/meal-plans/bulk: longest range one call may touch.
+const BULK_PLAN_MAX_DAYS = 31;
+
+/**
+ * parseBulkPlanOp — validate a POST /api/meal-plans/bulk body. Returns
+ * `{ error }` or the op with its `range` ({ start, end }, the days the
+ * response reports) filled in.
+ */
+function parseBulkPlanOp(body) {
+  const { op } = body || {};
+  const onConflict = body?.onConflict ?? 'skip';
+  if (!['skip', 'replace'].includes(onConflict)) {
+    return { error: "onConflict must be 'skip' or 'replace'" };
+  }
+  const spanError = (start, end, label) => {
+    const days = daysBetweenIso(start, end) + 1;
+    return days < 1 || days > BULK_PLAN_MAX_DAYS ? `${label} must span 1 to ${BULK_PLAN_MAX_DAYS} days` : null;
+  };
+
+  if (op === 'copy-week') {
+    const start = body.source?.start;
+    const end = body.source?.end ?? (validateIsoDate(start) ? undefined : addDaysIso(start, 6));
+    const err = validateIsoDate(start, 'source.start') || validateIsoDate(end, 'source.end')
+      || spanError(start, end, 'source') || validateIsoDate(body.target?.start, 'target.start');
+    if (err) return { error: err };
+    const range = { start: body.target.start, end: addDaysIso(body.target.start, daysBetweenIso(start, end)) };
+    return {
+      op,
+      source: { start, end },
+      offset: daysBetweenIso(start, range.start),
+      range,
+      replace: onConflict === 'replace',
+    };
+  }
+
+  if (op === 'apply-template') {
+    const err = validateIsoDate(body.start, 'start');
+    if (err) return { error: err };
+    const slots = body.slots;
+    if (!Array.isArray(slots) || !slots.length || slots.length > BULK_PLAN_MAX_DAYS * MEAL_TYPES.length) {
+      return { error: `slots must be an array of 1 to ${BULK_PLAN_MAX_DAYS * MEAL_TYPES.length} slots` };
+    }
+    const seen = new Set();
+    for (const slot of slots) {
+      if (!Number.isInteger(slot?.day) || slot.day < 0 || slot.day >= BULK_PLAN_MAX_DAYS) {
+        return { error: `slot day must be an integer from 0 to ${BULK_PLAN_MAX_DAYS - 1}` };
+      }
+      if (!MEAL_TYPES.includes(slot.mealType)) {
+        return { error: `slot mealType must be one of ${MEAL_TYPES.join(', ')}` };
+      }
+      if (typeof slot.mealId !== 'string' || !slot.mealId) {
+        return { error: 'slot mealId is required' };
+      }
+      const key = `${slot.day}:${slot.mealType}`;
+      if (seen.has(key)) return { error: `Two slots for day ${slot.day} ${slot.mealType}` };
+      seen.add(key);
+    }
+    const lastDay = Math.max(...slots.map((slot) => slot.day));
+    return {
+      op,
+      slots: slots.map((slot) => ({ date: addDaysIso(body.start, slot.day), mealType: slot.mealType, mealId: slot.mealId })),
+      range: { start: body.start, end: addDaysIso(body.start, lastDay) },
+      replace: onConflict === 'replace',
+    };
+  }
+
+  if (op === 'clear-range') {
+    const err = validateIsoDate(body.start, 'start') || validateIsoDate(body.end, 'end')
+      || spanError(body.start, body.end, 'start..end');
+    if (err) return { error: err };
+    const mealTypes = body.mealTypes ?? [];
+    if (!Array.isArray(mealTypes) || mealTypes.some((type) => !MEAL_TYPES.includes(type))) {
+      return { error: `mealTypes must be a subset of ${MEAL_TYPES.join(', ')}` };
+    }
+    return { op, range: { start: body.start, end: body.end }, mealTypes };
+  }
+
+  return { error: "op must be 'copy-week', 'apply-template' or 'clear-range'" };
+}
+
+// "Expiring soon" window used by the pantry badge, the summary endpoint
+// and the nightly job (keep in sync with migration 007's default).
+const EXPIRING_DEFAULT_DAYS = 3;
+
+// GET /api/bootstrap sections, and its cap on meals per list.
+const BOOTSTRAP_SECTIONS = ['user', 'meals', 'plans', 'kitchen'];
+const BOOTSTRAP_MAX_LIMIT = 100;
+
+/**
+ * pickImageMeta — whitelist the `imageMeta` object the meal form sends
+ * along with `imageUrl` (it's the /api/upload response minus the URL).
+ * Returns camelCase meal fields; anything malformed is dropped rather
+ * than rejected, since the metadata is an optimisation, not content.
+ */
+function pickImageMeta(meta) {
+  if (!meta || typeof meta !== 'object') return {};
+  const out = {};
+  if (Number.isInteger(meta.width) && meta.width > 0) out.imageWidth = meta.width;
+  if (Number.isInteger(meta.height) && meta.height > 0) out.imageHeight = meta.height;
+  if (typeof meta.publicId === 'string' && meta.publicId.length <= 255) out.imagePublicId = meta.publicId;
+  if (typeof meta.placeholder === 'string' && meta.placeholder.startsWith('data:image/')
+      && meta.placeholder.length <= 4096) {
+    out.imagePlaceholder = meta.placeholder;
+  }
+  return out;
+}
+
+/**
+ * suggestionStream — Server-Sent Events body for a streamed
+ * /api/meal-suggestions call. Events:
+ *
+ *   event: token   data: {"text":"…"}             (repeated)
+ *   event: done    data: {"cached":false}
+ *   event: error   data: {"error":"…"}
+ *
+ * `chunks` is any iterable or async iterable of text (a cache hit
+ * passes `[text]`); the full text is cached once the stream completes
+ * (never for a stream that errored midway).
+ */
+function suggestionStream(chunks, { cacheKey, cached = false } = {}) {
+  const encoder = new TextEncoder();
+  const iterator = chunks[Symbol.asyncIterator]?.() ?? chunks[Symbol.iterator]();
+  let text = '';
+  const send = (controller, event, data) => {
+    controller.enqueue(encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`));
+  };
+  const body = new ReadableStream({
+    async pull(controller) {
+      try {
+        const { done, value } = await iterator.next();
+        if (done) {
+          if (!cached && cacheKey && text) suggestionCache.set(cacheKey, text);
+          send(controller, 'done', { cached });
+          controller.close();
+          return;
+        }
+        text += value;
+        send(controller, 'token', { text: value });
+      } catch (error) {
+        console.error('Meal suggestion stream error:', error);
+        send(controller, 'error', { error: 'Failed to generate meal suggestions. Please try again.' });
+        controller.close();
+      }
+    },
+    // Browser went away: stop reading from the provider and free the
+    // limiter slot.
+    cancel() {
+      iterator.return?.();
+    },
+  });
+  return new Response(body, {
+    headers: {
+      'Content-Type': 'text/event-stream; charset=utf-8',
+      'Cache-Control': 'no-cache, no-transform',
+      'Connection': 'keep-alive',
+      // Stop reverse proxies (nginx) from buffering the whole stream.
+      'X-Accel-Buffering': 'no',
+    },
+  });
+}
+
+/**
+ * primeStream — wait for the first chunk before committing to a 200
+ * SSE response, so "queue full" / deadline errors from the LLM limiter
+ * still surface as proper 503 / 504 statuses.
+ */
+async function primeStream(iterable) {
+  const iterator = iterable[Symbol.asyncIterator]();
+  const first = await iterator.next();
+  return (async function* primed() {
+    if (first.done) return;
+    try {
+      yield first.value;
+      for (;;) {
+        const { done, value } = await iterator.next();
+        if (done) return;
+        yield value;
+      }
+    } finally {
+      await iterator.return?.();
+    }
+  })();
+}
+
+// GET /api/meals/cookable: result size cap, and how many not-yet-indexed
+// meals (created before migration 008) each call indexes on the way.
+const COOKABLE_MAX_LIMIT = 50;
+const COOKABLE_BACKFILL_BATCH = 200;
+
+/**
+ * indexMeals — (re)build the inverted ingredient index for `meals`
+ * (`[{ id, userId, ingredients }]`). Best-effort: never throws, a
+ * failure leaves the meal unindexed and the cookable endpoint retries.
+ */
+async function indexMeals(db, meals) {
+  const entries = meals.map((meal) => ({
+    id: meal.id,
+    userId: meal.userId,
+    ...indexIngredients(meal.ingredients),
+  }));
+  return db.collection('meal_ingredient_tokens').replaceForMeals(entries);
+}
+
+/**
+ * parseMealIngredients — store structured rows for `meals` in
+ * `meal_ingredients` (see lib/ingredient-parser.js). Best-effort like
+ * indexMeals(): a failure leaves the meal for the backfill endpoint.
+ */
+async function parseMealIngredients(db, meals) {
+  const entries = meals.map((meal) => ({
+    id: meal.id,
+    userId: meal.userId,
+    rows: parseIngredients(meal.ingredients),
+  }));
+  return db.collection('meal_ingredients').replaceForMeals(entries, PARSER_VERSION);
+}
+
+// POST /api/meal-ingredients/backfill batch size (default / max).
+const BACKFILL_DEFAULT_LIMIT = 200;
+const BACKFILL_MAX_LIMIT = 1000;
+
+/** Map LLM limiter errors to responses; null for anything else. */
+function limiterErrorResponse(error) {
+  if (error instanceof LimiterBusyError) {
+    const response = NextResponse.json({
+      error: 'AI suggestions are busy right now. Please try again in a moment.',
+    }, { status: 503 });
+    response.headers.set('Retry-After', String(error.retryAfterSeconds));
+    return response;
+  }
+  if (error instanceof DeadlineExceededError) {
+    return NextResponse.json({
+      error: 'AI suggestions took too long. Please try again.',
+    }, { status: 504 });
+  }
+  return null;
+}
+
+/**
+ * rateLimit — spend one of the caller's tokens for `route` (per user and
+ * per IP, see lib/rate-limit.js). Returns `{ limited, headers }`:
+ * `limited` is a ready 429 when the caller is over their allowance,
+ * otherwise null; pass `headers` to withRateLimit() on the response.
+ */
+async function rateLimit(request, route, user) {
+  const result = await rateLimiter.check(route, { userId: user.userId, ip: clientIp(request) });
+  const headers = rateLimitHeaders(result);
+  if (!result || result.allowed) return { limited: null, headers };
+  const response = NextResponse.json({
+    error: 'Too many requests. Please wait a moment and try again.',
+  }, { status: 429 });
+  return { limited: withRateLimit(response, headers), headers };
+}
+
+/** Copy RateLimit-* headers from rateLimit() onto `response`. */
+function withRateLimit(response, headers) {
+  Object.entries(headers).forEach(([key, value]) => {
+    response.headers.set(key, value);
+  });
+  return response;
+}
+
+// POST /api/shopping-list/scan and /api/pantry/scan: lowest pg_trgm
+// name score that counts as a match, and how many candidates to return.
+const SCAN_MIN_CONFIDENCE = 0.6;
+const SCAN_CANDIDATES = 3;
+
+/**
+ * resolveScan — match a scanned barcode to one of the user's rows in
+ * `collection` ('shopping_list_items' or 'pantry_items') in a single
+ * request:
+ *
+ *   1. exact `barcode` match (partial (user_id, barcode) index);
+ *   2. otherwise the product name, ranked by pg_trgm similarity. The
+ *      name is `body.name` when the client already knows it (its local
+ *      barcode cache), else it comes from the lookup chain, which is
+ *      only run, and only charged to the barcode-lookup rate limit,
+ *      when step 1 found nothing.
+ *
+ * Body: { code, name? }. Returns the response to send:
+ * `{ code, name, product, match, candidates }`. `product` is the lookup
+ * result or null when no lookup ran. `match` is the best candidate
+ * `{ item, matchedBy: 'barcode' | 'name', confidence }` or null.
+ */
+async function resolveScan(db, request, user, collection) {
+  let body;
+  try { body = await request.json(); }
+  catch { return NextResponse.json({ error: 'Invalid JSON' }, { status: 400 }); }
+
+  const code = typeof body.code === 'string' ? body.code.trim() : '';
+  if (!/^\d{6,14}$/.test(code)) {
+    return NextResponse.json({ error: 'Invalid barcode' }, { status: 400 });
+  }
+  let name = typeof body.name === 'string' && body.name.trim() ? body.name.trim() : null;
+
+  const items = db.collection(collection);
+  const query = { userId: user.userId, minConfidence: SCAN_MIN_CONFIDENCE, limit: SCAN_CANDIDATES };
+  let candidates = await items.matchScan({ ...query, code, name });
+
+  let product = null;
+  let limitHeaders = {};
+  if (!candidates.length && !name) {
+    const limit = await rateLimit(request, 'barcode-lookup', user);
+    if (limit.limited) return limit.limited;
+    limitHeaders = limit.headers;
+    console.log(`[barcode] scan ${code} (${collection})`);
+    product = await runLookupChain(code);
+    name = product.found ? (product.name || product.brand || null) : null;
+    if (name) candidates = await items.matchScan({ ...query, name });
+  }
+
+  return withRateLimit(NextResponse.json({
+    code,
+    name,
+    product,
+    match: candidates[0] || null,
+    candidates,
+  }), limitHeaders);
+}
+
+/** 503 + Retry-After when the password worker pool is saturated; null otherwise. */
+function passwordPoolErrorResponse(error) {
+  if (!(error instanceof PoolBusyError)) return null;
+  const response = NextResponse.json({
+    error: 'Too many sign-ins right now. Please try again in a moment.',
+  }, { status: 503 });
+  response.headers.set('Retry-After', String(error.retryAfterSeconds));
+  return response;
+}
+
+/**
+ * rehashPassword — after a successful login, re-hash a password stored
+ * at an old bcrypt cost. Runs after the response is built and never
+ * throws: a busy pool or a failed write just means it happens on a
+ * later login.
+ */
+function rehashPassword(db, user, password) {
+  if (!needsRehash(user.password)) return;
+  hashPassword(password)
+    .then((hash) => db.collection('users').updateOne({ id: user.id }, { $set: { password: hash } }))
+    .catch((error) => {
+      if (!(error instanceof PoolBusyError)) console.warn('[auth] rehash failed:', error?.message);
+    });
+}
+
 // ---------------------------------------------------------------------
 // Barcode helpers live in lib/barcode-lookup.js
 // See docs/operations/debugging.md for the debugging runbook.
 // ---------------------------------------------------------------------
 
 
-export async function GET(request, { params }) {
+async function handleGet(request, { params }) {
   try {
     const { db } = await connectToDatabase();
     const path = params.path?.join('/') || '';
@@ -81,11 +458,110 @@ export async function GET(request, { params }) {
       return withCors(NextResponse.json(userDataWithoutPassword));
     }
 
+    // -----------------------------------------------------------------
+    // GET /api/bootstrap?week=YYYY-MM-DD — app shell + planner in one call
+    // -----------------------------------------------------------------
+    // Replaces the five-odd requests the shell and the planner made on
+    // load (both meal lists twice, then meal-plans). Every section is
+    // queried in parallel; kitchen counts are best-effort (null on
+    // failure) so a counts hiccup never blanks the app.
+    //   ?week=       first day of the 7-day window (default: today)
+    //   ?include=    comma list of user,meals,plans,kitchen (default all);
+    //                the planner asks for `plans` alone on week changes
+    //   ?limit=      meals per list, 1..BOOTSTRAP_MAX_LIMIT (default 20,
+    //                same as GET /api/meals)
+    //   ?includeOthers=true  — community plans too, as GET /api/meal-plans
+    if (path === 'bootstrap') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      const week = url.searchParams.get('week') || todayIso();
+      const weekErr = validateIsoDate(week, 'week');
+      if (weekErr) return withCors(NextResponse.json({ error: weekErr }, { status: 400 }));
+      const limit = Number(url.searchParams.get('limit') || '20');
+      if (!Number.isInteger(limit) || limit < 1 || limit > BOOTSTRAP_MAX_LIMIT) {
+        return withCors(NextResponse.json({
+          error: `limit must be an integer between 1 and ${BOOTSTRAP_MAX_LIMIT}`
+        }, { status: 400 }));
+      }
+      const include = new Set((url.searchParams.get('include') || BOOTSTRAP_SECTIONS.join(',')).split(','));
+      const unknown = [...include].filter((section) => !BOOTSTRAP_SECTIONS.includes(section));
+      if (unknown.length) {
+        return withCors(NextResponse.json({
+          error: `Unknown include section(s): ${unknown.join(', ')}`
+        }, { status: 400 }));
+      }
+      const includeOthers = url.searchParams.get('includeOthers') === 'true';
+      const weekEnd = addDaysIso(week, 6);
+      const today = todayIso();
+      const skipped = Promise.resolve(undefined);
+
+      try {
+        const [userData, mine, community, plans, kitchen] = await Promise.all([
+          include.has('user') ? db.collection('users').findOne({ id: user.userId }) : skipped,
+          include.has('meals') ? db.collection('meals').page({ userId: user.userId, limit }) : skipped,
+          include.has('meals') ? db.collection('meals').page({ limit }) : skipped,
+          include.has('plans')
+            ? db.collection('meal_plans').find({
+              ...(includeOthers ? {} : { userId: user.userId }),
+              dateRange: { start: week, end: weekEnd },
+            })
+            : skipped,
+          include.has('kitchen')
+            ? Promise.all([
+              db.collection('pantry_items').count({ userId: user.userId }),
+              db.collection('pantry_items').count({
+                userId: user.userId,
+                expiresBetween: { from: today, to: addDaysIso(today, EXPIRING_DEFAULT_DAYS) },
+              }),
+              db.collection('shopping_list_items').count({ userId: user.userId }),
+              db.collection('shopping_list_items').count({ userId: user.userId, checked: false }),
+            ]).then(([pantry, expiring, shopping, unchecked]) => ({
+              pantryCount: pantry,
+              expiringCount: expiring,
+              shoppingCount: shopping,
+              shoppingUncheckedCount: unchecked,
+            })).catch((err) => {
+              console.warn('[bootstrap] kitchen counts failed:', err?.message || err);
+              return null;
+            })
+            : skipped,
+        ]);
+
+        if (include.has('user') && !userData) {
+          return withCors(NextResponse.json({ error: 'User not found' }, { status: 404 }));
+        }
+        const body = {};
+        if (include.has('user')) {
+          const { password, ...userWithoutPassword } = userData;
+          body.user = userWithoutPassword;
+        }
+        if (include.has('meals')) body.meals = { mine, community, limit };
+        if (include.has('plans')) {
+          body.week = {
+            start: week,
+            end: weekEnd,
+            plans: plans.map((plan) => ({ ...plan, isOwn: plan.userId === user.userId })),
+          };
+        }
+        if (include.has('kitchen')) body.kitchen = kitchen;
+        return withCors(NextResponse.json(body));
+      } catch (error) {
+        console.error('Error building bootstrap:', error);
+        return withCors(NextResponse.json({
+          error: 'Failed to load app data',
+          details: error.message
+        }, { status: 500 }));
+      }
+    }
+
     if (path === 'meals') {
       const user = getUserFromToken(request);
       const skip = parseInt(url.searchParams.get('skip') || '0');
       const limit = parseInt(url.searchParams.get('limit') || '20');
       const search = url.searchParams.get('search') || '';
+      const ingredient = url.searchParams.get('ingredient') || '';
       const userId = url.searchParams.get('userId');
 
       let query = {};
@@ -105,6 +581,16 @@ export async function GET(request, { params }) {
       }
 
       try {
+        // ?ingredient=Tomatoes → meals with a parsed "tomato" line
+        // (indexed lookup on meal_ingredients.name, no text scan).
+        if (ingredient) {
+          const name = parseIngredientLine(ingredient).name;
+          query.ids = name
+            ? await db.collection('meal_ingredients').findMealIdsByName(name, { userId: query.userId })
+            : [];
+          if (!query.ids.length) return withCors(NextResponse.json([]));
+        }
+
         const mealsResult = await db.collection('meals').find(query);
         
         // Handle both array response and MongoDB-style chaining
@@ -171,40 +657,200 @@ export async function GET(request, { params }) {
       }
     }
 
+    // -----------------------------------------------------------------
+    // GET /api/meals/cookable — meals ranked by fresh-pantry coverage
+    // -----------------------------------------------------------------
+    //   ?scope=mine|community  — own meals (default) or everyone's
+    //   ?limit=N               — 1..50, default 20
+    //   ?minCoverage=0.5       — drop meals below this fraction
+    // Must stay above the generic meals/:id branch.
+    if (path === 'meals/cookable') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+
+      const scope = url.searchParams.get('scope') || 'mine';
+      const limit = Number(url.searchParams.get('limit') || '20');
+      const minCoverage = Number(url.searchParams.get('minCoverage') || '0');
+      if (!['mine', 'community'].includes(scope)) {
+        return withCors(NextResponse.json({ error: 'scope must be "mine" or "community"' }, { status: 400 }));
+      }
+      if (!Number.isInteger(limit) || limit < 1 || limit > COOKABLE_MAX_LIMIT) {
+        return withCors(NextResponse.json({ error: `limit must be an integer between 1 and ${COOKABLE_MAX_LIMIT}` }, { status: 400 }));
+      }
+      if (!Number.isFinite(minCoverage) || minCoverage < 0 || minCoverage > 1) {
+        return withCors(NextResponse.json({ error: 'minCoverage must be between 0 and 1' }, { status: 400 }));
+      }
+
+      try {
+        const pantry = await db.collection('pantry_items').find(
+          { userId: user.userId, freshOn: todayIso() },
+          { fields: ['name'] }
+        );
+        const pantryNames = pantry.map((item) => item.name);
+        const tokens = [...new Set(pantryNames.flatMap(tokenize))];
+        if (!tokens.length) {
+          return withCors(NextResponse.json({ meals: [], pantryItems: pantryNames.length, backfilled: 0 }));
+        }
+
+        const index = db.collection('meal_ingredient_tokens');
+        const ownerId = scope === 'mine' ? user.userId : undefined;
+        const pending = await index.findUnindexed({ userId: ownerId, limit: COOKABLE_BACKFILL_BATCH });
+        const backfilled = pending.length ? await indexMeals(db, pending) : 0;
+
+        const postings = await index.postings(tokens, { userId: ownerId });
+        const lineCounts = new Map(postings.map((p) => [p.mealId, p.lineCount]));
+        const ranked = rankByCoverage(coveredLines(pantryNames, postings), lineCounts, { minCoverage, limit });
+
+        const found = ranked.length ? await db.collection('meals').find({ ids: ranked.map((r) => r.mealId) }) : [];
+        const byId = new Map(found.map((meal) => [meal.id, meal]));
+        const meals = ranked.filter((r) => byId.has(r.mealId)).map((r) => {
+          const meal = byId.get(r.mealId);
+          const covered = new Set(r.coveredLines);
+          return {
+            ...meal,
+            coverage: Math.round(r.coverage * 1000) / 1000,
+            coveredLines: r.coveredLines.length,
+            totalLines: r.total,
+            missingIngredients: ingredientLines(meal.ingredients).filter((_, i) => !covered.has(i)),
+            isOwn: meal.userId === user.userId,
+          };
+        });
+
+        return withCors(NextResponse.json({ meals, pantryItems: pantryNames.length, backfilled }));
+      } catch (error) {
+        console.error('Error ranking cookable meals:', error);
+        return withCors(NextResponse.json({
+          error: 'Failed to find cookable meals',
+          details: error.message
+        }, { status: 500 }));
+      }
+    }
+
+    // -----------------------------------------------------------------
+    // GET /api/meals/:id/ingredients — parsed ingredient lines
+    // -----------------------------------------------------------------
+    // Meals not parsed yet (pre-migration 009, awaiting backfill) are
+    // parsed on the fly so callers never see an empty list.
+    if (path.startsWith('meals/') && path.endsWith('/ingredients') && path.split('/').length === 3) {
+      const mealId = path.split('/')[1];
+      const meal = await db.collection('meals').findOne({ id: mealId });
+      if (!meal) {
+        return withCors(NextResponse.json({ error: 'Meal not found' }, { status: 404 }));
+      }
+      const stored = await db.collection('meal_ingredients')
+        .findByMealIds([mealId])
+        .catch((err) => {
+          console.warn('[meal_ingredients] read failed, parsing inline:', err?.message || err);
+          return [];
+        });
+      const ingredients = stored.length
+        ? stored
+        : parseIngredients(meal.ingredients).map((row) => ({ mealId, ...row }));
+      return withCors(NextResponse.json({ mealId, parsed: stored.length > 0, ingredients }));
+    }
+
     if (path.startsWith('meals/') && path.split('/').length === 2) {
       const mealId = path.split('/')[1];
+      // findOne embeds the owner (id, username) in the same request.
       const meal = await db.collection('meals').findOne({ id: mealId });
       
       if (!meal) {
         return withCors(NextResponse.json({ error: 'Meal not found' }, { status: 404 }));
       }
 
-      // Get user info
-      const userData = await db.collection('users').findOne(
-        { id: meal.userId },
-        { projection: { id: 1, username: 1 } }
-      );
-
-      const mealWithUser = {
+      return withCors(NextResponse.json({
         ...meal,
-        user: userData || { username: 'Unknown User' }
-      };
-
-      return withCors(NextResponse.json(mealWithUser));
+        user: meal.user || { username: 'Unknown User' }
+      }));
     }
 
     // -----------------------------------------------------------------
     // Kitchen: GET /api/pantry \u2014 list all pantry items for the user
     // -----------------------------------------------------------------
+    //   ?fresh=true  — drop expired items (no expiry counts as fresh)
+    //   ?fields=name — return [{ name }] only
     if (path === 'pantry') {
       const user = getUserFromToken(request);
       if (!user) {
         return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
       }
-      const items = await db.collection('pantry_items').find({ userId: user.userId });
+      const url = new URL(request.url);
+      const query = { userId: user.userId };
+      if (url.searchParams.get('fresh') === 'true') query.freshOn = todayIso();
+      const fields = url.searchParams.get('fields') === 'name' ? ['name'] : undefined;
+      const items = await db.collection('pantry_items').find(query, { fields });
       return withCors(NextResponse.json(items));
     }
 
+    // -----------------------------------------------------------------
+    // Kitchen: GET /api/pantry/expiring?within=<days>
+    // -----------------------------------------------------------------
+    // Items expiring between today and today + within (inclusive),
+    // soonest first. Default 3 days, max 60. Served by the
+    // (user_id, expires_at) index from migration 007.
+    if (path === 'pantry/expiring') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      const raw = new URL(request.url).searchParams.get('within');
+      const within = raw === null ? EXPIRING_DEFAULT_DAYS : Number(raw);
+      if (!Number.isInteger(within) || within < 0 || within > 60) {
+        return withCors(NextResponse.json({ error: 'within must be an integer between 0 and 60' }, { status: 400 }));
+      }
+      const today = todayIso();
+      const items = await db.collection('pantry_items').find({
+        userId: user.userId,
+        expiresBetween: { from: today, to: addDaysIso(today, within) },
+      });
+      return withCors(NextResponse.json(items));
+    }
+
+    // -----------------------------------------------------------------
+    // Kitchen: GET /api/pantry/expiring/summary
+    // -----------------------------------------------------------------
+    // The nightly "use soon" digest (refresh_pantry_expiring_summary()
+    // in migrations 007 and 013). Every user with pantry items has a row,
+    // zero counts included. If tonight's run hasn't happened — or pg_cron
+    // isn't installed, or the pantry was empty last night — answer from
+    // two indexed live queries instead and flag it with `live: true`.
+    if (path === 'pantry/expiring/summary') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      const today = todayIso();
+      try {
+        const summary = await db.collection('pantry_expiring_summary').findByUser(user.userId);
+        if (summary && summary.computedOn === today) {
+          return withCors(NextResponse.json({ ...summary, live: false }));
+        }
+      } catch (summaryErr) {
+        console.warn('[pantry] summary read failed; computing live:', summaryErr?.message);
+      }
+      const [expiring, expired] = await Promise.all([
+        db.collection('pantry_items').find({
+          userId: user.userId,
+          expiresBetween: { from: today, to: addDaysIso(today, EXPIRING_DEFAULT_DAYS) },
+        }),
+        db.collection('pantry_items').find({
+          userId: user.userId,
+          expiresBetween: { from: '0001-01-01', to: addDaysIso(today, -1) },
+        }, { fields: ['name'] }),
+      ]);
+      return withCors(NextResponse.json({
+        userId: user.userId,
+        computedOn: today,
+        windowDays: EXPIRING_DEFAULT_DAYS,
+        expiringCount: expiring.length,
+        expiredCount: expired.length,
+        items: expiring.slice(0, 20).map(({ id, name, expiresAt }) => ({ id, name, expiresAt })),
+        live: true,
+      }));
+    }
+
     // -----------------------------------------------------------------
     // Kitchen: GET /api/shopping-list \u2014 list all shopping list items
     // -----------------------------------------------------------------
@@ -217,6 +863,89 @@ export async function GET(request, { params }) {
       return withCors(NextResponse.json(items));
     }
 
+    // -----------------------------------------------------------------
+    // GET /api/meal-suggestions/stats — LLM limiter + cache metrics
+    // -----------------------------------------------------------------
+    if (path === 'meal-suggestions/stats') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      return withCors(NextResponse.json({
+        limiter: llmLimiter.stats(),
+        cache: suggestionCache.stats(),
+      }));
+    }
+
+    // -----------------------------------------------------------------
+    // GET /api/auth/stats — password worker pool metrics
+    // -----------------------------------------------------------------
+    if (path === 'auth/stats') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      return withCors(NextResponse.json({ passwordPool: passwordPool.stats() }));
+    }
+
+    // -----------------------------------------------------------------
+    // GET /api/export — the caller's data as streamed NDJSON
+    // -----------------------------------------------------------------
+    // Format and paging: lib/user-data.js. POST /api/import reads it back.
+    if (path === 'export') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      const { limited, headers } = await rateLimit(request, 'export', user);
+      if (limited) return withCors(limited);
+      return withCors(withRateLimit(exportResponse(db, user.userId), headers));
+    }
+
+    // -----------------------------------------------------------------
+    // GET /api/cache/stats — per-user collection cache metrics
+    // -----------------------------------------------------------------
+    if (path === 'cache/stats') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      return withCors(NextResponse.json(collectionCache.stats()));
+    }
+
+    // -----------------------------------------------------------------
+    // GET /api/debug/runtime — memory, heap and event-loop lag
+    // GET /api/debug/heap-snapshot — V8 heap snapshot (slow, large)
+    // -----------------------------------------------------------------
+    // For tests/bench_soak.py; 404 unless DEBUG_RUNTIME=1 and
+    // DEBUG_RUNTIME_TOKEN are set, see lib/runtime-stats.js. Operator
+    // only: callers send that token in X-Debug-Token; a user JWT isn't
+    // enough, since anyone can sign up. `?gc=1` collects first (needs
+    // --expose-gc). `state` sizes the module-level structures that
+    // could grow.
+    if (path === 'debug/runtime' || path === 'debug/heap-snapshot') {
+      if (!runtimeStatsEnabled()) {
+        return withCors(NextResponse.json({ error: 'Not found' }, { status: 404 }));
+      }
+      if (!operatorAuthorized(request)) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      if (path === 'debug/heap-snapshot') {
+        return withCors(heapSnapshotResponse());
+      }
+      return withCors(NextResponse.json({
+        ...runtimeSnapshot({ gc: url.searchParams.get('gc') === '1' }),
+        state: {
+          collectionCacheEntries: collectionCache.stats().size ?? null,
+          suggestionCacheEntries: suggestionCache.stats().size,
+          rateLimitKeys: rateLimiter.store.buckets?.size ?? null,
+          llmQueuedUsers: llmLimiter.stats().queuedUsers,
+          passwordQueueDepth: passwordPool.stats().queueDepth,
+          imageRecordFailures: imageUploadStats().recordFailures,
+        },
+      }));
+    }
+
     // -----------------------------------------------------------------
     // Kitchen: GET /api/barcode-lookup?code=<barcode>
     // -----------------------------------------------------------------
@@ -228,14 +957,19 @@ export async function GET(request, { params }) {
     // Debugging: if this returns found:false but the product genuinely
     // exists, call GET /api/barcode-diagnose?code=<code> to see per-
     // source verdicts. See docs/operations/debugging.md for a runbook.
+    //
+    // Rate limited per user and per IP (lib/rate-limit.js) before the
+    // code is validated, so malformed spam costs tokens too.
     if (path === 'barcode-lookup') {
       const user = getUserFromToken(request);
       if (!user) {
         return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
       }
+      const limit = await rateLimit(request, 'barcode-lookup', user);
+      if (limit.limited) return withCors(limit.limited);
       const rawCode = url.searchParams.get('code');
       if (!rawCode || !/^\d{6,14}$/.test(rawCode)) {
-        return withCors(NextResponse.json({ error: 'Invalid barcode' }, { status: 400 }));
+        return withCors(withRateLimit(NextResponse.json({ error: 'Invalid barcode' }, { status: 400 }), limit.headers));
       }
       // ?bypassCache=1 forces a cold upstream lookup, bypassing (and
       // NOT writing back to) the Supabase barcode_cache. Useful when a
@@ -245,7 +979,7 @@ export async function GET(request, { params }) {
       const bypassCache = url.searchParams.get('bypassCache') === '1';
       console.log(`[barcode] lookup ${rawCode}${bypassCache ? ' (bypassCache)' : ''}`);
       const result = await runLookupChain(rawCode, { bypassCache });
-      return withCors(NextResponse.json(result));
+      return withCors(withRateLimit(NextResponse.json(result), limit.headers));
     }
 
     // -----------------------------------------------------------------
@@ -270,13 +1004,15 @@ export async function GET(request, { params }) {
       if (!user) {
         return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
       }
+      const limit = await rateLimit(request, 'barcode-diagnose', user);
+      if (limit.limited) return withCors(limit.limited);
       const rawCode = url.searchParams.get('code');
       if (!rawCode || !/^\d{6,14}$/.test(rawCode)) {
-        return withCors(NextResponse.json({ error: 'Invalid barcode' }, { status: 400 }));
+        return withCors(withRateLimit(NextResponse.json({ error: 'Invalid barcode' }, { status: 400 }), limit.headers));
       }
       console.log(`[barcode] diagnose ${rawCode}`);
       const result = await runDiagnosis(rawCode);
-      return withCors(NextResponse.json(result));
+      return withCors(withRateLimit(NextResponse.json(result), limit.headers));
     }
 
     return withCors(NextResponse.json({ error: 'Not found' }, { status: 404 }));
@@ -287,7 +1023,7 @@ export async function GET(request, { params }) {
   }
 }
 
-export async function POST(request, { params }) {
+async function handlePost(request, { params }) {
   try {
     const { db } = await connectToDatabase();
     const path = params.path?.join('/') || '';
@@ -310,7 +1046,14 @@ export async function POST(request, { params }) {
       }
 
       // Create user - fix the date field name to match Supabase schema
-      const hashedPassword = await hashPassword(password);
+      let hashedPassword;
+      try {
+        hashedPassword = await hashPassword(password);
+      } catch (error) {
+        const busy = passwordPoolErrorResponse(error);
+        if (busy) return withCors(busy);
+        throw error;
+      }
       const userId = uuidv4();
       
       const user = {
@@ -335,6 +1078,36 @@ export async function POST(request, { params }) {
       }));
     }
 
+    // -----------------------------------------------------------------
+    // POST /api/import — load an NDJSON export into the caller's account
+    // -----------------------------------------------------------------
+    // The body is read as a stream (never buffered whole) and written in
+    // batched multi-row inserts. Existing ids are skipped, so a failed
+    // import can be re-run. 400 names the first bad line; the batches
+    // before it are already written.
+    if (path === 'import') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      const { limited, headers } = await rateLimit(request, 'import', user);
+      if (limited) return withCors(limited);
+      if (!request.body) {
+        return withCors(withRateLimit(NextResponse.json({ error: 'Empty import' }, { status: 400 }), headers));
+      }
+      try {
+        const result = await importNdjson(db, user.userId, request.body);
+        return withCors(withRateLimit(NextResponse.json(result), headers));
+      } catch (error) {
+        if (!(error instanceof ImportError)) throw error;
+        return withCors(withRateLimit(NextResponse.json({
+          error: error.message,
+          line: error.line,
+          ...error.result,
+        }, { status: 400 }), headers));
+      }
+    }
+
     if (path === 'auth/login') {
       const { username, password } = await request.json();
       
@@ -349,10 +1122,18 @@ export async function POST(request, { params }) {
       }
 
       // Verify password
-      const isValidPassword = await verifyPassword(password, user.password);
+      let isValidPassword;
+      try {
+        isValidPassword = await verifyPassword(password, user.password);
+      } catch (error) {
+        const busy = passwordPoolErrorResponse(error);
+        if (busy) return withCors(busy);
+        throw error;
+      }
       if (!isValidPassword) {
         return withCors(NextResponse.json({ error: 'Invalid credentials' }, { status: 401 }));
       }
+      rehashPassword(db, user, password);
 
       // Generate token
       const token = generateToken(user.id, user.username);
@@ -382,7 +1163,7 @@ export async function POST(request, { params }) {
         }, { status: 400 }));
       }
 
-      const { title, ingredients, instructions, imageUrl } = requestData;
+      const { title, ingredients, instructions, imageUrl, imageMeta } = requestData;
       
       // More detailed validation with specific error messages
       const errors = [];
@@ -411,12 +1192,14 @@ export async function POST(request, { params }) {
         ingredients: ingredients.trim(),
         instructions: instructions.trim(),
         imageUrl: imageUrl || null,
+        ...(imageUrl ? pickImageMeta(imageMeta) : {}),
         createdAt: new Date(),
         updatedAt: new Date(),
       };
 
       try {
         await db.collection('meals').insertOne(meal);
+        await Promise.all([indexMeals(db, [meal]), parseMealIngredients(db, [meal])]);
         return withCors(NextResponse.json(meal));
       } catch (dbError) {
         console.error('Database error:', dbError);
@@ -426,6 +1209,59 @@ export async function POST(request, { params }) {
       }
     }
 
+    // -----------------------------------------------------------------
+    // POST /api/meal-ingredients/backfill — parse meals saved before
+    // migration 009 (or by an older parser) into meal_ingredients
+    // -----------------------------------------------------------------
+    // Body: { limit?: 1..1000 (default 200), scope?: 'mine' | 'all' }
+    // One batch per call, oldest meals first; call again until
+    // `remaining` is 0. Idempotent — rows are derived from
+    // meals.ingredients. 'mine' is open to any logged-in user and rate
+    // limited. 'all' parses every account's meals, so it is operator
+    // only: X-Debug-Token must match DEBUG_RUNTIME_TOKEN (see
+    // lib/runtime-stats.js), and those calls skip the limiter so the
+    // shell loop in docs/operations/database-schema.md can run through.
+    if (path === 'meal-ingredients/backfill') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      const operator = operatorAuthorized(request);
+      let limitHeaders = {};
+      if (!operator) {
+        const limited = await rateLimit(request, 'meal-ingredients/backfill', user);
+        if (limited.limited) return withCors(limited.limited);
+        limitHeaders = limited.headers;
+      }
+      let body = {};
+      try { body = await request.json(); }
+      catch { /* empty body → defaults */ }
+
+      const limit = body.limit === undefined ? BACKFILL_DEFAULT_LIMIT : Number(body.limit);
+      const scope = body.scope || 'mine';
+      if (!Number.isInteger(limit) || limit < 1 || limit > BACKFILL_MAX_LIMIT) {
+        return withCors(withRateLimit(NextResponse.json({ error: `limit must be an integer between 1 and ${BACKFILL_MAX_LIMIT}` }, { status: 400 }), limitHeaders));
+      }
+      if (!['mine', 'all'].includes(scope)) {
+        return withCors(withRateLimit(NextResponse.json({ error: 'scope must be "mine" or "all"' }, { status: 400 }), limitHeaders));
+      }
+      if (scope === 'all' && !operator) {
+        return withCors(withRateLimit(NextResponse.json({ error: 'scope "all" needs the operator token' }, { status: 403 }), limitHeaders));
+      }
+
+      const { meals, count } = await db.collection('meal_ingredients').findStale(PARSER_VERSION, {
+        userId: scope === 'mine' ? user.userId : undefined,
+        limit,
+      });
+      const parsed = meals.length ? await parseMealIngredients(db, meals) : 0;
+      return withCors(withRateLimit(NextResponse.json({
+        parsed,
+        failed: meals.length - parsed,
+        remaining: Math.max(0, count - parsed),
+        version: PARSER_VERSION,
+      }), limitHeaders));
+    }
+
     if (path === 'meal-plans') {
       const user = getUserFromToken(request);
       if (!user) {
@@ -459,60 +1295,102 @@ export async function POST(request, { params }) {
       }
     }
 
+    // -----------------------------------------------------------------
+    // POST /api/meal-plans/bulk — copy a week, apply a template, clear
+    // -----------------------------------------------------------------
+    // Body, one of:
+    //   { op: 'copy-week', source: { start, end? }, target: { start }, onConflict? }
+    //       end defaults to start + 6; the range is shifted to target.start
+    //   { op: 'apply-template', start, slots: [{ day, mealType, mealId }], onConflict? }
+    //       day is an offset from start (0 = start)
+    //   { op: 'clear-range', start, end, mealTypes? }
+    // onConflict: 'skip' (default) keeps slots already planned,
+    // 'replace' overwrites them. Each op is one set-based write on
+    // meal_plans (copy-week reads the source first). The response holds
+    // the target range's plans, same shape as GET /api/meal-plans:
+    //   { op, written | deleted, week: { start, end, plans } }
+    if (path === 'meal-plans/bulk') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      let body;
+      try { body = await request.json(); }
+      catch { return withCors(NextResponse.json({ error: 'Invalid JSON' }, { status: 400 })); }
+
+      const parsed = parseBulkPlanOp(body);
+      if (parsed.error) {
+        return withCors(NextResponse.json({ error: parsed.error }, { status: 400 }));
+      }
+
+      const plans = db.collection('meal_plans');
+      let result;
+      try {
+        if (parsed.op === 'copy-week') {
+          const source = await plans.find({
+            userId: user.userId,
+            dateRange: { start: parsed.source.start, end: parsed.source.end },
+          });
+          const slots = source.map((plan) => ({
+            date: addDaysIso(plan.date, parsed.offset),
+            mealType: plan.mealType,
+            mealId: plan.mealId,
+          }));
+          const { writtenCount } = await plans.upsertMany(user.userId, slots, { replace: parsed.replace });
+          result = { written: writtenCount, skipped: slots.length - writtenCount };
+        } else if (parsed.op === 'apply-template') {
+          const { writtenCount } = await plans.upsertMany(user.userId, parsed.slots, { replace: parsed.replace });
+          result = { written: writtenCount, skipped: parsed.slots.length - writtenCount };
+        } else {
+          const { deletedCount } = await plans.deleteRange(user.userId, { ...parsed.range, mealTypes: parsed.mealTypes });
+          result = { deleted: deletedCount };
+        }
+      } catch (error) {
+        // 23503: meal_id doesn't exist; 22P02: not a UUID.
+        if (error?.code === '23503' || error?.code === '22P02') {
+          return withCors(NextResponse.json({ error: 'Unknown meal in slots' }, { status: 400 }));
+        }
+        throw error;
+      }
+
+      const week = await plans.find({ userId: user.userId, dateRange: parsed.range });
+      return withCors(NextResponse.json({
+        op: parsed.op,
+        ...result,
+        week: { ...parsed.range, plans: week.map((plan) => ({ ...plan, isOwn: true })) },
+      }));
+    }
+
     if (path === 'upload') {
       const user = getUserFromToken(request);
       if (!user) {
         return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
       }
+      const limit = await rateLimit(request, 'upload', user);
+      if (limit.limited) return withCors(limit.limited);
 
       const formData = await request.formData();
       const file = formData.get('file');
       
       if (!file) {
-        return withCors(NextResponse.json({ error: 'No file provided' }, { status: 400 }));
+        return withCors(withRateLimit(NextResponse.json({ error: 'No file provided' }, { status: 400 }), limit.headers));
       }
 
       // Validate file size (max 10MB)
       if (file.size > 10 * 1024 * 1024) {
-        return withCors(NextResponse.json({ error: 'File size exceeds 10MB limit' }, { status: 400 }));
+        return withCors(withRateLimit(NextResponse.json({ error: 'File size exceeds 10MB limit' }, { status: 400 }), limit.headers));
       }
 
       // Validate file type
       if (!file.type.includes('image')) {
-        return withCors(NextResponse.json({ error: 'Only image files are allowed' }, { status: 400 }));
-      }
-
-      // Convert file to buffer
-      const bytes = await file.arrayBuffer();
-      const buffer = Buffer.from(bytes);
-
-      // Convert buffer to base64
-      const fileStr = buffer.toString('base64');
-      const fileUri = `data:${file.type};base64,${fileStr}`;
-
-      // Upload to Cloudinary
-      const uploadResult = await new Promise((resolve, reject) => {
-        cloudinary.uploader.upload(
-          fileUri,
-          {
-            folder: 'forkcast/meals',
-            resource_type: 'image',
-            quality: 'auto:eco',
-            public_id: `meal-${user.userId}-${Date.now()}`,
-          },
-          (error, result) => {
-            if (error) reject(error);
-            else resolve(result);
-          }
-        );
-      });
+        return withCors(withRateLimit(NextResponse.json({ error: 'Only image files are allowed' }, { status: 400 }), limit.headers));
+      }
 
-      return withCors(NextResponse.json({
-        url: uploadResult.secure_url,
-        publicId: uploadResult.public_id,
-        width: uploadResult.width,
-        height: uploadResult.height
-      }));
+      // Hash-while-reading, reuse an earlier identical upload, and
+      // collapse concurrent duplicates — see lib/image-upload.js.
+      const asset = await storeMealImage({ userId: user.userId, file });
+
+      return withCors(withRateLimit(NextResponse.json(asset), limit.headers));
     }
 
     if (path === 'meal-suggestions') {
@@ -520,21 +1398,27 @@ export async function POST(request, { params }) {
       if (!user) {
         return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
       }
+      const limit = await rateLimit(request, 'meal-suggestions', user);
+      if (limit.limited) return withCors(limit.limited);
 
       try {
-        const { prompt, ingredients, dietary, cuisine, mealType, usePantry } = await request.json();
+        const { prompt, ingredients, dietary, cuisine, mealType, usePantry, stream } = await request.json();
+        // Streaming is opt-in: `stream: true` in the body or an SSE Accept
+        // header. Everything else gets the original JSON response.
+        const wantsStream = stream === true
+          || (request.headers.get('accept') || '').includes('text/event-stream');
         
         if (!prompt || prompt.trim().length === 0) {
-          return withCors(NextResponse.json({ 
+          return withCors(withRateLimit(NextResponse.json({ 
             error: 'Please describe what kind of meal you\'re looking for' 
-          }, { status: 400 }));
+          }, { status: 400 }), limit.headers));
         }
 
         const apiKey = process.env.EMERGENT_LLM_KEY;
         if (!apiKey) {
-          return withCors(NextResponse.json({ 
+          return withCors(withRateLimit(NextResponse.json({ 
             error: 'AI service is not configured' 
-          }, { status: 500 }));
+          }, { status: 500 }), limit.headers));
         }
 
         // Kitchen integration: when usePantry is true, fold pantry
@@ -543,10 +1427,9 @@ export async function POST(request, { params }) {
         let mergedIngredients = Array.isArray(ingredients) ? [...ingredients] : [];
         if (usePantry) {
           try {
-            const pantry = await db.collection('pantry_items').find({ userId: user.userId });
-            const today = new Date().toISOString().slice(0, 10);
-            const fresh = pantry.filter(
-              (p) => !p.expiresAt || p.expiresAt >= today
+            const fresh = await db.collection('pantry_items').find(
+              { userId: user.userId, freshOn: todayIso() },
+              { fields: ['name'] }
             );
             mergedIngredients = Array.from(new Set([
               ...mergedIngredients,
@@ -558,20 +1441,33 @@ export async function POST(request, { params }) {
           }
         }
 
-        const mealService = new MealSuggestionService(apiKey);
-        const suggestions = await mealService.getMealSuggestions(prompt, {
-          ingredients: mergedIngredients,
-          dietary,
-          cuisine,
-          mealType
-        });
+        const options = { ingredients: mergedIngredients, dietary, cuisine, mealType };
+        const cacheKey = suggestionCacheKey({ prompt, ...options });
+        const cachedText = suggestionCache.get(cacheKey);
+        const mealService = getMealSuggestionService(apiKey);
 
-        return withCors(NextResponse.json({ suggestions }));
+        if (wantsStream) {
+          const chunks = cachedText !== null
+            ? [cachedText]
+            : await primeStream(mealService.streamMealSuggestions(prompt, options, { userId: user.userId }));
+          return withCors(withRateLimit(suggestionStream(chunks, { cacheKey, cached: cachedText !== null }), limit.headers));
+        }
+
+        if (cachedText !== null) {
+          return withCors(withRateLimit(NextResponse.json({ suggestions: cachedText, cached: true }), limit.headers));
+        }
+
+        const suggestions = await mealService.getMealSuggestions(prompt, options, { userId: user.userId });
+        suggestionCache.set(cacheKey, suggestions);
+
+        return withCors(withRateLimit(NextResponse.json({ suggestions, cached: false }), limit.headers));
       } catch (error) {
+        const busy = limiterErrorResponse(error);
+        if (busy) return withCors(withRateLimit(busy, limit.headers));
         console.error('Meal suggestion error:', error);
-        return withCors(NextResponse.json({ 
+        return withCors(withRateLimit(NextResponse.json({ 
           error: 'Failed to generate meal suggestions. Please try again.' 
-        }, { status: 500 }));
+        }, { status: 500 }), limit.headers));
       }
     }
 
@@ -611,6 +1507,20 @@ export async function POST(request, { params }) {
       return withCors(NextResponse.json(item));
     }
 
+    // -----------------------------------------------------------------
+    // Kitchen: POST /api/pantry/scan — find the pantry item to restock
+    // -----------------------------------------------------------------
+    // Body: { code, name? }. Barcode match, else ranked name match
+    // (resolveScan above). The client bumps the quantity of `match.item`
+    // or, with no match, adds `name` as a new item.
+    if (path === 'pantry/scan') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      return withCors(await resolveScan(db, request, user, 'pantry_items'));
+    }
+
     // -----------------------------------------------------------------
     // Kitchen: POST /api/shopping-list \u2014 add manual shopping list item
     // -----------------------------------------------------------------
@@ -642,14 +1552,29 @@ export async function POST(request, { params }) {
       return withCors(NextResponse.json(item));
     }
 
+    // -----------------------------------------------------------------
+    // Kitchen: POST /api/shopping-list/scan — find the item a scan ticks off
+    // -----------------------------------------------------------------
+    // Body: { code, name? }. Unchecked items only: barcode match, else
+    // ranked name match (resolveScan above). The client ticks off
+    // `match.item` or, with no match, adds `name` with the barcode.
+    if (path === 'shopping-list/scan') {
+      const user = getUserFromToken(request);
+      if (!user) {
+        return withCors(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }));
+      }
+      return withCors(await resolveScan(db, request, user, 'shopping_list_items'));
+    }
+
     // -----------------------------------------------------------------
     // Kitchen: POST /api/shopping-list/generate \u2014 build shopping list
     // from the week's planned meals.
     // -----------------------------------------------------------------
     // Body: { startDate, endDate }  (ISO YYYY-MM-DD)
     // Aggregates every ingredient across all meal_plans in the range
-    // whose meal belongs to this user. Duplicates (case-insensitive) are
-    // de-duped and existing shopping list items are preserved.
+    // whose meal belongs to this user. Lines with the same canonical
+    // name are merged with their quantities summed, and existing
+    // shopping list items are preserved.
     if (path === 'shopping-list/generate') {
       const user = getUserFromToken(request);
       if (!user) {
@@ -671,23 +1596,42 @@ export async function POST(request, { params }) {
         dateRange: { start: startDate, end: endDate },
       });
 
-      // Aggregate ingredients across every planned meal in the range.
-      const nameToSource = {};
+      // Aggregate ingredients across every planned meal in the range,
+      // from the rows parsed at save time. A meal planned twice counts
+      // twice; meals not parsed yet (awaiting backfill) are parsed here.
+      const timesPlanned = new Map();
       for (const plan of plans) {
         if (!plan?.meal?.ingredients) continue;
-        const lines = String(plan.meal.ingredients)
-          .split('\n')
-          .map((l) => l.trim())
-          .filter(Boolean);
-        for (const line of lines) {
-          const key = line.toLowerCase();
-          if (!(key in nameToSource)) nameToSource[key] = { name: line, sourceMealId: plan.meal.id };
-        }
+        const entry = timesPlanned.get(plan.meal.id) || { meal: plan.meal, times: 0 };
+        entry.times += 1;
+        timesPlanned.set(plan.meal.id, entry);
+      }
+      const stored = await db.collection('meal_ingredients')
+        .findByMealIds([...timesPlanned.keys()])
+        .catch((err) => {
+          console.warn('[meal_ingredients] read failed, parsing inline:', err?.message || err);
+          return [];
+        });
+      const rowsByMeal = new Map();
+      for (const row of stored) rowsByMeal.set(row.mealId, [...(rowsByMeal.get(row.mealId) || []), row]);
+
+      const rows = [];
+      for (const [mealId, { meal, times }] of timesPlanned) {
+        const mealRows = rowsByMeal.get(mealId)
+          || parseIngredients(meal.ingredients).map((row) => ({ mealId, ...row }));
+        for (let i = 0; i < times; i++) rows.push(...mealRows);
       }
 
-      const uniqueNames = Object.values(nameToSource).map((n) => n.name);
+      // Dedupe on canonical name, including against what's already on
+      // the list, so "400g spaghetti" and "200 g Spaghetti" are one line
+      // ("spaghetti (600 g)") and re-generating adds nothing new.
+      const existing = await db.collection('shopping_list_items').find({ userId: user.userId });
+      const onList = new Set(existing.map((item) => parseIngredientLine(item.name).name));
+      const groups = aggregateIngredients(rows).filter((group) => !onList.has(group.name));
+
+      const uniqueNames = groups.map((group) => group.label);
       const sourceMap = {};
-      for (const v of Object.values(nameToSource)) sourceMap[v.name] = v.sourceMealId;
+      for (const group of groups) sourceMap[group.label] = group.mealIds[0];
 
       const { inserted } = await db.collection('shopping_list_items').insertMany(
         user.userId, uniqueNames, sourceMap
@@ -719,7 +1663,7 @@ export async function POST(request, { params }) {
   }
 }
 
-export async function PUT(request, { params }) {
+async function handlePut(request, { params }) {
   try {
     const { db } = await connectToDatabase();
     const path = params.path?.join('/') || '';
@@ -731,50 +1675,48 @@ export async function PUT(request, { params }) {
 
     if (path.startsWith('meals/') && path.split('/').length === 2) {
       const mealId = path.split('/')[1];
-      const { title, ingredients, instructions, imageUrl } = await request.json();
-      
-      console.log(`DEBUG PUT: mealId=${mealId}, userId=${user.userId}`);
-      
-      // Check if meal exists and belongs to user
-      const existingMeal = await db.collection('meals').findOne({ 
-        id: mealId, 
-        userId: user.userId 
-      });
-      
-      console.log(`DEBUG PUT: existingMeal found=${!!existingMeal}`);
-      if (existingMeal) {
-        console.log(`DEBUG PUT: existingMeal.id=${existingMeal.id}, existingMeal.userId=${existingMeal.userId}`);
-      }
-      
-      if (!existingMeal) {
-        return withCors(NextResponse.json({ error: 'Meal not found or unauthorized' }, { status: 404 }));
-      }
+      const { title, ingredients, instructions, imageUrl, imageMeta } = await request.json();
+
+      // The edit form sends imageUrl only when the image changed. A new
+      // image replaces all of the old one's metadata: its public ID and
+      // placeholder must not survive, or DELETE destroys the old asset
+      // and the wrong LQIP shows.
+      const imageData = imageUrl
+        ? {
+            imageUrl,
+            imagePublicId: null,
+            imagePlaceholder: null,
+            imageWidth: null,
+            imageHeight: null,
+            ...pickImageMeta(imageMeta),
+          }
+        : {};
 
-      // Update meal
+      // One owner-scoped update that returns the row: a missing meal and
+      // someone else's meal both match nothing.
       const updateData = {
         ...(title && { title }),
         ...(ingredients && { ingredients }),
         ...(instructions && { instructions }),
-        ...(imageUrl && { imageUrl }),
+        ...imageData,
         updatedAt: new Date(),
       };
 
-      console.log(`DEBUG PUT: updateData=`, updateData);
-
       const result = await db.collection('meals').updateOne(
         { id: mealId, userId: user.userId },
         { $set: updateData }
       );
 
-      console.log(`DEBUG PUT: updateOne result=`, result);
-      console.log(`DEBUG PUT: matchedCount=${result.matchedCount}, modifiedCount=${result.modifiedCount}`);
-
       if (result.matchedCount === 0) {
-        return withCors(NextResponse.json({ error: 'Meal not found' }, { status: 404 }));
+        return withCors(NextResponse.json({ error: 'Meal not found or unauthorized' }, { status: 404 }));
+      }
+
+      if (ingredients) {
+        const changed = [{ id: mealId, userId: user.userId, ingredients }];
+        await Promise.all([indexMeals(db, changed), parseMealIngredients(db, changed)]);
       }
 
-      const updatedMeal = await db.collection('meals').findOne({ id: mealId });
-      return withCors(NextResponse.json(updatedMeal));
+      return withCors(NextResponse.json(result.meal));
     }
 
     // -----------------------------------------------------------------
@@ -797,8 +1739,7 @@ export async function PUT(request, { params }) {
       if (result.matchedCount === 0) {
         return withCors(NextResponse.json({ error: 'Item not found' }, { status: 404 }));
       }
-      const updated = await db.collection('pantry_items').findOne({ id: itemId, userId: user.userId });
-      return withCors(NextResponse.json(updated));
+      return withCors(NextResponse.json(result.item));
     }
 
     // -----------------------------------------------------------------
@@ -814,8 +1755,7 @@ export async function PUT(request, { params }) {
       if (result.matchedCount === 0) {
         return withCors(NextResponse.json({ error: 'Item not found' }, { status: 404 }));
       }
-      const updated = await db.collection('shopping_list_items').findOne({ id: itemId, userId: user.userId });
-      return withCors(NextResponse.json(updated));
+      return withCors(NextResponse.json(result.item));
     }
 
     return withCors(NextResponse.json({ error: 'Not found' }, { status: 404 }));
@@ -826,7 +1766,7 @@ export async function PUT(request, { params }) {
   }
 }
 
-export async function DELETE(request, { params }) {
+async function handleDelete(request, { params }) {
   try {
     const { db } = await connectToDatabase();
     const path = params.path?.join('/') || '';
@@ -850,12 +1790,19 @@ export async function DELETE(request, { params }) {
         return withCors(NextResponse.json({ error: 'Meal not found or unauthorized' }, { status: 404 }));
       }
 
-      // Delete from Cloudinary if image exists
-      if (existingMeal.imageUrl) {
+      // Delete from Cloudinary if image exists — unless another of this
+      // user's meals points at the same (deduplicated) asset.
+      const imageShared = existingMeal.imageUrl
+        ? (await db.collection('meals').countByImageUrl(existingMeal.imageUrl, { excludeId: mealId })) > 0
+        : false;
+      if (existingMeal.imageUrl && !imageShared) {
         try {
-          // Extract public ID from Cloudinary URL
-          const publicId = existingMeal.imageUrl.split('/').pop().split('.')[0];
-          await cloudinary.uploader.destroy(`forkcast/meals/${publicId}`);
+          // Prefer the public ID recorded at upload; older meals only
+          // have the URL, so derive it from the filename.
+          const publicId = existingMeal.imagePublicId
+            || `forkcast/meals/${existingMeal.imageUrl.split('/').pop().split('.')[0]}`;
+          await cloudinary.uploader.destroy(publicId);
+          await db.collection('image_assets').removeByPublicId(user.userId, publicId);
         } catch (cloudinaryError) {
           console.warn('Failed to delete image from Cloudinary:', cloudinaryError);
         }
@@ -971,4 +1918,13 @@ export async function DELETE(request, { params }) {
     console.error('DELETE Error:', error);
     return withCors(NextResponse.json({ error: 'Internal server error' }, { status: 500 }));
   }
-}
\ No newline at end of file
+}
+
+// X-DB-Round-Trips on every response when DB_ROUND_TRIP_HEADER=1
+// (tests/bench_roundtrips.py), and request shapes recorded to
+// .traffic/ when TRAFFIC_CAPTURE=1 (lib/traffic-capture.js,
+// tests/bench_replay.py); the handlers themselves otherwise.
+export const GET = withTrafficCapture(withDbRoundTrips(handleGet));
+export const POST = withTrafficCapture(withDbRoundTrips(handlePost));
+export const PUT = withTrafficCapture(withDbRoundTrips(handlePut));
+export const DELETE = withTrafficCapture(withDbRoundTrips(handleDelete));
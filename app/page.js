@@ -27,6 +27,7 @@ import {
   Trash2,
 } from 'lucide-react';
 import { toast } from 'sonner';
+import { format, startOfWeek } from 'date-fns';
 
 import AuthForm from '@/components/AuthForm';
 import MealCard from '@/components/MealCard';
@@ -37,7 +38,8 @@ import { EmptyState } from '@/components/ui/empty-state';
 import { MealCardGrid } from '@/components/ui/meal-card-skeleton';
 import { ConfirmDialog } from '@/components/ui/confirm-dialog';
 import { ThemeToggle } from '@/components/theme-toggle';
-import { apiGet, apiPost, apiPut, apiDelete } from '@/lib/api-client';
+import { apiPost, apiPut, apiDelete } from '@/lib/api-client';
+import { useAppStore, loadBootstrap, refreshMeals, resetAppStore } from '@/lib/app-store';
 
 export default function App() {
   // ─── Auth state ─────────────────────────────────────────────────────
@@ -45,15 +47,16 @@ export default function App() {
   const [authLoading, setAuthLoading] = useState(true);
 
   // ─── Data state ─────────────────────────────────────────────────────
-  const [meals, setMeals] = useState([]);
-  const [myMeals, setMyMeals] = useState([]);
+  // Lives in lib/app-store.js, shared with the planner.
+  const meals = useAppStore((s) => s.communityMeals);
+  const myMeals = useAppStore((s) => s.myMeals);
 
   // Fine-grained request-status: 'idle' | 'loading' | 'success' | 'error'.
   // Distinguishing these unlocks: skeleton on first load, cached data +
   // subtle refresh spinner on subsequent loads, and a proper error card
   // (with a "Try again" CTA) when the fetch actually failed.
-  const [mealsStatus, setMealsStatus] = useState('idle');
-  const [mealsError, setMealsError] = useState(null);
+  const mealsStatus = useAppStore((s) => s.mealsStatus);
+  const mealsError = useAppStore((s) => s.mealsError);
 
   // UI state
   const [searchQuery, setSearchQuery] = useState('');
@@ -98,10 +101,7 @@ export default function App() {
     localStorage.removeItem('forkcast_token');
     localStorage.removeItem('forkcast_user');
     setUser(null);
-    setMeals([]);
-    setMyMeals([]);
-    setMealsStatus('idle');
-    setMealsError(null);
+    resetAppStore();
     toast.error('Your session has expired. Please log in again.');
     // Reset the debounce guard once the user has had time to see the
     // toast — otherwise re-login would leave expiredRef stuck true.
@@ -124,38 +124,25 @@ export default function App() {
   // ─── Meals loader ───────────────────────────────────────────────────
   // `isRefresh=true` means "we already have data on screen, just refetch
   // quietly" (no skeleton flash). `isRefresh=false` means "first load, show
-  // skeletons".
+  // skeletons". A first load is one GET /api/bootstrap for this week, so
+  // the planner finds its plans already in the store.
   const loadMeals = useCallback(
     async (isRefresh = false) => {
       if (!user) return;
 
-      setMealsStatus(isRefresh ? 'success' : 'loading');
-      setMealsError(null);
+      const res = isRefresh
+        ? await refreshMeals()
+        : await loadBootstrap(format(startOfWeek(new Date()), 'yyyy-MM-dd'));
 
-      const [allRes, mineRes] = await Promise.all([
-        apiGet('/api/meals'),
-        apiGet(`/api/meals?userId=${encodeURIComponent(user.id)}`),
-      ]);
-
-      // Any 401 from either call → session expired flow, stop here.
-      if (allRes.error?.code === 'SESSION_EXPIRED' || mineRes.error?.code === 'SESSION_EXPIRED') {
+      // 401 → session expired flow, stop here.
+      if (res.error?.code === 'SESSION_EXPIRED') {
         handleSessionExpired();
         return;
       }
 
-      if (!allRes.ok || !mineRes.ok) {
-        const err = allRes.error || mineRes.error;
-        setMealsStatus('error');
-        setMealsError(err);
-        // Only toast on a *refresh* failure — on first-load failure the
-        // inline error card is the primary signal, so we don't double-up.
-        if (isRefresh) toast.error(err?.message || 'Failed to refresh meals.');
-        return;
-      }
-
-      setMeals(Array.isArray(allRes.data) ? allRes.data : []);
-      setMyMeals(Array.isArray(mineRes.data) ? mineRes.data : []);
-      setMealsStatus('success');
+      // Only toast on a *refresh* failure — on first-load failure the
+      // inline error card is the primary signal, so we don't double-up.
+      if (!res.ok && isRefresh) toast.error(res.error?.message || 'Failed to refresh meals.');
     },
     [user, handleSessionExpired]
   );
@@ -174,10 +161,7 @@ export default function App() {
     localStorage.removeItem('forkcast_token');
     localStorage.removeItem('forkcast_user');
     setUser(null);
-    setMeals([]);
-    setMyMeals([]);
-    setMealsStatus('idle');
-    setMealsError(null);
+    resetAppStore();
     toast.success('Logged out successfully');
   };
 
@@ -18,6 +18,10 @@
  *   - onDetected     ({ code: string, format: string }) => void
  *   - title          e.g. "Scan into pantry", "Scan off shopping list"
  *   - allowManual    default true — show the "Type code instead" tab
+ *   - mode           'product' (EAN/UPC, default) | 'qr' — which formats
+ *                    the camera decoder looks for (see SCAN_MODES)
+ *   - onMetrics      optional (metrics) => void — frames/sec and
+ *                    time-to-first-decode from the camera pipeline
  */
 
 import { useEffect, useRef, useState } from 'react';
@@ -36,12 +40,20 @@ import { scanOnce, detectStrategy } from '@/lib/native/scanner';
 import { normalizeBarcode } from '@/lib/barcode-utils';
 import ScanConfirmDialog from '@/components/kitchen/ScanConfirmDialog';
 
+// Same dev flag as the pantry and shopping list: set
+// NEXT_PUBLIC_DEBUG_BARCODE=1 to log decode timings to the console.
+// Callers get the numbers through `onMetrics` either way.
+const DEBUG_BARCODE = typeof process !== 'undefined'
+  && process.env?.NEXT_PUBLIC_DEBUG_BARCODE === '1';
+
 export default function BarcodeScanner({
   open,
   onOpenChange,
   onDetected,
   title = 'Scan a barcode',
   allowManual = true,
+  mode = 'product',
+  onMetrics,
   // When true, show a confirm step after any scan (camera or HID)
   // so the user can verify / fix digits before we hit the API. Manual
   // typed entry skips confirm since the user already typed it.
@@ -121,8 +133,13 @@ export default function BarcodeScanner({
         const result = await scanOnce({
           videoEl: videoRef.current,
           signal: controller.signal,
+          mode,
+          onMetrics,
         });
         setBusy(false);
+        if (DEBUG_BARCODE && result?.metrics) {
+          console.log(`[scanner] ${strategy} decoded in ${result.metrics.timeToFirstDecodeMs}ms`, result.metrics);
+        }
         if (result && !cancelled()) {
           emitDetection(result.code, result.format);
         }
@@ -145,12 +162,12 @@ export default function BarcodeScanner({
       if (rafId) cancelAnimationFrame(rafId);
     };
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [open, tab, strategy]);
+  }, [open, tab, strategy, mode]);
 
   const runCapacitorScan = async () => {
     setBusy(true);
     try {
-      const result = await scanOnce();
+      const result = await scanOnce({ mode });
       if (result) {
         emitDetection(result.code, result.format);
       } else {
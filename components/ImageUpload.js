@@ -60,7 +60,12 @@ export default function ImageUpload({ onUploadComplete, existingImage = null })
       const data = await response.json();
       
       if (onUploadComplete) {
-        onUploadComplete(data.url);
+        onUploadComplete(data.url, {
+          width: data.width,
+          height: data.height,
+          publicId: data.publicId,
+          placeholder: data.placeholder || null,
+        });
       }
       
       setSelectedImage(data.url);
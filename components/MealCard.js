@@ -9,6 +9,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from
 import { ScrollArea } from '@/components/ui/scroll-area';
 import { User, Clock, ChefHat, Eye, Edit, Trash2, ChevronLeft, ChevronRight, Images, Plus, UtensilsCrossed } from 'lucide-react';
 import { formatDistanceToNow } from 'date-fns';
+import MealImage from '@/components/MealImage';
 
 export default function MealCard({ meal, currentUserId, onEdit, onDelete, onAddToMealPlan }) {
   const [showDetails, setShowDetails] = useState(false);
@@ -20,6 +21,9 @@ export default function MealCard({ meal, currentUserId, onEdit, onDelete, onAddT
     ...(meal.imageUrl ? [meal.imageUrl] : []),
     ...(meal.galleryImages || [])
   ];
+  // Only the primary photo has a placeholder captured at upload time.
+  const placeholderFor = (index) =>
+    index === 0 && meal.imageUrl ? meal.imagePlaceholder : undefined;
 
   const formatIngredients = (ingredients) => {
     if (typeof ingredients === 'string') {
@@ -52,8 +56,10 @@ export default function MealCard({ meal, currentUserId, onEdit, onDelete, onAddT
       {/* Image Section with Gallery Navigation */}
       {allImages.length > 0 ? (
         <div className="aspect-video relative overflow-hidden group">
-          <img
+          <MealImage
             src={allImages[currentImageIndex]}
+            size="card"
+            placeholder={placeholderFor(currentImageIndex)}
             alt={meal.title}
             className="w-full h-full object-cover"
           />
@@ -198,8 +204,11 @@ export default function MealCard({ meal, currentUserId, onEdit, onDelete, onAddT
                   {/* Gallery Section in Dialog */}
                   {allImages.length > 0 && (
                     <div className="space-y-4">
-                      <img
+                      <MealImage
                         src={allImages[currentImageIndex]}
+                        size="detail"
+                        eager
+                        placeholder={placeholderFor(currentImageIndex)}
                         alt={meal.title}
                         className="w-full h-64 object-cover rounded-lg"
                       />
@@ -208,9 +217,10 @@ export default function MealCard({ meal, currentUserId, onEdit, onDelete, onAddT
                       {allImages.length > 1 && (
                         <div className="flex gap-2 overflow-x-auto pb-2">
                           {allImages.map((image, index) => (
-                            <img
+                            <MealImage
                               key={index}
                               src={image}
+                              size="calendar"
                               alt={`${meal.title} ${index + 1}`}
                               className={`w-16 h-16 object-cover rounded cursor-pointer flex-shrink-0 border-2 transition-all ${
                                 index === currentImageIndex 
@@ -23,6 +23,7 @@ export default function MealForm({
     ingredients: '',
     instructions: '',
     imageUrl: null,
+    imageMeta: null,
     galleryImages: []
   });
   const [formErrors, setFormErrors] = useState({});
@@ -43,6 +44,7 @@ export default function MealForm({
             ? initialData.instructions.join('\n')
             : '',
         imageUrl: initialData.imageUrl || null,
+        imageMeta: null,
         galleryImages: initialData.galleryImages || []
       });
     } else {
@@ -51,6 +53,7 @@ export default function MealForm({
         ingredients: '',
         instructions: '',
         imageUrl: null,
+        imageMeta: null,
         galleryImages: []
       });
     }
@@ -72,10 +75,14 @@ export default function MealForm({
     }
   };
 
-  const handleImageUpload = (imageUrl) => {
+  // `meta` is the rest of the /api/upload response — width, height,
+  // publicId and the blurred placeholder — which the API stores on the
+  // meal so cards can request right-sized derivatives.
+  const handleImageUpload = (imageUrl, meta = null) => {
     setFormData({
       ...formData,
-      imageUrl
+      imageUrl,
+      imageMeta: imageUrl ? meta : null
     });
   };
 
@@ -118,6 +125,13 @@ export default function MealForm({
       return;
     }
 
+    // Editing: send the image only if it changed. The API treats any
+    // imageUrl as a new image and resets its stored metadata.
+    if (initialData && formData.imageUrl === (initialData.imageUrl || null)) {
+      const { imageUrl, imageMeta, ...rest } = formData;
+      onSubmit(rest);
+      return;
+    }
     onSubmit(formData);
   };
 
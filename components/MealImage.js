@@ -0,0 +1,38 @@
+'use client';
+
+/**
+ * components/MealImage.js
+ * -----------------------
+ * Drop-in <img> for meal photos. Picks a Cloudinary derivative sized
+ * for where it's rendered (see MEAL_IMAGE_SIZES in lib/image-url.js),
+ * lazy-loads by default, and paints the blurred placeholder captured
+ * at upload time until the real image arrives.
+ *
+ * Props:
+ *   - src          original image URL (meal.imageUrl)
+ *   - size         'card' | 'detail' | 'calendar'
+ *   - placeholder  optional data: URI (meal.imagePlaceholder)
+ *   - eager        skip lazy loading for above-the-fold images
+ *   - ...rest      forwarded to <img> (alt, className, onClick, …)
+ */
+
+import { useState } from 'react';
+import { mealImageProps } from '@/lib/image-url';
+
+export default function MealImage({ src, size = 'card', placeholder, eager = false, style, ...rest }) {
+  const [loaded, setLoaded] = useState(false);
+  const imgProps = mealImageProps(src, size, { eager });
+  const placeholderStyle = placeholder && !loaded
+    ? { backgroundImage: `url(${placeholder})`, backgroundSize: 'cover', backgroundPosition: 'center' }
+    : null;
+
+  return (
+    // eslint-disable-next-line @next/next/no-img-element
+    <img
+      {...imgProps}
+      {...rest}
+      style={{ ...placeholderStyle, ...style }}
+      onLoad={(e) => { setLoaded(true); rest.onLoad?.(e); }}
+    />
+  );
+}
@@ -6,9 +6,14 @@ import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from '@/components/ui/dialog';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
-import { Calendar, ChefHat, Plus, Utensils, Coffee, Clock, Sparkles, ChevronLeft, ChevronRight, Users, X, Share2 } from 'lucide-react';
+import { Calendar, ChefHat, Plus, Utensils, Coffee, Clock, Sparkles, ChevronLeft, ChevronRight, Users, X, Share2, AlertTriangle, Copy, Eraser } from 'lucide-react';
 import { format, startOfWeek, addDays, isSameDay, parseISO, isToday } from 'date-fns';
 import SharePlanDialog from '@/components/SharePlanDialog';
+import MealImage from '@/components/MealImage';
+import { ConfirmDialog } from '@/components/ui/confirm-dialog';
+import { toast } from 'sonner';
+import { apiGet } from '@/lib/api-client';
+import { useAppStore, getAppState, refreshMeals, loadWeek, prefetchWeek, invalidatePlans, bulkPlan, weekKey } from '@/lib/app-store';
 
 const MEAL_TYPES = [
   { value: 'breakfast', label: 'Breakfast', icon: Coffee },
@@ -16,62 +21,76 @@ const MEAL_TYPES = [
   { value: 'dinner', label: 'Dinner', icon: ChefHat },
 ];
 
+// `date-mealType` → the slot's meal, from a week's plans.
+function toPlanObject(plans) {
+  const planObject = {};
+  plans.forEach(plan => {
+    planObject[`${plan.date}-${plan.mealType}`] = {
+      id: plan.meal.id,
+      title: plan.meal.title,
+      imageUrl: plan.meal.imageUrl,
+      imagePlaceholder: plan.meal.imagePlaceholder,
+      ingredients: plan.meal.ingredients,
+      instructions: plan.meal.instructions,
+      isOwn: plan.isOwn,
+      user: plan.user,
+      planId: plan.id
+    };
+  });
+  return planObject;
+}
+
 export default function MealPlanningCalendar() {
   const [currentWeek, setCurrentWeek] = useState(() => startOfWeek(new Date()));
   const [mealPlan, setMealPlan] = useState({});
-  const [userMeals, setUserMeals] = useState([]);
-  const [allMeals, setAllMeals] = useState([]);
+  // Meal lists are shared with the app shell (lib/app-store.js).
+  const userMeals = useAppStore((s) => s.myMeals);
+  const allMeals = useAppStore((s) => s.communityMeals);
   const [showMealSelector, setShowMealSelector] = useState(false);
   const [selectedSlot, setSelectedSlot] = useState(null);
   const [aiSuggestions, setAiSuggestions] = useState('');
-  const [loadingMeals, setLoadingMeals] = useState(true);
+  const loadingMeals = useAppStore((s) => s.mealsStatus === 'idle' || s.mealsStatus === 'loading');
   const [showCommunityPlans, setShowCommunityPlans] = useState(false);
   const [draggedMeal, setDraggedMeal] = useState(null);
   const [selectedDayIndex, setSelectedDayIndex] = useState(0);
   // Kitchen: state for the "Share this plan" dialog.
   const [shareOpen, setShareOpen] = useState(false);
+  // Kitchen: nightly "use soon" pantry digest (GET /api/pantry/expiring/summary).
+  const [expiringSoon, setExpiringSoon] = useState(null);
+  // Bulk week actions (POST /api/meal-plans/bulk): 'copy' | 'clear' while running.
+  const [bulkBusy, setBulkBusy] = useState(null);
+  const [confirmClear, setConfirmClear] = useState(false);
+  // The week's plans as last loaded (lib/app-store.js); a background
+  // refetch updates them in place.
+  const weekPlans = useAppStore((s) => s.weeks[weekKey(format(currentWeek, 'yyyy-MM-dd'), showCommunityPlans)]);
+
+  useEffect(() => {
+    apiGet('/api/pantry/expiring/summary').then((res) => {
+      if (res.ok && res.data?.expiringCount > 0) setExpiringSoon(res.data);
+    });
+  }, []);
+
+  // The shell's bootstrap normally fills the meal lists before the
+  // planner mounts; only fetch them here if it hasn't.
+  useEffect(() => {
+    if (getAppState().mealsStatus === 'idle') refreshMeals();
+  }, []);
+
+  useEffect(() => {
+    setMealPlan(weekPlans ? toPlanObject(weekPlans) : {});
+  }, [weekPlans]);
 
-  // Load user's meals and meal plan data
   useEffect(() => {
-    loadUserMeals();
     loadMealPlan();
+  }, [currentWeek, showCommunityPlans]);
+
+  useEffect(() => {
     // Default the mobile day picker to today if it falls inside the current week, otherwise first day
     const todayIdx = Array.from({ length: 7 }, (_, i) => addDays(currentWeek, i))
       .findIndex((d) => isSameDay(d, new Date()));
     setSelectedDayIndex(todayIdx >= 0 ? todayIdx : 0);
   }, [currentWeek]);
 
-  const loadUserMeals = async () => {
-    try {
-      const token = localStorage.getItem('forkcast_token');
-      const user = JSON.parse(localStorage.getItem('forkcast_user') || '{}');
-      
-      // Load user's own meals
-      const userResponse = await fetch(`/api/meals?userId=${user.id}`, {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
-      
-      if (userResponse.ok) {
-        const userMealsData = await userResponse.json();
-        setUserMeals(userMealsData);
-      }
-
-      // Load all meals for community view
-      const allResponse = await fetch('/api/meals', {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
-      
-      if (allResponse.ok) {
-        const allMealsData = await allResponse.json();
-        setAllMeals(allMealsData);
-      }
-    } catch (error) {
-      console.error('Error loading meals:', error);
-    } finally {
-      setLoadingMeals(false);
-    }
-  };
-
   // Drag and drop functions
   const handleDragStart = (e, meal) => {
     setDraggedMeal(meal);
@@ -138,7 +157,7 @@ export default function MealPlanningCalendar() {
         addMealToSlot(date, mealType, newMeal);
         
         // Refresh user meals to include the new AI meal
-        loadUserMeals();
+        refreshMeals();
         
         console.log('AI meal added to collection and calendar!');
       }
@@ -173,7 +192,7 @@ export default function MealPlanningCalendar() {
       if (response.ok) {
         const newMeal = await response.json();
         // Refresh user meals
-        loadUserMeals();
+        refreshMeals();
         // Show success message or notification
         console.log('Meal copied successfully!');
       }
@@ -183,40 +202,15 @@ export default function MealPlanningCalendar() {
   };
 
   const loadMealPlan = async () => {
-    try {
-      const token = localStorage.getItem('forkcast_token');
-      const startDate = format(currentWeek, 'yyyy-MM-dd');
-      const endDate = format(addDays(currentWeek, 6), 'yyyy-MM-dd');
-      
-      const url = `/api/meal-plans?startDate=${startDate}&endDate=${endDate}${showCommunityPlans ? '&includeOthers=true' : ''}`;
-      const response = await fetch(url, {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
-      
-      if (response.ok) {
-        const plans = await response.json();
-        
-        // Convert array to object for easier lookup
-        const planObject = {};
-        plans.forEach(plan => {
-          const key = `${plan.date}-${plan.mealType}`;
-          planObject[key] = {
-            id: plan.meal.id,
-            title: plan.meal.title,
-            imageUrl: plan.meal.imageUrl,
-            ingredients: plan.meal.ingredients,
-            instructions: plan.meal.instructions,
-            isOwn: plan.isOwn,
-            user: plan.user,
-            planId: plan.id
-          };
-        });
-        
-        setMealPlan(planObject);
-      }
-    } catch (error) {
-      console.error('Error loading meal plan:', error);
+    const res = await loadWeek(format(currentWeek, 'yyyy-MM-dd'), { includeOthers: showCommunityPlans });
+    if (!res.ok) {
+      console.error('Error loading meal plan:', res.error?.message);
+      return;
     }
+    // Warm the weeks either side so the arrows render without a request.
+    [-7, 7].forEach((offset) => {
+      prefetchWeek(format(addDays(currentWeek, offset), 'yyyy-MM-dd'), { includeOthers: showCommunityPlans });
+    });
   };
 
   const weekDays = Array.from({ length: 7 }, (_, i) => addDays(currentWeek, i));
@@ -260,6 +254,9 @@ export default function MealPlanningCalendar() {
         });
         throw new Error('Failed to save meal plan');
       }
+      // Only weeks containing this day are refetched.
+      invalidatePlans([dateKey]);
+      loadMealPlan();
     } catch (error) {
       console.error('Error saving meal plan:', error);
       // Could show a toast notification here
@@ -305,6 +302,8 @@ export default function MealPlanningCalendar() {
         }
         throw new Error('Failed to remove meal plan');
       }
+      invalidatePlans([dateKey]);
+      loadMealPlan();
     } catch (error) {
       console.error('Error removing meal plan:', error);
       // Could show a toast notification here
@@ -345,6 +344,43 @@ export default function MealPlanningCalendar() {
     // loadMealPlan will be called automatically via useEffect when currentWeek changes
   };
 
+  // Fill this week's empty slots from last week's plan; slots already
+  // planned are kept.
+  const repeatLastWeek = async () => {
+    setBulkBusy('copy');
+    const res = await bulkPlan({
+      op: 'copy-week',
+      source: { start: format(addDays(currentWeek, -7), 'yyyy-MM-dd') },
+      target: { start: format(currentWeek, 'yyyy-MM-dd') },
+    });
+    setBulkBusy(null);
+    if (!res.ok) {
+      toast.error(res.error?.message || 'Could not copy last week');
+      return;
+    }
+    const { written, skipped } = res.data;
+    if (written) toast.success(`Copied ${written} meal${written === 1 ? '' : 's'} from last week`);
+    else toast.info(skipped ? 'Every slot last week planned is already filled' : 'Nothing planned last week');
+    loadMealPlan();
+  };
+
+  const clearWeek = async () => {
+    setBulkBusy('clear');
+    const res = await bulkPlan({
+      op: 'clear-range',
+      start: format(currentWeek, 'yyyy-MM-dd'),
+      end: format(addDays(currentWeek, 6), 'yyyy-MM-dd'),
+    });
+    setBulkBusy(null);
+    setConfirmClear(false);
+    if (!res.ok) {
+      toast.error(res.error?.message || 'Could not clear the week');
+      return;
+    }
+    toast.success(`Removed ${res.data.deleted} planned meal${res.data.deleted === 1 ? '' : 's'}`);
+    loadMealPlan();
+  };
+
   const getMealTypeColor = (mealType) => {
     switch (mealType) {
       case 'breakfast': return 'bg-orange-100 text-orange-800 border-orange-200 dark:bg-orange-950 dark:text-orange-300 dark:border-orange-900';
@@ -381,11 +417,28 @@ export default function MealPlanningCalendar() {
                 variant={showCommunityPlans ? "default" : "outline"}
                 onClick={() => {
                   setShowCommunityPlans(!showCommunityPlans);
-                  setTimeout(() => loadMealPlan(), 100);
                 }}
               >
                 {showCommunityPlans ? 'Hide Community' : 'Show Community'}
               </Button>
+              <Button
+                variant="outline"
+                onClick={repeatLastWeek}
+                disabled={!!bulkBusy}
+                className="flex items-center gap-2"
+              >
+                <Copy className="h-4 w-4" />
+                Repeat Last Week
+              </Button>
+              <Button
+                variant="outline"
+                onClick={() => setConfirmClear(true)}
+                disabled={!!bulkBusy}
+                className="flex items-center gap-2"
+              >
+                <Eraser className="h-4 w-4" />
+                Clear Week
+              </Button>
               <Button onClick={generateWeeklyAISuggestions} className="flex items-center gap-2">
                 <Sparkles className="h-4 w-4" />
                 AI Weekly Plan
@@ -446,13 +499,32 @@ export default function MealPlanningCalendar() {
                 size="sm"
                 onClick={() => {
                   setShowCommunityPlans(!showCommunityPlans);
-                  setTimeout(() => loadMealPlan(), 100);
                 }}
                 className="h-9 px-2.5 shrink-0"
                 aria-label="Toggle community plans"
               >
                 <Users className="h-4 w-4" />
               </Button>
+              <Button
+                variant="outline"
+                size="sm"
+                onClick={repeatLastWeek}
+                disabled={!!bulkBusy}
+                className="h-9 px-2.5 shrink-0"
+                aria-label="Repeat last week"
+              >
+                <Copy className="h-4 w-4" />
+              </Button>
+              <Button
+                variant="outline"
+                size="sm"
+                onClick={() => setConfirmClear(true)}
+                disabled={!!bulkBusy}
+                className="h-9 px-2.5 shrink-0"
+                aria-label="Clear this week"
+              >
+                <Eraser className="h-4 w-4" />
+              </Button>
               <Button
                 variant="outline"
                 size="sm"
@@ -467,6 +539,17 @@ export default function MealPlanningCalendar() {
         </CardHeader>
       </Card>
 
+      {/* Kitchen: pantry items to plan around before they go off */}
+      {expiringSoon && (
+        <div className="flex items-start gap-2 rounded-md border border-amber-200 bg-amber-50 px-3 py-2 text-sm text-amber-900 dark:border-amber-900 dark:bg-amber-950 dark:text-amber-200">
+          <AlertTriangle className="h-4 w-4 mt-0.5 shrink-0" aria-hidden="true" />
+          <span>
+            Use soon: {expiringSoon.items.map((item) => item.name).join(', ')}
+            {expiringSoon.expiringCount > expiringSoon.items.length && ` and ${expiringSoon.expiringCount - expiringSoon.items.length} more`}
+          </span>
+        </div>
+      )}
+
       {/* Mobile day picker + single-day view */}
       <div className="md:hidden space-y-3">
         {/* Horizontal day chips */}
@@ -540,8 +623,10 @@ export default function MealPlanningCalendar() {
                   {plannedMeal ? (
                     <div className="flex items-center gap-3">
                       {plannedMeal.imageUrl ? (
-                        <img
+                        <MealImage
                           src={plannedMeal.imageUrl}
+                          size="calendar"
+                          placeholder={plannedMeal.imagePlaceholder}
                           alt={plannedMeal.title}
                           className="w-16 h-16 rounded-lg object-cover shrink-0"
                         />
@@ -742,8 +827,10 @@ export default function MealPlanningCalendar() {
                           <CardContent className="p-4">
                             <div className="flex items-center gap-3">
                               {meal.imageUrl && (
-                                <img 
-                                  src={meal.imageUrl} 
+                                <MealImage
+                                  src={meal.imageUrl}
+                                  size="calendar"
+                                  placeholder={meal.imagePlaceholder}
                                   alt={meal.title}
                                   className="w-12 h-12 object-cover rounded"
                                 />
@@ -793,8 +880,10 @@ export default function MealPlanningCalendar() {
                           <CardContent className="p-4">
                             <div className="flex items-center gap-3">
                               {meal.imageUrl && (
-                                <img 
-                                  src={meal.imageUrl} 
+                                <MealImage
+                                  src={meal.imageUrl}
+                                  size="calendar"
+                                  placeholder={meal.imagePlaceholder}
                                   alt={meal.title}
                                   className="w-12 h-12 object-cover rounded"
                                 />
@@ -840,6 +929,20 @@ export default function MealPlanningCalendar() {
         </DialogContent>
       </Dialog>
 
+      <ConfirmDialog
+        open={confirmClear}
+        onOpenChange={(o) => {
+          if (!o && bulkBusy !== 'clear') setConfirmClear(false);
+        }}
+        title="Clear this week?"
+        description={`Every meal you planned for ${format(currentWeek, 'MMM d')} – ${format(addDays(currentWeek, 6), 'MMM d')} will be removed. The meals themselves stay in your collection.`}
+        confirmLabel="Clear week"
+        cancelLabel="Keep it"
+        destructive
+        loading={bulkBusy === 'clear'}
+        onConfirm={clearWeek}
+      />
+
       {/*
         Kitchen: Share Plan dialog. The payload is a compact snapshot of
         the current week \u2014 meals per (date, mealType). The receiving
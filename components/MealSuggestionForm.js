@@ -8,6 +8,38 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Sparkles, Loader2 } from 'lucide-react';
 
+/**
+ * Read a text/event-stream body from /api/meal-suggestions, calling
+ * `onText(fullTextSoFar)` after every token event. Resolves with the
+ * final text; rejects on an `error` event.
+ */
+async function readSuggestionStream(response, onText) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  let text = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const events = buffered.split('\n\n');
+    buffered = events.pop();
+    for (const raw of events) {
+      const event = /^event: (.*)$/m.exec(raw)?.[1];
+      const data = /^data: (.*)$/m.exec(raw)?.[1];
+      if (!event || !data) continue;
+      const payload = JSON.parse(data);
+      if (event === 'token') {
+        text += payload.text;
+        onText(text);
+      } else if (event === 'error') {
+        throw new Error(payload.error || 'Failed to get suggestions.');
+      }
+    }
+  }
+  return text;
+}
+
 export default function MealSuggestionForm({ onSuggestionsReceived }) {
   const [loading, setLoading] = useState(false);
   const [formData, setFormData] = useState({
@@ -40,6 +72,7 @@ export default function MealSuggestionForm({ onSuggestionsReceived }) {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          Accept: 'text/event-stream',
           Authorization: `Bearer ${token}`,
         },
         body: JSON.stringify({
@@ -48,6 +81,7 @@ export default function MealSuggestionForm({ onSuggestionsReceived }) {
           dietary: formData.dietary,
           cuisine: formData.cuisine,
           mealType: formData.mealType,
+          stream: true,
         }),
       });
 
@@ -56,10 +90,18 @@ export default function MealSuggestionForm({ onSuggestionsReceived }) {
         throw new Error(errorData.error || 'Failed to get suggestions.');
       }
 
-      const data = await response.json();
+      // Render suggestions as they stream in; the first card shows up
+      // long before the model has finished writing the last one.
+      const suggestions = await readSuggestionStream(response, (partial) => {
+        onSuggestionsReceived?.({
+          status: 'streaming',
+          suggestions: partial,
+          prompt: formData.prompt,
+        });
+      });
       onSuggestionsReceived?.({
         status: 'success',
-        suggestions: data.suggestions,
+        suggestions,
         prompt: formData.prompt,
       });
     } catch (error) {
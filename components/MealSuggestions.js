@@ -157,7 +157,8 @@ export default function MealSuggestions() {
       setParsedMeals([]);
       return;
     }
-    // success
+    // success — also used for 'streaming' partials, which re-render the
+    // cards with whatever text has arrived so far.
     setSuggestions(text || '');
     setParsedMeals(parseAISuggestions(text || ''));
     setAiStatus('success');
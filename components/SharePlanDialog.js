@@ -19,15 +19,19 @@
  *         plugin ships. See lib/native/ble.js for the shape.
  *
  *   Fallback — QR code
- *       - Always available. Encodes the plan JSON as a QR the other
- *         phone scans with its camera. Guaranteed offline transfer.
+ *       - Always available. Encodes the plan as a QR the other phone
+ *         scans with its camera. Guaranteed offline transfer.
+ *
+ * QR and BLE carry the compact binary plan format from
+ * lib/plan-codec.js (base45 text for QR, raw bytes for BLE) rather than
+ * JSON; the share sheet and "Copy JSON" stay human-readable.
  *
  * The dialog also offers a plain-text "Copy JSON" for power users, and
  * a "Receive" tab that opens the BarcodeScanner in QR mode to import a
  * plan from another device.
  */
 
-import { useMemo, useRef, useState } from 'react';
+import { useEffect, useMemo, useRef, useState } from 'react';
 import {
   Dialog,
   DialogContent,
@@ -44,6 +48,7 @@ import { QRCodeSVG } from 'qrcode.react';
 import { toast } from 'sonner';
 import BarcodeScanner from '@/components/BarcodeScanner';
 import { sharePayload } from '@/lib/native/share';
+import { encodePlan, encodePlanText, decodePlanText } from '@/lib/plan-codec';
 import {
   isBlePeerAvailable,
   canReceiveViaBle,
@@ -76,10 +81,24 @@ export default function SharePlanDialog({ open, onOpenChange, plan, onImport })
   const bleCanSend = canSendViaBle();
   const bleCanReceive = canReceiveViaBle();
 
-  // Compact JSON — QR codes have limited capacity, so we keep the
-  // payload lean. The receiving app decodes and merges.
+  // JSON for the human-facing transports (share sheet, clipboard).
   const payloadJson = useMemo(() => JSON.stringify(plan ?? {}), [plan]);
 
+  // Compact encodings for QR / BLE. Keyed on the JSON string so a new
+  // (but identical) plan object from the parent doesn't re-encode.
+  const [encoded, setEncoded] = useState(null); // { qrText, bytes }
+  useEffect(() => {
+    let cancelled = false;
+    const source = JSON.parse(payloadJson);
+    Promise.all([encodePlanText(source), encodePlan(source)])
+      .then(([qrText, bytes]) => { if (!cancelled) setEncoded({ qrText, bytes }); })
+      .catch((err) => {
+        console.error('Plan encoding failed:', err);
+        if (!cancelled) setEncoded({ qrText: payloadJson, bytes: null });
+      });
+    return () => { cancelled = true; };
+  }, [payloadJson]);
+
   const doNativeShare = async () => {
     const res = await sharePayload({
       title: 'Forkcast weekly plan',
@@ -104,7 +123,7 @@ export default function SharePlanDialog({ open, onOpenChange, plan, onImport })
     }
     try {
       setBleSendState('advertising');
-      const handle = await sendPlanViaBle(payloadJson, {
+      const handle = await sendPlanViaBle(encoded?.bytes || await encodePlan(plan ?? {}), {
         onAdvertising: () => setBleSendState('advertising'),
         onConnected:   () => setBleSendState('connected'),
         onSent:        () => {
@@ -155,13 +174,13 @@ export default function SharePlanDialog({ open, onOpenChange, plan, onImport })
   };
 
   /**
-   * Called by BarcodeScanner when a QR is decoded. The QR contains the
-   * plan JSON; we parse it and hand off to the caller-supplied import
-   * handler.
+   * Called by BarcodeScanner when a QR is decoded. The QR contains an
+   * encoded plan (or raw JSON from older builds); we decode it and hand
+   * off to the caller-supplied import handler.
    */
-  const handleImportScan = ({ code }) => {
+  const handleImportScan = async ({ code }) => {
     try {
-      const parsed = JSON.parse(code);
+      const parsed = await decodePlanText(code);
       onImport?.(parsed);
       toast.success('Plan imported');
       onOpenChange?.(false);
@@ -219,7 +238,13 @@ export default function SharePlanDialog({ open, onOpenChange, plan, onImport })
                 {transport === 'qr' ? (
                   <div className="flex flex-col items-center gap-3">
                     <div className="bg-white p-3 rounded-lg border">
-                      <QRCodeSVG value={payloadJson} size={200} includeMargin={false} />
+                      {encoded ? (
+                        <QRCodeSVG value={encoded.qrText} size={200} includeMargin={false} />
+                      ) : (
+                        <div className="h-[200px] w-[200px] flex items-center justify-center">
+                          <Loader2 className="h-6 w-6 animate-spin text-muted-foreground" />
+                        </div>
+                      )}
                     </div>
                     <p className="text-xs text-muted-foreground text-center max-w-[15rem]">
                       Point the other phone’s camera at this code.
@@ -293,6 +318,7 @@ export default function SharePlanDialog({ open, onOpenChange, plan, onImport })
         onOpenChange={setScannerOpen}
         onDetected={handleImportScan}
         title="Scan a plan QR"
+        mode="qr"
         allowManual={false}
       />
     </>
@@ -5,7 +5,9 @@
  * ----------------------------
  * Pantry sub-tab of the Kitchen feature. Shows the user's stocked
  * ingredients, lets them add / edit / delete items, and highlights
- * items that are expired or expiring within 3 days.
+ * items that are expired or expiring within 3 days. Scanning a product
+ * that's already stocked restocks it (quantity + 1) instead of adding
+ * a duplicate row.
  *
  * Data flows through /api/pantry via lib/api-client so 401 responses
  * automatically trigger the auto-logout / session-expired flow already
@@ -20,7 +22,7 @@ import { Badge } from '@/components/ui/badge';
 import { Label } from '@/components/ui/label';
 import { Trash2, ScanLine, Plus, AlertTriangle, Package } from 'lucide-react';
 import { toast } from 'sonner';
-import { apiGet, apiPost, apiDelete } from '@/lib/api-client';
+import { apiGet, apiPost, apiPut, apiDelete } from '@/lib/api-client';
 import { EmptyState } from '@/components/ui/empty-state';
 import BarcodeScanner from '@/components/BarcodeScanner';
 import UnknownBarcodeDialog from '@/components/kitchen/UnknownBarcodeDialog';
@@ -82,75 +84,95 @@ export default function Pantry() {
     setExpiresAt('');
   };
 
-  // Handler for the barcode scanner — resolution order matches
-  // ShoppingList: cache → /api/barcode-lookup → UnknownBarcodeDialog.
+  // Scanning something already in the pantry restocks it: quantity
+  // goes up by one (an item with no quantity counts as 1). Only for
+  // items counted without a unit; "500 g" + one pack is unknowable, so
+  // those get a new row as before.
+  const restock = async (item) => {
+    const quantity = (Number(item.quantity) || 1) + 1;
+    const res = await apiPut(`/api/pantry/${item.id}`, { quantity });
+    if (!res.ok) {
+      toast.error(res.error?.message || `Could not restock ${item.name}`);
+      return;
+    }
+    setItems((cur) => cur.map((i) => (i.id === item.id ? res.data : i)));
+    toast.success(`Restocked ${item.name} (${quantity}${item.unit ? ` ${item.unit}` : ''})`);
+  };
+
+  // Handler for the barcode scanner. Same resolution as ShoppingList:
+  // /api/pantry/scan matches the barcode, then the product name (from
+  // the local cache, else the server's lookup chain) against the
+  // pantry. A match is restocked, a named product is added, an unknown
+  // code opens UnknownBarcodeDialog.
   //
   // Error-handling contract (added Jul 2026):
   //   - HTTP failure (5xx / network / rate-limit) → toast.error and stop.
   //     We do NOT open UnknownBarcodeDialog on a transient failure,
   //     because that trained users to teach us wrong names (fixes the
   //     "scanner didn't recognize a well-known product" class of bug).
-  //   - Hit with brand-only (name === null) → treat brand as the name.
+  //   - Hit with brand-only (name === null) → the server uses the brand
+  //     as the name.
   const handleBarcode = async ({ code }) => {
     if (DEBUG_BARCODE) console.log('[barcode] scan received:', code);
 
-    // 1) Local cache (previous hits + user-taught mappings).
     const cached = await getCached(code);
-    if (cached?.name) {
-      if (DEBUG_BARCODE) console.log('[barcode] cache hit:', cached);
-      addItem({ name: cached.name, barcode: code });
-      return;
-    }
-    // 2) Multi-source network lookup.
-    const res = await apiGet(`/api/barcode-lookup?code=${encodeURIComponent(code)}`);
-    if (DEBUG_BARCODE) console.log('[barcode] lookup response:', res);
+    if (DEBUG_BARCODE && cached?.name) console.log('[barcode] cache hit:', cached);
+    const scan = await apiPost('/api/pantry/scan', {
+      code,
+      ...(cached?.name ? { name: cached.name } : {}),
+    });
+    if (DEBUG_BARCODE) console.log('[barcode] scan response:', scan);
 
-    // 2a) Distinguish an HTTP failure from a genuine miss — the "teach
-    //     me" dialog is only for actual misses, not transient outages.
-    //     Branch on the canonical `error.code` from api-client so each
-    //     failure mode gets a specific, actionable message.
-    //     SESSION_EXPIRED is handled by the global listener in
-    //     app/page.js (auto-logout + toast) so we return quietly here
-    //     to avoid a double-toast.
-    if (!res.ok) {
-      const code = res.error?.code;
+    // Distinguish an HTTP failure from a genuine miss — the "teach me"
+    // dialog is only for actual misses, not transient outages. Branch
+    // on the canonical `error.code` from api-client so each failure
+    // mode gets a specific, actionable message. SESSION_EXPIRED is
+    // handled by the global listener in app/page.js (auto-logout +
+    // toast) so we return quietly here to avoid a double-toast.
+    if (!scan.ok) {
+      const code = scan.error?.code;
       if (code === 'SESSION_EXPIRED') return;
       if (code === 'NETWORK_ERROR') {
-        toast.error(res.error?.message || "You're offline — the barcode lookup needs a connection.");
+        toast.error(scan.error?.message || "You're offline — the barcode lookup needs a connection.");
       } else if (code === 'SERVER_ERROR') {
         toast.error('Product database is temporarily unreachable (server error). Try again in a moment.');
-      } else if (res.status === 429) {
-        toast.error('Open Food Facts rate-limited this server. Please wait a minute and try again.');
+      } else if (code === 'RATE_LIMITED') {
+        toast.error(`Too many scans in a row. Try again in ${scan.error.retryAfter || 60} seconds.`);
       } else {
         toast.error(
-          res.error?.message
+          scan.error?.message
             || 'Product lookup service is unavailable right now. Please try again in a moment.'
         );
       }
       return;
     }
 
-    // 2b) Genuine hit? Accept name OR brand — some Open Food Facts
-    //     entries populate only one.
-    if (res.data?.found) {
-      const productName = res.data.name || res.data.brand;
-      if (productName) {
-        await setCached(code, {
-          name: productName,
-          brand: res.data.brand || null,
-          image: res.data.image || null,
-          quantity: res.data.quantity || null,
-          source: res.data.source || 'off',
-        });
-        addItem({ name: productName, barcode: code });
-        return;
-      }
-      console.warn('[barcode] hit had neither name nor brand:', res.data);
+    const { product, match, name: productName } = scan.data;
+
+    if (product?.found && productName) {
+      await setCached(code, {
+        name: productName,
+        brand: product.brand || null,
+        image: product.image || null,
+        quantity: product.quantity || null,
+        source: product.source || 'off',
+      });
+    } else if (product?.found) {
+      console.warn('[barcode] hit had neither name nor brand:', product);
+    }
+
+    if (match && !match.item.unit) {
+      await restock(items.find((i) => i.id === match.item.id) || match.item);
+      return;
+    }
+    if (productName || match) {
+      addItem({ name: productName || match.item.name, barcode: code });
+      return;
     }
 
-    // 3) Nothing found — ask the user to name it. If they Skip,
-    //    we still fall back to adding "Barcode <code>" so the scan
-    //    isn't lost.
+    // Nothing found — ask the user to name it. If they Skip,
+    // we still fall back to adding "Barcode <code>" so the scan
+    // isn't lost.
     setUnknownBarcode(code);
   };
 
@@ -309,6 +331,7 @@ function PantryRow({ item, onRemove }) {
         <p className="font-medium truncate">{item.name}</p>
         <p className="text-xs text-muted-foreground">
           {item.expiresAt ? `expires ${item.expiresAt}` : 'no expiry set'}
+          {item.quantity != null ? ` • ${item.quantity}${item.unit ? ` ${item.unit}` : ''}` : ''}
           {item.barcode ? ` • ${item.barcode}` : ''}
         </p>
       </div>
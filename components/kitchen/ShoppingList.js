@@ -9,10 +9,11 @@
  *   - "Generate from planned meals" — hits /api/shopping-list/generate
  *     which walks the week's meal_plans and aggregates ingredients.
  *   - Tick items manually or by scanning a barcode. A scanned code is
- *     resolved via /api/barcode-lookup; we then fuzzy-match the product
- *     name against unchecked list items and tick the closest one. If
- *     nothing matches, we add the product to the list so no scan is
- *     ever silently discarded.
+ *     matched on the server (/api/shopping-list/scan): same barcode
+ *     first, then the product name ranked by similarity against
+ *     unchecked items, and the best match is ticked. If nothing
+ *     matches, we add the product to the list so no scan is ever
+ *     silently discarded.
  *   - "Clear checked" removes finished items in one tap.
  *
  * Barcode failure modes (see handleBarcode for details):
@@ -125,150 +126,108 @@ export default function ShoppingList() {
   };
 
   /**
-   * Given a resolved product name (and optionally the barcode that
-   * resolved it), do the right thing on the shopping list:
+   * Handle a barcode scan while shopping. One request to
+   * /api/shopping-list/scan resolves it on the server:
+   *   1. an unchecked item with this barcode (a re-scan of something a
+   *      previous scan added) — deterministic, unaffected by the
+   *      product name changing between lookups;
+   *   2. otherwise the product name, ranked against unchecked items by
+   *      trigram similarity, so "Alpro Oat Milk" picks "oat milk" over
+   *      "milk". The name comes from the local IndexedDB cache when we
+   *      have it (instant, works for user-taught codes), else the
+   *      server runs the lookup chain (lib/barcode-lookup.js).
+   * A match is ticked off. No match but a known name → the product is
+   * added with its barcode, so no scan is silently dropped. Unknown
+   * code → UnknownBarcodeDialog so the user can teach us the name.
    *
-   *   1. If we ALREADY have that same barcode on the list, we're
-   *      re-scanning what the user just added — treat it as "I bought
-   *      this" and tick it off. Deterministic; unaffected by whether
-   *      OFF returns a slightly different `product_name` the second
-   *      time round.
-   *   2. Else if a fuzzy name match on an unchecked item wins, tick
-   *      that one off. This is the pre-scanner path used for
-   *      manually-typed items ("sugar" ticked off by scanning any
-   *      sugar product).
-   *   3. Otherwise, ADD the item to the list — so a scanned product is
-   *      never silently dropped.
-   *
-   * Root cause of the "8710437003216 doesn't display" report (Jul 2026):
-   * we used to jump straight to step 2 (fuzzy name), which meant the
-   * SECOND scan of a code (whose product name matched the row added by
-   * the FIRST scan) would tick it off and move it into "Already in the
-   * cart" — the user then thought the scan hadn't worked. Matching on
-   * barcode first makes the tick-off intentional AND enables the row
-   * to appear in the visible "To buy" list after the first scan.
-   */
-  const tickOffByProductName = async (productName, { code = null } = {}) => {
-    // Step 1 — deterministic barcode match. Only unchecked rows: a
-    // ticked-off row shouldn't magically un-tick when re-scanned.
-    const byBarcode = code
-      ? items.find((i) => !i.checked && i.barcode && i.barcode === code)
-      : null;
-    if (byBarcode) {
-      await toggle(byBarcode);
-      toast.success(`Ticked off ${byBarcode.name}`);
-      return;
-    }
-
-    // Step 2 — fuzzy name match for manually-typed items.
-    const byName = items.find(
-      (i) => !i.checked && (
-        i.name.toLowerCase().includes(productName.toLowerCase()) ||
-        productName.toLowerCase().includes(i.name.toLowerCase())
-      )
-    );
-    if (byName) {
-      await toggle(byName);
-      toast.success(`Ticked off ${byName.name}`);
-      return;
-    }
-
-    // Step 3 — new item. Persist name AND barcode so subsequent scans
-    // in step 1 can find it deterministically.
-    const res = await apiPost('/api/shopping-list', {
-      name: productName,
-      ...(code ? { barcode: code } : {}),
-    });
-    if (res.ok) {
-      setItems((cur) => [...cur, res.data]);
-      toast.success(`Added ${productName} to your list`);
-    } else {
-      toast.error(res.error?.message || `Recognised ${productName}, but could not add it to your list.`);
-    }
-  };
-
-  /**
-   * Handle a barcode scan while shopping. Resolution order:
-   *   1. Local IndexedDB cache (either a previous OFF/UPCitemdb hit
-   *      OR a user-taught mapping). Instant, offline-friendly.
-   *   2. /api/barcode-lookup (Open Food Facts family + UPCitemdb chain
-   *      — see lib/barcode-lookup.js).
-   *   3. If both miss, pop UnknownBarcodeDialog so the user can teach
-   *      us the product name once, and remember it forever.
+   * Barcode first matters: the "8710437003216 doesn't display" report
+   * (Jul 2026) was a SECOND scan ticking off, by name, the row the
+   * first scan had added, moving it into "Already in the cart" where
+   * the user missed it.
    *
    * Error-handling contract (added Jul 2026):
-   *   - lookup HTTP failure  → toast.error, do NOT open the "What is
-   *     this?" dialog (that dialog is for genuine misses, not for
-   *     transient network / rate-limit issues).
+   *   - HTTP failure  → toast.error, do NOT open the "What is this?"
+   *     dialog (that dialog is for genuine misses, not for transient
+   *     network / rate-limit issues).
    *   - lookup returns found:true with brand-only (name === null) →
-   *     use brand as productName. Previously we treated this as
-   *     unknown, which was the bug behind "the scanner doesn't
+   *     the server uses brand as the name. Previously we treated this
+   *     as unknown, which was the bug behind "the scanner doesn't
    *     recognize this well-known product" reports.
    */
   const handleBarcode = async ({ code }) => {
     if (DEBUG_BARCODE) console.log('[barcode] scan received:', code);
 
-    // 1) Try local cache first — this is what makes repeat scans
-    //    instant and lets user-taught mappings work offline.
     const cached = await getCached(code);
-    if (cached?.name) {
-      if (DEBUG_BARCODE) console.log('[barcode] cache hit:', cached);
-      await tickOffByProductName(cached.name, { code });
-      return;
-    }
-
-    // 2) Network lookup via the multi-source proxy.
-    const lookup = await apiGet(`/api/barcode-lookup?code=${encodeURIComponent(code)}`);
-    if (DEBUG_BARCODE) console.log('[barcode] lookup response:', lookup);
+    if (DEBUG_BARCODE && cached?.name) console.log('[barcode] cache hit:', cached);
+    const scan = await apiPost('/api/shopping-list/scan', {
+      code,
+      ...(cached?.name ? { name: cached.name } : {}),
+    });
+    if (DEBUG_BARCODE) console.log('[barcode] scan response:', scan);
 
-    // 2a) Distinguish an HTTP failure from a genuine miss. A 5xx or
-    //     network error is NOT the user's fault and should not push
-    //     them into the "teach me" dialog. We branch on the canonical
-    //     `error.code` from api-client so each failure mode gets a
-    //     specific, actionable message. SESSION_EXPIRED is handled by
-    //     the global listener in app/page.js (auto-logout + toast) so
-    //     we return quietly here to avoid a double-toast.
-    if (!lookup.ok) {
-      const code = lookup.error?.code;
+    // Distinguish an HTTP failure from a genuine miss. We branch on the
+    // canonical `error.code` from api-client so each failure mode gets
+    // a specific, actionable message. SESSION_EXPIRED is handled by the
+    // global listener in app/page.js (auto-logout + toast) so we return
+    // quietly here to avoid a double-toast.
+    if (!scan.ok) {
+      const code = scan.error?.code;
       if (code === 'SESSION_EXPIRED') return;
       if (code === 'NETWORK_ERROR') {
-        toast.error(lookup.error?.message || "You're offline — the barcode lookup needs a connection.");
+        toast.error(scan.error?.message || "You're offline — the barcode lookup needs a connection.");
       } else if (code === 'SERVER_ERROR') {
         toast.error('Product database is temporarily unreachable (server error). Try again in a moment.');
-      } else if (lookup.status === 429) {
-        toast.error('Open Food Facts rate-limited this server. Please wait a minute and try again.');
+      } else if (code === 'RATE_LIMITED') {
+        toast.error(`Too many scans in a row. Try again in ${scan.error.retryAfter || 60} seconds.`);
       } else {
         toast.error(
-          lookup.error?.message
+          scan.error?.message
             || 'Product lookup service is unavailable right now. Please try again in a moment.'
         );
       }
       return;
     }
 
-    // 2b) Genuine hit? Accept name OR brand — some Open Food Facts
-    //     entries have only one populated.
-    if (lookup.data?.found) {
-      const productName = lookup.data.name || lookup.data.brand;
-      if (productName) {
-        // Save the hit to the cache so future scans skip the network.
-        await setCached(code, {
-          name: productName,
-          brand: lookup.data.brand || null,
-          image: lookup.data.image || null,
-          quantity: lookup.data.quantity || null,
-          source: lookup.data.source || 'off',
-        });
-        await tickOffByProductName(productName, { code });
-        return;
-      }
+    const { product, match, name: productName } = scan.data;
+
+    // Save a fresh lookup hit so future scans skip the upstream chain.
+    if (product?.found && productName) {
+      await setCached(code, {
+        name: productName,
+        brand: product.brand || null,
+        image: product.image || null,
+        quantity: product.quantity || null,
+        source: product.source || 'off',
+      });
+    } else if (product?.found) {
       // Very rare: source claimed a hit but had neither name nor brand.
       // Log for triage and fall through to the "teach me" dialog.
-      console.warn('[barcode] hit had neither name nor brand:', lookup.data);
+      console.warn('[barcode] hit had neither name nor brand:', product);
+    }
+
+    if (match) {
+      // Prefer our copy of the row: toggle() flips what's on screen.
+      const item = items.find((i) => i.id === match.item.id) || match.item;
+      await toggle(item);
+      toast.success(`Ticked off ${item.name}`);
+      return;
+    }
+
+    if (productName) {
+      // New item. Persist name AND barcode so the next scan of this
+      // code matches it deterministically.
+      const res = await apiPost('/api/shopping-list', { name: productName, barcode: code });
+      if (res.ok) {
+        setItems((cur) => [...cur, res.data]);
+        toast.success(`Added ${productName} to your list`);
+      } else {
+        toast.error(res.error?.message || `Recognised ${productName}, but could not add it to your list.`);
+      }
+      return;
     }
 
-    // 3) Unknown — let the user teach us. The dialog will call
-    //    handleUnknownSave (below) with { name, code } once they submit.
+    // Unknown — let the user teach us. The dialog will call
+    // handleUnknownSave (below) with { name, code } once they submit.
     setUnknownBarcode(code);
   };
 
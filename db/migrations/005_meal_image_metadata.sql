@@ -0,0 +1,24 @@
+-- Forkcast — Migration 005: Meal image metadata
+--
+-- Records what /api/upload already knows about a meal's primary photo
+-- so the client can request right-sized Cloudinary derivatives instead
+-- of the full-size original (see lib/image-url.js):
+--
+--   * image_width / image_height — intrinsic size of the upload, used to
+--     reserve layout space and avoid reflow while the image loads.
+--   * image_public_id — Cloudinary public ID. Lets DELETE /api/meals/:id
+--     destroy the asset without reverse-engineering it from the URL.
+--   * image_placeholder — a ~16 px blurred JPEG as a data: URI (a few
+--     hundred bytes), painted behind the <img> until it loads.
+--
+-- All nullable: meals created before this migration (and meals without
+-- a photo) simply render without a placeholder.
+--
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+alter table public.meals add column if not exists image_width       integer;
+alter table public.meals add column if not exists image_height      integer;
+alter table public.meals add column if not exists image_public_id   text;
+alter table public.meals add column if not exists image_placeholder text;
+
+-- End of migration 005.
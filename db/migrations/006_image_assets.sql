@@ -0,0 +1,55 @@
+-- Forkcast — Migration 006: Image assets (upload dedupe)
+--
+-- Content-hash index of meal photos already stored in Cloudinary. The
+-- same photo tends to be uploaded more than once — the user re-picks
+-- it for a second meal, double-taps "Upload", or the client retries on
+-- a flaky connection — and every copy used to cost a full transfer
+-- plus Cloudinary storage. POST /api/upload now hashes the bytes
+-- (SHA-256) while reading them and, on a hit here, returns the
+-- existing asset without touching Cloudinary at all.
+--
+-- Design notes:
+--   * Scoped PER USER. Sharing assets across users would let one
+--     user's DELETE /api/meals/:id destroy an image another user still
+--     references, and would leak "someone already uploaded this" via
+--     timing. Per-user keeps both problems out.
+--   * Rows are written AFTER a successful upload; a failed upload
+--     leaves nothing behind. Upserts ignore duplicates, so two
+--     instances racing on the same bytes keep the first row.
+--   * DELETE /api/meals/:id only destroys the Cloudinary asset when no
+--     other meal references the URL, then removes the row here.
+--
+-- Run in Supabase SQL Editor. Safe to re-run. RLS enabled + forced
+-- with default-deny; the server uses the service-role key.
+--
+-- See lib/image-upload.js for the runtime code.
+
+create table if not exists public.image_assets (
+    user_id      uuid        not null references public.users(id) on delete cascade,
+    -- Lowercase hex SHA-256 of the uploaded bytes.
+    content_hash text        not null,
+    public_id    text        not null,
+    url          text        not null,
+    width        integer,
+    height       integer,
+    placeholder  text,
+    bytes        integer,
+    created_at   timestamptz not null default now(),
+    primary key (user_id, content_hash)
+);
+
+-- removeByPublicId() on meal delete.
+create index if not exists image_assets_user_public_id_idx
+    on public.image_assets (user_id, public_id);
+
+-- meals.countByImageUrl() — "is anyone else still using this photo?"
+create index if not exists meals_image_url_idx
+    on public.meals (image_url)
+    where image_url is not null;
+
+alter table public.image_assets enable row level security;
+alter table public.image_assets force  row level security;
+
+revoke all on public.image_assets from anon, authenticated;
+
+-- End of migration 006.
@@ -0,0 +1,141 @@
+-- Forkcast — Migration 007: Expiry-aware pantry queries
+--
+-- Two things the planner and the AI suggestion flow need without
+-- pulling the user's whole pantry into Node:
+--
+--   1. "What's fresh?" / "What expires in the next N days?" for ONE
+--      user. Migration 002's pantry_items_expires_at_idx is keyed on
+--      expires_at alone, so a per-user range scan still has to visit
+--      every user's rows in that date range. The composite partial
+--      index below serves `user_id = ? AND expires_at BETWEEN ? AND ?`
+--      (GET /api/pantry/expiring) and the `expires_at >= today` half of
+--      the fresh filter (GET /api/pantry?fresh=true) directly.
+--
+--   2. A per-user "expiring soon" summary computed once a night by
+--      refresh_pantry_expiring_summary(). The planner reads one small
+--      row (GET /api/pantry/expiring/summary) instead of a live query
+--      on every page view. Scheduled with pg_cron when the extension is
+--      available (Supabase: Database → Extensions → pg_cron); otherwise
+--      the endpoint falls back to a live query and you can call the
+--      function from any scheduler.
+--
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+-- ---------------------------------------------------------------------------
+-- Index
+-- ---------------------------------------------------------------------------
+create index if not exists pantry_items_user_expires_idx
+    on public.pantry_items (user_id, expires_at)
+    where expires_at is not null;
+
+-- ---------------------------------------------------------------------------
+-- pantry_expiring_summary
+-- ---------------------------------------------------------------------------
+create table if not exists public.pantry_expiring_summary (
+    user_id         uuid        primary key references public.users(id) on delete cascade,
+    -- The calendar day the summary describes; readers treat a row whose
+    -- computed_on isn't today as stale.
+    computed_on     date        not null,
+    window_days     integer     not null,
+    expiring_count  integer     not null default 0,
+    expired_count   integer     not null default 0,
+    -- [{ "id": uuid, "name": text, "expiresAt": "YYYY-MM-DD" }, …]
+    -- soonest first, capped at 20 entries.
+    items           jsonb       not null default '[]'::jsonb,
+    computed_at     timestamptz not null default now()
+);
+
+alter table public.pantry_expiring_summary enable row level security;
+alter table public.pantry_expiring_summary force  row level security;
+
+revoke all on public.pantry_expiring_summary from anon, authenticated;
+
+-- ---------------------------------------------------------------------------
+-- Nightly refresh
+-- ---------------------------------------------------------------------------
+-- Recomputes every user's row in one statement. Returns the number of
+-- users with something expiring. Cheap: both scans are served by
+-- pantry_items_user_expires_idx.
+create or replace function public.refresh_pantry_expiring_summary(p_window_days integer default 3)
+returns integer
+language plpgsql
+as $$
+declare
+    affected integer;
+begin
+    -- Users with nothing expiring (any more) drop out of the table.
+    delete from public.pantry_expiring_summary s
+    where not exists (
+        select 1 from public.pantry_items p
+        where p.user_id = s.user_id
+          and p.expires_at is not null
+          and p.expires_at <= current_date + p_window_days
+    );
+
+    insert into public.pantry_expiring_summary as s
+        (user_id, computed_on, window_days, expiring_count, expired_count, items, computed_at)
+    select
+        u.user_id,
+        current_date,
+        p_window_days,
+        u.expiring_count,
+        u.expired_count,
+        coalesce(top.items, '[]'::jsonb),
+        now()
+    from (
+        select user_id,
+               count(*) filter (where expires_at >= current_date) as expiring_count,
+               count(*) filter (where expires_at <  current_date) as expired_count
+        from public.pantry_items
+        where expires_at is not null
+          and expires_at <= current_date + p_window_days
+        group by user_id
+    ) u
+    left join lateral (
+        select jsonb_agg(
+                   jsonb_build_object('id', t.id, 'name', t.name, 'expiresAt', t.expires_at)
+                   order by t.expires_at, t.name
+               ) as items
+        from (
+            select id, name, expires_at
+            from public.pantry_items
+            where user_id = u.user_id
+              and expires_at between current_date and current_date + p_window_days
+            order by expires_at, name
+            limit 20
+        ) t
+    ) top on true
+    on conflict (user_id) do update set
+        computed_on    = excluded.computed_on,
+        window_days    = excluded.window_days,
+        expiring_count = excluded.expiring_count,
+        expired_count  = excluded.expired_count,
+        items          = excluded.items,
+        computed_at    = excluded.computed_at;
+
+    get diagnostics affected = row_count;
+    return affected;
+end;
+$$;
+
+revoke all on function public.refresh_pantry_expiring_summary(integer) from anon, authenticated;
+
+-- 03:15 UTC every night. cron.schedule() with an existing job name
+-- replaces that job, so re-running the migration doesn't duplicate it.
+do $$
+begin
+    if exists (select 1 from pg_extension where extname = 'pg_cron') then
+        perform cron.schedule(
+            'pantry-expiring-summary',
+            '15 3 * * *',
+            'select public.refresh_pantry_expiring_summary()'
+        );
+    else
+        raise notice 'pg_cron not installed; call refresh_pantry_expiring_summary() from an external scheduler';
+    end if;
+end $$;
+
+-- Populate immediately so the planner has data before the first run.
+select public.refresh_pantry_expiring_summary();
+
+-- End of migration 007.
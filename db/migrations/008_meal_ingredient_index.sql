@@ -0,0 +1,57 @@
+-- Forkcast — Migration 008: Inverted ingredient index for "cookable" meals
+--
+-- GET /api/meals/cookable ranks meals by how many of their ingredient
+-- lines the user's fresh pantry covers. Doing that with `ingredients
+-- ilike '%tomato%'` per pantry item is a sequential scan of every meal
+-- per item; with a few thousand community meals it stops being
+-- interactive.
+--
+-- Instead each meal's ingredients are tokenised once, on create/update
+-- (lib/ingredient-index.js), into one row per (meal, line, token). The
+-- endpoint fetches the postings for the pantry's tokens in one indexed
+-- query and does the set arithmetic in Node.
+--
+--   * line_count is denormalised onto every posting so a single query
+--     returns both "which lines match" and "out of how many".
+--   * meals.ingredient_line_count marks a meal as indexed. It is null
+--     for meals created before this migration; the endpoint indexes
+--     those lazily in batches, so no backfill step is required.
+--
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+-- ---------------------------------------------------------------------------
+-- meals.ingredient_line_count
+-- ---------------------------------------------------------------------------
+alter table public.meals
+    add column if not exists ingredient_line_count integer;
+
+create index if not exists meals_unindexed_ingredients_idx
+    on public.meals (created_at)
+    where ingredient_line_count is null;
+
+-- ---------------------------------------------------------------------------
+-- meal_ingredient_tokens
+-- ---------------------------------------------------------------------------
+create table if not exists public.meal_ingredient_tokens (
+    meal_id     uuid     not null references public.meals(id) on delete cascade,
+    -- Denormalised from meals.user_id so "my meals" filters without a join.
+    user_id     uuid     not null references public.users(id) on delete cascade,
+    -- 0-based index among the meal's non-empty ingredient lines.
+    line_no     integer  not null,
+    -- Normalised token: lower-case, unaccented, singular ("tomato").
+    token       text     not null,
+    line_count  integer  not null,
+    primary key (meal_id, line_no, token)
+);
+
+-- Serves `token in (…)` (community scope) and `token in (…) and
+-- user_id = ?` (mine scope).
+create index if not exists meal_ingredient_tokens_token_user_idx
+    on public.meal_ingredient_tokens (token, user_id);
+
+alter table public.meal_ingredient_tokens enable row level security;
+alter table public.meal_ingredient_tokens force  row level security;
+
+revoke all on public.meal_ingredient_tokens from anon, authenticated;
+
+-- End of migration 008.
@@ -0,0 +1,64 @@
+-- Forkcast — Migration 009: Structured meal ingredients
+--
+-- meals.ingredients is free text. Until now every consumer re-split it
+-- on '\n' per request (shopping-list/generate) or searched it with
+-- ilike, so "400g spaghetti" and "200 g Spaghetti" were two different
+-- shopping-list lines and "which meals use spaghetti?" was a table scan.
+--
+-- lib/ingredient-parser.js now parses each line ONCE, when the meal is
+-- saved, into quantity / unit / metric amount / canonical name, and the
+-- rows are stored here:
+--
+--   * name is canonical (lower-case, singular, prep words removed) and
+--     indexed, so search and aggregation are index lookups.
+--   * metric_quantity / metric_unit ('g' | 'ml') let amounts in
+--     different units be summed; count-like units (clove, can) stay in
+--     quantity / unit.
+--   * meals.ingredients_parser_version records which parser produced a
+--     meal's rows. Null (meals created before this migration) or older
+--     than the current version → POST /api/meal-ingredients/backfill
+--     re-parses it. meals.ingredients stays the source of truth.
+--
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+-- ---------------------------------------------------------------------------
+-- meals.ingredients_parser_version
+-- ---------------------------------------------------------------------------
+alter table public.meals
+    add column if not exists ingredients_parser_version integer;
+
+create index if not exists meals_ingredients_parser_version_idx
+    on public.meals (ingredients_parser_version, created_at);
+
+-- ---------------------------------------------------------------------------
+-- meal_ingredients
+-- ---------------------------------------------------------------------------
+create table if not exists public.meal_ingredients (
+    meal_id          uuid     not null references public.meals(id) on delete cascade,
+    -- Denormalised from meals.user_id for per-user lookups without a join.
+    user_id          uuid     not null references public.users(id) on delete cascade,
+    -- 0-based line number within meals.ingredients (non-empty lines).
+    position         integer  not null,
+    raw              text     not null,
+    quantity         numeric,
+    unit             text,
+    metric_quantity  numeric,
+    metric_unit      text     check (metric_unit in ('g', 'ml')),
+    -- The ingredient as typed ("Cherry Tomatoes") and canonical ("cherry tomato").
+    item             text,
+    name             text     not null,
+    note             text,
+    primary key (meal_id, position)
+);
+
+create index if not exists meal_ingredients_name_idx
+    on public.meal_ingredients (name);
+create index if not exists meal_ingredients_user_name_idx
+    on public.meal_ingredients (user_id, name);
+
+alter table public.meal_ingredients enable row level security;
+alter table public.meal_ingredients force  row level security;
+
+revoke all on public.meal_ingredients from anon, authenticated;
+
+-- End of migration 009.
@@ -0,0 +1,133 @@
+-- Forkcast — Migration 010: Shared rate-limit buckets
+--
+-- Token buckets for lib/rate-limit.js when more than one server
+-- instance is running (RATE_LIMIT_STORE=supabase). The default
+-- in-memory store keeps buckets per instance, so on Vercel a user
+-- spread across N lambdas gets N times their allowance; this table
+-- gives every instance the same view.
+--
+-- Design notes:
+--   * One row per bucket key, e.g. 'barcode-lookup:user:<uuid>' or
+--     'upload:ip:203.0.113.7'. The row stores the token count at
+--     `updated_at`; refill is computed on read from the elapsed time,
+--     so nothing has to tick in the background.
+--   * rate_limit_take() refills, checks and debits ALL of a request's
+--     buckets (user + IP) in one call and one transaction. The upsert
+--     takes a row lock per key, so concurrent requests for the same
+--     user queue on that row instead of both spending the last token.
+--     It is all-or-nothing: a request denied by its IP bucket doesn't
+--     also spend a token from its user bucket.
+--   * Rows are tiny and self-describing; sweep_rate_limit_buckets()
+--     drops rows untouched for a day (a full bucket and a missing row
+--     behave the same). Scheduled with pg_cron when available.
+--
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+-- ---------------------------------------------------------------------------
+-- rate_limit_buckets
+-- ---------------------------------------------------------------------------
+create table if not exists public.rate_limit_buckets (
+    key         text             primary key,
+    tokens      double precision not null,
+    updated_at  timestamptz      not null default now()
+);
+
+create index if not exists rate_limit_buckets_updated_at_idx
+    on public.rate_limit_buckets (updated_at);
+
+alter table public.rate_limit_buckets enable row level security;
+alter table public.rate_limit_buckets force  row level security;
+
+revoke all on public.rate_limit_buckets from anon, authenticated;
+
+-- ---------------------------------------------------------------------------
+-- rate_limit_take(keys, capacities, refill_per_sec, cost)
+-- ---------------------------------------------------------------------------
+-- Arrays are parallel: bucket i is (p_keys[i], p_capacities[i],
+-- p_refill_per_sec[i]). Returns one row per bucket, in input order,
+-- with the tokens left after the call. `allowed` is the same on every
+-- row: true when every bucket had at least p_cost tokens (and all were
+-- debited), false when any fell short (and none were).
+create or replace function public.rate_limit_take(
+    p_keys           text[],
+    p_capacities     double precision[],
+    p_refill_per_sec double precision[],
+    p_cost           double precision default 1
+)
+returns table (key text, tokens double precision, allowed boolean)
+language plpgsql
+as $$
+declare
+    now_ts  timestamptz := clock_timestamp();
+    levels  double precision[] := array_fill(0::double precision, array[coalesce(array_length(p_keys, 1), 0)]);
+    ok      boolean := true;
+    t       double precision;
+    i       integer;
+begin
+    -- Lock keys in a stable order so two requests sharing buckets can't
+    -- deadlock, then refill each one to `now_ts`.
+    for i in select ord from unnest(p_keys) with ordinality as k(v, ord) order by v loop
+        insert into public.rate_limit_buckets as b (key, tokens, updated_at)
+        values (p_keys[i], p_capacities[i], now_ts)
+        on conflict on constraint rate_limit_buckets_pkey do update
+            set tokens = least(
+                    p_capacities[i],
+                    b.tokens + greatest(0, extract(epoch from now_ts - b.updated_at)) * p_refill_per_sec[i]
+                ),
+                updated_at = now_ts
+        returning b.tokens into t;
+        levels[i] := t;
+        if t < p_cost then
+            ok := false;
+        end if;
+    end loop;
+
+    for i in 1 .. coalesce(array_length(p_keys, 1), 0) loop
+        if ok then
+            levels[i] := levels[i] - p_cost;
+            update public.rate_limit_buckets b set tokens = levels[i] where b.key = p_keys[i];
+        end if;
+        key     := p_keys[i];
+        tokens  := levels[i];
+        allowed := ok;
+        return next;
+    end loop;
+end;
+$$;
+
+revoke all on function public.rate_limit_take(text[], double precision[], double precision[], double precision)
+    from anon, authenticated;
+
+-- ---------------------------------------------------------------------------
+-- Sweep
+-- ---------------------------------------------------------------------------
+create or replace function public.sweep_rate_limit_buckets(p_idle interval default interval '1 day')
+returns integer
+language plpgsql
+as $$
+declare
+    affected integer;
+begin
+    delete from public.rate_limit_buckets where updated_at < now() - p_idle;
+    get diagnostics affected = row_count;
+    return affected;
+end;
+$$;
+
+revoke all on function public.sweep_rate_limit_buckets(interval) from anon, authenticated;
+
+-- Every hour at :40. Re-running replaces the job (same name).
+do $$
+begin
+    if exists (select 1 from pg_extension where extname = 'pg_cron') then
+        perform cron.schedule(
+            'rate-limit-bucket-sweep',
+            '40 * * * *',
+            'select public.sweep_rate_limit_buckets()'
+        );
+    else
+        raise notice 'pg_cron not installed; call sweep_rate_limit_buckets() from an external scheduler';
+    end if;
+end $$;
+
+-- End of migration 010.
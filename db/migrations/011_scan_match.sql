@@ -0,0 +1,134 @@
+-- Forkcast — Migration 011: Server-side scan matching
+--
+-- Backs POST /api/shopping-list/scan and POST /api/pantry/scan. A scan
+-- used to be resolved in the browser: an exact `barcode` find over the
+-- loaded list, then a two-way `includes()` substring match on names.
+-- That needed the whole list in memory and picked the first substring
+-- hit, so scanning "Alpro Oat Milk" could tick off "milk" while
+-- "oat milk" sat further down the list.
+--
+-- The two functions below do both steps in one query:
+--
+--   1. Exact barcode match. Served by the partial (user_id, barcode)
+--      indexes: migration 004 added the shopping-list one, the pantry
+--      one is new here.
+--   2. Ranked name match with pg_trgm. The score is the larger of
+--      word_similarity() in each direction, so a short list entry
+--      ("milk") inside a long product name ("Arla Organic Whole Milk
+--      1L") scores 1.0, and so does the reverse. Ties go to the closer
+--      whole-string similarity(), which prefers "oat milk" over "milk"
+--      for an oat milk product.
+--
+-- Results come back as jsonb rows plus `matched_by` ('barcode' /
+-- 'name') and `confidence` (0..1, 1 for a barcode match); the API maps
+-- them to the usual camelCase shape. A user's list is small, so the
+-- user_id indexes bound the scan. The trigram index on shopping-list
+-- names mirrors migration 002's pantry one for `%`-operator searches.
+--
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+create extension if not exists pg_trgm;
+
+-- ---------------------------------------------------------------------------
+-- Indexes
+-- ---------------------------------------------------------------------------
+create index if not exists pantry_items_user_barcode_idx
+    on public.pantry_items (user_id, barcode)
+    where barcode is not null;
+
+do $$
+begin
+    if exists (select 1 from pg_extension where extname = 'pg_trgm') then
+        create index if not exists shopping_list_items_name_trgm_idx on public.shopping_list_items
+            using gin (name gin_trgm_ops);
+    else
+        raise notice 'pg_trgm not installed; skipping shopping_list_items_name_trgm_idx';
+    end if;
+end $$;
+
+-- ---------------------------------------------------------------------------
+-- match_shopping_list_items — unchecked rows only
+-- ---------------------------------------------------------------------------
+-- Either argument may be null: no code skips step 1, no name skips
+-- step 2. A barcode match always ranks first.
+create or replace function public.match_shopping_list_items(
+    p_user_id        uuid,
+    p_code           text,
+    p_name           text,
+    p_min_confidence real    default 0.6,
+    p_limit          integer default 3
+)
+returns table (item jsonb, matched_by text, confidence real)
+language sql
+stable
+as $$
+    select r.item, r.matched_by, r.confidence
+    from (
+        select to_jsonb(s) as item, 'barcode'::text as matched_by, 1::real as confidence,
+               1::real as closeness, s.added_at
+        from   public.shopping_list_items s
+        where  p_code is not null
+        and    s.user_id = p_user_id
+        and    s.barcode = p_code
+        and    not s.checked
+
+        union all
+
+        select to_jsonb(s), 'name', m.score, similarity(s.name, p_name), s.added_at
+        from   public.shopping_list_items s
+        cross  join lateral (
+            select greatest(word_similarity(s.name, p_name), word_similarity(p_name, s.name)) as score
+        ) m
+        where  p_name is not null
+        and    s.user_id = p_user_id
+        and    not s.checked
+        and    (p_code is null or s.barcode is distinct from p_code)
+        and    m.score >= p_min_confidence
+    ) r
+    order by r.matched_by = 'barcode' desc, r.confidence desc, r.closeness desc, r.added_at asc
+    limit p_limit;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- match_pantry_items — every row; newest stock first on ties
+-- ---------------------------------------------------------------------------
+create or replace function public.match_pantry_items(
+    p_user_id        uuid,
+    p_code           text,
+    p_name           text,
+    p_min_confidence real    default 0.6,
+    p_limit          integer default 3
+)
+returns table (item jsonb, matched_by text, confidence real)
+language sql
+stable
+as $$
+    select r.item, r.matched_by, r.confidence
+    from (
+        select to_jsonb(p) as item, 'barcode'::text as matched_by, 1::real as confidence,
+               1::real as closeness, p.added_at
+        from   public.pantry_items p
+        where  p_code is not null
+        and    p.user_id = p_user_id
+        and    p.barcode = p_code
+
+        union all
+
+        select to_jsonb(p), 'name', m.score, similarity(p.name, p_name), p.added_at
+        from   public.pantry_items p
+        cross  join lateral (
+            select greatest(word_similarity(p.name, p_name), word_similarity(p_name, p.name)) as score
+        ) m
+        where  p_name is not null
+        and    p.user_id = p_user_id
+        and    (p_code is null or p.barcode is distinct from p_code)
+        and    m.score >= p_min_confidence
+    ) r
+    order by r.matched_by = 'barcode' desc, r.confidence desc, r.closeness desc, r.added_at desc
+    limit p_limit;
+$$;
+
+revoke all on function public.match_shopping_list_items(uuid, text, text, real, integer) from anon, authenticated;
+revoke all on function public.match_pantry_items(uuid, text, text, real, integer) from anon, authenticated;
+
+-- End of migration 011.
@@ -0,0 +1,97 @@
+-- Forkcast — Migration 012: Index audit
+--
+-- Indexes for the list reads the API issues on every page view, checked
+-- with EXPLAIN (ANALYZE, BUFFERS) against a seeded database by
+-- tests/test_query_plans.py. Before this migration each of these reads
+-- either filtered on a single-column index and then sorted every one of
+-- the user's rows, or walked a global index and filtered out other
+-- users' rows:
+--
+--   meals                 user_id = ? ORDER BY created_at DESC
+--                         (GET /api/meals?userId=, the planner's picker)
+--   pantry_items          user_id = ? ORDER BY added_at DESC
+--                         (GET /api/pantry, ?fresh=true, ?fields=name)
+--   shopping_list_items   user_id = ? ORDER BY checked, added_at
+--                         (GET /api/shopping-list, scan and
+--                         from-meals responses)
+--
+-- A composite index per read returns the user's rows already in order,
+-- so the plan has no Sort node, and LIMIT / range pages stop early.
+--
+-- meal_plans needs no new read index. Its week query
+--
+--   user_id = ? AND date BETWEEN ? AND ? ORDER BY date
+--
+-- is a range scan on the (user_id, date, meal_type) unique key, which
+-- also backs upsertMany's ON CONFLICT. Two other gaps get indexes here.
+-- Both are foreign keys whose ON DELETE action looks up the child rows:
+--
+--   meal_plans.meal_id               cascade when a meal is deleted
+--   shopping_list_items.source_meal_id  set null when a meal is deleted
+--
+-- Without them, every meal delete scans both tables.
+--
+-- Redundant indexes are dropped. Each one is a prefix or a duplicate of
+-- another index, so it only costs writes and cache. Both naming schemes
+-- are covered: the `idx_*` names are from the original project (see
+-- SUPABASE_RESTORE.sql), the `*_idx` names are from db/schema.sql.
+--
+--   meals (user_id)                      → meals_user_created_idx
+--   meal_plans (user_id), (user_id, date)
+--                                        → the unique key
+--   users (username)                     → users_username_key
+--   pantry_items (user_id)               → pantry_items_user_added_idx
+--   shopping_list_items (user_id), (user_id, checked)
+--                                        → shopping_list_items_user_list_idx
+--
+-- meals (created_at) stays: it serves the all-users feed (GET /api/meals
+-- without userId).
+--
+-- Plain CREATE / DROP INDEX briefly lock writes on each table. That is
+-- fine at Forkcast's size. On a large table, run each statement on its
+-- own with CONCURRENTLY instead. The SQL Editor wraps a multi-statement
+-- script in one transaction, where CONCURRENTLY is not allowed.
+--
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+-- ---------------------------------------------------------------------------
+-- Composite indexes for the list reads
+-- ---------------------------------------------------------------------------
+create index if not exists meals_user_created_idx
+    on public.meals (user_id, created_at desc);
+
+create index if not exists pantry_items_user_added_idx
+    on public.pantry_items (user_id, added_at desc);
+
+create index if not exists shopping_list_items_user_list_idx
+    on public.shopping_list_items (user_id, checked, added_at);
+
+-- ---------------------------------------------------------------------------
+-- Foreign keys followed on meal delete
+-- ---------------------------------------------------------------------------
+create index if not exists meal_plans_meal_id_idx
+    on public.meal_plans (meal_id);
+
+create index if not exists shopping_list_items_source_meal_idx
+    on public.shopping_list_items (source_meal_id)
+    where source_meal_id is not null;
+
+-- ---------------------------------------------------------------------------
+-- Redundant indexes
+-- ---------------------------------------------------------------------------
+drop index if exists public.idx_meals_user_id;
+drop index if exists public.meals_user_id_idx;
+
+drop index if exists public.idx_meal_plans_user_id;
+drop index if exists public.idx_meal_plans_user_date;
+drop index if exists public.meal_plans_user_id_idx;
+
+drop index if exists public.idx_users_username;
+drop index if exists public.users_username_idx;
+
+drop index if exists public.pantry_items_user_id_idx;
+
+drop index if exists public.shopping_list_items_user_id_idx;
+drop index if exists public.shopping_list_items_checked_idx;
+
+analyze public.meals, public.meal_plans, public.pantry_items, public.shopping_list_items;
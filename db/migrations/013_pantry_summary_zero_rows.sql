@@ -0,0 +1,91 @@
+-- Forkcast — Migration 013: Zero rows in the pantry expiring summary
+--
+-- refresh_pantry_expiring_summary() from migration 007 deleted the row
+-- of every user with nothing expiring. Most users have nothing
+-- expiring, so GET /api/pantry/expiring/summary found no row dated
+-- today for them and ran its live fallback on every call, which is what
+-- the summary was meant to avoid.
+--
+-- The function now writes a row for every user with pantry items. Users
+-- with nothing expiring get expiring_count = 0, expired_count = 0 and
+-- items = '[]'. Only users with an empty pantry drop out. Their live
+-- query matches nothing, and they get a row on the first night after
+-- they add an item.
+--
+-- The counts now read every pantry row once a night, not just the
+-- dated ones in the window. The top-20 list still uses
+-- pantry_items_user_expires_idx.
+--
+-- The pg_cron job from migration 007 calls the function by name, so it
+-- picks up the new body without being rescheduled.
+--
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+-- Recomputes every user's row in one statement. Returns the number of
+-- rows written.
+create or replace function public.refresh_pantry_expiring_summary(p_window_days integer default 3)
+returns integer
+language plpgsql
+as $$
+declare
+    affected integer;
+begin
+    -- Users whose pantry is now empty drop out of the table.
+    delete from public.pantry_expiring_summary s
+    where not exists (
+        select 1 from public.pantry_items p
+        where p.user_id = s.user_id
+    );
+
+    insert into public.pantry_expiring_summary as s
+        (user_id, computed_on, window_days, expiring_count, expired_count, items, computed_at)
+    select
+        u.user_id,
+        current_date,
+        p_window_days,
+        u.expiring_count,
+        u.expired_count,
+        coalesce(top.items, '[]'::jsonb),
+        now()
+    from (
+        select user_id,
+               count(*) filter (where expires_at between current_date and current_date + p_window_days)
+                   as expiring_count,
+               count(*) filter (where expires_at < current_date) as expired_count
+        from public.pantry_items
+        group by user_id
+    ) u
+    left join lateral (
+        select jsonb_agg(
+                   jsonb_build_object('id', t.id, 'name', t.name, 'expiresAt', t.expires_at)
+                   order by t.expires_at, t.name
+               ) as items
+        from (
+            select id, name, expires_at
+            from public.pantry_items
+            where user_id = u.user_id
+              and expires_at between current_date and current_date + p_window_days
+            order by expires_at, name
+            limit 20
+        ) t
+    ) top on true
+    on conflict (user_id) do update set
+        computed_on    = excluded.computed_on,
+        window_days    = excluded.window_days,
+        expiring_count = excluded.expiring_count,
+        expired_count  = excluded.expired_count,
+        items          = excluded.items,
+        computed_at    = excluded.computed_at;
+
+    get diagnostics affected = row_count;
+    return affected;
+end;
+$$;
+
+revoke all on function public.refresh_pantry_expiring_summary(integer) from anon, authenticated;
+
+-- Write today's zero rows now, so the endpoint stops running its live
+-- fallback for these users before the next nightly run.
+select public.refresh_pantry_expiring_summary();
+
+-- End of migration 013.
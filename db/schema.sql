@@ -19,7 +19,8 @@ create table if not exists public.users (
     created_at  timestamptz     not null default now()
 );
 
-create index if not exists users_username_idx on public.users (username);
+-- `unique` already indexes username (users_username_key); migration 012
+-- dropped the duplicate users_username_idx.
 
 -- ---------------------------------------------------------------------------
 -- meals
@@ -31,13 +32,20 @@ create table if not exists public.meals (
     ingredients     text            not null default '',
     instructions    text            not null default '',
     image_url       text,
+    -- Primary-photo metadata from /api/upload (migration 005).
+    image_width       integer,
+    image_height      integer,
+    image_public_id   text,
+    image_placeholder text,         -- tiny blurred data: URI (LQIP)
     gallery_images  text,           -- JSON-encoded array of Cloudinary URLs
     created_at      timestamptz     not null default now(),
     updated_at      timestamptz     not null default now()
 );
 
-create index if not exists meals_user_id_idx    on public.meals (user_id);
-create index if not exists meals_created_at_idx on public.meals (created_at desc);
+-- A user's meals newest first, without a sort (migration 012); the
+-- plain created_at index serves the all-users feed.
+create index if not exists meals_user_created_idx on public.meals (user_id, created_at desc);
+create index if not exists meals_created_at_idx   on public.meals (created_at desc);
 
 -- Trigram index for cheap ILIKE search on meal fields. Requires pg_trgm.
 create extension if not exists pg_trgm;
@@ -66,14 +74,17 @@ create table if not exists public.meal_plans (
     id           uuid            primary key default gen_random_uuid(),
     user_id      uuid            not null references public.users(id) on delete cascade,
     meal_id      uuid            not null references public.meals(id) on delete cascade,
-    planned_for  date            not null,
-    created_at   timestamptz     not null default now()
+    date         date            not null,
+    meal_type    varchar(20)     not null
+                                 check (meal_type in ('breakfast', 'lunch', 'dinner')),
+    created_at   timestamptz     not null default now(),
+    -- One meal per slot; the onConflict target of db.meal_plans.upsertMany.
+    -- Also serves the week read (user_id, date range, order by date).
+    constraint meal_plans_user_id_date_meal_type_key unique (user_id, date, meal_type)
 );
 
-create index if not exists meal_plans_user_id_idx     on public.meal_plans (user_id);
-create index if not exists meal_plans_planned_for_idx on public.meal_plans (planned_for);
-create unique index if not exists meal_plans_unique_per_day
-    on public.meal_plans (user_id, meal_id, planned_for);
+-- Followed by the cascade when a meal is deleted (migration 012).
+create index if not exists meal_plans_meal_id_idx on public.meal_plans (meal_id);
 
 -- ---------------------------------------------------------------------------
 -- Row Level Security
@@ -122,7 +133,7 @@ create table if not exists public.pantry_items (
     added_at    timestamptz     not null default now()
 );
 
-create index if not exists pantry_items_user_id_idx    on public.pantry_items (user_id);
+create index if not exists pantry_items_user_added_idx on public.pantry_items (user_id, added_at desc);
 create index if not exists pantry_items_expires_at_idx on public.pantry_items (expires_at)
     where expires_at is not null;
 do $$
@@ -148,8 +159,13 @@ create table if not exists public.shopping_list_items (
     added_at       timestamptz     not null default now()
 );
 
-create index if not exists shopping_list_items_user_id_idx on public.shopping_list_items (user_id);
-create index if not exists shopping_list_items_checked_idx on public.shopping_list_items (user_id, checked);
+-- The list in display order (migration 012), and the ON DELETE SET NULL
+-- lookup when a meal is deleted.
+create index if not exists shopping_list_items_user_list_idx
+    on public.shopping_list_items (user_id, checked, added_at);
+create index if not exists shopping_list_items_source_meal_idx
+    on public.shopping_list_items (source_meal_id)
+    where source_meal_id is not null;
 -- Fast "do I already have this scanned code on my list?" lookup.
 -- Filtered to non-null so it only carries scan-added rows.
 create index if not exists shopping_list_items_user_barcode_idx
@@ -164,4 +180,300 @@ alter table public.shopping_list_items force  row level security;
 revoke all on public.pantry_items        from anon, authenticated;
 revoke all on public.shopping_list_items from anon, authenticated;
 
+-- ---------------------------------------------------------------------------
+-- Upload dedupe (added in migration 006_image_assets.sql)
+-- ---------------------------------------------------------------------------
+-- image_assets: per-user SHA-256 → Cloudinary asset, so re-uploading the
+-- same photo reuses it instead of transferring it again.
+create table if not exists public.image_assets (
+    user_id      uuid        not null references public.users(id) on delete cascade,
+    content_hash text        not null,
+    public_id    text        not null,
+    url          text        not null,
+    width        integer,
+    height       integer,
+    placeholder  text,
+    bytes        integer,
+    created_at   timestamptz not null default now(),
+    primary key (user_id, content_hash)
+);
+
+create index if not exists image_assets_user_public_id_idx
+    on public.image_assets (user_id, public_id);
+create index if not exists meals_image_url_idx
+    on public.meals (image_url)
+    where image_url is not null;
+
+alter table public.image_assets enable row level security;
+alter table public.image_assets force  row level security;
+
+revoke all on public.image_assets from anon, authenticated;
+
+-- ---------------------------------------------------------------------------
+-- Expiry-aware pantry queries (added in migration 007_pantry_expiry.sql)
+-- ---------------------------------------------------------------------------
+-- The nightly refresh function and its pg_cron schedule live in the
+-- migration; only the index and table are repeated here.
+create index if not exists pantry_items_user_expires_idx
+    on public.pantry_items (user_id, expires_at)
+    where expires_at is not null;
+
+create table if not exists public.pantry_expiring_summary (
+    user_id         uuid        primary key references public.users(id) on delete cascade,
+    computed_on     date        not null,
+    window_days     integer     not null,
+    expiring_count  integer     not null default 0,
+    expired_count   integer     not null default 0,
+    items           jsonb       not null default '[]'::jsonb,
+    computed_at     timestamptz not null default now()
+);
+
+alter table public.pantry_expiring_summary enable row level security;
+alter table public.pantry_expiring_summary force  row level security;
+
+revoke all on public.pantry_expiring_summary from anon, authenticated;
+
+-- ---------------------------------------------------------------------------
+-- Inverted ingredient index (added in migration 008_meal_ingredient_index.sql)
+-- ---------------------------------------------------------------------------
+alter table public.meals
+    add column if not exists ingredient_line_count integer;
+
+create index if not exists meals_unindexed_ingredients_idx
+    on public.meals (created_at)
+    where ingredient_line_count is null;
+
+create table if not exists public.meal_ingredient_tokens (
+    meal_id     uuid     not null references public.meals(id) on delete cascade,
+    user_id     uuid     not null references public.users(id) on delete cascade,
+    line_no     integer  not null,
+    token       text     not null,
+    line_count  integer  not null,
+    primary key (meal_id, line_no, token)
+);
+
+create index if not exists meal_ingredient_tokens_token_user_idx
+    on public.meal_ingredient_tokens (token, user_id);
+
+alter table public.meal_ingredient_tokens enable row level security;
+alter table public.meal_ingredient_tokens force  row level security;
+
+revoke all on public.meal_ingredient_tokens from anon, authenticated;
+
+-- ---------------------------------------------------------------------------
+-- Structured meal ingredients (added in migration 009_meal_ingredients.sql)
+-- ---------------------------------------------------------------------------
+alter table public.meals
+    add column if not exists ingredients_parser_version integer;
+
+create index if not exists meals_ingredients_parser_version_idx
+    on public.meals (ingredients_parser_version, created_at);
+
+create table if not exists public.meal_ingredients (
+    meal_id          uuid     not null references public.meals(id) on delete cascade,
+    user_id          uuid     not null references public.users(id) on delete cascade,
+    position         integer  not null,
+    raw              text     not null,
+    quantity         numeric,
+    unit             text,
+    metric_quantity  numeric,
+    metric_unit      text     check (metric_unit in ('g', 'ml')),
+    item             text,
+    name             text     not null,
+    note             text,
+    primary key (meal_id, position)
+);
+
+create index if not exists meal_ingredients_name_idx
+    on public.meal_ingredients (name);
+create index if not exists meal_ingredients_user_name_idx
+    on public.meal_ingredients (user_id, name);
+
+alter table public.meal_ingredients enable row level security;
+alter table public.meal_ingredients force  row level security;
+
+revoke all on public.meal_ingredients from anon, authenticated;
+
+-- ---------------------------------------------------------------------------
+-- Shared rate-limit buckets (added in migration 010_rate_limit_buckets.sql)
+-- ---------------------------------------------------------------------------
+-- Used by lib/rate-limit.js with RATE_LIMIT_STORE=supabase. The hourly
+-- pg_cron sweep lives in the migration; the functions are repeated here.
+create table if not exists public.rate_limit_buckets (
+    key         text             primary key,
+    tokens      double precision not null,
+    updated_at  timestamptz      not null default now()
+);
+
+create index if not exists rate_limit_buckets_updated_at_idx
+    on public.rate_limit_buckets (updated_at);
+
+alter table public.rate_limit_buckets enable row level security;
+alter table public.rate_limit_buckets force  row level security;
+
+revoke all on public.rate_limit_buckets from anon, authenticated;
+
+-- Arrays are parallel: bucket i is (p_keys[i], p_capacities[i],
+-- p_refill_per_sec[i]). Returns one row per bucket, in input order,
+-- with the tokens left after the call. `allowed` is the same on every
+-- row: true when every bucket had at least p_cost tokens (and all were
+-- debited), false when any fell short (and none were).
+create or replace function public.rate_limit_take(
+    p_keys           text[],
+    p_capacities     double precision[],
+    p_refill_per_sec double precision[],
+    p_cost           double precision default 1
+)
+returns table (key text, tokens double precision, allowed boolean)
+language plpgsql
+as $$
+declare
+    now_ts  timestamptz := clock_timestamp();
+    levels  double precision[] := array_fill(0::double precision, array[coalesce(array_length(p_keys, 1), 0)]);
+    ok      boolean := true;
+    t       double precision;
+    i       integer;
+begin
+    -- Lock keys in a stable order so two requests sharing buckets can't
+    -- deadlock, then refill each one to `now_ts`.
+    for i in select ord from unnest(p_keys) with ordinality as k(v, ord) order by v loop
+        insert into public.rate_limit_buckets as b (key, tokens, updated_at)
+        values (p_keys[i], p_capacities[i], now_ts)
+        on conflict on constraint rate_limit_buckets_pkey do update
+            set tokens = least(
+                    p_capacities[i],
+                    b.tokens + greatest(0, extract(epoch from now_ts - b.updated_at)) * p_refill_per_sec[i]
+                ),
+                updated_at = now_ts
+        returning b.tokens into t;
+        levels[i] := t;
+        if t < p_cost then
+            ok := false;
+        end if;
+    end loop;
+
+    for i in 1 .. coalesce(array_length(p_keys, 1), 0) loop
+        if ok then
+            levels[i] := levels[i] - p_cost;
+            update public.rate_limit_buckets b set tokens = levels[i] where b.key = p_keys[i];
+        end if;
+        key     := p_keys[i];
+        tokens  := levels[i];
+        allowed := ok;
+        return next;
+    end loop;
+end;
+$$;
+
+revoke all on function public.rate_limit_take(text[], double precision[], double precision[], double precision)
+    from anon, authenticated;
+
+create or replace function public.sweep_rate_limit_buckets(p_idle interval default interval '1 day')
+returns integer
+language plpgsql
+as $$
+declare
+    affected integer;
+begin
+    delete from public.rate_limit_buckets where updated_at < now() - p_idle;
+    get diagnostics affected = row_count;
+    return affected;
+end;
+$$;
+
+revoke all on function public.sweep_rate_limit_buckets(interval) from anon, authenticated;
+
+-- ---------------------------------------------------------------------------
+-- Server-side scan matching (added in migration 011_scan_match.sql)
+-- ---------------------------------------------------------------------------
+-- Exact barcode first, then a pg_trgm name match; backs
+-- POST /api/shopping-list/scan and POST /api/pantry/scan. pg_trgm is
+-- created with the meals indexes above.
+create index if not exists pantry_items_user_barcode_idx
+    on public.pantry_items (user_id, barcode)
+    where barcode is not null;
+create index if not exists shopping_list_items_name_trgm_idx
+    on public.shopping_list_items using gin (name gin_trgm_ops);
+
+-- Unchecked rows only. Either argument may be null: no code skips the
+-- barcode step, no name skips the name step. A barcode match always
+-- ranks first.
+create or replace function public.match_shopping_list_items(
+    p_user_id        uuid,
+    p_code           text,
+    p_name           text,
+    p_min_confidence real    default 0.6,
+    p_limit          integer default 3
+)
+returns table (item jsonb, matched_by text, confidence real)
+language sql
+stable
+as $$
+    select r.item, r.matched_by, r.confidence
+    from (
+        select to_jsonb(s) as item, 'barcode'::text as matched_by, 1::real as confidence,
+               1::real as closeness, s.added_at
+        from   public.shopping_list_items s
+        where  p_code is not null
+        and    s.user_id = p_user_id
+        and    s.barcode = p_code
+        and    not s.checked
+
+        union all
+
+        select to_jsonb(s), 'name', m.score, similarity(s.name, p_name), s.added_at
+        from   public.shopping_list_items s
+        cross  join lateral (
+            select greatest(word_similarity(s.name, p_name), word_similarity(p_name, s.name)) as score
+        ) m
+        where  p_name is not null
+        and    s.user_id = p_user_id
+        and    not s.checked
+        and    (p_code is null or s.barcode is distinct from p_code)
+        and    m.score >= p_min_confidence
+    ) r
+    order by r.matched_by = 'barcode' desc, r.confidence desc, r.closeness desc, r.added_at asc
+    limit p_limit;
+$$;
+
+-- Every pantry row; newest stock first on ties.
+create or replace function public.match_pantry_items(
+    p_user_id        uuid,
+    p_code           text,
+    p_name           text,
+    p_min_confidence real    default 0.6,
+    p_limit          integer default 3
+)
+returns table (item jsonb, matched_by text, confidence real)
+language sql
+stable
+as $$
+    select r.item, r.matched_by, r.confidence
+    from (
+        select to_jsonb(p) as item, 'barcode'::text as matched_by, 1::real as confidence,
+               1::real as closeness, p.added_at
+        from   public.pantry_items p
+        where  p_code is not null
+        and    p.user_id = p_user_id
+        and    p.barcode = p_code
+
+        union all
+
+        select to_jsonb(p), 'name', m.score, similarity(p.name, p_name), p.added_at
+        from   public.pantry_items p
+        cross  join lateral (
+            select greatest(word_similarity(p.name, p_name), word_similarity(p_name, p.name)) as score
+        ) m
+        where  p_name is not null
+        and    p.user_id = p_user_id
+        and    (p_code is null or p.barcode is distinct from p_code)
+        and    m.score >= p_min_confidence
+    ) r
+    order by r.matched_by = 'barcode' desc, r.confidence desc, r.closeness desc, r.added_at desc
+    limit p_limit;
+$$;
+
+revoke all on function public.match_shopping_list_items(uuid, text, text, real, integer) from anon, authenticated;
+revoke all on function public.match_pantry_items(uuid, text, text, real, integer) from anon, authenticated;
+
 -- End of schema.
@@ -16,7 +16,8 @@
 //   Codes:
 //     NETWORK_ERROR   — TypeError from fetch (offline, DNS, CORS at edge)
 //     SESSION_EXPIRED — 401 from server, token invalid/absent
-//     BAD_REQUEST     — 4xx other than 401
+//     RATE_LIMITED    — 429; `error.retryAfter` is the wait in seconds
+//     BAD_REQUEST     — 4xx other than 401 / 429
 //     SERVER_ERROR    — 5xx
 //     UNKNOWN         — anything else
 
@@ -93,6 +94,7 @@ export async function apiFetch(path, options = {}) {
   // Non-2xx — classify.
   let code = 'UNKNOWN';
   if (response.status === 401) code = 'SESSION_EXPIRED';
+  else if (response.status === 429) code = 'RATE_LIMITED';
   else if (response.status >= 400 && response.status < 500) code = 'BAD_REQUEST';
   else if (response.status >= 500) code = 'SERVER_ERROR';
 
@@ -102,6 +104,8 @@ export async function apiFetch(path, options = {}) {
       ? 'Your session has expired. Please log in again.'
       : code === 'SERVER_ERROR'
       ? 'The server hit an error. Please try again in a moment.'
+      : code === 'RATE_LIMITED'
+      ? 'Too many requests. Please wait a moment and try again.'
       : 'Something went wrong. Please try again.');
 
   // Global auto-logout hook. Any 401 anywhere in the app should tear
@@ -125,11 +129,137 @@ export async function apiFetch(path, options = {}) {
     }
   }
 
-  return { ok: false, status: response.status, error: { code, message }, data };
+  const error = { code, message };
+  if (code === 'RATE_LIMITED') error.retryAfter = Number(response.headers.get('retry-after')) || null;
+
+  return { ok: false, status: response.status, error, data };
+}
+
+// ---------------------------------------------------------------------
+//  Query cache
+// ---------------------------------------------------------------------
+//
+// apiQuery(path) is apiGet(path) through a cache shared by every
+// component, keyed by the path with its query parameters sorted:
+//
+//   * A successful result is served from the cache for `staleMs`
+//     (default 60 s). After that, the next apiQuery refetches it.
+//     peekQuery() still returns it, flagged stale, so a screen can
+//     render it while the refetch runs.
+//   * Identical requests in flight are shared, not repeated.
+//   * Failures are never cached.
+//   * Entries carry TAGS, by default the resource (`/api/pantry/…` →
+//     'pantry'). A successful apiPost / apiPut / apiDelete invalidates
+//     its own resource's tag, or the tags given as `invalidates`.
+//     A request still in flight when its tags are invalidated is not
+//     stored, so it can't put pre-write data back.
+//
+// setQueryData() stores data that arrived some other way, e.g. one
+// section of /api/bootstrap. At most QUERY_CACHE_MAX entries are kept;
+// the least recently used go first. Background prefetch lives with its
+// callers (prefetchWeek in lib/app-store.js), which also update state.
+
+const DEFAULT_STALE_MS = 60 * 1000;
+const QUERY_CACHE_MAX = 100;
+
+const queryCache = new Map();   // key → { result, fetchedAt, staleMs, tags }
+const queryInflight = new Map();   // key → { promise, tags }
+let queryGeneration = 0;
+const tagInvalidatedAt = new Map();   // tag ('*' = everything) → generation of its last invalidation
+
+function invalidatedSince(tags, generation) {
+  return ['*', ...tags].some((tag) => (tagInvalidatedAt.get(tag) ?? -1) > generation);
+}
+
+/** 'meal-plans' for '/api/meal-plans/bulk?x=1'. */
+export function resourceOf(path) {
+  return path.split('?')[0].replace(/^\/api\//, '').split('/')[0];
+}
+
+/** Cache key: the path with its query parameters in a fixed order. */
+export function queryKey(path) {
+  const [pathname, query = ''] = path.split('?');
+  const params = new URLSearchParams(query);
+  params.sort();
+  const sorted = params.toString();
+  return sorted ? `${pathname}?${sorted}` : pathname;
+}
+
+function rememberQuery(key, entry) {
+  queryCache.delete(key);
+  queryCache.set(key, entry);
+  while (queryCache.size > QUERY_CACHE_MAX) queryCache.delete(queryCache.keys().next().value);
+}
+
+/** The cached result for `path` and whether it is stale, or null. */
+export function peekQuery(path) {
+  const entry = queryCache.get(queryKey(path));
+  if (!entry) return null;
+  return { result: entry.result, stale: Date.now() - entry.fetchedAt >= entry.staleMs };
+}
+
+/**
+ * apiQuery(path, { staleMs, tags, force })
+ *   GET `path` through the cache. `force` skips a fresh entry (but still
+ *   joins a request already in flight). Same return shape as apiFetch.
+ */
+export function apiQuery(path, { staleMs = DEFAULT_STALE_MS, tags = [resourceOf(path)], force = false } = {}) {
+  const key = queryKey(path);
+  const cached = queryCache.get(key);
+  if (cached && !force && Date.now() - cached.fetchedAt < cached.staleMs) {
+    rememberQuery(key, cached);
+    return Promise.resolve(cached.result);
+  }
+  if (queryInflight.has(key)) return queryInflight.get(key).promise;
+
+  const generation = queryGeneration;
+  const promise = apiGet(path).then((result) => {
+    if (result.ok && !invalidatedSince(tags, generation)) {
+      rememberQuery(key, { result, fetchedAt: Date.now(), staleMs, tags });
+    }
+    return result;
+  }).finally(() => {
+    if (queryInflight.get(key)?.promise === promise) queryInflight.delete(key);
+  });
+  queryInflight.set(key, { promise, tags });
+  return promise;
+}
+
+/** Cache `data` as the successful result of `path`. */
+export function setQueryData(path, data, { staleMs = DEFAULT_STALE_MS, tags = [resourceOf(path)] } = {}) {
+  rememberQuery(queryKey(path), { result: { ok: true, status: 200, data }, fetchedAt: Date.now(), staleMs, tags });
+}
+
+/**
+ * Drop every entry carrying any of `tags`. Reads for them already in
+ * flight are neither stored nor shared with later callers.
+ */
+export function invalidateQueries(tags) {
+  queryGeneration += 1;
+  for (const tag of tags) tagInvalidatedAt.set(tag, queryGeneration);
+  const hit = (entry) => entry.tags.some((tag) => tags.includes(tag));
+  for (const [key, entry] of queryCache) if (hit(entry)) queryCache.delete(key);
+  for (const [key, entry] of queryInflight) if (hit(entry)) queryInflight.delete(key);
+}
+
+/** Forget every cached query (logout / session expired). */
+export function clearQueryCache() {
+  queryGeneration += 1;
+  tagInvalidatedAt.set('*', queryGeneration);
+  queryCache.clear();
+  queryInflight.clear();
+}
+
+async function apiMutate(path, options) {
+  const { invalidates, ...rest } = options;
+  const result = await apiFetch(path, rest);
+  if (result.ok) invalidateQueries(invalidates || [resourceOf(path)]);
+  return result;
 }
 
-// Convenience wrappers so the call sites read cleaner.
+// Convenience wrappers so the call sites read cleaner. Mutations take
+// `invalidates: [tag, …]` to narrow or widen what they invalidate.
 export const apiGet    = (path, opts) => apiFetch(path, { ...opts, method: 'GET' });
-export const apiPost   = (path, body, opts) => apiFetch(path, { ...opts, method: 'POST', body });
-export const apiPut    = (path, body, opts) => apiFetch(path, { ...opts, method: 'PUT', body });
-export const apiDelete = (path, opts) => apiFetch(path, { ...opts, method: 'DELETE' });
+export const apiPost   = (path, body, opts) => apiMutate(path, { ...opts, method: 'POST', body });
+export const apiPut    = (path, body, opts) => apiMutate(path, { ...opts, method: 'PUT', body });
+export const apiDelete = (path, opts) => apiMutate(path, { ...opts, method: 'DELETE' });
@@ -0,0 +1,240 @@
+/**
+ * lib/app-store.js
+ * ----------------
+ * Shared client-side store for the app shell (app/page.js) and the
+ * planner (MealPlanningCalendar), filled from GET /api/bootstrap.
+ *
+ * Before this, the shell fetched both meal lists on load and the
+ * planner fetched them again, plus /api/meal-plans, on every week
+ * change. Now:
+ *
+ *   * loadBootstrap(week) — one request for user, both meal lists, the
+ *     week's plans and kitchen counts (first load, "Try again").
+ *   * refreshMeals()      — both lists only, after a create / copy /
+ *     delete anywhere; every component sees the new lists.
+ *   * loadWeek(week)      — plans only. A week loaded in the last
+ *     PLANS_STALE_MS comes from the cache with no request; an older one
+ *     is shown at once and refetched in the background.
+ *   * prefetchWeek(week)  — loads a week nobody is looking at yet, so
+ *     the planner can warm the weeks either side of the current one.
+ *   * bulkPlan(body)      — POST /api/meal-plans/bulk (copy a week,
+ *     apply a template, clear); the week it returns goes straight into
+ *     the cache.
+ *
+ * Requests go through the query cache in lib/api-client.js, which
+ * shares identical requests in flight and handles staleness. Each
+ * week's entry is tagged with its seven days (`meal-plans:YYYY-MM-DD`,
+ * see planDayTags), so a plan write invalidates only the weeks that
+ * contain its day. The weeks either side stay warm.
+ *
+ * Components read with `useAppStore(selector)`. The selector must
+ * return a slice of the state (e.g. `(s) => s.myMeals`), not a new
+ * object, or React re-renders forever.
+ */
+
+import { useSyncExternalStore } from 'react';
+import { apiPost, apiQuery, clearQueryCache, invalidateQueries, peekQuery, setQueryData } from '@/lib/api-client';
+
+// Plans change only through this client (which invalidates them) or
+// another device, so they can stay fresh longer than the default.
+const PLANS_STALE_MS = 5 * 60 * 1000;
+
+const INITIAL_STATE = {
+  mealsStatus: 'idle',     // 'idle' | 'loading' | 'success' | 'error'
+  mealsError: null,
+  user: null,
+  myMeals: [],
+  communityMeals: [],
+  kitchen: null,           // { pantryCount, expiringCount, shoppingCount, shoppingUncheckedCount }
+  weeks: {},               // weekKey → plans[] (GET /api/meal-plans shape), last loaded
+};
+
+let state = INITIAL_STATE;
+const listeners = new Set();
+
+function setState(patch) {
+  state = { ...state, ...patch };
+  listeners.forEach((listener) => listener());
+}
+
+function subscribe(listener) {
+  listeners.add(listener);
+  return () => listeners.delete(listener);
+}
+
+export function getAppState() {
+  return state;
+}
+
+export function useAppStore(selector) {
+  return useSyncExternalStore(subscribe, () => selector(state), () => selector(INITIAL_STATE));
+}
+
+/** Cache key for a week's plans (`week` is the 'YYYY-MM-DD' start). */
+export function weekKey(week, includeOthers = false) {
+  return includeOthers ? `${week}+others` : week;
+}
+
+/** Every 'YYYY-MM-DD' day from `start` to `end`, inclusive. */
+function daysBetween(start, end) {
+  const days = [];
+  for (let t = Date.parse(`${start}T00:00:00Z`); t <= Date.parse(`${end}T00:00:00Z`); t += 86400000) {
+    days.push(new Date(t).toISOString().slice(0, 10));
+  }
+  return days;
+}
+
+/** The seven days of the week starting `week`. */
+function daysOf(week) {
+  const days = [];
+  for (let t = Date.parse(`${week}T00:00:00Z`), i = 0; i < 7; i += 1, t += 86400000) {
+    days.push(new Date(t).toISOString().slice(0, 10));
+  }
+  return days;
+}
+
+/** Query-cache tags for plans on `days`; pass them as `invalidates` after a plan write. */
+export function planDayTags(days) {
+  return days.map((day) => `meal-plans:${day}`);
+}
+
+function bootstrapPath(include, { week, includeOthers } = {}) {
+  const params = new URLSearchParams({ include: include.join(',') });
+  if (week) params.set('week', week);
+  if (includeOthers) params.set('includeOthers', 'true');
+  return `/api/bootstrap?${params}`;
+}
+
+// A section is invalidated by writes to its resource; plans embed meal
+// titles and images, so meal writes invalidate them too.
+function bootstrapTags(include, week) {
+  const tags = ['bootstrap'];
+  if (include.includes('user')) tags.push('user');
+  if (include.includes('meals')) tags.push('meals');
+  if (include.includes('plans')) tags.push('meal-plans', 'meals', ...(week ? planDayTags(daysOf(week)) : []));
+  if (include.includes('kitchen')) tags.push('pantry', 'shopping-list');
+  return tags;
+}
+
+function fetchBootstrap(include, { week, includeOthers, force = false } = {}) {
+  const plansOnly = include.length === 1 && include[0] === 'plans';
+  return apiQuery(bootstrapPath(include, { week, includeOthers }), {
+    tags: bootstrapTags(include, week),
+    staleMs: plansOnly ? PLANS_STALE_MS : undefined,
+    force,
+  });
+}
+
+function applyBootstrap(data, { includeOthers = false } = {}) {
+  const patch = {};
+  if (data.user) patch.user = data.user;
+  if (data.meals) {
+    patch.myMeals = data.meals.mine;
+    patch.communityMeals = data.meals.community;
+    patch.mealsStatus = 'success';
+    patch.mealsError = null;
+  }
+  if (data.week) {
+    patch.weeks = { ...state.weeks, [weekKey(data.week.start, includeOthers)]: data.week.plans };
+    // The week also answers a later plans-only request for it.
+    const { start } = data.week;
+    setQueryData(bootstrapPath(['plans'], { week: start, includeOthers }), { week: data.week }, {
+      tags: bootstrapTags(['plans'], start),
+      staleMs: PLANS_STALE_MS,
+    });
+  }
+  if ('kitchen' in data) patch.kitchen = data.kitchen;
+  setState(patch);
+}
+
+function failMeals(res) {
+  if (res.error?.code !== 'SESSION_EXPIRED') setState({ mealsStatus: 'error', mealsError: res.error });
+}
+
+/**
+ * Everything the shell needs, for the week starting `week`.
+ * `isRefresh` keeps what's on screen (no skeleton) while refetching.
+ * Returns the api-client result.
+ */
+export async function loadBootstrap(week, { isRefresh = false } = {}) {
+  setState({ mealsStatus: isRefresh ? state.mealsStatus : 'loading', mealsError: null });
+  const res = await fetchBootstrap(['user', 'meals', 'plans', 'kitchen'], { week, force: true });
+  if (res.ok) applyBootstrap(res.data);
+  else failMeals(res);
+  return res;
+}
+
+/** Refetch both meal lists (after a meal is created, copied or deleted). */
+export async function refreshMeals() {
+  const res = await fetchBootstrap(['meals'], { force: true });
+  if (res.ok) applyBootstrap(res.data);
+  else failMeals(res);
+  return res;
+}
+
+function fetchWeek(week, includeOthers, force) {
+  return fetchBootstrap(['plans'], { week, includeOthers, force }).then((res) => {
+    if (res.ok) applyBootstrap(res.data, { includeOthers });
+    return res;
+  });
+}
+
+/**
+ * Plans for the week starting `week`. Fresh cache → no request. Stale
+ * or invalidated, but loaded before → the last plans at once, refetched
+ * in the background (the store updates when they land). `force` always
+ * waits for the server. Returns `{ ok, plans }`, or the failed
+ * api-client result.
+ */
+export async function loadWeek(week, { includeOthers = false, force = false } = {}) {
+  const cached = peekQuery(bootstrapPath(['plans'], { week, includeOthers }));
+  if (cached && !cached.stale && !force) return { ok: true, plans: cached.result.data.week.plans };
+
+  const pending = fetchWeek(week, includeOthers, force);
+  const shown = state.weeks[weekKey(week, includeOthers)];
+  if (shown && !force) return { ok: true, plans: shown };
+
+  const res = await pending;
+  if (!res.ok) return res;
+  return { ok: true, plans: res.data.week.plans };
+}
+
+/** Load the week starting `week` in the background, unless it is already fresh or loading. */
+export function prefetchWeek(week, { includeOthers = false } = {}) {
+  const cached = peekQuery(bootstrapPath(['plans'], { week, includeOthers }));
+  if (cached && !cached.stale) return;
+  fetchWeek(week, includeOthers, false).catch(() => {});
+}
+
+/**
+ * Run a bulk plan operation (see POST /api/meal-plans/bulk). Cached
+ * weeks overlapping the range it wrote are invalidated; the returned
+ * week is cached when it is a whole seven-day week. Returns the
+ * api-client result.
+ */
+export async function bulkPlan(body) {
+  const res = await apiPost('/api/meal-plans/bulk', body, { invalidates: [] });
+  if (!res.ok) return res;
+  const { week } = res.data;
+  const days = daysBetween(week.start, week.end);
+  invalidatePlans(days);
+  if (days.length === 7) applyBootstrap({ week });
+  return res;
+}
+
+/**
+ * Invalidate cached plans for the weeks containing `days`
+ * ('YYYY-MM-DD'), after a plan is added or removed elsewhere than
+ * through bulkPlan; the next loadWeek for them refetches. What's on
+ * screen stays until then.
+ */
+export function invalidatePlans(days) {
+  invalidateQueries(planDayTags(days));
+}
+
+/** Forget everything (logout / session expired). */
+export function resetAppStore() {
+  clearQueryCache();
+  state = INITIAL_STATE;
+  listeners.forEach((listener) => listener());
+}
@@ -1,5 +1,10 @@
 import jwt from 'jsonwebtoken';
 import bcrypt from 'bcryptjs';
+import { passwordPool } from './password-pool';
+
+// bcrypt cost for new hashes. Raising it is safe: existing hashes still
+// verify, and login re-hashes them at the new cost (see needsRehash).
+export const BCRYPT_COST = Number.parseInt(process.env.BCRYPT_COST || '', 10) || 12;
 
 // JWT secret is read lazily so that a missing env var does not crash the
 // build. In production it MUST be provided via the deployment secrets
@@ -16,12 +21,24 @@ function getJwtSecret() {
   return secret;
 }
 
+// Both run on the worker pool in lib/password-pool.js and reject with
+// PoolBusyError when its queue is full.
 export async function hashPassword(password) {
-  return await bcrypt.hash(password, 12);
+  return await passwordPool.hash(password, BCRYPT_COST);
 }
 
 export async function verifyPassword(password, hashedPassword) {
-  return await bcrypt.compare(password, hashedPassword);
+  return await passwordPool.compare(password, hashedPassword);
+}
+
+// True if `hashedPassword` was made at a different cost than
+// BCRYPT_COST. Reading the cost is a string parse, not a hash.
+export function needsRehash(hashedPassword) {
+  try {
+    return bcrypt.getRounds(hashedPassword) !== BCRYPT_COST;
+  } catch (error) {
+    return false;
+  }
 }
 
 export function generateToken(userId, username) {
@@ -97,6 +97,18 @@ const RETRY_BACKOFF_MS = 250;
  */
 const USER_AGENT = 'Forkcast/1.0 (+https://forkcast-six.vercel.app; kitchen barcode lookup)';
 
+/**
+ * Test hook: when BARCODE_UPSTREAM_URL is set (e.g.
+ * http://127.0.0.1:8767), every source is fetched from
+ * `<that>/<host>/<path>` instead of `https://<host>/<path>`.
+ * tests/barcode_stub.py serves that shape, so the pytest suite never
+ * touches the real databases. Leave unset in production.
+ */
+function upstreamUrl(host, path) {
+  const base = process.env.BARCODE_UPSTREAM_URL;
+  return base ? `${base.replace(/\/+$/, '')}/${host}${path}` : `https://${host}${path}`;
+}
+
 // ---------------------------------------------------------------------
 //  Variant generator
 // ---------------------------------------------------------------------
@@ -211,7 +223,7 @@ const OPEN_FACTS_HOSTS = [
  * challenge page when you've been rate-limited.
  */
 async function queryOpenFactsHost(host, code) {
-  const url = `https://${host}/api/v2/product/${encodeURIComponent(code)}.json?fields=product_name,brands,image_thumb_url,quantity`;
+  const url = upstreamUrl(host, `/api/v2/product/${encodeURIComponent(code)}.json?fields=product_name,brands,image_thumb_url,quantity`);
   try {
     const res = await robustFetch(url, {
       headers: {
@@ -251,7 +263,7 @@ async function queryOpenFactsHost(host, code) {
  * checks for it in the header hook below.
  */
 async function lookupUpcItemDb(code) {
-  const url = `https://api.upcitemdb.com/prod/trial/lookup?upc=${encodeURIComponent(code)}`;
+  const url = upstreamUrl('api.upcitemdb.com', `/prod/trial/lookup?upc=${encodeURIComponent(code)}`);
   try {
     const headers = { 'User-Agent': USER_AGENT, 'Accept': 'application/json' };
     // Optional paid-key upgrade: uncomment when you're ready. The paid
@@ -309,20 +321,37 @@ const SOURCES = [
 const CACHE_HIT_TTL_MS  = Number(process.env.BARCODE_CACHE_HIT_TTL_MS)  || 30 * 24 * 60 * 60 * 1000; // 30 days
 const CACHE_MISS_TTL_MS = Number(process.env.BARCODE_CACHE_MISS_TTL_MS) ||  7 * 24 * 60 * 60 * 1000; //  7 days
 
+/**
+ * Upper bound on a cache read or write (ms). The cache is an
+ * optimisation: when barcode_cache is slow (lock contention, a
+ * saturated pool) waiting on it costs more than asking upstream, so
+ * past this budget the lookup carries on as if the cache had missed.
+ */
+const CACHE_TIMEOUT_MS = Number(process.env.BARCODE_CACHE_TIMEOUT_MS) || 1500;
+
+/** `promise`, or a rejection once CACHE_TIMEOUT_MS has passed. */
+function withinCacheBudget(promise) {
+  let timer;
+  const timeout = new Promise((_, reject) => {
+    timer = setTimeout(() => reject(new Error(`timed out after ${CACHE_TIMEOUT_MS}ms`)), CACHE_TIMEOUT_MS);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
 /**
  * Try the server-side Supabase cache for a code. Returns a normalised
  * `runLookupChain` payload on hit, or null on miss / cache unavailable.
  *
- * Best-effort: silent fallback to null on any error so a cache outage
- * degrades gracefully to the upstream chain rather than blocking the
- * whole feature.
+ * Best-effort: silent fallback to null on any error or after
+ * CACHE_TIMEOUT_MS, so a cache outage degrades gracefully to the
+ * upstream chain rather than blocking the whole feature.
  */
 async function readServerCache(rawCode) {
   try {
     // Lazy import so this module still loads in environments without
     // Supabase credentials (unit tests, local dev without .env).
     const { db } = await import('./supabase-db.js');
-    const row = await db.barcode_cache.getFresh(rawCode);
+    const row = await withinCacheBudget(db.barcode_cache.getFresh(rawCode));
     if (!row) return null;
     // Shape it exactly like runLookupChain's own return payload so
     // downstream callers don't need a special case. `source` preserves
@@ -357,7 +386,7 @@ async function writeServerCache(rawCode, result) {
   try {
     const { db } = await import('./supabase-db.js');
     const ttl = result.found ? CACHE_HIT_TTL_MS : CACHE_MISS_TTL_MS;
-    await db.barcode_cache.upsert({
+    await withinCacheBudget(db.barcode_cache.upsert({
       code: rawCode,
       found: !!result.found,
       name: result.name || null,
@@ -366,7 +395,7 @@ async function writeServerCache(rawCode, result) {
       quantity: result.quantity || null,
       source: result.source || 'none',
       expiresAt: new Date(Date.now() + ttl),
-    });
+    }));
   } catch (err) {
     console.warn('[barcode] cache write failed:', err?.message || err);
   }
@@ -1,10 +1,44 @@
 import { v2 as cloudinary } from 'cloudinary';
+import { PLACEHOLDER_TRANSFORMATION } from './image-url';
 
 cloudinary.config({
   cloud_name: process.env.NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME,
   api_key: process.env.CLOUDINARY_API_KEY,
   api_secret: process.env.CLOUDINARY_API_SECRET,
   secure: true,
+  // Optional API host override. Unset in production; tests point it at
+  // the local stub in tests/test_upload_dedup.py.
+  ...(process.env.CLOUDINARY_UPLOAD_PREFIX
+    ? { upload_prefix: process.env.CLOUDINARY_UPLOAD_PREFIX }
+    : {}),
 });
 
-export default cloudinary;
\ No newline at end of file
+/**
+ * Upload options that ask Cloudinary to render the LQIP derivative
+ * eagerly, in the same round trip as the upload itself.
+ */
+export const PLACEHOLDER_EAGER = [{ raw_transformation: PLACEHOLDER_TRANSFORMATION }];
+
+/**
+ * Turn the eager LQIP derivative from an upload result into an inline
+ * `data:image/jpeg;base64,…` URI (a few hundred bytes) that can be
+ * stored on the meal row. Best-effort: returns null on any failure —
+ * a missing placeholder just means the card shows the plain muted
+ * background while the photo loads.
+ */
+export async function fetchPlaceholder(uploadResult) {
+  const url = uploadResult?.eager?.[0]?.secure_url;
+  if (!url) return null;
+  try {
+    const res = await fetch(url, { signal: AbortSignal.timeout(3000) });
+    if (!res.ok) return null;
+    const bytes = Buffer.from(await res.arrayBuffer());
+    if (bytes.length > 2048) return null;
+    return `data:image/jpeg;base64,${bytes.toString('base64')}`;
+  } catch (err) {
+    console.warn('[upload] placeholder fetch failed:', err?.message || err);
+    return null;
+  }
+}
+
+export default cloudinary;
@@ -0,0 +1,232 @@
+/**
+ * lib/collection-cache.js
+ * -----------------------
+ * Read-through cache for per-user collection reads in lib/supabase-db.js:
+ * GET /api/pantry, /api/shopping-list, /api/meals?userId= and
+ * /api/meal-plans. A user reads the same lists many times between
+ * writes (every tab switch, the bootstrap call, the planner), and each
+ * read is a PostgREST round trip.
+ *
+ * Invalidation is by VERSION TAG rather than by deleting keys. Every
+ * cached read names the tags it depends on, e.g.
+ *
+ *   ['pantry_items', 'pantry_items:<userId>']
+ *
+ * and the cache key includes each tag's current version. A write bumps
+ * the version of the tags it touches, so every entry built on the old
+ * version is simply never looked up again and ages out through the LRU
+ * and the TTL. That works the same on any key/value backend (no "delete
+ * by prefix" needed), and a read that raced a write can only store its
+ * result under the version the write just retired.
+ *
+ * A missing version (never set, evicted, expired) gets a fresh random
+ * one, never a default: entries cached under an earlier version must
+ * not come back to life.
+ *
+ * The cache is OFF unless a deploy opts in, because the in-process
+ * backend is only exact on a single instance:
+ *
+ *   * COLLECTION_CACHE_BACKEND=memory — MemoryBackend, an LRU Map in
+ *     this process, at most COLLECTION_CACHE_MAX entries (default
+ *     2000). For single-instance deploys (one `yarn start`, one
+ *     container). With several instances a write on one doesn't reach
+ *     the others, and a user could read their old list back.
+ *   * collectionCache.setBackend(new KeyValueBackend(client)) — a
+ *     shared store (Redis, Upstash, ...) that every instance talks to,
+ *     so invalidation is global. Setting a backend turns the cache on.
+ *     See the class for the client it expects.
+ *
+ * Entries expire after COLLECTION_CACHE_TTL_MS (default 30 s), which
+ * also bounds staleness from writes that bypass lib/supabase-db.js (SQL
+ * functions, the dashboard). COLLECTION_CACHE_DISABLED=1 keeps the
+ * cache off whatever else is set. A backend error FAILS OPEN: the read
+ * goes to the database.
+ *
+ * Values are cloned in and out, so callers may mutate what they get.
+ */
+
+import { randomUUID } from 'crypto';
+
+const DEFAULT_TTL_MS = 30 * 1000;
+const DEFAULT_MAX_ENTRIES = 2000;
+
+function envInt(name, fallback) {
+  const n = Number.parseInt(process.env[name] || '', 10);
+  return Number.isFinite(n) && n > 0 ? n : fallback;
+}
+
+/** In-process LRU with per-entry expiry. */
+export class MemoryBackend {
+  constructor({ maxEntries = DEFAULT_MAX_ENTRIES, now = Date.now } = {}) {
+    this.maxEntries = maxEntries;
+    this.now = now;
+    this.entries = new Map(); // key → { value, expiresAt }
+    this.evictions = 0;
+  }
+
+  async get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+    if (entry.expiresAt <= this.now()) {
+      this.entries.delete(key);
+      return undefined;
+    }
+    // Re-insert: Map order is least-recently-used first.
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  async set(key, value, ttlMs) {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: this.now() + ttlMs });
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.evictions += 1;
+    }
+  }
+
+  stats() {
+    return { backend: 'memory', size: this.entries.size, maxEntries: this.maxEntries, evictions: this.evictions };
+  }
+}
+
+/**
+ * Shared backend over any client with
+ *
+ *   get(key)                → Promise<string | null>
+ *   set(key, value, ttlMs)  → Promise
+ *
+ * Values are stored as JSON under `prefix`. For ioredis:
+ *
+ *   new KeyValueBackend({
+ *     get: (key) => redis.get(key),
+ *     set: (key, value, ttlMs) => redis.set(key, value, 'PX', ttlMs),
+ *   })
+ *
+ * Size is bounded by the store's own eviction policy (allkeys-lru).
+ */
+export class KeyValueBackend {
+  constructor(client, { prefix = 'forkcast:collection-cache:' } = {}) {
+    this.client = client;
+    this.prefix = prefix;
+  }
+
+  async get(key) {
+    const raw = await this.client.get(this.prefix + key);
+    return raw == null ? undefined : JSON.parse(raw);
+  }
+
+  async set(key, value, ttlMs) {
+    await this.client.set(this.prefix + key, JSON.stringify(value), ttlMs);
+  }
+
+  stats() {
+    return { backend: 'shared' };
+  }
+}
+
+export class CollectionCache {
+  constructor({ backend = new MemoryBackend(), ttlMs = DEFAULT_TTL_MS, enabled = true, disabled = false } = {}) {
+    this.backend = backend;
+    this.ttlMs = ttlMs;
+    this.disabled = disabled;   // hard off: setBackend() can't turn it on
+    this.enabled = enabled && !disabled;
+    this.counters = new Map(); // collection → { hits, misses, invalidations, errors }
+  }
+
+  /** Use `backend` from now on and turn the cache on (unless `disabled`). */
+  setBackend(backend) {
+    this.backend = backend;
+    this.enabled = !this.disabled;
+  }
+
+  count(collection, field) {
+    let c = this.counters.get(collection);
+    if (!c) {
+      c = { hits: 0, misses: 0, invalidations: 0, errors: 0 };
+      this.counters.set(collection, c);
+    }
+    c[field] += 1;
+  }
+
+  /** Current version of `tag`, creating one if there is none. */
+  async version(tag) {
+    const key = `v|${tag}`;
+    let version = await this.backend.get(key);
+    if (version === undefined) {
+      version = randomUUID();
+      // Outlive the entries built on it; losing it early only costs a miss.
+      await this.backend.set(key, version, this.ttlMs * 10);
+    }
+    return version;
+  }
+
+  /**
+   * Cached result of `load()` for `collection`, keyed by the current
+   * versions of `tags` plus `variant` (the serialised query). Never
+   * rejects because of the backend; `load()` errors propagate as-is.
+   */
+  async read(collection, tags, variant, load) {
+    if (!this.enabled) return load();
+
+    let key;
+    try {
+      const versions = await Promise.all(tags.map((tag) => this.version(tag)));
+      key = `${tags.map((tag, i) => `${tag}@${versions[i]}`).join('|')}|${variant}`;
+      const cached = await this.backend.get(key);
+      if (cached !== undefined) {
+        this.count(collection, 'hits');
+        return structuredClone(cached);
+      }
+    } catch (error) {
+      this.count(collection, 'errors');
+      console.warn(`[collection-cache] ${collection}: read failed, going to the database:`, error?.message || error);
+      return load();
+    }
+
+    this.count(collection, 'misses');
+    const value = await load();
+    try {
+      await this.backend.set(key, structuredClone(value), this.ttlMs);
+    } catch (error) {
+      this.count(collection, 'errors');
+      console.warn(`[collection-cache] ${collection}: write failed:`, error?.message || error);
+    }
+    return value;
+  }
+
+  /** Retire the current version of every tag. Never rejects. */
+  async invalidate(collection, tags) {
+    if (!this.enabled) return;
+    this.count(collection, 'invalidations');
+    try {
+      await Promise.all(tags.map((tag) => this.backend.set(`v|${tag}`, randomUUID(), this.ttlMs * 10)));
+    } catch (error) {
+      this.count(collection, 'errors');
+      console.warn(`[collection-cache] ${collection}: invalidation failed, entries stay until their TTL:`, error?.message || error);
+    }
+  }
+
+  stats() {
+    const collections = {};
+    for (const [name, c] of this.counters) {
+      const reads = c.hits + c.misses;
+      collections[name] = { ...c, hitRate: reads ? c.hits / reads : null };
+    }
+    return { enabled: this.enabled, ttlMs: this.ttlMs, ...this.backend.stats(), collections };
+  }
+}
+
+const configuredBackend = process.env.COLLECTION_CACHE_BACKEND || 'off';
+if (!['off', 'memory'].includes(configuredBackend)) {
+  console.warn(`[collection-cache] unknown COLLECTION_CACHE_BACKEND=${configuredBackend}; cache stays off`);
+}
+
+/** Shared instance used by lib/supabase-db.js. */
+export const collectionCache = new CollectionCache({
+  backend: new MemoryBackend({ maxEntries: envInt('COLLECTION_CACHE_MAX', DEFAULT_MAX_ENTRIES) }),
+  ttlMs: envInt('COLLECTION_CACHE_TTL_MS', DEFAULT_TTL_MS),
+  enabled: configuredBackend === 'memory',
+  disabled: process.env.COLLECTION_CACHE_DISABLED === '1',
+});
@@ -0,0 +1,133 @@
+/**
+ * lib/image-upload.js
+ * -------------------
+ * Server-side pipeline behind POST /api/upload.
+ *
+ *   1. Stream the incoming file once, feeding every chunk to a SHA-256
+ *      hash while collecting the bytes (no second pass over the buffer).
+ *   2. Look the hash up in `image_assets` (per user). Hit → return the
+ *      existing Cloudinary asset without transferring anything.
+ *   3. Miss → upload to Cloudinary, then record the hash.
+ *
+ * Concurrent uploads of the same bytes by the same user (double-tap on
+ * "Upload", a client retrying while the first request is still in
+ * flight) are collapsed onto ONE upstream transfer by an in-process
+ * single-flight map. Across instances the unique (user_id,
+ * content_hash) key keeps the table consistent; at worst two instances
+ * each upload once and later lookups converge on the first row.
+ *
+ * The response shape is exactly what /api/upload has always returned,
+ * plus `deduplicated: true` when the asset was reused.
+ *
+ * A hash that can't be recorded (foreign key, outage) doesn't fail the
+ * upload, but that upload will never be deduplicated. Those failures
+ * are logged and counted in imageUploadStats().recordFailures, shown
+ * by GET /api/debug/runtime, so a dedup path that silently does
+ * nothing shows up.
+ */
+
+import { createHash } from 'crypto';
+import cloudinary, { PLACEHOLDER_EAGER, fetchPlaceholder } from './cloudinary';
+import { db } from './supabase-db';
+
+/** userId:hash → Promise<asset> for uploads currently in flight. */
+const inFlight = new Map();
+
+const counters = { transfers: 0, deduplicated: 0, recordFailures: 0 };
+
+/** Upstream transfers, reused assets and failed hash records since start. */
+export function imageUploadStats() {
+  return { ...counters, inFlight: inFlight.size };
+}
+
+/**
+ * Read a web `File`/`Blob` stream, hashing as we go. Returns
+ * `{ hash, buffer }` where `hash` is lowercase hex SHA-256.
+ */
+export async function hashFileStream(file) {
+  const hasher = createHash('sha256');
+  const chunks = [];
+  const reader = file.stream().getReader();
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    hasher.update(value);
+    chunks.push(value);
+  }
+  return { hash: hasher.digest('hex'), buffer: Buffer.concat(chunks) };
+}
+
+function uploadToCloudinary(buffer, mimeType, userId) {
+  const fileUri = `data:${mimeType};base64,${buffer.toString('base64')}`;
+  return new Promise((resolve, reject) => {
+    cloudinary.uploader.upload(
+      fileUri,
+      {
+        folder: 'forkcast/meals',
+        resource_type: 'image',
+        quality: 'auto:eco',
+        public_id: `meal-${userId}-${Date.now()}`,
+        // Tiny blurred derivative for the LQIP placeholder — see
+        // lib/image-url.js. Rendered in the same round trip.
+        eager: PLACEHOLDER_EAGER,
+      },
+      (error, result) => {
+        if (error) reject(error);
+        else resolve(result);
+      }
+    );
+  });
+}
+
+async function uploadAndRecord({ userId, hash, buffer, mimeType }) {
+  const existing = await db.image_assets.findByHash(userId, hash);
+  if (existing) {
+    counters.deduplicated += 1;
+    return { ...existing, deduplicated: true };
+  }
+
+  const result = await uploadToCloudinary(buffer, mimeType, userId);
+  counters.transfers += 1;
+  const asset = {
+    url: result.secure_url,
+    publicId: result.public_id,
+    width: result.width,
+    height: result.height,
+    placeholder: await fetchPlaceholder(result),
+  };
+  if (!(await db.image_assets.record(userId, hash, { ...asset, bytes: buffer.length }))) {
+    counters.recordFailures += 1;
+    console.error(`[image-upload] hash not recorded for user ${userId}; this image won't be deduplicated`);
+  }
+  return asset;
+}
+
+/**
+ * Store a meal photo for `userId`, reusing an existing asset when the
+ * same bytes were uploaded before. Throws on Cloudinary failure (the
+ * route turns that into a 500, as before).
+ *
+ * @param {object} args
+ * @param {string} args.userId
+ * @param {File}   args.file   Already validated for size and MIME type.
+ * @returns {Promise<{ url, publicId, width, height, placeholder, deduplicated? }>}
+ */
+export async function storeMealImage({ userId, file }) {
+  const { hash, buffer } = await hashFileStream(file);
+  const key = `${userId}:${hash}`;
+
+  const pending = inFlight.get(key);
+  if (pending) {
+    const asset = await pending;
+    counters.deduplicated += 1;
+    return { ...asset, deduplicated: true };
+  }
+
+  const promise = uploadAndRecord({ userId, hash, buffer, mimeType: file.type });
+  inFlight.set(key, promise);
+  try {
+    return await promise;
+  } finally {
+    inFlight.delete(key);
+  }
+}
@@ -0,0 +1,108 @@
+/**
+ * lib/image-url.js
+ * ----------------
+ * Responsive-image helpers for meal photos. Pure functions, safe on the
+ * server and in the browser (deliberately does NOT import the
+ * `cloudinary` Node SDK — see lib/cloudinary.js for that).
+ *
+ * Meals store the original Cloudinary `secure_url`. Rendering that URL
+ * directly downloads the full-size upload for a 64 px calendar tile.
+ * Instead, every <img> asks for a named size and we splice a
+ * transformation segment in after `/upload/`:
+ *
+ *   https://res.cloudinary.com/<cloud>/image/upload/v123/forkcast/meals/x.jpg
+ *   https://res.cloudinary.com/<cloud>/image/upload/w_400,h_225,c_fill,g_auto,f_auto,q_auto/v123/forkcast/meals/x.jpg
+ *
+ * `srcSet` lists the 1×/2×/3× widths so high-DPR phones get a sharp
+ * image without desktop browsers paying for it. Non-Cloudinary URLs
+ * (AI placeholders, data: previews) pass through untouched.
+ *
+ * See docs/services/cloudinary.md → "Image transformations".
+ */
+
+/**
+ * Named render sizes, in CSS pixels. `sizes` is the <img sizes>
+ * attribute matching the layout that renders that size.
+ */
+export const MEAL_IMAGE_SIZES = {
+  // Discover / My Meals grid — aspect-video, 1–3 columns.
+  card: {
+    width: 400,
+    height: 225,
+    sizes: '(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw',
+  },
+  // Meal detail dialog hero (max-w-2xl, h-64).
+  detail: {
+    width: 672,
+    height: 256,
+    sizes: '(min-width: 768px) 672px, 100vw',
+  },
+  // Planner slot tile (w-16 h-16) and meal selector rows (w-12 h-12).
+  calendar: {
+    width: 64,
+    height: 64,
+    sizes: '64px',
+  },
+};
+
+const DPR_STEPS = [1, 2, 3];
+
+/** True for URLs we can transform on the fly. */
+export function isCloudinaryUrl(url) {
+  return typeof url === 'string' && /^https?:\/\/res\.cloudinary\.com\/[^/]+\/image\/upload\//.test(url);
+}
+
+/**
+ * Insert a transformation segment after `/upload/`. Returns the input
+ * unchanged for anything that isn't a Cloudinary delivery URL.
+ */
+export function transformImageUrl(url, params) {
+  if (!isCloudinaryUrl(url) || !params) return url;
+  return url.replace('/image/upload/', `/image/upload/${params}/`);
+}
+
+function sizeParams(width, height) {
+  const parts = [`w_${width}`];
+  if (height) parts.push(`h_${height}`, 'c_fill', 'g_auto');
+  else parts.push('c_limit');
+  parts.push('f_auto', 'q_auto');
+  return parts.join(',');
+}
+
+/**
+ * Build the attributes for a meal <img>:
+ *   { src, srcSet, sizes, width, height, loading, decoding }
+ *
+ * @param {string} url        Original image URL (meal.imageUrl)
+ * @param {'card'|'detail'|'calendar'} size
+ * @param {object} [opts]
+ * @param {boolean} [opts.eager] Above-the-fold images skip lazy loading.
+ */
+export function mealImageProps(url, size = 'card', { eager = false } = {}) {
+  const preset = MEAL_IMAGE_SIZES[size] || MEAL_IMAGE_SIZES.card;
+  const props = {
+    src: url,
+    width: preset.width,
+    height: preset.height,
+    loading: eager ? 'eager' : 'lazy',
+    decoding: 'async',
+  };
+  if (!isCloudinaryUrl(url)) return props;
+  props.src = transformImageUrl(url, sizeParams(preset.width, preset.height));
+  props.srcSet = DPR_STEPS
+    .map((dpr) => {
+      const w = preset.width * dpr;
+      const h = preset.height ? preset.height * dpr : null;
+      return `${transformImageUrl(url, sizeParams(w, h))} ${w}w`;
+    })
+    .join(', ');
+  props.sizes = preset.sizes;
+  return props;
+}
+
+/**
+ * Cloudinary transformation for the low-quality image placeholder
+ * (LQIP) computed at upload time. 16 px wide and blurred, it comes back
+ * as a few hundred bytes and is inlined on the meal row as a data URI.
+ */
+export const PLACEHOLDER_TRANSFORMATION = 'w_16,c_scale,e_blur:200,q_30,f_jpg';
@@ -0,0 +1,152 @@
+/**
+ * lib/ingredient-index.js
+ * -----------------------
+ * Pure helpers behind GET /api/meals/cookable ("what can I cook with
+ * what's in my pantry?"). No I/O here — the route fetches postings
+ * from the `meal_ingredient_tokens` table and hands them to these
+ * functions. See db/migrations/008_meal_ingredient_index.sql.
+ *
+ * The inverted index
+ * ------------------
+ * Each meal's free-text `ingredients` is split into lines (one
+ * ingredient per line — the same convention shopping-list/generate
+ * relies on) and every line is reduced to a set of normalised tokens:
+ *
+ *   "400g Cherry Tomatoes, halved"  →  { cherry, tomato }
+ *   "2 tbsp extra-virgin olive oil" →  { extra, virgin, olive, oil }
+ *
+ * One row per (meal, line, token) is stored, indexed by token, so
+ * "which lines mention tomato?" is an index lookup rather than an
+ * `ilike` scan over every meal.
+ *
+ * Coverage
+ * --------
+ * A pantry item covers a line when ALL of the item's tokens appear in
+ * that line: "olive oil" covers "2 tbsp extra-virgin olive oil" but not
+ * "1 tbsp vegetable oil"; "milk" covers "1 cup whole milk". A meal's
+ * score is covered lines / total lines.
+ */
+
+// Quantities, units and preparation words that say nothing about WHAT
+// the ingredient is. Kept deliberately short: a false stopword hides a
+// real ingredient, while a missing one only adds a harmless posting.
+const STOPWORDS = new Set([
+  // units
+  'g', 'gram', 'kg', 'kilo', 'mg', 'ml', 'l', 'litre', 'liter', 'dl', 'cl',
+  'oz', 'ounce', 'lb', 'pound', 'cup', 'tbsp', 'tablespoon', 'tsp', 'teaspoon',
+  'pinch', 'dash', 'handful', 'bunch', 'can', 'tin', 'jar', 'pack', 'packet',
+  'piece', 'slice', 'stick', 'sprig',
+  // preparation / size
+  'fresh', 'freshly', 'chopped', 'diced', 'minced', 'sliced', 'grated',
+  'crushed', 'peeled', 'halved', 'quartered', 'finely', 'roughly', 'thinly',
+  'large', 'small', 'medium', 'optional', 'taste', 'about', 'approx',
+  // glue
+  'a', 'an', 'and', 'or', 'of', 'to', 'for', 'the', 'with', 'plus', 'into', 'in',
+]);
+
+/**
+ * Normalise one word: lower-case, strip accents and non-letters, and
+ * fold the common English plurals so "tomatoes" and "tomato" meet.
+ * Returns '' for words that shouldn't be indexed.
+ */
+export function normalizeToken(word) {
+  let w = String(word || '')
+    .toLowerCase()
+    .normalize('NFD')
+    .replace(/[̀-ͯ]/g, '')
+    .replace(/[^a-z]/g, '');
+  if (w.length < 2) return '';
+  if (w.length > 4 && w.endsWith('ies')) w = `${w.slice(0, -3)}y`;        // berries → berry
+  else if (w.length > 4 && /(oes|ches|shes|xes|sses)$/.test(w)) w = w.slice(0, -2); // tomatoes → tomato
+  else if (w.length > 3 && w.endsWith('s') && !/(ss|us|is)$/.test(w)) w = w.slice(0, -1); // eggs → egg
+  return STOPWORDS.has(w) ? '' : w;
+}
+
+/** Unique normalised tokens of a line / pantry name, in first-seen order. */
+export function tokenize(text) {
+  const out = [];
+  const seen = new Set();
+  for (const raw of String(text || '').split(/[\s,;/()\-]+/)) {
+    const t = normalizeToken(raw);
+    if (t && !seen.has(t)) {
+      seen.add(t);
+      out.push(t);
+    }
+  }
+  return out;
+}
+
+/** Non-empty ingredient lines, trimmed, as the index numbers them. */
+export function ingredientLines(ingredientsText) {
+  return String(ingredientsText || '')
+    .split('\n')
+    .map((line) => line.replace(/^[-•*]\s*/, '').trim())
+    .filter(Boolean);
+}
+
+/**
+ * Index rows for one meal: `{ lineCount, rows: [{ lineNo, token }] }`.
+ * lineCount includes lines that produced no tokens ("salt to taste"
+ * still has `salt`, but "to taste" alone counts as an uncoverable line).
+ */
+export function indexIngredients(ingredientsText) {
+  const lines = ingredientLines(ingredientsText);
+  const rows = [];
+  lines.forEach((line, lineNo) => {
+    for (const token of tokenize(line)) rows.push({ lineNo, token });
+  });
+  return { lineCount: lines.length, rows };
+}
+
+/**
+ * Given the pantry (array of names) and the postings for the pantry's
+ * tokens (`[{ mealId, lineNo, token }]`), return Map mealId → Set of
+ * covered line numbers.
+ */
+export function coveredLines(pantryNames, postings) {
+  const byToken = new Map();
+  for (const { mealId, lineNo, token } of postings) {
+    let set = byToken.get(token);
+    if (!set) byToken.set(token, (set = new Set()));
+    set.add(`${mealId}:${lineNo}`);
+  }
+
+  const covered = new Map();
+  for (const name of pantryNames) {
+    const tokens = tokenize(name);
+    if (!tokens.length) continue;
+    // Intersect posting lists, smallest first.
+    const lists = tokens.map((t) => byToken.get(t));
+    if (lists.some((l) => !l)) continue;
+    lists.sort((a, b) => a.size - b.size);
+    for (const key of lists[0]) {
+      if (!lists.every((l) => l.has(key))) continue;
+      const sep = key.lastIndexOf(':');
+      const mealId = key.slice(0, sep);
+      let lines = covered.get(mealId);
+      if (!lines) covered.set(mealId, (lines = new Set()));
+      lines.add(Number(key.slice(sep + 1)));
+    }
+  }
+  return covered;
+}
+
+/**
+ * Rank meals by coverage. `lineCounts` is Map mealId → total lines.
+ * Returns `[{ mealId, coveredLines: number[], total, coverage }]`,
+ * best first (coverage, then absolute matches, then fewer lines).
+ */
+export function rankByCoverage(covered, lineCounts, { minCoverage = 0, limit = 20 } = {}) {
+  const ranked = [];
+  for (const [mealId, lines] of covered) {
+    const total = lineCounts.get(mealId);
+    if (!total) continue;
+    const coverage = Math.min(1, lines.size / total);
+    if (coverage < minCoverage) continue;
+    ranked.push({ mealId, coveredLines: [...lines].sort((a, b) => a - b), total, coverage });
+  }
+  ranked.sort((a, b) => (b.coverage - a.coverage)
+    || (b.coveredLines.length - a.coveredLines.length)
+    || (a.total - b.total));
+  return ranked.slice(0, limit);
+}
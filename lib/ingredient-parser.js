@@ -0,0 +1,239 @@
+/**
+ * lib/ingredient-parser.js
+ * ------------------------
+ * Turns a free-text ingredient line into structured data, once, when a
+ * meal is saved (POST / PUT /api/meals). Rows land in `meal_ingredients`
+ * (db/migrations/009_meal_ingredients.sql) so the shopping list, search
+ * and anything else that needs "how much of what" reads columns instead
+ * of re-splitting `meals.ingredients` on every request.
+ *
+ *   "400g spaghetti"                  → 400 g        spaghetti
+ *   "1 ½ cups whole milk"             → 1.5 cup      whole milk   (360 ml)
+ *   "2-3 garlic cloves, crushed"      → 3 clove      garlic       (note: crushed)
+ *   "Salt to taste"                   → –            salt         (note: to taste)
+ *
+ * `name` is the canonical form used for grouping and lookups: the same
+ * normalisation the cookable index uses (lib/ingredient-index.js), so
+ * "Cherry Tomatoes" and "cherry tomato" are one ingredient. `item` keeps
+ * the wording the user typed, for display.
+ *
+ * Bump PARSER_VERSION when parsing changes: meals parsed by an older
+ * version are picked up again by POST /api/meal-ingredients/backfill.
+ */
+
+// Explicit extension: tests/test_ingredient_parser.mjs imports this
+// module with plain node.
+import { tokenize } from './ingredient-index.js';
+
+export const PARSER_VERSION = 3;
+
+// Metric conversions use kitchen measures (5 ml teaspoon, 240 ml cup).
+// Count-like units (clove, can, …) have no metric equivalent.
+const UNITS = {
+  g:     { aliases: ['g', 'gr', 'gram', 'grams', 'gramme', 'grammes'], metric: 'g', factor: 1 },
+  kg:    { aliases: ['kg', 'kgs', 'kilo', 'kilos', 'kilogram', 'kilograms'], metric: 'g', factor: 1000 },
+  mg:    { aliases: ['mg', 'milligram', 'milligrams'], metric: 'g', factor: 0.001 },
+  oz:    { aliases: ['oz', 'ounce', 'ounces'], metric: 'g', factor: 28.35 },
+  lb:    { aliases: ['lb', 'lbs', 'pound', 'pounds'], metric: 'g', factor: 453.6 },
+  ml:    { aliases: ['ml', 'millilitre', 'millilitres', 'milliliter', 'milliliters'], metric: 'ml', factor: 1 },
+  cl:    { aliases: ['cl', 'centilitre', 'centilitres'], metric: 'ml', factor: 10 },
+  dl:    { aliases: ['dl', 'decilitre', 'decilitres'], metric: 'ml', factor: 100 },
+  l:     { aliases: ['l', 'litre', 'litres', 'liter', 'liters'], metric: 'ml', factor: 1000 },
+  tsp:   { aliases: ['tsp', 'tsps', 'teaspoon', 'teaspoons'], metric: 'ml', factor: 5 },
+  tbsp:  { aliases: ['tbsp', 'tbsps', 'tbs', 'tablespoon', 'tablespoons'], metric: 'ml', factor: 15 },
+  cup:   { aliases: ['cup', 'cups'], metric: 'ml', factor: 240 },
+  'fl oz': { aliases: ['floz', 'fl oz', 'fluid ounce', 'fluid ounces'], metric: 'ml', factor: 29.57 },
+  pint:  { aliases: ['pint', 'pints', 'pt'], metric: 'ml', factor: 568 },
+  pinch: { aliases: ['pinch', 'pinches'] },
+  dash:  { aliases: ['dash', 'dashes'] },
+  clove: { aliases: ['clove', 'cloves'] },
+  can:   { aliases: ['can', 'cans', 'tin', 'tins'] },
+  jar:   { aliases: ['jar', 'jars'] },
+  pack:  { aliases: ['pack', 'packs', 'packet', 'packets'] },
+  bunch: { aliases: ['bunch', 'bunches'] },
+  handful: { aliases: ['handful', 'handfuls'] },
+  slice: { aliases: ['slice', 'slices'] },
+  sprig: { aliases: ['sprig', 'sprigs'] },
+  stick: { aliases: ['stick', 'sticks'] },
+  piece: { aliases: ['piece', 'pieces', 'pc', 'pcs'] },
+};
+
+const UNIT_BY_ALIAS = new Map();
+for (const [unit, def] of Object.entries(UNITS)) {
+  for (const alias of def.aliases) UNIT_BY_ALIAS.set(alias, unit);
+}
+
+const VULGAR_FRACTIONS = {
+  '½': '1/2', '⅓': '1/3', '⅔': '2/3', '¼': '1/4', '¾': '3/4',
+  '⅕': '1/5', '⅛': '1/8', '⅜': '3/8', '⅝': '5/8', '⅞': '7/8',
+};
+const WORD_NUMBERS = { a: 1, an: 1, one: 1, two: 2, three: 3, four: 4, five: 5, six: 6, half: 0.5 };
+
+// Fractions first: "1/2" must not stop at the "1".
+const NUMBER = String.raw`\d+\s+\d+\/\d+|\d+\/\d+|\d+(?:[.,]\d+)?`;
+const QUANTITY_RE = new RegExp(`^(${NUMBER})(?:\\s*(?:-|–|to)\\s*(${NUMBER}))?\\s*`);
+
+function parseNumber(text) {
+  const parts = text.trim().split(/\s+/);
+  let total = 0;
+  for (const part of parts) {
+    if (part.includes('/')) {
+      const [num, den] = part.split('/').map(Number);
+      if (!den) return null;
+      total += num / den;
+    } else {
+      total += Number(part.replace(',', '.'));
+    }
+  }
+  return Number.isFinite(total) ? total : null;
+}
+
+function round(n, places = 2) {
+  const f = 10 ** places;
+  return Math.round(n * f) / f;
+}
+
+/**
+ * Parse one ingredient line. Returns
+ * `{ raw, quantity, unit, metricQuantity, metricUnit, item, name, note }`
+ * — every field but `raw` may be null, and `name` falls back to the
+ * lower-cased item text when normalisation leaves nothing.
+ */
+export function parseIngredientLine(line) {
+  const raw = String(line || '').replace(/^[-•*]\s*/, '').trim();
+  let rest = raw;
+  const notes = [];
+
+  // "(optional)", "(about 2)" … and everything after the first comma
+  // are preparation notes, not part of the name. A comma between two
+  // digits is a decimal comma ("1,5 l water"), not a note.
+  rest = rest.replace(/\(([^)]*)\)/g, (_, inner) => {
+    if (inner.trim()) notes.push(inner.trim());
+    return ' ';
+  });
+  const comma = rest.search(/(?<!\d),(?!\d)/);
+  if (comma !== -1) {
+    notes.push(rest.slice(comma + 1).trim());
+    rest = rest.slice(0, comma);
+  }
+
+  rest = rest
+    .replace(/(\d)?\s*([½⅓⅔¼¾⅕⅛⅜⅝⅞])/g, (_, whole, frac) => `${whole ? `${whole} ` : ''}${VULGAR_FRACTIONS[frac]}`)
+    .replace(/(\d)([a-zA-Z])/g, '$1 $2') // "400g" → "400 g"
+    .replace(/\s+/g, ' ')
+    .trim();
+
+  let quantity = null;
+  const match = rest.match(QUANTITY_RE);
+  if (match) {
+    // Ranges ("2-3") take the upper bound: it's a shopping quantity.
+    quantity = parseNumber(match[2] || match[1]);
+    rest = rest.slice(match[0].length);
+  } else {
+    const word = rest.split(' ')[0].toLowerCase();
+    if (word in WORD_NUMBERS && rest.includes(' ')) {
+      quantity = WORD_NUMBERS[word];
+      rest = rest.slice(word.length).trim();
+    }
+  }
+
+  let unit = null;
+  const words = rest.split(' ');
+  for (const take of [2, 1]) {
+    const candidate = words.slice(0, take).join(' ').toLowerCase().replace(/\.$/, '');
+    if (words.length > take && UNIT_BY_ALIAS.has(candidate)) {
+      unit = UNIT_BY_ALIAS.get(candidate);
+      rest = words.slice(take).join(' ');
+      break;
+    }
+  }
+  // "garlic cloves" → 1 clove of garlic, but only for count-like units
+  // ("3 Cup mushrooms" shouldn't lose its name).
+  if (!unit && quantity !== null && words.length > 1) {
+    const last = UNIT_BY_ALIAS.get(words[words.length - 1].toLowerCase());
+    if (last && !UNITS[last].metric) {
+      unit = last;
+      rest = words.slice(0, -1).join(' ');
+    }
+  }
+  // "a pinch of salt", "2 cans of tomatoes", "half an onion"
+  rest = rest.replace(/^(?:of|an?)\s+/i, '');
+  if (unit && quantity === null) quantity = 1;
+  rest = rest.replace(/\s+to taste$/i, () => {
+    notes.push('to taste');
+    return '';
+  });
+
+  const item = rest.trim() || null;
+  const name = item ? (tokenize(item).join(' ') || item.toLowerCase()) : null;
+
+  const def = unit ? UNITS[unit] : null;
+  const metricUnit = def?.metric && quantity !== null ? def.metric : null;
+  const metricQuantity = metricUnit ? round(quantity * def.factor) : null;
+
+  return {
+    raw,
+    quantity: quantity === null ? null : round(quantity, 3),
+    unit,
+    metricQuantity,
+    metricUnit,
+    item,
+    name,
+    note: notes.filter(Boolean).join('; ') || null,
+  };
+}
+
+/** Parse a meal's `ingredients` text; one entry per non-empty line, with `position`. */
+export function parseIngredients(ingredientsText) {
+  return String(ingredientsText || '')
+    .split('\n')
+    .map((line) => line.trim())
+    .filter(Boolean)
+    .map((line, position) => ({ position, ...parseIngredientLine(line) }))
+    .filter((row) => row.name);
+}
+
+function formatAmount(quantity, unit) {
+  if (unit === 'g' && quantity >= 1000) return `${round(quantity / 1000)} kg`;
+  if (unit === 'ml' && quantity >= 1000) return `${round(quantity / 1000)} l`;
+  const q = round(quantity);
+  if (!unit) return String(q);
+  return `${q} ${unit}`;
+}
+
+/**
+ * Combine parsed rows (from any number of meals) into one entry per
+ * canonical ingredient. Quantities are summed when they share a unit —
+ * metric ones after conversion, so "1 kg" + "200 g" is "1.2 kg" — and
+ * an ingredient needed in incompatible units lists each amount.
+ *
+ * Returns `[{ name, item, amounts: ['1.2 kg'], label, mealIds }]` in
+ * first-seen order; `label` is what goes on the shopping list.
+ */
+export function aggregateIngredients(rows) {
+  const groups = new Map();
+  for (const row of rows) {
+    if (!row.name) continue;
+    let group = groups.get(row.name);
+    if (!group) {
+      group = { name: row.name, item: row.item || row.name, totals: new Map(), mealIds: [] };
+      groups.set(row.name, group);
+    }
+    if (row.mealId && !group.mealIds.includes(row.mealId)) group.mealIds.push(row.mealId);
+    const unit = row.metricUnit || row.unit || '';
+    const quantity = row.metricUnit ? row.metricQuantity : row.quantity;
+    if (quantity === null || quantity === undefined) continue;
+    group.totals.set(unit, (group.totals.get(unit) || 0) + Number(quantity));
+  }
+
+  return [...groups.values()].map(({ name, item, totals, mealIds }) => {
+    const amounts = [...totals].map(([unit, quantity]) => formatAmount(quantity, unit || null));
+    return {
+      name,
+      item,
+      amounts,
+      label: amounts.length ? `${item} (${amounts.join(' + ')})` : item,
+      mealIds,
+    };
+  });
+}
@@ -0,0 +1,212 @@
+/**
+ * lib/llm-limiter.js
+ * ------------------
+ * Shared admission control for outbound LLM calls.
+ *
+ * A spike on the "suggest" button used to open one provider connection
+ * per click with no upper bound, which either piled up sockets or
+ * tripped the provider's rate limit (429) for everyone at once. Every
+ * call now goes through one process-wide limiter:
+ *
+ *   * At most LLM_MAX_IN_FLIGHT calls run concurrently (default 4).
+ *   * Callers beyond that wait in a BOUNDED queue (LLM_MAX_QUEUE,
+ *     default 32). A full queue rejects immediately with
+ *     LimiterBusyError so the route can answer 503 + Retry-After
+ *     instead of holding the request open.
+ *   * The queue is FAIR per user: each user has their own FIFO and
+ *     free slots are handed out round-robin across users, so one user
+ *     mashing the button can't starve everyone else. A single user may
+ *     hold at most LLM_MAX_QUEUE_PER_USER waiting entries (default 4).
+ *   * Each call gets a deadline (LLM_DEADLINE_MS, default 30 s) that
+ *     covers queueing AND the upstream request. The deadline is an
+ *     AbortSignal handed to the task, which passes it on to fetch().
+ *
+ * Metrics (`limiter.stats()`): in-flight, queue depth, admitted /
+ * rejected / timed-out counters and queue wait-time percentiles over
+ * the most recent calls.
+ */
+
+const WAIT_SAMPLES = 200;
+
+function envInt(name, fallback) {
+  const n = Number.parseInt(process.env[name] || '', 10);
+  return Number.isFinite(n) && n > 0 ? n : fallback;
+}
+
+/** Queue full (globally or for this user). `retryAfterSeconds` is a hint. */
+export class LimiterBusyError extends Error {
+  constructor(message, retryAfterSeconds) {
+    super(message);
+    this.name = 'LimiterBusyError';
+    this.retryAfterSeconds = retryAfterSeconds;
+  }
+}
+
+/** The deadline passed while queued or while the task was running. */
+export class DeadlineExceededError extends Error {
+  constructor(message = 'LLM request deadline exceeded') {
+    super(message);
+    this.name = 'DeadlineExceededError';
+  }
+}
+
+function percentile(sorted, p) {
+  if (!sorted.length) return 0;
+  return sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))];
+}
+
+export class LLMLimiter {
+  constructor({ maxInFlight = 4, maxQueue = 32, maxQueuePerUser = 4, deadlineMs = 30000 } = {}) {
+    this.maxInFlight = maxInFlight;
+    this.maxQueue = maxQueue;
+    this.maxQueuePerUser = maxQueuePerUser;
+    this.deadlineMs = deadlineMs;
+
+    this.inFlight = 0;
+    this.queued = 0;
+    // userId → array of waiters. Map order doubles as the round-robin
+    // rotation: a user whose waiter is served is moved to the back.
+    this.queues = new Map();
+
+    this.counters = { admitted: 0, rejected: 0, timedOut: 0, completed: 0 };
+    this.waits = [];
+  }
+
+  /**
+   * Wait for a slot. Resolves with `{ signal, release }`: `signal`
+   * aborts at the deadline (forward it to fetch()), `release()` frees
+   * the slot and is safe to call more than once. Use this directly when
+   * the slot must outlive a single promise (streaming); otherwise
+   * prefer run(). Rejects with LimiterBusyError / DeadlineExceededError.
+   */
+  async enter(userId, { deadlineMs = this.deadlineMs } = {}) {
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(new DeadlineExceededError()), deadlineMs);
+    try {
+      await this.acquire(userId || 'anonymous', controller.signal);
+    } catch (err) {
+      clearTimeout(timer);
+      throw err;
+    }
+    let released = false;
+    return {
+      signal: controller.signal,
+      release: () => {
+        if (released) return;
+        released = true;
+        clearTimeout(timer);
+        if (controller.signal.aborted) this.counters.timedOut += 1;
+        this.release();
+      },
+    };
+  }
+
+  /** Run `task(signal)` inside a slot; see enter(). */
+  async run(userId, task, options) {
+    const slot = await this.enter(userId, options);
+    try {
+      return await task(slot.signal);
+    } catch (err) {
+      if (slot.signal.aborted) throw new DeadlineExceededError();
+      throw err;
+    } finally {
+      slot.release();
+    }
+  }
+
+  acquire(userId, signal) {
+    const enqueuedAt = Date.now();
+    if (this.inFlight < this.maxInFlight && this.queued === 0) {
+      this.admit(enqueuedAt);
+      return Promise.resolve();
+    }
+
+    const userQueue = this.queues.get(userId) || [];
+    if (this.queued >= this.maxQueue || userQueue.length >= this.maxQueuePerUser) {
+      this.counters.rejected += 1;
+      throw new LimiterBusyError(
+        this.queued >= this.maxQueue ? 'LLM queue is full' : 'Too many pending suggestions for this user',
+        this.retryAfterHint()
+      );
+    }
+
+    return new Promise((resolve, reject) => {
+      const waiter = { resolve, reject, enqueuedAt };
+      const onAbort = () => {
+        const q = this.queues.get(userId);
+        const i = q ? q.indexOf(waiter) : -1;
+        if (i === -1) return;
+        q.splice(i, 1);
+        if (!q.length) this.queues.delete(userId);
+        this.queued -= 1;
+        this.counters.timedOut += 1;
+        reject(new DeadlineExceededError('Timed out waiting for an LLM slot'));
+      };
+      waiter.resolve = () => {
+        signal.removeEventListener('abort', onAbort);
+        resolve();
+      };
+      signal.addEventListener('abort', onAbort, { once: true });
+
+      userQueue.push(waiter);
+      this.queues.set(userId, userQueue);
+      this.queued += 1;
+    });
+  }
+
+  release() {
+    this.inFlight -= 1;
+    this.counters.completed += 1;
+    // Round-robin: take the head of the first user's queue, then move
+    // that user to the back of the rotation.
+    const next = this.queues.entries().next();
+    if (next.done) return;
+    const [userId, q] = next.value;
+    const waiter = q.shift();
+    this.queues.delete(userId);
+    if (q.length) this.queues.set(userId, q);
+    this.queued -= 1;
+    this.admit(waiter.enqueuedAt);
+    waiter.resolve();
+  }
+
+  admit(enqueuedAt) {
+    this.inFlight += 1;
+    this.counters.admitted += 1;
+    this.waits.push(Date.now() - enqueuedAt);
+    if (this.waits.length > WAIT_SAMPLES) this.waits.shift();
+  }
+
+  /** Rough seconds until a slot frees up, for Retry-After. */
+  retryAfterHint() {
+    const sorted = [...this.waits].sort((a, b) => a - b);
+    const p50 = percentile(sorted, 0.5);
+    return Math.max(1, Math.ceil(p50 / 1000) || 1);
+  }
+
+  stats() {
+    const sorted = [...this.waits].sort((a, b) => a - b);
+    return {
+      inFlight: this.inFlight,
+      queueDepth: this.queued,
+      queuedUsers: this.queues.size,
+      maxInFlight: this.maxInFlight,
+      maxQueue: this.maxQueue,
+      ...this.counters,
+      waitMs: {
+        p50: percentile(sorted, 0.5),
+        p95: percentile(sorted, 0.95),
+        max: sorted.length ? sorted[sorted.length - 1] : 0,
+        samples: sorted.length,
+      },
+    };
+  }
+}
+
+/** Process-wide limiter shared by every MealSuggestionService. */
+export const llmLimiter = new LLMLimiter({
+  maxInFlight: envInt('LLM_MAX_IN_FLIGHT', 4),
+  maxQueue: envInt('LLM_MAX_QUEUE', 32),
+  maxQueuePerUser: envInt('LLM_MAX_QUEUE_PER_USER', 4),
+  deadlineMs: envInt('LLM_DEADLINE_MS', 30000),
+});
@@ -1,15 +1,32 @@
 // Simple LLM service using Emergent AI API
-export class MealSuggestionService {
-  constructor(apiKey) {
-    this.apiKey = apiKey;
-    this.baseUrl = process.env.EMERGENT_LLM_BASE_URL || 'https://api.emergentai.com/v1';
-  }
+//
+// One instance per API key is shared across requests (see
+// getMealSuggestionService). Two ways to call it:
+//   * getMealSuggestions()    — resolves with the full text
+//   * streamMealSuggestions() — async generator yielding text deltas as
+//                               the provider streams them (OpenAI-style
+//                               `stream: true` SSE), so the route can
+//                               forward tokens to the browser.
+//
+// Every real (non-mock) call runs inside the shared llmLimiter slot for
+// the calling user, with the limiter's deadline wired into fetch() and
+// 429/503 answers retried with backoff — see lib/llm-limiter.js.
 
-  async getMealSuggestions(prompt, options = {}) {
-    try {
-      // For testing purposes, return a mock response if the API key is not valid
-      if (!this.apiKey || this.apiKey.startsWith('sk-emergent-')) {
-        return `Here are some delicious meal suggestions based on your request:
+import { llmLimiter, LimiterBusyError, DeadlineExceededError } from './llm-limiter';
+
+const SYSTEM_PROMPT = `You are a culinary expert AI assistant for Forkcast, a meal planning app. Your role is to suggest delicious, creative meal ideas based on user preferences, dietary restrictions, available ingredients, or desired cuisines. 
+
+Please provide 3-5 specific meal suggestions in a clear, organized format. For each suggestion, include:
+- Meal name
+- Brief description (1-2 sentences)
+- Key ingredients
+- Estimated cooking time
+- Difficulty level (Easy/Medium/Hard)
+
+Format your response as a numbered list with clear sections for each meal.`;
+
+// Returned when no real key is configured (local dev / tests).
+const MOCK_SUGGESTIONS = `Here are some delicious meal suggestions based on your request:
 
 1. **Grilled Chicken with Quinoa Salad**
    - Description: A protein-packed, healthy meal perfect for dinner
@@ -30,51 +47,177 @@ export class MealSuggestionService {
    - Difficulty: Easy
 
 These suggestions are tailored to be healthy, quick to prepare, and use common ingredients. Each meal provides balanced nutrition and can be customized based on your preferences.`;
-      }
 
-      const systemPrompt = `You are a culinary expert AI assistant for Forkcast, a meal planning app. Your role is to suggest delicious, creative meal ideas based on user preferences, dietary restrictions, available ingredients, or desired cuisines. 
+const MODEL = 'gpt-4o-mini';
 
-Please provide 3-5 specific meal suggestions in a clear, organized format. For each suggestion, include:
-- Meal name
-- Brief description (1-2 sentences)
-- Key ingredients
-- Estimated cooking time
-- Difficulty level (Easy/Medium/Hard)
+// 429 / 503 handling: retry up to MAX_RETRIES times, waiting for the
+// provider's Retry-After when it sends one, else exponential backoff
+// with jitter. Never sleeps past the caller's deadline.
+const MAX_RETRIES = 2;
+const BASE_BACKOFF_MS = 500;
+const MAX_BACKOFF_MS = 8000;
 
-Format your response as a numbered list with clear sections for each meal.`;
+function retryDelayMs(response, attempt) {
+  const header = Number.parseFloat(response.headers.get('retry-after') || '');
+  if (Number.isFinite(header) && header >= 0) return Math.min(header * 1000, MAX_BACKOFF_MS);
+  const exp = Math.min(BASE_BACKOFF_MS * 2 ** attempt, MAX_BACKOFF_MS);
+  return exp / 2 + Math.random() * (exp / 2);
+}
 
-      const userPrompt = this.formatPrompt(prompt, options);
-
-      const response = await fetch(`${this.baseUrl}/chat/completions`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.apiKey}`,
-        },
-        body: JSON.stringify({
-          model: 'gpt-4o-mini',
-          messages: [
-            { role: 'system', content: systemPrompt },
-            { role: 'user', content: userPrompt }
-          ],
-          max_tokens: 1000,
-          temperature: 0.7,
-        }),
-      });
+function sleep(ms, signal) {
+  return new Promise((resolve, reject) => {
+    if (signal.aborted) return reject(new DeadlineExceededError());
+    const timer = setTimeout(() => {
+      signal.removeEventListener('abort', onAbort);
+      resolve();
+    }, ms);
+    const onAbort = () => {
+      clearTimeout(timer);
+      reject(new DeadlineExceededError());
+    };
+    signal.addEventListener('abort', onAbort, { once: true });
+  });
+}
+
+/** Limiter errors go straight to the route, which maps them to 503/504. */
+function isLimiterError(error) {
+  return error instanceof LimiterBusyError || error instanceof DeadlineExceededError;
+}
+
+export class MealSuggestionService {
+  constructor(apiKey) {
+    this.apiKey = apiKey;
+    this.baseUrl = process.env.EMERGENT_LLM_BASE_URL || 'https://api.emergentai.com/v1';
+  }
+
+  // For testing purposes, return a mock response if the API key is not valid
+  usesMock() {
+    return !this.apiKey || this.apiKey.startsWith('sk-emergent-');
+  }
+
+  buildRequest(prompt, options, { stream = false } = {}) {
+    return {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${this.apiKey}`,
+      },
+      body: JSON.stringify({
+        model: MODEL,
+        messages: [
+          { role: 'system', content: SYSTEM_PROMPT },
+          { role: 'user', content: this.formatPrompt(prompt, options) }
+        ],
+        max_tokens: 1000,
+        temperature: 0.7,
+        ...(stream ? { stream: true } : {}),
+      }),
+    };
+  }
 
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.error?.message || 'Failed to get AI response');
+  /**
+   * POST chat/completions under `signal`, retrying 429/503. Returns the
+   * final Response (ok or not); throws DeadlineExceededError if the
+   * deadline passes first.
+   */
+  async fetchCompletion(init, signal) {
+    for (let attempt = 0; ; attempt += 1) {
+      let response;
+      try {
+        response = await fetch(`${this.baseUrl}/chat/completions`, { ...init, signal });
+      } catch (error) {
+        if (signal.aborted) throw new DeadlineExceededError();
+        throw error;
       }
+      const retryable = response.status === 429 || response.status === 503;
+      if (!retryable || attempt >= MAX_RETRIES) return response;
+      const delay = retryDelayMs(response, attempt);
+      console.warn(`[llm] ${response.status} from provider; retry ${attempt + 1}/${MAX_RETRIES} in ${Math.round(delay)}ms`);
+      await response.body?.cancel().catch(() => {});
+      await sleep(delay, signal);
+    }
+  }
+
+  async getMealSuggestions(prompt, options = {}, { userId } = {}) {
+    try {
+      if (this.usesMock()) return MOCK_SUGGESTIONS;
+
+      return await llmLimiter.run(userId, async (signal) => {
+        const response = await this.fetchCompletion(this.buildRequest(prompt, options), signal);
 
-      const data = await response.json();
-      return data.choices?.[0]?.message?.content || 'No suggestions available';
+        if (!response.ok) {
+          const errorData = await response.json().catch(() => ({}));
+          throw new Error(errorData.error?.message || 'Failed to get AI response');
+        }
+
+        const data = await response.json();
+        return data.choices?.[0]?.message?.content || 'No suggestions available';
+      });
     } catch (error) {
+      if (isLimiterError(error)) throw error;
       console.error('Error getting meal suggestions:', error);
       throw new Error('Failed to generate meal suggestions: ' + error.message);
     }
   }
 
+  /**
+   * Yield the suggestion text in pieces as the provider produces them.
+   * Errors before the first token throw like getMealSuggestions; the
+   * caller decides what to do with a stream that dies midway. The
+   * limiter slot is held until the stream ends (or is abandoned).
+   */
+  async *streamMealSuggestions(prompt, options = {}, { userId } = {}) {
+    if (this.usesMock()) {
+      // Line by line, so the mock exercises the same client path.
+      for (const line of MOCK_SUGGESTIONS.split(/(?<=\n)/)) yield line;
+      return;
+    }
+
+    const slot = await llmLimiter.enter(userId);
+    try {
+      yield* this.readCompletionStream(prompt, options, slot.signal);
+    } catch (error) {
+      if (slot.signal.aborted) throw new DeadlineExceededError();
+      throw error;
+    } finally {
+      slot.release();
+    }
+  }
+
+  async *readCompletionStream(prompt, options, signal) {
+    const response = await this.fetchCompletion(this.buildRequest(prompt, options, { stream: true }), signal);
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error('Failed to generate meal suggestions: ' + (errorData.error?.message || 'Failed to get AI response'));
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffered += decoder.decode(value, { stream: true });
+      // SSE events are separated by a blank line; keep the trailing
+      // partial event for the next chunk.
+      const events = buffered.split(/\r?\n\r?\n/);
+      buffered = events.pop();
+      for (const event of events) {
+        for (const line of event.split(/\r?\n/)) {
+          if (!line.startsWith('data:')) continue;
+          const payload = line.slice(5).trim();
+          if (payload === '[DONE]') return;
+          try {
+            const delta = JSON.parse(payload).choices?.[0]?.delta?.content;
+            if (delta) yield delta;
+          } catch {
+            // Keep-alives and malformed lines are skipped.
+          }
+        }
+      }
+    }
+  }
+
   formatPrompt(basePrompt, options) {
     const { ingredients, dietary, cuisine, mealType } = options;
     
@@ -100,4 +243,16 @@ Format your response as a numbered list with clear sections for each meal.`;
     
     return formattedPrompt;
   }
-}
\ No newline at end of file
+}
+
+const services = new Map();
+
+/** Shared MealSuggestionService for `apiKey` (one per key, per process). */
+export function getMealSuggestionService(apiKey) {
+  let service = services.get(apiKey);
+  if (!service) {
+    service = new MealSuggestionService(apiKey);
+    services.set(apiKey, service);
+  }
+  return service;
+}
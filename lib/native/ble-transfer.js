@@ -0,0 +1,501 @@
+/**
+ * lib/native/ble-transfer.js
+ * --------------------------
+ * Chunked, resumable framing for the BLE plan transfer.
+ *
+ * The v1 transfer put the whole plan in one readable characteristic.
+ * The central then pulled it with ATT long reads, one round trip per
+ * (MTU - 1) bytes. Nothing detected a bad chunk, and a dropped
+ * connection meant starting again. This module is the protocol that
+ * replaces it. It is transport-agnostic (frames in, frames out), so
+ * lib/native/ble.js wires it to the Capacitor / Web Bluetooth APIs and
+ * tests/test_ble_transfer.mjs drives it over a simulated lossy link.
+ *
+ * Two characteristics:
+ *   data    (sender → receiver, notify)                 START, DATA
+ *   control (receiver → sender, write without response) HELLO, ACK,
+ *                                                       NAK, DONE
+ *
+ *   receiver                               sender
+ *      │ HELLO(mtu, transferId, resumeSeq) →   │
+ *      │ ← START(transferId, length, chunkSize, count, crc32)
+ *      │ ← DATA(seq, payload, crc16)  × window │  streamed, no per-chunk round trip
+ *      │ ACK(nextSeq)  every few chunks     →  │  cumulative; slides the window
+ *      │ NAK(nextSeq)  on gap / bad CRC     →  │  go-back-N from nextSeq
+ *      │ DONE(status)  after whole-payload CRC-32 check
+ *
+ * Chunk size is negotiated: the receiver sends its ATT MTU in HELLO
+ * and every DATA frame fills MTU - 3 (ATT header) bytes. The sender
+ * keeps up to `window` unacknowledged chunks in flight. If no ACK
+ * arrives within `ackTimeoutMs` it rewinds to the last acknowledged
+ * chunk.
+ *
+ * Resume: transferId is the payload's CRC-32. A receiver that lost the
+ * link keeps `resumeState()` and sends it in its next HELLO. If the
+ * sender is still offering the same payload it continues from the
+ * last acknowledged chunk; otherwise the receiver starts over.
+ *
+ * Every frame ends in a CRC-16 of the bytes before it, so a corrupted
+ * ACK can't move the sender's window. All integers are big-endian.
+ */
+
+export const PROTOCOL_VERSION = 1;
+export const DEFAULT_MTU = 23;          // BLE minimum; every stack supports it
+export const MAX_MTU = 517;
+
+const ATT_HEADER = 3;
+const DATA_OVERHEAD = 5;                // type + seq(2) + crc16(2)
+const CRC_BYTES = 2;
+
+const T_HELLO = 0x01;
+const T_START = 0x02;
+const T_DATA = 0x03;
+const T_ACK = 0x04;
+const T_NAK = 0x05;
+const T_DONE = 0x06;
+
+const DONE_OK = 0;
+const DONE_CRC_MISMATCH = 1;
+
+// -------------------------------------------------------------------------
+// Checksums
+// -------------------------------------------------------------------------
+
+/** CRC-16/CCITT-FALSE over `bytes[start, end)`. */
+export function crc16(bytes, start = 0, end = bytes.length) {
+  let crc = 0xffff;
+  for (let i = start; i < end; i++) {
+    crc ^= bytes[i] << 8;
+    for (let b = 0; b < 8; b++) crc = crc & 0x8000 ? ((crc << 1) ^ 0x1021) & 0xffff : (crc << 1) & 0xffff;
+  }
+  return crc;
+}
+
+let CRC32_TABLE = null;
+
+/** CRC-32 (IEEE 802.3), as an unsigned 32-bit number. */
+export function crc32(bytes) {
+  if (!CRC32_TABLE) {
+    CRC32_TABLE = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+      let c = n;
+      for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+      CRC32_TABLE[n] = c >>> 0;
+    }
+  }
+  let crc = 0xffffffff;
+  for (let i = 0; i < bytes.length; i++) crc = CRC32_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+  return (crc ^ 0xffffffff) >>> 0;
+}
+
+// -------------------------------------------------------------------------
+// Frames
+// -------------------------------------------------------------------------
+
+/** Allocate a frame with `size` body bytes plus the trailing CRC-16. */
+function frame(type, size) {
+  const bytes = new Uint8Array(size + CRC_BYTES);
+  bytes[0] = type;
+  return [bytes, new DataView(bytes.buffer)];
+}
+
+function seal(bytes) {
+  const end = bytes.length - CRC_BYTES;
+  new DataView(bytes.buffer).setUint16(end, crc16(bytes, 0, end));
+  return bytes;
+}
+
+export function helloFrame(mtu, transferId = 0, resumeSeq = 0) {
+  const [bytes, view] = frame(T_HELLO, 10);
+  view.setUint8(1, PROTOCOL_VERSION);
+  view.setUint16(2, mtu);
+  view.setUint32(4, transferId);
+  view.setUint16(8, resumeSeq);
+  return seal(bytes);
+}
+
+function startFrame(transferId, totalLength, chunkSize, chunkCount, checksum) {
+  const [bytes, view] = frame(T_START, 18);
+  view.setUint8(1, PROTOCOL_VERSION);
+  view.setUint32(2, transferId);
+  view.setUint32(6, totalLength);
+  view.setUint16(10, chunkSize);
+  view.setUint16(12, chunkCount);
+  view.setUint32(14, checksum);
+  return seal(bytes);
+}
+
+function dataFrame(seq, chunk) {
+  const [bytes, view] = frame(T_DATA, 3 + chunk.length);
+  view.setUint16(1, seq);
+  bytes.set(chunk, 3);
+  return seal(bytes);
+}
+
+function seqFrame(type, transferId, seq) {
+  const [bytes, view] = frame(type, 7);
+  view.setUint32(1, transferId);
+  view.setUint16(5, seq);
+  return seal(bytes);
+}
+
+function doneFrame(transferId, status) {
+  const [bytes, view] = frame(T_DONE, 6);
+  view.setUint32(1, transferId);
+  view.setUint8(5, status);
+  return seal(bytes);
+}
+
+/**
+ * Parse any frame; returns null for anything malformed. A DATA frame
+ * with a bad CRC comes back with `ok: false` (the receiver NAKs it);
+ * any other frame with a bad CRC is dropped.
+ */
+export function parseFrame(bytes) {
+  if (!bytes || bytes.length < 1 + CRC_BYTES) return null;
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const end = bytes.length - CRC_BYTES;
+  const ok = view.getUint16(end) === crc16(bytes, 0, end);
+  if (!ok && bytes[0] !== T_DATA) return null;
+  try {
+    switch (bytes[0]) {
+      case T_HELLO:
+        return { type: 'hello', version: view.getUint8(1), mtu: view.getUint16(2),
+          transferId: view.getUint32(4), resumeSeq: view.getUint16(8) };
+      case T_START:
+        return { type: 'start', version: view.getUint8(1), transferId: view.getUint32(2),
+          totalLength: view.getUint32(6), chunkSize: view.getUint16(10),
+          chunkCount: view.getUint16(12), checksum: view.getUint32(14) };
+      case T_DATA:
+        if (bytes.length < DATA_OVERHEAD) return null;
+        return { type: 'data', seq: view.getUint16(1), chunk: bytes.subarray(3, end), ok };
+      case T_ACK:
+      case T_NAK:
+        return { type: bytes[0] === T_ACK ? 'ack' : 'nak', transferId: view.getUint32(1), seq: view.getUint16(5) };
+      case T_DONE:
+        return { type: 'done', transferId: view.getUint32(1), ok: view.getUint8(5) === DONE_OK };
+      default:
+        return null;
+    }
+  } catch {
+    return null; // RangeError: frame shorter than its type needs
+  }
+}
+
+/** Payload bytes per DATA frame for a given ATT MTU. */
+export function chunkSizeFor(mtu) {
+  const clamped = Math.min(MAX_MTU, Math.max(DEFAULT_MTU, mtu || DEFAULT_MTU));
+  return clamped - ATT_HEADER - DATA_OVERHEAD;
+}
+
+const defaultTimers = {
+  setTimeout: (fn, ms) => setTimeout(fn, ms),
+  clearTimeout: (id) => clearTimeout(id),
+};
+
+function deferred() {
+  let resolve;
+  let reject;
+  const promise = new Promise((res, rej) => { resolve = res; reject = rej; });
+  return { promise, resolve, reject };
+}
+
+// -------------------------------------------------------------------------
+// Sender (peripheral side)
+// -------------------------------------------------------------------------
+
+/**
+ * Streams `payload` to whichever receiver says HELLO. Feed it every
+ * control-characteristic write with handleControl(); it calls
+ * `sendFrame(bytes)` for each notification to push. `done` resolves
+ * when the receiver confirms the whole-payload CRC.
+ */
+export class ChunkSender {
+  constructor(payload, {
+    sendFrame,
+    window = 16,
+    ackTimeoutMs = 500,
+    maxTimeouts = 10,
+    timers = defaultTimers,
+  }) {
+    this.payload = payload;
+    this.transferId = crc32(payload);
+    this.sendFrame = sendFrame;
+    this.window = window;
+    this.ackTimeoutMs = ackTimeoutMs;
+    this.maxTimeouts = maxTimeouts;
+    this.timers = timers;
+
+    this.chunkSize = 0;
+    this.chunkCount = 0;
+    this.base = 0;        // first unacknowledged chunk
+    this.next = 0;        // next chunk to send
+    this.timeouts = 0;
+    this.timer = null;
+    this.heard = false;   // any ACK/NAK since START, i.e. START arrived
+    this.finished = false;
+    this.stats = { framesSent: 0, bytesSent: 0, retransmitted: 0, resumedFrom: 0 };
+    this.result = deferred();
+    this.done = this.result.promise;
+  }
+
+  handleControl(bytes) {
+    if (this.finished) return;
+    const msg = parseFrame(bytes);
+    if (!msg) return;
+    if (msg.type === 'hello') return this.onHello(msg);
+    if (msg.transferId !== this.transferId || !this.chunkCount) return;
+    this.heard = true;
+    if (msg.type === 'ack') {
+      if (msg.seq > this.base) {
+        this.base = Math.min(msg.seq, this.chunkCount);
+        this.next = Math.max(this.next, this.base);
+        this.timeouts = 0;
+      }
+      this.pump();
+    } else if (msg.type === 'nak') {
+      this.rewind(msg.seq);
+    } else if (msg.type === 'done') {
+      this.finish(msg.ok ? null : new Error('Receiver rejected the plan checksum'));
+    }
+  }
+
+  onHello({ mtu, transferId, resumeSeq }) {
+    this.chunkSize = chunkSizeFor(mtu);
+    this.chunkCount = Math.max(1, Math.ceil(this.payload.length / this.chunkSize));
+    const resume = transferId === this.transferId && resumeSeq < this.chunkCount ? resumeSeq : 0;
+    this.base = resume;
+    this.next = resume;
+    this.timeouts = 0;
+    this.heard = false;
+    this.stats.resumedFrom = resume;
+    this.emitStart();
+    this.pump();
+  }
+
+  emitStart() {
+    this.emit(startFrame(this.transferId, this.payload.length, this.chunkSize, this.chunkCount, this.transferId));
+  }
+
+  rewind(seq) {
+    if (seq < this.next) this.stats.retransmitted += this.next - seq;
+    this.base = Math.max(this.base, Math.min(seq, this.chunkCount));
+    this.next = this.base;
+    this.pump();
+  }
+
+  pump() {
+    while (this.next < this.chunkCount && this.next < this.base + this.window) {
+      const from = this.next * this.chunkSize;
+      this.emit(dataFrame(this.next, this.payload.subarray(from, from + this.chunkSize)));
+      this.next += 1;
+    }
+    this.arm();
+  }
+
+  arm() {
+    if (this.timer !== null) this.timers.clearTimeout(this.timer);
+    this.timer = this.timers.setTimeout(() => this.onTimeout(), this.ackTimeoutMs);
+  }
+
+  onTimeout() {
+    this.timer = null;
+    if (this.finished) return;
+    this.timeouts += 1;
+    if (this.timeouts > this.maxTimeouts) {
+      this.finish(new Error('Bluetooth transfer stalled (no acknowledgement from receiver)'));
+      return;
+    }
+    // Silence since START: it may have been lost, and the receiver
+    // ignores chunks until it has one.
+    if (!this.heard) this.emitStart();
+    // Everything sent but DONE lost: resend the last chunk so the
+    // receiver repeats its DONE.
+    this.rewind(this.base >= this.chunkCount ? this.chunkCount - 1 : this.base);
+  }
+
+  emit(bytes) {
+    this.stats.framesSent += 1;
+    this.stats.bytesSent += bytes.length;
+    Promise.resolve()
+      .then(() => this.sendFrame(bytes))
+      .catch((err) => this.finish(err));
+  }
+
+  finish(err) {
+    if (this.finished) return;
+    this.finished = true;
+    if (this.timer !== null) this.timers.clearTimeout(this.timer);
+    if (err) this.result.reject(err);
+    else this.result.resolve(this.stats);
+  }
+
+  /** Stop timers without settling (e.g. connection dropped; a new HELLO may follow). */
+  pause() {
+    if (this.timer !== null) this.timers.clearTimeout(this.timer);
+    this.timer = null;
+  }
+}
+
+// -------------------------------------------------------------------------
+// Receiver (central side)
+// -------------------------------------------------------------------------
+
+/**
+ * Reassembles a transfer. Call start() once notifications are enabled,
+ * feed every data-characteristic notification to handleData(), and
+ * await `done` for the payload bytes. `sendControl(bytes)` writes to
+ * the control characteristic. Pass a previous receiver's
+ * resumeState() as `resume` to continue an interrupted transfer.
+ */
+export class ChunkReceiver {
+  constructor({
+    sendControl,
+    mtu = DEFAULT_MTU,
+    resume = null,
+    ackEvery = 4,
+    helloTimeoutMs = 1000,
+    maxHellos = 5,
+    timers = defaultTimers,
+  }) {
+    this.sendControl = sendControl;
+    this.mtu = mtu;
+    this.ackEvery = ackEvery;
+    this.helloTimeoutMs = helloTimeoutMs;
+    this.maxHellos = maxHellos;
+    this.timers = timers;
+
+    this.transferId = resume?.transferId || 0;
+    this.nextSeq = resume?.nextSeq || 0;
+    this.chunks = resume?.chunks ? [...resume.chunks] : [];
+    this.meta = null;
+    this.naked = -1;        // seq we last NAKed, so a burst of out-of-order frames costs one NAK
+    this.hellos = 0;
+    this.helloTimer = null;
+    this.complete = false;
+    this.failed = false;
+    this.stats = { framesReceived: 0, badCrc: 0, outOfOrder: 0, duplicates: 0, naks: 0, acks: 0 };
+    this.result = deferred();
+    this.done = this.result.promise;
+  }
+
+  start() {
+    this.sendHello();
+  }
+
+  sendHello() {
+    if (this.meta || this.failed) return;
+    this.hellos += 1;
+    if (this.hellos > this.maxHellos) {
+      this.fail(new Error('Sender did not answer'));
+      return;
+    }
+    this.control(helloFrame(this.mtu, this.transferId, this.nextSeq));
+    this.helloTimer = this.timers.setTimeout(() => this.sendHello(), this.helloTimeoutMs);
+  }
+
+  handleData(bytes) {
+    if (this.failed) return;
+    const msg = parseFrame(bytes);
+    if (!msg) return;
+    this.stats.framesReceived += 1;
+
+    if (msg.type === 'start') return this.onStart(msg);
+    if (msg.type !== 'data') return;
+    // START was lost: the HELLO timer asks again (idempotent on the
+    // sender), so chunks until then are ignored.
+    if (!this.meta) return;
+    if (this.complete) {
+      // Our DONE was lost and the sender is retrying.
+      this.control(doneFrame(this.transferId, DONE_OK));
+      return;
+    }
+    if (!msg.ok) {
+      this.stats.badCrc += 1;
+      this.nak();
+      return;
+    }
+    if (msg.seq < this.nextSeq) {
+      this.stats.duplicates += 1;
+      this.ack(); // our ACK was probably lost
+      return;
+    }
+    if (msg.seq > this.nextSeq) {
+      this.stats.outOfOrder += 1;
+      this.nak();
+      return;
+    }
+
+    this.chunks[this.nextSeq] = msg.chunk.slice();
+    this.nextSeq += 1;
+    if (this.nextSeq === this.meta.chunkCount) {
+      this.assemble();
+    } else if (this.nextSeq % this.ackEvery === 0) {
+      this.ack();
+    }
+  }
+
+  onStart(meta) {
+    this.timers.clearTimeout(this.helloTimer);
+    if (meta.version > PROTOCOL_VERSION) {
+      this.fail(new Error('The sending device uses a newer Forkcast. Please update the app.'));
+      return;
+    }
+    if (meta.transferId !== this.transferId) {
+      // New (or changed) plan: any resume state is worthless.
+      this.transferId = meta.transferId;
+      this.nextSeq = 0;
+      this.chunks = [];
+    }
+    this.meta = meta;
+    this.naked = -1;
+  }
+
+  assemble() {
+    const payload = new Uint8Array(this.meta.totalLength);
+    let offset = 0;
+    for (let i = 0; i < this.meta.chunkCount; i++) {
+      payload.set(this.chunks[i], offset);
+      offset += this.chunks[i].length;
+    }
+    if (offset !== this.meta.totalLength || crc32(payload) !== this.meta.checksum) {
+      this.control(doneFrame(this.transferId, DONE_CRC_MISMATCH));
+      this.fail(new Error('Plan checksum mismatch'));
+      return;
+    }
+    this.complete = true;
+    this.control(doneFrame(this.transferId, DONE_OK));
+    this.result.resolve(payload);
+  }
+
+  ack() {
+    this.stats.acks += 1;
+    this.control(seqFrame(T_ACK, this.transferId, this.nextSeq));
+  }
+
+  nak() {
+    if (this.naked === this.nextSeq) return;
+    this.naked = this.nextSeq;
+    this.stats.naks += 1;
+    this.control(seqFrame(T_NAK, this.transferId, this.nextSeq));
+  }
+
+  control(bytes) {
+    Promise.resolve()
+      .then(() => this.sendControl(bytes))
+      .catch(() => { /* lost write: timeouts / NAKs recover */ });
+  }
+
+  fail(err) {
+    if (this.failed || this.complete) return;
+    this.failed = true;
+    this.timers.clearTimeout(this.helloTimer);
+    this.result.reject(err);
+  }
+
+  /** Everything needed to resume after a disconnect (see ChunkReceiver `resume`). */
+  resumeState() {
+    if (!this.transferId || this.complete) return null;
+    return { transferId: this.transferId, nextSeq: this.nextSeq, chunks: this.chunks.slice(0, this.nextSeq) };
+  }
+}
@@ -25,9 +25,21 @@
  *
  * Both sides use the same well-known UUIDs (below) so a Forkcast
  * device on any platform can find and talk to any other.
+ *
+ * TRANSFER
+ * ========
+ * When the peripheral plugin can push notifications, the plan is
+ * streamed with the chunked protocol in ./ble-transfer.js. Chunks are
+ * sized to the negotiated MTU and each carries a sequence number and a
+ * CRC. The receiver acknowledges with write-without-response, and a
+ * dropped link resumes from the last acknowledged chunk. The single
+ * readable characteristic stays alongside it, so older receivers (and
+ * senders without notify support) keep working.
  */
 
 import { hasWebBluetooth, isCapacitorNative } from './index';
+import { isEncodedPlan, decodePlan } from '@/lib/plan-codec';
+import { ChunkSender, ChunkReceiver, DEFAULT_MTU, MAX_MTU } from './ble-transfer';
 
 // -------------------------------------------------------------------------
 // Constants \u2014 well-known Bluetooth GATT identifiers for the Forkcast plan
@@ -37,15 +49,27 @@ import { hasWebBluetooth, isCapacitorNative } from './index';
 // -------------------------------------------------------------------------
 export const FORKCAST_SERVICE_UUID        = '0000f0cc-0000-1000-8000-00805f9b34fb';
 export const FORKCAST_PLAN_CHARACTERISTIC = '0000f0cd-0000-1000-8000-00805f9b34fb';
+export const FORKCAST_DATA_CHARACTERISTIC    = '0000f0ce-0000-1000-8000-00805f9b34fb';
+export const FORKCAST_CONTROL_CHARACTERISTIC = '0000f0cf-0000-1000-8000-00805f9b34fb';
 export const FORKCAST_ADVERTISED_NAME     = 'Forkcast-Plan';
 
-// Cap payloads at 4 KB \u2014 well within one BLE MTU exchange after
-// negotiation and far above what a typical week plan needs. Anything
-// bigger, we chunk (the receiver reassembles by reading until it sees
-// the "\u241E" (record separator) terminator we append).
+// Cap payloads at 4 KB. Plans are sent in the compact binary format from
+// lib/plan-codec.js (a busy week is ~1.5 KB, against ~11 KB of JSON);
+// the receiver tells it apart by its 0xFC magic byte. Plain JSON strings
+// are still accepted for older senders and get the "\u241E" (record
+// separator) terminator so the receiver can trim padding.
 const MAX_PAYLOAD_BYTES = 4 * 1024;
 const RECORD_TERMINATOR = '\x1e';
 
+// Reconnect attempts after a dropped link before giving up; each one
+// resumes from the last acknowledged chunk.
+const MAX_RESUMES = 2;
+
+// The last interrupted streamed transfer, so a retry (even after the
+// dialog reopens) continues where it stopped. The sender ignores it
+// unless it is still offering the same plan.
+let pendingResume = null;
+
 // -------------------------------------------------------------------------
 // Capability probes
 // -------------------------------------------------------------------------
@@ -101,7 +125,7 @@ function hasPeripheralPlugin() {
  * Begin advertising the local Forkcast plan for a nearby device to
  * receive. Returns an object with `stop()` so the UI can cancel.
  *
- * @param {string} payload  Plan JSON (already stringified)
+ * @param {Uint8Array|string} payload  encodePlan() bytes, or legacy plan JSON
  * @param {object} [callbacks]
  * @param {() => void}      [callbacks.onAdvertising]
  * @param {(peer: string) => void} [callbacks.onConnected]
@@ -116,7 +140,9 @@ export async function sendPlanViaBle(payload, callbacks = {}) {
     );
   }
 
-  const bytes = new TextEncoder().encode(payload + RECORD_TERMINATOR);
+  const bytes = payload instanceof Uint8Array
+    ? payload
+    : new TextEncoder().encode(payload + RECORD_TERMINATOR);
   if (bytes.byteLength > MAX_PAYLOAD_BYTES) {
     throw new Error(
       `Plan is too large for BLE transfer (${bytes.byteLength} bytes; ` +
@@ -131,22 +157,31 @@ export async function sendPlanViaBle(payload, callbacks = {}) {
   // b64 for characteristic values.
   const b64 = toBase64(bytes);
 
-  await BlePeripheral.addService({
-    service: FORKCAST_SERVICE_UUID,
-    characteristics: [
-      {
-        uuid: FORKCAST_PLAN_CHARACTERISTIC,
-        // "read" is enough for a one-shot pull; "notify" would let the
-        // sender push, but read keeps the receiver logic simple and
-        // works on every stack.
-        properties: { read: true },
-        // Some plugins use `value`, others use `initialValue`. Pass
-        // both keys; the extraneous one is harmlessly ignored.
-        value: b64,
-        initialValue: b64,
-      },
-    ],
-  });
+  // Streaming needs the plugin to push notifications and report
+  // control writes; without both only the legacy read is offered.
+  const canStream = typeof BlePeripheral.notify === 'function'
+    && typeof BlePeripheral.addListener === 'function';
+
+  const characteristics = [
+    {
+      uuid: FORKCAST_PLAN_CHARACTERISTIC,
+      // Legacy one-shot pull for receivers without the streaming
+      // protocol.
+      properties: { read: true },
+      // Some plugins use `value`, others use `initialValue`. Pass
+      // both keys; the extraneous one is harmlessly ignored.
+      value: b64,
+      initialValue: b64,
+    },
+  ];
+  if (canStream) {
+    characteristics.push(
+      { uuid: FORKCAST_DATA_CHARACTERISTIC, properties: { notify: true } },
+      { uuid: FORKCAST_CONTROL_CHARACTERISTIC, properties: { write: true, writeWithoutResponse: true } },
+    );
+  }
+
+  await BlePeripheral.addService({ service: FORKCAST_SERVICE_UUID, characteristics });
 
   await BlePeripheral.startAdvertising({
     localName: FORKCAST_ADVERTISED_NAME,
@@ -165,10 +200,34 @@ export async function sendPlanViaBle(payload, callbacks = {}) {
       const readSub = await BlePeripheral.addListener('characteristicRead', () => {
         callbacks.onSent?.();
       });
+      // Streaming: every HELLO starts (or resumes) a transfer. The
+      // sender is stateless apart from the payload, so a fresh one per
+      // HELLO is what makes resume-after-reconnect work.
+      let sender = null;
+      const writeSub = canStream
+        ? await BlePeripheral.addListener('characteristicWrite', (evt) => {
+          if (!sameUuid(evt?.characteristic, FORKCAST_CONTROL_CHARACTERISTIC)) return;
+          const frame = fromBase64(evt.value || '');
+          if (frame[0] === 0x01 || !sender) {
+            sender?.pause();
+            sender = new ChunkSender(bytes, {
+              sendFrame: (chunk) => BlePeripheral.notify({
+                service: FORKCAST_SERVICE_UUID,
+                characteristic: FORKCAST_DATA_CHARACTERISTIC,
+                value: toBase64(chunk),
+              }),
+            });
+            sender.done.then(() => callbacks.onSent?.(), () => { /* receiver will retry */ });
+          }
+          sender.handleControl(frame);
+        })
+        : null;
       return {
         async stop() {
+          sender?.pause();
           try { await sub.remove?.(); } catch { /* noop */ }
           try { await readSub.remove?.(); } catch { /* noop */ }
+          try { await writeSub?.remove?.(); } catch { /* noop */ }
           try { await BlePeripheral.stopAdvertising(); } catch { /* noop */ }
           try { await BlePeripheral.removeService?.({ service: FORKCAST_SERVICE_UUID }); } catch { /* noop */ }
         },
@@ -250,20 +309,42 @@ async function receiveViaCapacitor({ scanMs, signal, onProgress }) {
     signal?.addEventListener('abort', () => { clearTimeout(timeout); finish(null, new Error('Aborted')); });
   });
 
-  onProgress?.('connecting');
   const deviceId = scanResult.device.deviceId;
-  await BleClient.connect(deviceId);
-  try {
-    onProgress?.('reading');
-    const dv = await BleClient.read(
-      deviceId,
-      FORKCAST_SERVICE_UUID,
-      FORKCAST_PLAN_CHARACTERISTIC
-    );
-    const text = new TextDecoder().decode(dv.buffer || dv);
-    return JSON.parse(text.replace(RECORD_TERMINATOR, ''));
-  } finally {
-    try { await BleClient.disconnect(deviceId); } catch { /* noop */ }
+  for (let attempt = 0; ; attempt++) {
+    onProgress?.('connecting');
+    let dropped = null;
+    const disconnected = new Promise((resolve) => { dropped = resolve; });
+    await BleClient.connect(deviceId, () => dropped());
+    try {
+      onProgress?.('reading');
+      const services = await BleClient.getServices(deviceId).catch(() => []);
+      const service = services.find((s) => sameUuid(s.uuid, FORKCAST_SERVICE_UUID));
+      const streams = service?.characteristics?.some((c) => sameUuid(c.uuid, FORKCAST_CONTROL_CHARACTERISTIC));
+      if (!streams) {
+        const dv = await BleClient.read(deviceId, FORKCAST_SERVICE_UUID, FORKCAST_PLAN_CHARACTERISTIC);
+        return decodePlanPayload(dv);
+      }
+
+      // Android reports the negotiated MTU; iOS negotiates on its own
+      // and doesn't expose it, so assume the minimum there.
+      const mtu = await BleClient.getMtu?.(deviceId).catch(() => null);
+      const bytes = await streamFrom({
+        mtu,
+        subscribe: (onFrame) => BleClient.startNotifications(
+          deviceId, FORKCAST_SERVICE_UUID, FORKCAST_DATA_CHARACTERISTIC, (dv) => onFrame(toBytes(dv))
+        ),
+        write: (frame) => BleClient.writeWithoutResponse(
+          deviceId, FORKCAST_SERVICE_UUID, FORKCAST_CONTROL_CHARACTERISTIC, new DataView(frame.buffer)
+        ),
+        disconnected,
+      });
+      return decodePlanPayload(bytes);
+    } catch (err) {
+      if (!err?.resumable || attempt >= MAX_RESUMES) throw err;
+    } finally {
+      try { await BleClient.stopNotifications(deviceId, FORKCAST_SERVICE_UUID, FORKCAST_DATA_CHARACTERISTIC); } catch { /* noop */ }
+      try { await BleClient.disconnect(deviceId); } catch { /* noop */ }
+    }
   }
 }
 
@@ -274,17 +355,70 @@ async function receiveViaWebBluetooth({ onProgress }) {
   const device = await navigator.bluetooth.requestDevice({
     filters: [{ services: [FORKCAST_SERVICE_UUID] }],
   });
-  onProgress?.('connecting');
-  const server = await device.gatt.connect();
+  for (let attempt = 0; ; attempt++) {
+    onProgress?.('connecting');
+    const server = await device.gatt.connect();
+    const disconnected = new Promise((resolve) => {
+      device.addEventListener('gattserverdisconnected', resolve, { once: true });
+    });
+    try {
+      onProgress?.('reading');
+      const service = await server.getPrimaryService(FORKCAST_SERVICE_UUID);
+      const data = await service.getCharacteristic(FORKCAST_DATA_CHARACTERISTIC).catch(() => null);
+      const control = data && await service.getCharacteristic(FORKCAST_CONTROL_CHARACTERISTIC).catch(() => null);
+      if (!control) {
+        const characteristic = await service.getCharacteristic(FORKCAST_PLAN_CHARACTERISTIC);
+        return decodePlanPayload(await characteristic.readValue());
+      }
+
+      // Web Bluetooth doesn't expose the MTU; streamFrom() falls back
+      // to the 23-byte minimum.
+      const bytes = await streamFrom({
+        mtu: null,
+        subscribe: async (onFrame) => {
+          data.addEventListener('characteristicvaluechanged', (e) => onFrame(toBytes(e.target.value)));
+          await data.startNotifications();
+        },
+        write: (frame) => control.writeValueWithoutResponse(frame),
+        disconnected,
+      });
+      return decodePlanPayload(bytes);
+    } catch (err) {
+      if (!err?.resumable || attempt >= MAX_RESUMES) throw err;
+    } finally {
+      try { device.gatt.disconnect(); } catch { /* noop */ }
+    }
+  }
+}
+
+/**
+ * Run one streamed transfer over an already-connected link. If the
+ * link drops mid-transfer the progress is kept in `pendingResume` and
+ * the thrown error is marked `resumable` so the caller can reconnect.
+ */
+async function streamFrom({ mtu, subscribe, write, disconnected }) {
+  const receiver = new ChunkReceiver({
+    mtu: Math.min(MAX_MTU, mtu || DEFAULT_MTU),
+    resume: pendingResume,
+    sendControl: write,
+  });
+  await subscribe((frame) => receiver.handleData(frame));
+  receiver.start();
+
+  const lost = disconnected.then(() => {
+    const err = new Error('Bluetooth connection lost');
+    err.resumable = true;
+    throw err;
+  });
+  lost.catch(() => { /* only matters while racing */ });
   try {
-    onProgress?.('reading');
-    const service = await server.getPrimaryService(FORKCAST_SERVICE_UUID);
-    const characteristic = await service.getCharacteristic(FORKCAST_PLAN_CHARACTERISTIC);
-    const value = await characteristic.readValue();
-    const text = new TextDecoder().decode(value);
-    return JSON.parse(text.replace(RECORD_TERMINATOR, ''));
-  } finally {
-    try { device.gatt.disconnect(); } catch { /* noop */ }
+    const bytes = await Promise.race([receiver.done, lost]);
+    pendingResume = null;
+    return bytes;
+  } catch (err) {
+    pendingResume = receiver.resumeState();
+    receiver.fail(err);
+    throw err;
   }
 }
 
@@ -302,6 +436,33 @@ export async function connectWebBleDevice(services) {
   });
 }
 
+/**
+ * Characteristic value (DataView) → plan. Binary plan-codec payloads
+ * are recognised by their magic byte; anything else is legacy JSON.
+ */
+async function decodePlanPayload(dv) {
+  const bytes = toBytes(dv);
+  if (isEncodedPlan(bytes)) return decodePlan(bytes);
+  const text = new TextDecoder().decode(bytes);
+  return JSON.parse(text.replace(RECORD_TERMINATOR, ''));
+}
+
+function toBytes(dv) {
+  if (dv instanceof Uint8Array) return dv;
+  return new Uint8Array(dv.buffer || dv, dv.byteOffset || 0, dv.byteLength);
+}
+
+function sameUuid(a, b) {
+  return String(a || '').toLowerCase() === b;
+}
+
+function fromBase64(b64) {
+  const bin = atob(b64);
+  const bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i += 1) bytes[i] = bin.charCodeAt(i);
+  return bytes;
+}
+
 function toBase64(bytes) {
   // Small, dependency-free base64 encoder that works in both browser
   // and Capacitor WebView contexts.
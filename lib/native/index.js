@@ -71,3 +71,19 @@ export function hasWebBluetooth() {
 export function hasWebShare() {
   return hasWindow() && typeof navigator?.share === 'function';
 }
+
+/**
+ * True when camera frames can be decoded in a Web Worker: we need
+ * `Worker`, `createImageBitmap` (to crop + downsample the frame and
+ * transfer it zero-copy) and `OffscreenCanvas` inside the worker to
+ * read the pixels back. Safari gained OffscreenCanvas 2D in 16.4; older
+ * WebViews fall back to the main-thread ZXing reader.
+ */
+export function hasWorkerFrameDecode() {
+  return (
+    hasWindow() &&
+    typeof Worker === 'function' &&
+    typeof createImageBitmap === 'function' &&
+    typeof OffscreenCanvas === 'function'
+  );
+}
@@ -0,0 +1,132 @@
+/**
+ * lib/native/scan-worker.js
+ * -------------------------
+ * Dedicated Web Worker that decodes barcode frames off the main thread.
+ *
+ * The main thread (see `scanWithWorker` in lib/native/scanner.js) owns
+ * the <video> element and the camera stream. For each frame it asks the
+ * browser for an `ImageBitmap` that is ALREADY cropped to the aiming
+ * reticle and downsampled, then transfers that bitmap here (zero-copy —
+ * ownership moves, nothing is cloned). This worker:
+ *
+ *   1. Draws the bitmap into a reusable OffscreenCanvas.
+ *   2. Converts RGBA → 8-bit luminance (the only thing ZXing needs).
+ *   3. Runs ZXing's MultiFormatReader restricted to the requested
+ *      formats (EAN/UPC by default — far fewer decoders to try per
+ *      frame than the "everything" reader @zxing/browser builds).
+ *   4. Posts back { id, code, format, decodeMs } or { id, code: null }.
+ *
+ * Message protocol
+ * ----------------
+ *   → { type: 'configure', formats: ['ean_13', ...] }
+ *   → { type: 'frame', id, bitmap }            (bitmap in transfer list)
+ *   ← { type: 'result', id, code, format, decodeMs }
+ *   ← { type: 'error', id, message }
+ *
+ * The worker holds no camera state and never touches the DOM, so it is
+ * safe to terminate at any moment.
+ */
+
+import {
+  BarcodeFormat,
+  BinaryBitmap,
+  DecodeHintType,
+  HybridBinarizer,
+  MultiFormatReader,
+  RGBLuminanceSource,
+} from '@zxing/library';
+
+/** Map the lower-case names used across lib/native/* to ZXing enums. */
+const FORMAT_BY_NAME = {
+  ean_13:   BarcodeFormat.EAN_13,
+  ean_8:    BarcodeFormat.EAN_8,
+  upc_a:    BarcodeFormat.UPC_A,
+  upc_e:    BarcodeFormat.UPC_E,
+  code_128: BarcodeFormat.CODE_128,
+  code_39:  BarcodeFormat.CODE_39,
+  qr_code:  BarcodeFormat.QR_CODE,
+};
+
+let reader = null;
+let canvas = null;
+let ctx = null;
+
+function configure(formats) {
+  const wanted = (formats || [])
+    .map((name) => FORMAT_BY_NAME[name])
+    .filter((f) => f !== undefined);
+  const hints = new Map();
+  hints.set(DecodeHintType.POSSIBLE_FORMATS, wanted.length
+    ? wanted
+    : [BarcodeFormat.EAN_13, BarcodeFormat.EAN_8, BarcodeFormat.UPC_A, BarcodeFormat.UPC_E]);
+  reader = new MultiFormatReader();
+  reader.setHints(hints);
+}
+
+/**
+ * Grow-only OffscreenCanvas. Reallocating a canvas per frame is the
+ * single biggest source of GC churn in naive worker decoders.
+ */
+function getContext(width, height) {
+  if (!canvas || canvas.width < width || canvas.height < height) {
+    canvas = new OffscreenCanvas(width, height);
+    ctx = canvas.getContext('2d', { willReadFrequently: true });
+  }
+  return ctx;
+}
+
+function toLuminance(rgba, width, height) {
+  const out = new Uint8ClampedArray(width * height);
+  for (let i = 0, p = 0; i < out.length; i += 1, p += 4) {
+    // Integer approximation of Rec. 601 luma — same weights ZXing's
+    // own HTMLCanvasElementLuminanceSource uses.
+    out[i] = (rgba[p] * 306 + rgba[p + 1] * 601 + rgba[p + 2] * 117) >> 10;
+  }
+  return out;
+}
+
+function decodeFrame(bitmap) {
+  const { width, height } = bitmap;
+  const c = getContext(width, height);
+  c.drawImage(bitmap, 0, 0);
+  bitmap.close();
+  const { data } = c.getImageData(0, 0, width, height);
+  const source = new RGBLuminanceSource(toLuminance(data, width, height), width, height);
+  try {
+    const result = reader.decodeWithState(new BinaryBitmap(new HybridBinarizer(source)));
+    return {
+      code: result.getText(),
+      format: String(BarcodeFormat[result.getBarcodeFormat()] || 'unknown').toLowerCase(),
+    };
+  } catch {
+    // NotFound / Checksum / Format exceptions are the normal outcome
+    // for frames without a readable barcode.
+    return null;
+  } finally {
+    reader.reset();
+  }
+}
+
+self.onmessage = (event) => {
+  const msg = event.data || {};
+  if (msg.type === 'configure') {
+    configure(msg.formats);
+    return;
+  }
+  if (msg.type !== 'frame') return;
+  if (!reader) configure();
+  const started = performance.now();
+  try {
+    const hit = decodeFrame(msg.bitmap);
+    self.postMessage({
+      type: 'result',
+      id: msg.id,
+      code: hit?.code ?? null,
+      format: hit?.format ?? null,
+      decodeMs: performance.now() - started,
+    });
+  } catch (err) {
+    try { msg.bitmap?.close?.(); } catch { /* already detached */ }
+    self.postMessage({ type: 'error', id: msg.id, message: String(err?.message || err) });
+  }
+};
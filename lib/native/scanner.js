@@ -6,12 +6,28 @@
  * Fallback chain (best → worst):
  *   1. Capacitor + @capacitor-mlkit/barcode-scanning — native, fast
  *   2. Browser BarcodeDetector API              — Chrome / Edge / Android
- *   3. @zxing/browser (video stream)            — iOS Safari / Firefox
+ *   3. ZXing in a Web Worker (lib/native/scan-worker.js)
+ *                                               — iOS Safari 16.4+ / Firefox
+ *   3b. @zxing/browser on the main thread       — older WebViews
  *   4. Manual entry only                        — typed / HID scanner
  *
  * Each function returns / accepts a small, plain object so callers
  * don't need to know which backend was used.
  *
+ * FRAME PIPELINE (strategies 2 and 3)
+ * ------------------------------------
+ * Decoding a full 1080p frame on every animation frame is what made
+ * mid-range Android phones stutter and run hot. Both web paths now:
+ *
+ *   - restrict formats to what the caller actually needs (EAN/UPC for
+ *     groceries, QR for plan import — see SCAN_MODES),
+ *   - crop to the aiming reticle (SCAN_ROI) and downsample to at most
+ *     MAX_DECODE_WIDTH pixels before decoding,
+ *   - keep exactly one frame in flight and adapt the frame interval to
+ *     the measured decode time (see nextFrameInterval),
+ *   - report frames/sec and time-to-first-decode via `onMetrics` and
+ *     on the returned result's `metrics` field.
+ *
  * NOTE ON DYNAMIC IMPORTS
  * -----------------------
  * We import Capacitor plugins via dynamic import() inside a try/catch
@@ -22,13 +38,37 @@
  */
 
 import { BrowserMultiFormatReader } from '@zxing/browser';
-import { isCapacitorNative, hasBarcodeDetector } from './index';
+import { isCapacitorNative, hasBarcodeDetector, hasWorkerFrameDecode } from './index';
 import { normalizeBarcode } from '@/lib/barcode-utils';
 
-/** Barcode formats we care about for pantry / shopping. */
-const BARCODE_FORMATS = [
-  'ean_13', 'ean_8', 'upc_a', 'upc_e', 'code_128', 'code_39', 'qr_code',
-];
+/**
+ * Formats per scan mode. Every extra format is another decoder pass
+ * per frame, so the grocery path only asks for retail GTINs.
+ *   - product — pantry / shopping list (EAN-13, EAN-8, UPC-A, UPC-E)
+ *   - qr      — plan import from another device (SharePlanDialog)
+ */
+export const SCAN_MODES = {
+  product: ['ean_13', 'ean_8', 'upc_a', 'upc_e'],
+  qr: ['qr_code'],
+};
+
+/**
+ * Region of interest as fractions of the video frame. Matches the
+ * reticle drawn by components/BarcodeScanner.js (80% wide, a third
+ * tall) with some vertical slack for shaky hands. QR codes are square
+ * and usually fill the view, so QR mode keeps the full frame.
+ */
+const SCAN_ROI = {
+  product: { x: 0.1, y: 0.25, width: 0.8, height: 0.5 },
+  qr:      { x: 0,   y: 0,    width: 1,   height: 1 },
+};
+
+/** Frames wider than this are downsampled before decoding. */
+const MAX_DECODE_WIDTH = 640;
+
+/** Frame pacing bounds — ~15 fps ceiling, ~2.5 fps floor. */
+const MIN_FRAME_INTERVAL_MS = 66;
+const MAX_FRAME_INTERVAL_MS = 400;
 
 /**
  * Which scanner strategy is available on the current runtime?
@@ -47,12 +87,18 @@ export function detectStrategy() {
  * Scan a single barcode. Returns { code: string, format: string } or
  * null if the user cancels.
  *
+ * Web paths also attach `metrics` (see snapshotMetrics) to the result.
+ *
  * @param {object} opts
  * @param {HTMLVideoElement} [opts.videoEl] Required for zxing / barcode_detector.
  * @param {AbortSignal}       [opts.signal] Cancel the scan externally.
+ * @param {'product'|'qr'}    [opts.mode='product'] Which formats to decode.
+ * @param {(metrics: object) => void} [opts.onMetrics] Called ~once a second.
  */
-export async function scanOnce({ videoEl, signal } = {}) {
+export async function scanOnce({ videoEl, signal, mode = 'product', onMetrics } = {}) {
   const strategy = detectStrategy();
+  const formats = SCAN_MODES[mode] || SCAN_MODES.product;
+  const roi = SCAN_ROI[mode] || SCAN_ROI.product;
 
   // --- 1. Capacitor native path ------------------------------------
   if (strategy === 'capacitor') {
@@ -85,30 +131,171 @@ export async function scanOnce({ videoEl, signal } = {}) {
 
   // BarcodeDetector API — fastest of the web options.
   if (strategy === 'barcode_detector') {
-    return scanWithBarcodeDetector(videoEl, signal);
+    return scanWithBarcodeDetector(videoEl, signal, { formats, roi, onMetrics });
   }
 
-  // ZXing fallback (iOS Safari, Firefox).
+  // ZXing fallback (iOS Safari, Firefox) — off the main thread when the
+  // runtime can hand frames to a worker.
+  if (hasWorkerFrameDecode()) {
+    try {
+      return await scanWithWorker(videoEl, signal, { formats, roi, onMetrics });
+    } catch (err) {
+      if (String(err?.message).includes('permission') || err?.name === 'NotAllowedError') throw err;
+      console.warn('Worker scan failed, falling back to main thread:', err?.message);
+    }
+  }
   return scanWithZXing(videoEl, signal);
 }
 
-async function scanWithBarcodeDetector(videoEl, signal) {
-  // eslint-disable-next-line no-undef
-  const detector = new BarcodeDetector({ formats: BARCODE_FORMATS });
-  const stream = await navigator.mediaDevices.getUserMedia({
-    video: { facingMode: 'environment' },
+// ---------------------------------------------------------------------
+//  Frame pipeline helpers
+// ---------------------------------------------------------------------
+
+const now = () => (typeof performance !== 'undefined' ? performance.now() : Date.now());
+
+/**
+ * Ask for a modest stream. Phones happily hand out 4K frames when only
+ * `facingMode` is given, which multiplies every crop/copy below.
+ */
+function openCamera() {
+  return navigator.mediaDevices.getUserMedia({
+    video: {
+      facingMode: 'environment',
+      width: { ideal: 1280 },
+      height: { ideal: 720 },
+    },
+  });
+}
+
+/**
+ * Crop the current video frame to `roi` and downsample it to at most
+ * MAX_DECODE_WIDTH. `createImageBitmap` does both in one (usually GPU-
+ * backed) step and the resulting bitmap is transferable.
+ */
+function grabFrame(videoEl, roi) {
+  const vw = videoEl.videoWidth;
+  const vh = videoEl.videoHeight;
+  const sx = Math.round(vw * roi.x);
+  const sy = Math.round(vh * roi.y);
+  const sw = Math.round(vw * roi.width);
+  const sh = Math.round(vh * roi.height);
+  const scale = Math.min(1, MAX_DECODE_WIDTH / sw);
+  return createImageBitmap(videoEl, sx, sy, sw, sh, {
+    resizeWidth: Math.max(1, Math.round(sw * scale)),
+    resizeHeight: Math.max(1, Math.round(sh * scale)),
+    resizeQuality: 'low',
+  });
+}
+
+/**
+ * Adaptive pacing: leave the decoder idle for roughly half as long as
+ * a decode takes, so a slow phone settles at a sustainable rate instead
+ * of queueing frames it can never catch up on.
+ */
+function nextFrameInterval(avgDecodeMs) {
+  return Math.min(MAX_FRAME_INTERVAL_MS, Math.max(MIN_FRAME_INTERVAL_MS, avgDecodeMs * 1.5));
+}
+
+/**
+ * Resolve after `ms`, or immediately once `signal` aborts. The abort
+ * listener is removed when the timer fires: the signal lives for the
+ * whole scan session, and this runs once per frame.
+ */
+function wait(ms, signal) {
+  return new Promise((resolve) => {
+    if (signal?.aborted) {
+      resolve();
+      return;
+    }
+    const onAbort = () => { clearTimeout(t); resolve(); };
+    const t = setTimeout(() => {
+      signal?.removeEventListener('abort', onAbort);
+      resolve();
+    }, ms);
+    signal?.addEventListener('abort', onAbort, { once: true });
   });
+}
+
+function createMetrics() {
+  return {
+    startedAt: now(),
+    frames: 0,
+    avgDecodeMs: 0,
+    firstFrameAt: null,
+    firstDecodeAt: null,
+    frameIntervalMs: MIN_FRAME_INTERVAL_MS,
+    lastReportAt: 0,
+  };
+}
+
+function recordFrame(m, decodeMs) {
+  m.frames += 1;
+  if (m.firstFrameAt === null) m.firstFrameAt = now();
+  // Exponential moving average — reacts within a few frames when the
+  // phone throttles, without jittering on a single slow frame.
+  m.avgDecodeMs = m.frames === 1 ? decodeMs : m.avgDecodeMs * 0.8 + decodeMs * 0.2;
+  m.frameIntervalMs = nextFrameInterval(m.avgDecodeMs);
+}
+
+/**
+ * Plain-object view of the metrics:
+ *   { frames, fps, avgDecodeMs, frameIntervalMs,
+ *     timeToFirstFrameMs, timeToFirstDecodeMs }
+ * `timeToFirstDecodeMs` is null until a code has been read.
+ */
+export function snapshotMetrics(m) {
+  const elapsedMs = now() - m.startedAt;
+  return {
+    frames: m.frames,
+    fps: elapsedMs > 0 ? Math.round((m.frames / elapsedMs) * 10000) / 10 : 0,
+    avgDecodeMs: Math.round(m.avgDecodeMs * 10) / 10,
+    frameIntervalMs: Math.round(m.frameIntervalMs),
+    timeToFirstFrameMs: m.firstFrameAt === null ? null : Math.round(m.firstFrameAt - m.startedAt),
+    timeToFirstDecodeMs: m.firstDecodeAt === null ? null : Math.round(m.firstDecodeAt - m.startedAt),
+  };
+}
+
+function maybeReport(m, onMetrics, force = false) {
+  if (!onMetrics) return;
+  const t = now();
+  if (!force && t - m.lastReportAt < 1000) return;
+  m.lastReportAt = t;
+  onMetrics(snapshotMetrics(m));
+}
+
+function frameReady(videoEl) {
+  return videoEl.readyState >= 2 && videoEl.videoWidth > 0 &&
+    !(typeof document !== 'undefined' && document.hidden);
+}
+
+async function scanWithBarcodeDetector(videoEl, signal, { formats, roi, onMetrics }) {
+  // eslint-disable-next-line no-undef
+  const detector = new BarcodeDetector({ formats });
+  const metrics = createMetrics();
+  const stream = await openCamera();
   videoEl.srcObject = stream;
   await videoEl.play();
   try {
     while (true) {
       if (signal?.aborted) return null;
-      const barcodes = await detector.detect(videoEl).catch(() => []);
-      if (barcodes.length) {
-        return { code: normalizeBarcode(barcodes[0].rawValue), format: barcodes[0].format };
+      if (frameReady(videoEl)) {
+        const started = now();
+        const source = await grabFrame(videoEl, roi).catch(() => videoEl);
+        const barcodes = await detector.detect(source).catch(() => []);
+        source.close?.();
+        recordFrame(metrics, now() - started);
+        if (barcodes.length) {
+          metrics.firstDecodeAt = now();
+          maybeReport(metrics, onMetrics, true);
+          return {
+            code: normalizeBarcode(barcodes[0].rawValue),
+            format: barcodes[0].format,
+            metrics: snapshotMetrics(metrics),
+          };
+        }
+        maybeReport(metrics, onMetrics);
       }
-      // Yield the main thread — ~10 fps polling is plenty for barcodes.
-      await new Promise((r) => setTimeout(r, 100));
+      await wait(metrics.frameIntervalMs, signal);
     }
   } finally {
     stream.getTracks().forEach((t) => t.stop());
@@ -116,6 +303,70 @@ async function scanWithBarcodeDetector(videoEl, signal) {
   }
 }
 
+/**
+ * ZXing in a dedicated worker. Frames are cropped/downsampled on the
+ * way out (grabFrame) and transferred, so the main thread only pays for
+ * a bitmap handle per frame. Throws if the worker itself can't start so
+ * scanOnce can fall back to the main-thread reader.
+ */
+async function scanWithWorker(videoEl, signal, { formats, roi, onMetrics }) {
+  const worker = new Worker(new URL('./scan-worker.js', import.meta.url));
+  worker.postMessage({ type: 'configure', formats });
+  const metrics = createMetrics();
+  let nextId = 0;
+
+  const decode = (bitmap) => new Promise((resolve, reject) => {
+    const id = ++nextId;
+    const onMessage = (e) => {
+      if (e.data?.id !== id) return;
+      cleanup();
+      if (e.data.type === 'error') reject(new Error(e.data.message));
+      else resolve(e.data);
+    };
+    const onError = (e) => {
+      cleanup();
+      reject(new Error(e?.message || 'scan worker failed'));
+    };
+    const cleanup = () => {
+      worker.removeEventListener('message', onMessage);
+      worker.removeEventListener('error', onError);
+    };
+    worker.addEventListener('message', onMessage);
+    worker.addEventListener('error', onError);
+    worker.postMessage({ type: 'frame', id, bitmap }, [bitmap]);
+  });
+
+  let stream;
+  try {
+    stream = await openCamera();
+    videoEl.srcObject = stream;
+    await videoEl.play();
+    while (true) {
+      if (signal?.aborted) return null;
+      if (frameReady(videoEl)) {
+        const bitmap = await grabFrame(videoEl, roi);
+        const res = await decode(bitmap);
+        recordFrame(metrics, res.decodeMs);
+        if (res.code) {
+          metrics.firstDecodeAt = now();
+          maybeReport(metrics, onMetrics, true);
+          return {
+            code: normalizeBarcode(res.code),
+            format: res.format,
+            metrics: snapshotMetrics(metrics),
+          };
+        }
+        maybeReport(metrics, onMetrics);
+      }
+      await wait(metrics.frameIntervalMs, signal);
+    }
+  } finally {
+    worker.terminate();
+    stream?.getTracks().forEach((t) => t.stop());
+    videoEl.srcObject = null;
+  }
+}
+
 async function scanWithZXing(videoEl, signal) {
   const reader = new BrowserMultiFormatReader();
   return new Promise((resolve, reject) => {
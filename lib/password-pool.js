@@ -0,0 +1,280 @@
+/**
+ * lib/password-pool.js
+ * --------------------
+ * bcrypt off the request thread.
+ *
+ * bcryptjs is pure JavaScript, and at cost 12 one hash or compare
+ * holds the event loop for a few hundred ms. Run inline in auth/login,
+ * a burst of logins stalled every other request on the instance
+ * (pantry, planner, health checks) behind them. Hashing now runs in a
+ * small worker_threads pool:
+ *
+ *   * BCRYPT_POOL_SIZE workers (default: cores - 1, at least 1), so the
+ *     main thread keeps a core for routing.
+ *   * Jobs beyond that wait in a BOUNDED FIFO (BCRYPT_MAX_QUEUE,
+ *     default 64). A full queue rejects immediately with PoolBusyError,
+ *     and the route answers 503 + Retry-After. Left unbounded, the
+ *     queue would just turn a login storm into timeouts.
+ *   * A worker that crashes rejects its job and is replaced, after a
+ *     backoff that doubles with each crash in a row. Workers that keep
+ *     dying before finishing a single job (bcryptjs missing from the
+ *     server build, say) are given up on after MAX_STARTUP_CRASHES and
+ *     the pool switches to inline hashing, so auth keeps working.
+ *   * If worker_threads is unavailable (e.g. an edge runtime), jobs run
+ *     inline with bcryptjs's async API, as before.
+ *
+ * Metrics (`passwordPool.stats()`): busy workers, queue depth,
+ * completed / rejected counters and job-time percentiles.
+ */
+
+import os from 'node:os';
+import bcrypt from 'bcryptjs';
+
+const TIME_SAMPLES = 200;
+const RESPAWN_BASE_MS = 100;
+const RESPAWN_MAX_MS = 5000;
+const MAX_STARTUP_CRASHES = 5;
+
+function envInt(name, fallback) {
+  const n = Number.parseInt(process.env[name] || '', 10);
+  return Number.isFinite(n) && n > 0 ? n : fallback;
+}
+
+function defaultPoolSize() {
+  const cores = typeof os.availableParallelism === 'function' ? os.availableParallelism() : os.cpus().length;
+  return Math.max(1, cores - 1);
+}
+
+/** Queue full. `retryAfterSeconds` is a hint for the Retry-After header. */
+export class PoolBusyError extends Error {
+  constructor(message, retryAfterSeconds) {
+    super(message);
+    this.name = 'PoolBusyError';
+    this.retryAfterSeconds = retryAfterSeconds;
+  }
+}
+
+// Evaluated as CommonJS inside each worker. No separate worker file to
+// bundle, but file tracing can't see this require(): next.config.js
+// lists bcryptjs in serverComponentsExternalPackages so the standalone
+// build ships it in node_modules.
+const WORKER_SOURCE = `
+const { parentPort } = require('node:worker_threads');
+const bcrypt = require('bcryptjs');
+parentPort.on('message', ({ id, op, password, hash, cost }) => {
+  try {
+    const result = op === 'hash' ? bcrypt.hashSync(password, cost) : bcrypt.compareSync(password, hash);
+    parentPort.postMessage({ id, result });
+  } catch (err) {
+    parentPort.postMessage({ id, error: err.message });
+  }
+});
+`;
+
+function percentile(sorted, p) {
+  if (!sorted.length) return 0;
+  return sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))];
+}
+
+export class PasswordPool {
+  constructor({ size = defaultPoolSize(), maxQueue = 64 } = {}) {
+    this.size = size;
+    this.maxQueue = maxQueue;
+
+    this.workers = [];          // { worker, job }
+    this.queue = [];
+    this.nextId = 1;
+    this.inline = false;
+    this.WorkerClass = undefined;
+
+    this.startupCrashes = 0;    // crashes in a row by workers that never finished a job
+
+    this.counters = { completed: 0, rejected: 0, crashed: 0 };
+    this.times = [];
+  }
+
+  /** bcrypt hash of `password` at `cost` rounds. */
+  hash(password, cost) {
+    return this.run({ op: 'hash', password, cost });
+  }
+
+  /** True if `password` matches bcrypt `hash`. */
+  compare(password, hash) {
+    return this.run({ op: 'compare', password, hash });
+  }
+
+  async run(job) {
+    const WorkerClass = await this.workerClass();
+    if (!WorkerClass || this.inline) return this.runInline(job);
+
+    return new Promise((resolve, reject) => {
+      const entry = { ...job, id: this.nextId++, resolve, reject, enqueuedAt: Date.now() };
+      const slot = this.idleSlot(WorkerClass);
+      if (slot) {
+        this.dispatch(slot, entry);
+        return;
+      }
+      if (this.queue.length >= this.maxQueue) {
+        this.counters.rejected += 1;
+        reject(new PoolBusyError('Password hashing queue is full', this.retryAfterHint()));
+        return;
+      }
+      this.queue.push(entry);
+    });
+  }
+
+  async workerClass() {
+    if (this.WorkerClass !== undefined) return this.WorkerClass;
+    try {
+      ({ Worker: this.WorkerClass } = await import('node:worker_threads'));
+    } catch {
+      this.WorkerClass = null;
+      this.inline = true;
+    }
+    return this.WorkerClass;
+  }
+
+  idleSlot(WorkerClass) {
+    const idle = this.workers.find((slot) => slot.worker && !slot.job);
+    if (idle) return idle;
+    if (this.workers.length >= this.size) return null;
+    const slot = { worker: null, job: null };
+    this.spawn(slot, WorkerClass);
+    this.workers.push(slot);
+    return slot;
+  }
+
+  spawn(slot, WorkerClass) {
+    const worker = new WorkerClass(WORKER_SOURCE, { eval: true });
+    slot.finishedJobs = 0;
+    worker.on('message', ({ id, result, error }) => {
+      const job = slot.job;
+      if (!job || job.id !== id) return;
+      this.finish(slot, job, error ? new Error(error) : null, result);
+    });
+    const onCrash = (err) => {
+      if (slot.worker !== worker) return;
+      this.counters.crashed += 1;
+      const job = slot.job;
+      slot.job = null;
+      slot.worker = null;
+      this.startupCrashes = slot.finishedJobs ? 1 : this.startupCrashes + 1;
+      // A worker that never finished anything most likely failed to load,
+      // not on this job: put the job back for the next worker (or inline).
+      if (job && !slot.finishedJobs) this.queue.unshift(job);
+      else if (job) job.reject(err instanceof Error ? err : new Error('Password worker exited'));
+      if (this.startupCrashes >= MAX_STARTUP_CRASHES) {
+        this.fallBackInline(err);
+        return;
+      }
+      this.respawn(slot, WorkerClass);
+    };
+    worker.on('error', onCrash);
+    worker.on('exit', (code) => { if (code !== 0) onCrash(new Error(`Password worker exited with code ${code}`)); });
+    // Idle workers must not keep the process (or a test run) alive;
+    // dispatch() refs them while busy. After the listeners: adding a
+    // 'message' listener re-refs.
+    worker.unref();
+    slot.worker = worker;
+  }
+
+  respawn(slot, WorkerClass) {
+    const delay = Math.min(RESPAWN_MAX_MS, RESPAWN_BASE_MS * 2 ** (this.startupCrashes - 1));
+    setTimeout(() => {
+      if (this.inline) return;
+      this.spawn(slot, WorkerClass);
+      this.drain(slot);
+    }, delay);
+  }
+
+  /** Stop using workers: run queued and future jobs inline. */
+  fallBackInline(err) {
+    this.inline = true;
+    console.error(
+      `[password-pool] ${MAX_STARTUP_CRASHES} workers in a row crashed before finishing a job; hashing inline from now on:`,
+      err?.message || err,
+    );
+    const jobs = [];
+    for (const slot of this.workers) {
+      const { worker, job } = slot;
+      slot.worker = null;  // the exit from terminate() is not a crash
+      if (job) jobs.push(job);
+      worker?.terminate();
+    }
+    this.workers = [];
+    for (const job of [...jobs, ...this.queue.splice(0)]) {
+      this.runInline(job).then(job.resolve, job.reject);
+    }
+  }
+
+  dispatch(slot, job) {
+    slot.job = job;
+    slot.startedAt = Date.now();
+    slot.worker.ref();
+    const { id, op, password, hash, cost } = job;
+    slot.worker.postMessage({ id, op, password, hash, cost });
+  }
+
+  finish(slot, job, err, result) {
+    slot.job = null;
+    slot.finishedJobs += 1;
+    this.startupCrashes = 0;
+    slot.worker.unref();
+    this.record(Date.now() - slot.startedAt);
+    if (err) job.reject(err);
+    else job.resolve(result);
+    this.drain(slot);
+  }
+
+  drain(slot) {
+    const next = this.queue.shift();
+    if (next) this.dispatch(slot, next);
+  }
+
+  async runInline({ op, password, hash, cost }) {
+    const startedAt = Date.now();
+    try {
+      return op === 'hash' ? await bcrypt.hash(password, cost) : await bcrypt.compare(password, hash);
+    } finally {
+      this.record(Date.now() - startedAt);
+    }
+  }
+
+  record(ms) {
+    this.counters.completed += 1;
+    this.times.push(ms);
+    if (this.times.length > TIME_SAMPLES) this.times.shift();
+  }
+
+  /** Rough seconds until a queued job would start, for Retry-After. */
+  retryAfterHint() {
+    const p50 = percentile([...this.times].sort((a, b) => a - b), 0.5) || 250;
+    const waves = Math.ceil((this.queue.length + 1) / Math.max(1, this.size));
+    return Math.max(1, Math.ceil((waves * p50) / 1000));
+  }
+
+  stats() {
+    const sorted = [...this.times].sort((a, b) => a - b);
+    return {
+      size: this.size,
+      workers: this.workers.length,
+      busy: this.workers.filter((slot) => slot.job).length,
+      queueDepth: this.queue.length,
+      maxQueue: this.maxQueue,
+      inline: this.inline,
+      ...this.counters,
+      jobMs: {
+        p50: percentile(sorted, 0.5),
+        p95: percentile(sorted, 0.95),
+        max: sorted.length ? sorted[sorted.length - 1] : 0,
+        samples: sorted.length,
+      },
+    };
+  }
+}
+
+/** Process-wide pool used by lib/auth.js. */
+export const passwordPool = new PasswordPool({
+  size: envInt('BCRYPT_POOL_SIZE', defaultPoolSize()),
+  maxQueue: envInt('BCRYPT_MAX_QUEUE', 64),
+});
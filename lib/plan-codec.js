@@ -0,0 +1,393 @@
+/**
+ * lib/plan-codec.js
+ * -----------------
+ * Compact, versioned binary encoding for shared week plans.
+ *
+ * SharePlanDialog used to put `JSON.stringify(plan)` straight into the
+ * QR code and onto the BLE characteristic. JSON repeats every key name,
+ * spells out each date, and a meal planned on three days carries its
+ * ingredients three times — a busy week with long titles overflowed a
+ * single QR code. This codec gets the same plan several times smaller:
+ *
+ *   1. Field-keyed binary schema (protobuf-style tag + wire type), so
+ *      unknown fields are skipped and later versions can add fields
+ *      without breaking older readers.
+ *   2. Dictionaries / deltas: the week start is a day number, each
+ *      entry's date is a day offset from it, meal types are a one-byte
+ *      index, the "Week of …" title is rebuilt from the week start, and
+ *      a meal repeated later in the week is a back-reference.
+ *   3. deflate-raw (CompressionStream) when it makes the body smaller.
+ *   4. Text envelopes: base45 (RFC 9285) for QR — its alphabet is
+ *      exactly QR's alphanumeric mode, 5.5 bits/char instead of 8 —
+ *      and base64url for anything URL- or clipboard-shaped.
+ *
+ * Binary layout:
+ *
+ *   0xFC  version  flags  varint(bodyLength)  body
+ *
+ * flags bit 0 = body is deflate-raw compressed. bodyLength lets readers
+ * ignore trailing padding some BLE stacks append.
+ *
+ * decodePlanText() still accepts the old raw-JSON QR codes, so plans
+ * shared from older builds keep importing.
+ */
+
+export const PLAN_CODEC_VERSION = 1;
+export const PLAN_QR_PREFIX = 'FC1:';
+export const PLAN_LINK_PREFIX = 'fc1.';
+
+const MAGIC = 0xfc;
+const FLAG_DEFLATE = 0x01;
+
+// Field numbers. Never renumber; retire and add new ones instead.
+const PLAN_TITLE = 1;
+const PLAN_WEEK_START = 2;
+const PLAN_ENTRY = 3;
+const ENTRY_DAY_OFFSET = 1;
+const ENTRY_MEAL_TYPE = 2;
+const ENTRY_MEAL_TYPE_TEXT = 3;
+const ENTRY_TITLE = 4;
+const ENTRY_INGREDIENTS = 5;
+const ENTRY_SAME_AS = 6;
+const ENTRY_KEY = 7;
+
+const WIRE_VARINT = 0;
+const WIRE_BYTES = 2;
+
+// Index = wire value. Append only.
+const MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snack'];
+const MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
+const DAY_MS = 86400000;
+
+const utf8 = new TextEncoder();
+const utf8Decoder = new TextDecoder();
+
+// -------------------------------------------------------------------------
+// Dates
+// -------------------------------------------------------------------------
+
+function isoToDay(iso) {
+  if (!/^\d{4}-\d{2}-\d{2}$/.test(iso || '')) return null;
+  const ms = Date.parse(`${iso}T00:00:00Z`);
+  return Number.isNaN(ms) ? null : Math.round(ms / DAY_MS);
+}
+
+function dayToIso(day) {
+  return new Date(day * DAY_MS).toISOString().slice(0, 10);
+}
+
+/** The title MealPlanningCalendar gives a week ("Week of Nov 3, 2025"). */
+function defaultTitle(weekStartIso) {
+  const d = new Date(`${weekStartIso}T00:00:00Z`);
+  return `Week of ${MONTHS[d.getUTCMonth()]} ${d.getUTCDate()}, ${d.getUTCFullYear()}`;
+}
+
+// -------------------------------------------------------------------------
+// Wire primitives
+// -------------------------------------------------------------------------
+
+class Writer {
+  constructor() {
+    this.bytes = [];
+  }
+
+  varint(n) {
+    let v = Math.max(0, Math.floor(n));
+    while (v >= 0x80) {
+      this.bytes.push((v % 0x80) | 0x80);
+      v = Math.floor(v / 0x80);
+    }
+    this.bytes.push(v);
+  }
+
+  field(no, wire) {
+    this.varint(no * 8 + wire);
+  }
+
+  uint(no, n) {
+    this.field(no, WIRE_VARINT);
+    this.varint(n);
+  }
+
+  raw(no, bytes) {
+    this.field(no, WIRE_BYTES);
+    this.varint(bytes.length);
+    for (const b of bytes) this.bytes.push(b);
+  }
+
+  string(no, s) {
+    this.raw(no, utf8.encode(s));
+  }
+
+  finish() {
+    return Uint8Array.from(this.bytes);
+  }
+}
+
+class Reader {
+  constructor(bytes) {
+    this.bytes = bytes;
+    this.pos = 0;
+  }
+
+  get done() {
+    return this.pos >= this.bytes.length;
+  }
+
+  varint() {
+    let result = 0;
+    let scale = 1;
+    for (let i = 0; i < 8; i++) {
+      if (this.pos >= this.bytes.length) throw new Error('Truncated plan payload');
+      const b = this.bytes[this.pos++];
+      result += (b & 0x7f) * scale;
+      if (b < 0x80) return result;
+      scale *= 0x80;
+    }
+    throw new Error('Malformed plan payload');
+  }
+
+  raw() {
+    const len = this.varint();
+    if (this.pos + len > this.bytes.length) throw new Error('Truncated plan payload');
+    const out = this.bytes.subarray(this.pos, this.pos + len);
+    this.pos += len;
+    return out;
+  }
+
+  /** Iterate `[fieldNo, value]`; value is a number or a Uint8Array slice. */
+  *fields() {
+    while (!this.done) {
+      const key = this.varint();
+      const wire = key % 8;
+      const no = Math.floor(key / 8);
+      if (wire === WIRE_VARINT) yield [no, this.varint()];
+      else if (wire === WIRE_BYTES) yield [no, this.raw()];
+      else throw new Error(`Unsupported wire type ${wire} in plan payload`);
+    }
+  }
+}
+
+// -------------------------------------------------------------------------
+// Compression (CompressionStream: every current browser, Node ≥ 18)
+// -------------------------------------------------------------------------
+
+const hasCompression = () => typeof CompressionStream !== 'undefined';
+
+async function transform(bytes, stream) {
+  const response = new Response(new Blob([bytes]).stream().pipeThrough(stream));
+  return new Uint8Array(await response.arrayBuffer());
+}
+
+// -------------------------------------------------------------------------
+// Plan <-> bytes
+// -------------------------------------------------------------------------
+
+function encodeBody(plan) {
+  const w = new Writer();
+  const weekStart = plan?.weekStart || '';
+  const startDay = isoToDay(weekStart);
+
+  if (startDay !== null) w.uint(PLAN_WEEK_START, startDay);
+  if (plan?.title && (startDay === null || plan.title !== defaultTitle(weekStart))) {
+    w.string(PLAN_TITLE, plan.title);
+  }
+
+  const seen = new Map(); // `${title}\0${ingredients}` → entry index
+  (plan?.entries || []).forEach((entry, index) => {
+    const e = new Writer();
+    const title = entry?.title || '';
+    const ingredients = entry?.ingredients || '';
+
+    // "2025-11-03-dinner" → day offset + meal-type index.
+    const m = /^(\d{4}-\d{2}-\d{2})-(.+)$/.exec(entry?.key || '');
+    const day = m ? isoToDay(m[1]) : null;
+    if (m && day !== null && startDay !== null && day >= startDay) {
+      e.uint(ENTRY_DAY_OFFSET, day - startDay);
+      const typeIndex = MEAL_TYPES.indexOf(m[2]);
+      if (typeIndex !== -1) e.uint(ENTRY_MEAL_TYPE, typeIndex);
+      else e.string(ENTRY_MEAL_TYPE_TEXT, m[2]);
+    } else if (entry?.key) {
+      e.string(ENTRY_KEY, entry.key);
+    }
+
+    const dedupeKey = `${title}\0${ingredients}`;
+    if (seen.has(dedupeKey)) {
+      e.uint(ENTRY_SAME_AS, seen.get(dedupeKey));
+    } else {
+      seen.set(dedupeKey, index);
+      if (title) e.string(ENTRY_TITLE, title);
+      if (ingredients) e.string(ENTRY_INGREDIENTS, ingredients);
+    }
+    w.raw(PLAN_ENTRY, e.finish());
+  });
+
+  return w.finish();
+}
+
+function decodeBody(body) {
+  let title = null;
+  let startDay = null;
+  const rawEntries = [];
+  for (const [no, value] of new Reader(body).fields()) {
+    if (no === PLAN_TITLE) title = utf8Decoder.decode(value);
+    else if (no === PLAN_WEEK_START) startDay = value;
+    else if (no === PLAN_ENTRY) rawEntries.push(value);
+    // Unknown fields: ignored (written by a newer version).
+  }
+
+  const weekStart = startDay === null ? '' : dayToIso(startDay);
+  const entries = [];
+  for (const bytes of rawEntries) {
+    const e = { dayOffset: null, mealType: null, key: null, title: '', ingredients: '', sameAs: null };
+    for (const [no, value] of new Reader(bytes).fields()) {
+      if (no === ENTRY_DAY_OFFSET) e.dayOffset = value;
+      else if (no === ENTRY_MEAL_TYPE) e.mealType = MEAL_TYPES[value] || `type-${value}`;
+      else if (no === ENTRY_MEAL_TYPE_TEXT) e.mealType = utf8Decoder.decode(value);
+      else if (no === ENTRY_TITLE) e.title = utf8Decoder.decode(value);
+      else if (no === ENTRY_INGREDIENTS) e.ingredients = utf8Decoder.decode(value);
+      else if (no === ENTRY_SAME_AS) e.sameAs = value;
+      else if (no === ENTRY_KEY) e.key = utf8Decoder.decode(value);
+    }
+    if (e.sameAs !== null) {
+      const source = entries[e.sameAs];
+      if (!source) throw new Error('Malformed plan payload (bad back-reference)');
+      e.title = source.title;
+      e.ingredients = source.ingredients;
+    }
+    const key = e.key ?? (e.dayOffset !== null && startDay !== null
+      ? `${dayToIso(startDay + e.dayOffset)}-${e.mealType}`
+      : '');
+    entries.push({ key, title: e.title, ingredients: e.ingredients });
+  }
+
+  return {
+    title: title ?? (weekStart ? defaultTitle(weekStart) : ''),
+    weekStart,
+    entries,
+  };
+}
+
+/** True when `bytes` starts like an encodePlan() payload. */
+export function isEncodedPlan(bytes) {
+  return bytes?.length > 3 && bytes[0] === MAGIC;
+}
+
+/**
+ * Encode a plan (`{ title, weekStart, entries: [{ key, title, ingredients }] }`,
+ * as built by MealPlanningCalendar) to bytes.
+ */
+export async function encodePlan(plan) {
+  let body = encodeBody(plan);
+  let flags = 0;
+  if (hasCompression()) {
+    const deflated = await transform(body, new CompressionStream('deflate-raw'));
+    if (deflated.length < body.length) {
+      body = deflated;
+      flags |= FLAG_DEFLATE;
+    }
+  }
+  const header = new Writer();
+  header.bytes.push(MAGIC, PLAN_CODEC_VERSION, flags);
+  header.varint(body.length);
+  const out = new Uint8Array(header.bytes.length + body.length);
+  out.set(header.bytes, 0);
+  out.set(body, header.bytes.length);
+  return out;
+}
+
+/** Inverse of encodePlan(). Throws on anything that isn't a valid payload. */
+export async function decodePlan(bytes) {
+  if (!isEncodedPlan(bytes)) throw new Error('Not a Forkcast plan payload');
+  const version = bytes[1];
+  if (version > PLAN_CODEC_VERSION) {
+    throw new Error('This plan was shared from a newer version of Forkcast. Please update the app.');
+  }
+  const flags = bytes[2];
+  const reader = new Reader(bytes);
+  reader.pos = 3;
+  let body = reader.raw();
+  if (flags & FLAG_DEFLATE) {
+    if (typeof DecompressionStream === 'undefined') {
+      throw new Error('This device cannot decompress shared plans.');
+    }
+    body = await transform(body, new DecompressionStream('deflate-raw'));
+  }
+  return decodeBody(body);
+}
+
+// -------------------------------------------------------------------------
+// Text envelopes
+// -------------------------------------------------------------------------
+
+const B45 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:';
+
+/** RFC 9285 base45. */
+export function toBase45(bytes) {
+  let out = '';
+  for (let i = 0; i + 1 < bytes.length; i += 2) {
+    let n = bytes[i] * 256 + bytes[i + 1];
+    const c = n % 45; n = (n - c) / 45;
+    const d = n % 45;
+    const e = (n - d) / 45;
+    out += B45[c] + B45[d] + B45[e];
+  }
+  if (bytes.length % 2) {
+    const n = bytes[bytes.length - 1];
+    out += B45[n % 45] + B45[Math.floor(n / 45)];
+  }
+  return out;
+}
+
+export function fromBase45(text) {
+  const values = Array.from(text, (ch) => {
+    const v = B45.indexOf(ch);
+    if (v === -1) throw new Error('Invalid base45 character');
+    return v;
+  });
+  if (values.length % 3 === 1) throw new Error('Invalid base45 length');
+  const out = [];
+  for (let i = 0; i < values.length; i += 3) {
+    if (i + 2 < values.length) {
+      const n = values[i] + values[i + 1] * 45 + values[i + 2] * 2025;
+      if (n > 0xffff) throw new Error('Invalid base45 triplet');
+      out.push(n >> 8, n & 0xff);
+    } else {
+      const n = values[i] + values[i + 1] * 45;
+      if (n > 0xff) throw new Error('Invalid base45 pair');
+      out.push(n);
+    }
+  }
+  return Uint8Array.from(out);
+}
+
+export function toBase64Url(bytes) {
+  let bin = '';
+  for (let i = 0; i < bytes.length; i += 1) bin += String.fromCharCode(bytes[i]);
+  return btoa(bin).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+}
+
+export function fromBase64Url(text) {
+  const b64 = text.replace(/-/g, '+').replace(/_/g, '/');
+  const bin = atob(b64 + '='.repeat((4 - (b64.length % 4)) % 4));
+  return Uint8Array.from(bin, (ch) => ch.charCodeAt(0));
+}
+
+/**
+ * Plan → text. `format: 'qr'` (default) gives `FC1:<base45>`, which QR
+ * encoders pack in alphanumeric mode; `'link'` gives `fc1.<base64url>`.
+ */
+export async function encodePlanText(plan, { format = 'qr' } = {}) {
+  const bytes = await encodePlan(plan);
+  return format === 'link'
+    ? PLAN_LINK_PREFIX + toBase64Url(bytes)
+    : PLAN_QR_PREFIX + toBase45(bytes);
+}
+
+/** Text from either envelope — or a legacy raw-JSON QR — back to a plan. */
+export async function decodePlanText(text) {
+  const value = String(text || '').trim();
+  if (value.startsWith(PLAN_QR_PREFIX)) return decodePlan(fromBase45(value.slice(PLAN_QR_PREFIX.length)));
+  if (value.startsWith(PLAN_LINK_PREFIX)) return decodePlan(fromBase64Url(value.slice(PLAN_LINK_PREFIX.length)));
+  return JSON.parse(value);
+}
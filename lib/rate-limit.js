@@ -0,0 +1,232 @@
+/**
+ * lib/rate-limit.js
+ * -----------------
+ * Per-user and per-IP token buckets for the endpoints that cost real
+ * money or upstream quota: barcode-lookup and barcode-diagnose (Open
+ * Facts / UPCitemdb), meal-suggestions (LLM) and upload (Cloudinary),
+ * plus export / import, which read or write a user's whole data set,
+ * and the meal-ingredients backfill, which parses and rewrites a batch
+ * of meals per call.
+ *
+ * The LLM limiter and the password pool bound how much work runs at
+ * once; this bounds how much work one caller may ask for over time.
+ * Each route has a POLICY with two buckets:
+ *
+ *   * user — keyed by the JWT's userId, so one account can't drain a
+ *     shared quota (OFF throttles our outbound IP, not our users).
+ *   * ip   — keyed by the client IP, so a script minting accounts
+ *     still hits a ceiling. Set generously: households and offices
+ *     share an address.
+ *
+ * A bucket holds up to `burst` tokens and refills at `perMinute`. A
+ * request spends one token from BOTH buckets or from neither (a
+ * request refused by the IP bucket doesn't cost the user anything).
+ *
+ * Stores (RATE_LIMIT_STORE):
+ *
+ *   * memory   (default) — a Map in this process. Exact on a single
+ *     instance; on N instances a caller effectively gets N buckets.
+ *   * supabase — rate_limit_take() in Postgres (migration 010), shared
+ *     by every instance, one round trip per request.
+ *
+ * A store error FAILS OPEN: the request is allowed and the error
+ * logged. Rate limiting protects quotas; it must not take the scanner
+ * down with the database.
+ *
+ * Policies can be overridden with RATE_LIMIT_POLICIES, a JSON object
+ * merged over the defaults, e.g.
+ *   {"barcode-lookup":{"user":{"burst":10,"perMinute":6}}}
+ * RATE_LIMIT_DISABLED=1 turns limiting off (benchmarks).
+ *
+ * Responses carry RateLimit-Limit / -Remaining / -Reset / -Policy
+ * (IETF draft-ietf-httpapi-ratelimit-headers) for whichever bucket is
+ * closest to empty; a refusal adds Retry-After.
+ */
+
+import { db } from './supabase-db';
+
+const MAX_MEMORY_KEYS = 10000;
+
+export const DEFAULT_POLICIES = {
+  'barcode-lookup':   { user: { burst: 30, perMinute: 30 }, ip: { burst: 120, perMinute: 120 } },
+  'barcode-diagnose': { user: { burst: 3,  perMinute: 1 },  ip: { burst: 10,  perMinute: 5 } },
+  'meal-suggestions': { user: { burst: 5,  perMinute: 2 },  ip: { burst: 20,  perMinute: 10 } },
+  upload:             { user: { burst: 10, perMinute: 10 }, ip: { burst: 40,  perMinute: 40 } },
+  export:             { user: { burst: 3,  perMinute: 1 },  ip: { burst: 20,  perMinute: 10 } },
+  import:             { user: { burst: 3,  perMinute: 1 },  ip: { burst: 20,  perMinute: 10 } },
+  'meal-ingredients/backfill': { user: { burst: 5, perMinute: 2 }, ip: { burst: 20, perMinute: 10 } },
+};
+
+function readPolicyOverrides() {
+  const raw = process.env.RATE_LIMIT_POLICIES;
+  if (!raw) return {};
+  try {
+    const parsed = JSON.parse(raw);
+    return parsed && typeof parsed === 'object' ? parsed : {};
+  } catch {
+    console.warn('[rate-limit] RATE_LIMIT_POLICIES is not valid JSON; using defaults');
+    return {};
+  }
+}
+
+/** Defaults with `overrides` merged in per route and per bucket. */
+export function mergePolicies(defaults, overrides = {}) {
+  const out = {};
+  for (const route of new Set([...Object.keys(defaults), ...Object.keys(overrides)])) {
+    out[route] = {};
+    for (const scope of ['user', 'ip']) {
+      const bucket = { ...defaults[route]?.[scope], ...overrides[route]?.[scope] };
+      if (bucket.burst > 0 && bucket.perMinute > 0) out[route][scope] = bucket;
+    }
+  }
+  return out;
+}
+
+/**
+ * clientIp — first address in X-Forwarded-For (set by Vercel and most
+ * proxies), else X-Real-IP. Behind no proxy at all the header is
+ * whatever the client sent, so don't rely on the IP bucket there.
+ */
+export function clientIp(request) {
+  const forwarded = request.headers.get('x-forwarded-for');
+  if (forwarded) return forwarded.split(',')[0].trim() || 'unknown';
+  return request.headers.get('x-real-ip') || 'unknown';
+}
+
+/** Token counts for one bucket after `elapsedMs`, capped at capacity. */
+function refill(tokens, elapsedMs, { capacity, refillPerSec }) {
+  return Math.min(capacity, tokens + (Math.max(0, elapsedMs) / 1000) * refillPerSec);
+}
+
+/** In-process store. `take` is synchronous underneath, so it's atomic. */
+export class MemoryStore {
+  constructor({ maxKeys = MAX_MEMORY_KEYS, now = Date.now } = {}) {
+    this.maxKeys = maxKeys;
+    this.now = now;
+    this.buckets = new Map(); // key → { tokens, updatedAt, fullAt }
+  }
+
+  async take(buckets, cost = 1) {
+    const now = this.now();
+    const levels = buckets.map((b) => {
+      const entry = this.buckets.get(b.key);
+      return entry ? refill(entry.tokens, now - entry.updatedAt, b) : b.capacity;
+    });
+    const allowed = levels.every((tokens) => tokens >= cost);
+    const tokens = levels.map((level, i) => {
+      const left = allowed ? level - cost : level;
+      const b = buckets[i];
+      this.buckets.delete(b.key); // re-insert: Map order is oldest-touched first
+      this.buckets.set(b.key, {
+        tokens: left,
+        updatedAt: now,
+        fullAt: now + ((b.capacity - left) / b.refillPerSec) * 1000,
+      });
+      return left;
+    });
+    this.prune(now);
+    return { allowed, tokens };
+  }
+
+  /** Drop buckets that have refilled completely (same as absent), then the oldest if still too many. */
+  prune(now) {
+    if (this.buckets.size <= this.maxKeys) return;
+    for (const [key, entry] of this.buckets) {
+      if (entry.fullAt <= now) this.buckets.delete(key);
+    }
+    for (const key of this.buckets.keys()) {
+      if (this.buckets.size <= this.maxKeys) break;
+      this.buckets.delete(key);
+    }
+  }
+}
+
+/** Shared store: rate_limit_take() in Postgres (migration 010). */
+export class SupabaseStore {
+  async take(buckets, cost = 1) {
+    return db.rate_limit_buckets.take(buckets, cost);
+  }
+}
+
+export class RateLimiter {
+  constructor({ store = new MemoryStore(), policies = DEFAULT_POLICIES, enabled = true } = {}) {
+    this.store = store;
+    this.policies = policies;
+    this.enabled = enabled;
+  }
+
+  /**
+   * Spend one token for `route` from the user's and the IP's buckets.
+   * Resolves with `{ allowed, limit, remaining, resetSeconds,
+   * retryAfterSeconds, policy }`, or null when the route has no policy
+   * or limiting is disabled. Never rejects.
+   */
+  async check(route, { userId, ip } = {}) {
+    const policy = this.policies[route];
+    if (!this.enabled || !policy) return null;
+
+    const buckets = [];
+    if (policy.user && userId) buckets.push({ scope: 'user', id: userId, ...policy.user });
+    if (policy.ip && ip) buckets.push({ scope: 'ip', id: ip, ...policy.ip });
+    if (!buckets.length) return null;
+    for (const b of buckets) {
+      b.key = `${route}:${b.scope}:${b.id}`;
+      b.capacity = b.burst;
+      b.refillPerSec = b.perMinute / 60;
+    }
+
+    let result;
+    try {
+      result = await this.store.take(buckets.map(({ key, capacity, refillPerSec }) => ({ key, capacity, refillPerSec })));
+    } catch (error) {
+      console.warn(`[rate-limit] ${route}: store failed, allowing request:`, error?.message || error);
+      return null;
+    }
+
+    // Report the bucket closest to empty, as a fraction of its size.
+    let binding = 0;
+    buckets.forEach((b, i) => {
+      if (result.tokens[i] / b.capacity < result.tokens[binding] / buckets[binding].capacity) binding = i;
+    });
+    const b = buckets[binding];
+    const tokens = result.tokens[binding];
+
+    let retryAfterSeconds = 0;
+    if (!result.allowed) {
+      buckets.forEach((bucket, i) => {
+        const wait = Math.ceil((1 - result.tokens[i]) / bucket.refillPerSec);
+        retryAfterSeconds = Math.max(retryAfterSeconds, wait);
+      });
+    }
+
+    return {
+      allowed: result.allowed,
+      limit: b.capacity,
+      remaining: Math.max(0, Math.floor(tokens)),
+      resetSeconds: Math.max(0, Math.ceil((b.capacity - tokens) / b.refillPerSec)),
+      retryAfterSeconds: Math.max(1, retryAfterSeconds),
+      policy: `${b.capacity};w=${Math.round(b.capacity / b.refillPerSec)};scope=${b.scope}`,
+    };
+  }
+
+}
+
+/** RateLimit-* headers for a check() result (and Retry-After on refusal). */
+export function rateLimitHeaders(result) {
+  if (!result) return {};
+  const headers = {
+    'RateLimit-Limit': String(result.limit),
+    'RateLimit-Remaining': String(result.remaining),
+    'RateLimit-Reset': String(result.resetSeconds),
+    'RateLimit-Policy': result.policy,
+  };
+  if (!result.allowed) headers['Retry-After'] = String(result.retryAfterSeconds);
+  return headers;
+}
+
+// Process-wide limiter used by the API route.
+export const rateLimiter = new RateLimiter({
+  store: process.env.RATE_LIMIT_STORE === 'supabase' ? new SupabaseStore() : new MemoryStore(),
+  policies: mergePolicies(DEFAULT_POLICIES, readPolicyOverrides()),
+  enabled: process.env.RATE_LIMIT_DISABLED !== '1',
+});
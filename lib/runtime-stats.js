@@ -0,0 +1,134 @@
+/**
+ * lib/runtime-stats.js
+ * --------------------
+ * Process memory, V8 heap and event-loop lag for soak tests
+ * (tests/bench_soak.py), served by GET /api/debug/runtime and
+ * GET /api/debug/heap-snapshot.
+ *
+ * A long-lived `next start` keeps module-level state for its whole life:
+ * the Supabase client, the collection / suggestion caches, rate-limit
+ * buckets, the LLM and password queues, Cloudinary config. A slow leak
+ * in any of them only shows after hours, as RSS and heapUsed that never
+ * come back down. The soak runner samples runtimeSnapshot() at intervals
+ * and tests the series for a trend; two heap snapshots, diffed by
+ * constructor, then point at what is growing.
+ *
+ *   * memory        process.memoryUsage() (rss, heapUsed, external, …)
+ *   * heap          v8.getHeapStatistics(), incl. detached contexts
+ *   * spaces        used bytes per V8 heap space (old_space growing
+ *                   while new_space is flat is the leak signature)
+ *   * eventLoopLag  perf_hooks histogram since the previous snapshot:
+ *                   mean / p50 / p99 / max in ms. Reading resets it, so
+ *                   each sample covers one interval
+ *
+ * `gc: true` runs a full collection first when the server was started
+ * with `NODE_OPTIONS=--expose-gc`, so samples measure what is retained
+ * rather than where the collector happened to be.
+ *
+ * Off unless DEBUG_RUNTIME=1 AND DEBUG_RUNTIME_TOKEN is set: a heap
+ * snapshot pauses the process for seconds and contains every string in
+ * memory, including other users' JWTs, JWT_SECRET and the Supabase
+ * service key. Signup is open, so a JWT proves nothing here; callers
+ * must send the operator's token in X-Debug-Token
+ * (operatorAuthorized). Never enable it on a deployment that serves
+ * real users.
+ */
+
+import { createHash, timingSafeEqual } from 'crypto';
+import { monitorEventLoopDelay } from 'perf_hooks';
+import { Readable } from 'stream';
+import v8 from 'v8';
+
+const LAG_RESOLUTION_MS = 10;
+
+export function runtimeStatsEnabled() {
+  return process.env.DEBUG_RUNTIME === '1' && Boolean(process.env.DEBUG_RUNTIME_TOKEN);
+}
+
+if (process.env.DEBUG_RUNTIME === '1' && !process.env.DEBUG_RUNTIME_TOKEN) {
+  console.warn('[runtime-stats] DEBUG_RUNTIME=1 without DEBUG_RUNTIME_TOKEN; the debug endpoints stay off');
+}
+
+const digest = (value) => createHash('sha256').update(value).digest();
+
+/**
+ * True if `request` carries the operator's DEBUG_RUNTIME_TOKEN in
+ * X-Debug-Token. Also gates other operator-only work, such as the
+ * all-users scope of POST /api/meal-ingredients/backfill.
+ */
+export function operatorAuthorized(request) {
+  const expected = process.env.DEBUG_RUNTIME_TOKEN;
+  const given = request.headers.get('x-debug-token');
+  if (!expected || !given) return false;
+  // Hash both sides: timingSafeEqual needs equal lengths, and comparing
+  // digests doesn't leak the token's length either.
+  return timingSafeEqual(digest(given), digest(expected));
+}
+
+let lagHistogram = null;
+let lagSince = 0;
+
+// Started on import when enabled, so the first sample covers startup too.
+function eventLoopLag() {
+  if (!lagHistogram) {
+    lagHistogram = monitorEventLoopDelay({ resolution: LAG_RESOLUTION_MS });
+    lagHistogram.enable();
+    lagSince = Date.now();
+  }
+  return lagHistogram;
+}
+
+if (runtimeStatsEnabled()) eventLoopLag();
+
+const nsToMs = (ns) => (Number.isFinite(ns) ? Math.round(ns / 1e4) / 100 : null);
+
+/** One sample; see the header for the fields. */
+export function runtimeSnapshot({ gc = false } = {}) {
+  const gcAvailable = typeof global.gc === 'function';
+  if (gc && gcAvailable) global.gc();
+
+  const histogram = eventLoopLag();
+  const lag = {
+    windowMs: Date.now() - lagSince,
+    meanMs: nsToMs(histogram.mean),
+    p50Ms: nsToMs(histogram.percentile(50)),
+    p99Ms: nsToMs(histogram.percentile(99)),
+    maxMs: nsToMs(histogram.max),
+  };
+  histogram.reset();
+  lagSince = Date.now();
+
+  const heap = v8.getHeapStatistics();
+  const spaces = {};
+  for (const space of v8.getHeapSpaceStatistics()) spaces[space.space_name] = space.space_used_size;
+
+  return {
+    ts: Date.now(),
+    pid: process.pid,
+    uptimeS: Math.round(process.uptime()),
+    gcAvailable,
+    memory: process.memoryUsage(),
+    heap: {
+      totalHeapSize: heap.total_heap_size,
+      usedHeapSize: heap.used_heap_size,
+      heapSizeLimit: heap.heap_size_limit,
+      mallocedMemory: heap.malloced_memory,
+      externalMemory: heap.external_memory,
+      nativeContexts: heap.number_of_native_contexts,
+      detachedContexts: heap.number_of_detached_contexts,
+    },
+    spaces,
+    eventLoopLag: lag,
+  };
+}
+
+/** The V8 heap snapshot (.heapsnapshot JSON), streamed as it is written. */
+export function heapSnapshotResponse() {
+  return new Response(Readable.toWeb(v8.getHeapSnapshot()), {
+    headers: {
+      'Content-Type': 'application/json',
+      'Content-Disposition': `attachment; filename="forkcast-${process.pid}-${Date.now()}.heapsnapshot"`,
+      'Cache-Control': 'no-store',
+    },
+  });
+}
@@ -0,0 +1,104 @@
+/**
+ * lib/suggestion-cache.js
+ * -----------------------
+ * In-process response cache for POST /api/meal-suggestions.
+ *
+ * Every suggestion costs LLM budget and several seconds of latency, yet
+ * the same request comes in again and again: the planner's weekly
+ * prompt is a fixed template, and "quick dinner" + the same pantry is a
+ * common combination. We cache the final text keyed by a hash of the
+ * NORMALISED inputs:
+ *
+ *   * prompt      trimmed, lower-cased, whitespace collapsed
+ *   * dietary     lower-cased; 'any' / '' / missing all mean "none"
+ *   * cuisine     same as dietary
+ *   * mealType    lower-cased
+ *   * ingredients lower-cased, trimmed, de-duplicated and SORTED — the
+ *                 merged pantry set comes back in whatever order the DB
+ *                 returned it, which must not defeat the cache
+ *
+ * Entries expire after SUGGESTION_CACHE_TTL_MS (default 6 h) and the
+ * cache holds at most SUGGESTION_CACHE_MAX entries (default 500),
+ * evicting least-recently-used first. A Map iterates in insertion order,
+ * so re-inserting on read is all the LRU bookkeeping we need.
+ *
+ * Per-instance only — a cold serverless instance starts empty. That's
+ * fine: the cache is a latency/budget optimisation, never a source of
+ * truth.
+ */
+
+import { createHash } from 'crypto';
+
+const DEFAULT_TTL_MS = 6 * 60 * 60 * 1000;
+const DEFAULT_MAX_ENTRIES = 500;
+
+function envInt(name, fallback) {
+  const n = Number.parseInt(process.env[name] || '', 10);
+  return Number.isFinite(n) && n > 0 ? n : fallback;
+}
+
+function normText(value) {
+  return String(value || '').trim().toLowerCase().replace(/\s+/g, ' ');
+}
+
+function normChoice(value) {
+  const v = normText(value);
+  return v === 'any' ? '' : v;
+}
+
+/**
+ * Stable cache key for a suggestion request. Exported so tests (and the
+ * route's logging) can reason about which requests collide.
+ */
+export function suggestionCacheKey({ prompt, dietary, cuisine, mealType, ingredients } = {}) {
+  const normalised = {
+    p: normText(prompt),
+    d: normChoice(dietary),
+    c: normChoice(cuisine),
+    m: normText(mealType),
+    i: Array.from(new Set((ingredients || []).map(normText).filter(Boolean))).sort(),
+  };
+  return createHash('sha256').update(JSON.stringify(normalised)).digest('hex');
+}
+
+export class SuggestionCache {
+  constructor({ ttlMs = DEFAULT_TTL_MS, maxEntries = DEFAULT_MAX_ENTRIES } = {}) {
+    this.ttlMs = ttlMs;
+    this.maxEntries = maxEntries;
+    this.entries = new Map();
+    this.hits = 0;
+    this.misses = 0;
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry || entry.expiresAt <= Date.now()) {
+      if (entry) this.entries.delete(key);
+      this.misses += 1;
+      return null;
+    }
+    // Refresh recency.
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    this.hits += 1;
+    return entry.value;
+  }
+
+  set(key, value) {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + this.ttlMs });
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+  }
+
+  stats() {
+    return { size: this.entries.size, hits: this.hits, misses: this.misses };
+  }
+}
+
+/** Shared instance used by the API route. */
+export const suggestionCache = new SuggestionCache({
+  ttlMs: envInt('SUGGESTION_CACHE_TTL_MS', DEFAULT_TTL_MS),
+  maxEntries: envInt('SUGGESTION_CACHE_MAX', DEFAULT_MAX_ENTRIES),
+});
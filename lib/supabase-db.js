@@ -1,8 +1,39 @@
+import { AsyncLocalStorage } from 'node:async_hooks'
 import { createClient } from '@supabase/supabase-js'
+import { collectionCache } from './collection-cache'
 
 const supabaseUrl = process.env.NEXT_PUBLIC_SUPABASE_URL
 const supabaseServiceKey = process.env.SUPABASE_SERVICE_ROLE_KEY
 
+// meal_ingredient_tokens / meal_ingredients paging: rows per insert,
+// rows per postings page (PostgREST's default max-rows is 1000).
+const INDEX_WRITE_BATCH = 1000
+const POSTINGS_PAGE = 1000
+
+// Per-request count of PostgREST round trips. Every request the client
+// makes goes through countingFetch(); withDbRoundTrips() opens a scope
+// per API request and reports the count as X-DB-Round-Trips. Off
+// unless DB_ROUND_TRIP_HEADER=1 (tests/bench_roundtrips.py).
+const roundTripScope = new AsyncLocalStorage()
+
+function countingFetch(...args) {
+  const scope = roundTripScope.getStore()
+  if (scope) scope.count += 1
+  return fetch(...args)
+}
+
+export function withDbRoundTrips(handler) {
+  if (process.env.DB_ROUND_TRIP_HEADER !== '1') return handler
+  return (request, context) => {
+    const scope = { count: 0 }
+    return roundTripScope.run(scope, async () => {
+      const response = await handler(request, context)
+      response.headers.set('X-DB-Round-Trips', String(scope.count))
+      return response
+    })
+  }
+}
+
 // Lazy admin client. We DO NOT throw at module load because that would
 // break the Next.js build (route collection / SSG) when env vars aren't
 // present at build time (e.g., during the Emergent build pipeline).
@@ -21,6 +52,7 @@ function getSupabaseAdmin() {
         autoRefreshToken: false,
         persistSession: false,
       },
+      global: { fetch: countingFetch },
     })
   }
   return _supabaseAdmin
@@ -39,6 +71,106 @@ export const supabaseAdmin = new Proxy(
   }
 )
 
+// meals row (with the `user:users(id, username)` embed) → API shape.
+function mealFromRow(meal) {
+  return {
+    id: meal.id,
+    userId: meal.user_id,
+    title: meal.title,
+    ingredients: meal.ingredients,
+    instructions: meal.instructions,
+    imageUrl: meal.image_url,
+    imageWidth: meal.image_width ?? null,
+    imageHeight: meal.image_height ?? null,
+    imagePublicId: meal.image_public_id ?? null,
+    imagePlaceholder: meal.image_placeholder ?? null,
+    galleryImages: meal.gallery_images ? JSON.parse(meal.gallery_images) : [],
+    createdAt: meal.created_at,
+    updatedAt: meal.updated_at,
+    user: meal.user ? {
+      id: meal.user.id,
+      username: meal.user.username
+    } : null
+  }
+}
+
+// pantry_items / shopping_list_items row → API shape.
+function pantryItemFromRow(row) {
+  return {
+    id: row.id,
+    userId: row.user_id,
+    name: row.name,
+    barcode: row.barcode,
+    quantity: row.quantity,
+    unit: row.unit,
+    expiresAt: row.expires_at,
+    addedAt: row.added_at,
+  };
+}
+
+function shoppingItemFromRow(row) {
+  return {
+    id: row.id,
+    userId: row.user_id,
+    name: row.name,
+    barcode: row.barcode || null,
+    checked: row.checked,
+    sourceMealId: row.source_meal_id,
+    addedAt: row.added_at,
+  };
+}
+
+// Columns carried by GET /api/export and POST /api/import, API name →
+// column, per collection. user_id is implied by the caller; derived
+// columns (ingredient index, parser version) are rebuilt lazily after
+// an import, like meals saved before migrations 008 / 009.
+const USER_DATA_COLUMNS = {
+  meals: {
+    id: 'id', title: 'title', ingredients: 'ingredients', instructions: 'instructions',
+    imageUrl: 'image_url', imageWidth: 'image_width', imageHeight: 'image_height',
+    imagePublicId: 'image_public_id', imagePlaceholder: 'image_placeholder',
+    galleryImages: 'gallery_images', createdAt: 'created_at', updatedAt: 'updated_at',
+  },
+  meal_plans: { id: 'id', date: 'date', mealType: 'meal_type', mealId: 'meal_id', createdAt: 'created_at' },
+  pantry_items: {
+    id: 'id', name: 'name', barcode: 'barcode', quantity: 'quantity', unit: 'unit',
+    expiresAt: 'expires_at', addedAt: 'added_at',
+  },
+  shopping_list_items: {
+    id: 'id', name: 'name', barcode: 'barcode', checked: 'checked',
+    sourceMealId: 'source_meal_id', addedAt: 'added_at',
+  },
+}
+
+// An import never overwrites: rows that already exist are skipped.
+// A plan whose slot (user, date, meal type) is taken counts as existing.
+const USER_DATA_CONFLICT = {
+  meals: 'id',
+  meal_plans: 'user_id,date,meal_type',
+  pantry_items: 'id',
+  shopping_list_items: 'id',
+}
+
+// match_pantry_items / match_shopping_list_items (migration 011):
+// best rows for a scanned `code` and/or product `name`, barcode match
+// first, then pg_trgm name similarity. Returns
+// [{ item, matchedBy: 'barcode' | 'name', confidence }].
+async function matchScan(fn, fromRow, { userId, code = null, name = null, minConfidence, limit }) {
+  const { data, error } = await supabaseAdmin.rpc(fn, {
+    p_user_id: userId,
+    p_code: code,
+    p_name: name,
+    p_min_confidence: minConfidence,
+    p_limit: limit,
+  });
+  if (error) throw error;
+  return (data || []).map((row) => ({
+    item: fromRow(row.item),
+    matchedBy: row.matched_by,
+    confidence: Math.round(Number(row.confidence) * 100) / 100,
+  }));
+}
+
 // Simplified database interface that mimics MongoDB structure
 export const db = {
   users: {
@@ -71,11 +203,45 @@ export const db = {
       
       if (error) throw error
       return { insertedId: data.id }
+    },
+
+    // Only the password is ever updated (re-hash on login).
+    async updateOne(query, update) {
+      const set = update.$set || update
+      const { error } = await supabaseAdmin
+        .from('users')
+        .update({ password: set.password })
+        .eq('id', query.id)
+
+      if (error) throw error
+      return { modifiedCount: 1 }
     }
   },
   
   meals: {
     async find(query = {}) {
+      const transformedData = await this.findAll(query)
+      
+      // Return object that supports MongoDB-style chaining
+      return {
+        sort: () => ({
+          skip: (skip) => ({
+            limit: (limit) => ({
+              toArray: () => transformedData.slice(skip, skip + limit)
+            })
+          })
+        }),
+        // For direct access without chaining
+        length: transformedData.length,
+        map: transformedData.map.bind(transformedData),
+        filter: transformedData.filter.bind(transformedData),
+        // Make it iterable
+        [Symbol.iterator]: transformedData[Symbol.iterator].bind(transformedData)
+      }
+    },
+    
+    // find() as a plain array (the cached read, see the end of `db`).
+    async findAll(query = {}) {
       let queryBuilder = supabaseAdmin
         .from('meals')
         .select(`
@@ -90,6 +256,9 @@ export const db = {
       if (query.id) {
         queryBuilder = queryBuilder.eq('id', query.id)
       }
+      if (query.ids) {
+        queryBuilder = queryBuilder.in('id', query.ids)
+      }
       if (query.$or) {
         // Simple search implementation
         const searchTerm = query.$or[0].title?.$regex || ''
@@ -104,38 +273,7 @@ export const db = {
       if (error) throw error
       
       // Transform data to match expected format
-      const transformedData = (data || []).map(meal => ({
-        id: meal.id,
-        userId: meal.user_id,
-        title: meal.title,
-        ingredients: meal.ingredients,
-        instructions: meal.instructions,
-        imageUrl: meal.image_url,
-        galleryImages: meal.gallery_images ? JSON.parse(meal.gallery_images) : [],
-        createdAt: meal.created_at,
-        updatedAt: meal.updated_at,
-        user: meal.user ? {
-          id: meal.user.id,
-          username: meal.user.username
-        } : null
-      }))
-      
-      // Return object that supports MongoDB-style chaining
-      return {
-        sort: () => ({
-          skip: (skip) => ({
-            limit: (limit) => ({
-              toArray: () => transformedData.slice(skip, skip + limit)
-            })
-          })
-        }),
-        // For direct access without chaining
-        length: transformedData.length,
-        map: transformedData.map.bind(transformedData),
-        filter: transformedData.filter.bind(transformedData),
-        // Make it iterable
-        [Symbol.iterator]: transformedData[Symbol.iterator].bind(transformedData)
-      }
+      return (data || []).map(mealFromRow)
     },
     
     async findOne(query) {
@@ -159,22 +297,25 @@ export const db = {
         throw error
       }
       
-      // Transform data
-      return {
-        id: data.id,
-        userId: data.user_id,
-        title: data.title,
-        ingredients: data.ingredients,
-        instructions: data.instructions,
-        imageUrl: data.image_url,
-        galleryImages: data.gallery_images ? JSON.parse(data.gallery_images) : [],
-        createdAt: data.created_at,
-        updatedAt: data.updated_at,
-        user: data.user ? {
-          id: data.user.id,
-          username: data.user.username
-        } : null
-      }
+      return mealFromRow(data)
+    },
+
+    // One page of meals, newest first, paged in Postgres (find() pulls
+    // every row and slices in JS). `userId` limits to one owner.
+    async page({ userId, offset = 0, limit = 20 } = {}) {
+      let queryBuilder = supabaseAdmin
+        .from('meals')
+        .select(`
+          *,
+          user:users(id, username)
+        `)
+        .order('created_at', { ascending: false })
+        .range(offset, offset + limit - 1)
+      if (userId) queryBuilder = queryBuilder.eq('user_id', userId)
+
+      const { data, error } = await queryBuilder
+      if (error) throw error
+      return (data || []).map(mealFromRow)
     },
     
     async insertOne(meal) {
@@ -185,6 +326,10 @@ export const db = {
         ingredients: meal.ingredients,
         instructions: meal.instructions,
         image_url: meal.imageUrl,
+        image_width: meal.imageWidth ?? null,
+        image_height: meal.imageHeight ?? null,
+        image_public_id: meal.imagePublicId ?? null,
+        image_placeholder: meal.imagePlaceholder ?? null,
         gallery_images: meal.galleryImages ? JSON.stringify(meal.galleryImages) : null,
         created_at: meal.createdAt,
         updated_at: meal.updatedAt
@@ -206,6 +351,11 @@ export const db = {
       if (update.$set.ingredients) updateData.ingredients = update.$set.ingredients
       if (update.$set.instructions) updateData.instructions = update.$set.instructions
       if (update.$set.imageUrl) updateData.image_url = update.$set.imageUrl
+      // Image metadata may be set to null (a new image without it).
+      if (update.$set.imageWidth !== undefined) updateData.image_width = update.$set.imageWidth
+      if (update.$set.imageHeight !== undefined) updateData.image_height = update.$set.imageHeight
+      if (update.$set.imagePublicId !== undefined) updateData.image_public_id = update.$set.imagePublicId
+      if (update.$set.imagePlaceholder !== undefined) updateData.image_placeholder = update.$set.imagePlaceholder
       if (update.$set.galleryImages) updateData.gallery_images = JSON.stringify(update.$set.galleryImages)
       if (update.$set.updatedAt) updateData.updated_at = update.$set.updatedAt
       
@@ -214,15 +364,36 @@ export const db = {
       if (query.id) queryBuilder = queryBuilder.eq('id', query.id)
       if (query.userId) queryBuilder = queryBuilder.eq('user_id', query.userId)
       
-      const { data, error } = await queryBuilder.select()
+      // The updated row comes back from the same request (RETURNING),
+      // owner embedded, so callers don't re-read it.
+      const { data, error } = await queryBuilder.select(`
+          *,
+          user:users(id, username)
+        `)
       if (error) throw error
       
       return {
         matchedCount: data ? data.length : 0,
-        modifiedCount: data ? data.length : 0
+        modifiedCount: data ? data.length : 0,
+        meal: data?.length ? mealFromRow(data[0]) : null
       }
     },
     
+    // How many meals (other than `excludeId`) point at this image? With
+    // upload dedupe several of a user's meals can share one asset, so
+    // DELETE /api/meals/:id only destroys it when this returns 0.
+    async countByImageUrl(imageUrl, { excludeId } = {}) {
+      let queryBuilder = supabaseAdmin
+        .from('meals')
+        .select('id', { count: 'exact', head: true })
+        .eq('image_url', imageUrl)
+      if (excludeId) queryBuilder = queryBuilder.neq('id', excludeId)
+
+      const { count, error } = await queryBuilder
+      if (error) throw error
+      return count || 0
+    },
+
     async deleteOne(query) {
       let queryBuilder = supabaseAdmin.from('meals').delete()
       
@@ -240,7 +411,7 @@ export const db = {
     async find(query = {}) {
       let queryBuilder = supabaseAdmin.from('meal_plans').select(`
         *,
-        meal:meals(id, title, image_url, ingredients, instructions),
+        meal:meals(id, title, image_url, image_placeholder, ingredients, instructions),
         user:users(id, username)
       `);
       
@@ -271,6 +442,7 @@ export const db = {
           id: plan.meal.id,
           title: plan.meal.title,
           imageUrl: plan.meal.image_url,
+          imagePlaceholder: plan.meal.image_placeholder ?? null,
           ingredients: plan.meal.ingredients,
           instructions: plan.meal.instructions
         } : null,
@@ -316,6 +488,44 @@ export const db = {
       if (error) throw error;
       
       return { deletedCount: count || 0 };
+    },
+
+    // Set-based writes for POST /api/meal-plans/bulk. One request each.
+    //
+    // upsertMany: `slots` is [{ date, mealType, mealId }]. A slot the
+    // user already has is replaced when `replace`, otherwise left alone
+    // (on conflict (user_id, date, meal_type) do nothing). Returns how
+    // many slots were written.
+    async upsertMany(userId, slots, { replace = false } = {}) {
+      if (!slots.length) return { writtenCount: 0 };
+      const rows = slots.map((slot) => ({
+        user_id: userId,
+        date: slot.date,
+        meal_type: slot.mealType,
+        meal_id: slot.mealId
+      }));
+      const { data, error } = await supabaseAdmin
+        .from('meal_plans')
+        .upsert(rows, { onConflict: 'user_id,date,meal_type', ignoreDuplicates: !replace, defaultToNull: false })
+        .select('id');
+      if (error) throw error;
+      return { writtenCount: data ? data.length : 0 };
+    },
+
+    // Every plan of the user's between `start` and `end` (inclusive),
+    // optionally only some meal types.
+    async deleteRange(userId, { start, end, mealTypes } = {}) {
+      let queryBuilder = supabaseAdmin
+        .from('meal_plans')
+        .delete()
+        .eq('user_id', userId)
+        .gte('date', start)
+        .lte('date', end);
+      if (mealTypes?.length) queryBuilder = queryBuilder.in('meal_type', mealTypes);
+
+      const { data, error } = await queryBuilder.select('id');
+      if (error) throw error;
+      return { deletedCount: data ? data.length : 0 };
     }
   },
 
@@ -326,19 +536,34 @@ export const db = {
   // are scoped by user_id at the query level (defence in depth on top of
   // RLS \u2014 the server uses service_role which bypasses RLS).
   pantry_items: {
-    async find(query = {}) {
+    // Filters beyond the plain equality ones (all dates 'YYYY-MM-DD'):
+    //   freshOn        — only items with no expiry or expires_at >= date
+    //   expiresBetween — { from, to } inclusive; ordered soonest first
+    // Pass `{ fields: ['name'] }` to fetch only names — the suggestion
+    // flow needs nothing else, so don't ship whole rows.
+    async find(query = {}, { fields } = {}) {
+      const namesOnly = Array.isArray(fields) && fields.length === 1 && fields[0] === 'name';
       let qb = supabaseAdmin
         .from('pantry_items')
-        .select('*')
-        .order('added_at', { ascending: false });
+        .select(namesOnly ? 'name' : '*');
 
       if (query.userId) qb = qb.eq('user_id', query.userId);
       if (query.id)     qb = qb.eq('id', query.id);
       if (query.barcode) qb = qb.eq('barcode', query.barcode);
+      if (query.freshOn) qb = qb.or(`expires_at.is.null,expires_at.gte.${query.freshOn}`);
+      if (query.expiresBetween) {
+        qb = qb
+          .gte('expires_at', query.expiresBetween.from)
+          .lte('expires_at', query.expiresBetween.to)
+          .order('expires_at', { ascending: true });
+      } else {
+        qb = qb.order('added_at', { ascending: false });
+      }
 
       const { data, error } = await qb;
       if (error) throw error;
 
+      if (namesOnly) return (data || []).map((row) => ({ name: row.name }));
       return (data || []).map((row) => ({
         id: row.id,
         userId: row.user_id,
@@ -351,11 +576,33 @@ export const db = {
       }));
     },
 
+    // Row count only (HEAD request, nothing shipped back). Supports
+    // userId and expiresBetween, same meaning as find().
+    async count(query = {}) {
+      let qb = supabaseAdmin
+        .from('pantry_items')
+        .select('id', { count: 'exact', head: true });
+      if (query.userId) qb = qb.eq('user_id', query.userId);
+      if (query.expiresBetween) {
+        qb = qb
+          .gte('expires_at', query.expiresBetween.from)
+          .lte('expires_at', query.expiresBetween.to);
+      }
+      const { count, error } = await qb;
+      if (error) throw error;
+      return count || 0;
+    },
+
     async findOne(query) {
       const rows = await this.find(query);
       return rows[0] || null;
     },
 
+    // Scan restocking: see matchScan() above.
+    async matchScan(query) {
+      return matchScan('match_pantry_items', pantryItemFromRow, query);
+    },
+
     async insertOne(item) {
       const row = {
         user_id: item.userId,
@@ -396,11 +643,13 @@ export const db = {
       if (query.id)     qb = qb.eq('id', query.id);
       if (query.userId) qb = qb.eq('user_id', query.userId);
 
+      // `item` is the updated row, from the same request (RETURNING).
       const { data, error } = await qb.select();
       if (error) throw error;
       return {
         matchedCount:  data ? data.length : 0,
         modifiedCount: data ? data.length : 0,
+        item: data?.length ? pantryItemFromRow(data[0]) : null,
       };
     },
 
@@ -414,6 +663,32 @@ export const db = {
     },
   },
 
+  // ---------------------------------------------------------------------
+  // pantry_expiring_summary — nightly per-user "use soon" digest
+  // ---------------------------------------------------------------------
+  // Written only by the SQL function refresh_pantry_expiring_summary()
+  // (see db/migrations/007_pantry_expiry.sql and 013); read-only here.
+  pantry_expiring_summary: {
+    async findByUser(userId) {
+      const { data, error } = await supabaseAdmin
+        .from('pantry_expiring_summary')
+        .select('*')
+        .eq('user_id', userId)
+        .maybeSingle();
+      if (error) throw error;
+      if (!data) return null;
+      return {
+        userId: data.user_id,
+        computedOn: data.computed_on,
+        windowDays: data.window_days,
+        expiringCount: data.expiring_count,
+        expiredCount: data.expired_count,
+        items: data.items || [],
+        computedAt: data.computed_at,
+      };
+    },
+  },
+
   // ---------------------------------------------------------------------
   // shopping_list_items \u2014 Kitchen feature
   // ---------------------------------------------------------------------
@@ -445,11 +720,28 @@ export const db = {
       }));
     },
 
+    // Row count only; supports userId and checked.
+    async count(query = {}) {
+      let qb = supabaseAdmin
+        .from('shopping_list_items')
+        .select('id', { count: 'exact', head: true });
+      if (query.userId) qb = qb.eq('user_id', query.userId);
+      if (query.checked !== undefined) qb = qb.eq('checked', query.checked);
+      const { count, error } = await qb;
+      if (error) throw error;
+      return count || 0;
+    },
+
     async findOne(query) {
       const rows = await this.find(query);
       return rows[0] || null;
     },
 
+    // Scan tick-off, unchecked rows only: see matchScan() above.
+    async matchScan(query) {
+      return matchScan('match_shopping_list_items', shoppingItemFromRow, query);
+    },
+
     async insertOne(item) {
       const row = {
         user_id:        item.userId,
@@ -510,11 +802,13 @@ export const db = {
       if (query.id)     qb = qb.eq('id', query.id);
       if (query.userId) qb = qb.eq('user_id', query.userId);
 
+      // `item` is the updated row, from the same request (RETURNING).
       const { data, error } = await qb.select();
       if (error) throw error;
       return {
         matchedCount:  data ? data.length : 0,
         modifiedCount: data ? data.length : 0,
+        item: data?.length ? shoppingItemFromRow(data[0]) : null,
       };
     },
 
@@ -613,6 +907,466 @@ export const db = {
         console.warn('[barcode_cache] invalidate threw:', err?.message || err);
       }
     },
+  },
+
+  // ---------------------------------------------------------------------
+  // image_assets — content-hash index of uploaded meal photos
+  // ---------------------------------------------------------------------
+  // One row per (user_id, sha256 of the uploaded bytes). /api/upload
+  // consults it before sending anything to Cloudinary so re-uploading
+  // the same photo (editing a meal, retrying on a flaky network) reuses
+  // the existing asset. Scoped per user so deleting one user's meal can
+  // never pull an image out from under somebody else.
+  //
+  // Same best-effort contract as barcode_cache: a Supabase outage means
+  // "miss" (we upload again), never a failed upload.
+  //
+  // See db/migrations/006_image_assets.sql and lib/image-upload.js.
+  image_assets: {
+    async findByHash(userId, contentHash) {
+      try {
+        const { data, error } = await supabaseAdmin
+          .from('image_assets')
+          .select('*')
+          .eq('user_id', userId)
+          .eq('content_hash', contentHash)
+          .maybeSingle();
+        if (error) {
+          if (error.code !== 'PGRST116') {
+            console.warn('[image_assets] findByHash error:', error.message);
+          }
+          return null;
+        }
+        if (!data) return null;
+        return {
+          url: data.url,
+          publicId: data.public_id,
+          width: data.width,
+          height: data.height,
+          placeholder: data.placeholder,
+        };
+      } catch (err) {
+        console.warn('[image_assets] findByHash threw:', err?.message || err);
+        return null;
+      }
+    },
+
+    /**
+     * Record an uploaded asset. `ignoreDuplicates` keeps the first row
+     * when two instances race on the same hash — both URLs are valid,
+     * later lookups just converge on one of them. Resolves false when
+     * the row could not be written (never rejects).
+     */
+    async record(userId, contentHash, asset) {
+      try {
+        const { error } = await supabaseAdmin
+          .from('image_assets')
+          .upsert([{
+            user_id:      userId,
+            content_hash: contentHash,
+            public_id:    asset.publicId,
+            url:          asset.url,
+            width:        asset.width ?? null,
+            height:       asset.height ?? null,
+            placeholder:  asset.placeholder ?? null,
+            bytes:        asset.bytes ?? null,
+          }], { onConflict: 'user_id,content_hash', ignoreDuplicates: true });
+        if (error) {
+          console.warn('[image_assets] record error:', error.message);
+          return false;
+        }
+        return true;
+      } catch (err) {
+        console.warn('[image_assets] record threw:', err?.message || err);
+        return false;
+      }
+    },
+
+    /** Forget an asset once it has been destroyed on Cloudinary. */
+    async removeByPublicId(userId, publicId) {
+      try {
+        const { error } = await supabaseAdmin
+          .from('image_assets')
+          .delete()
+          .eq('user_id', userId)
+          .eq('public_id', publicId);
+        if (error) console.warn('[image_assets] remove error:', error.message);
+      } catch (err) {
+        console.warn('[image_assets] remove threw:', err?.message || err);
+      }
+    },
+  },
+
+  // -------------------------------------------------------------------
+  // Inverted ingredient index behind GET /api/meals/cookable.
+  // -------------------------------------------------------------------
+  // One row per (meal, ingredient line, normalised token); tokens come
+  // from lib/ingredient-index.js. meals.ingredient_line_count doubles as
+  // the "indexed" marker: null means the meal predates the index (or a
+  // write failed half way) and the next cookable query re-indexes it.
+  //
+  // Maintenance is best-effort like the other side tables — a failure
+  // logs and leaves the marker null rather than failing the meal save.
+  //
+  // See db/migrations/008_meal_ingredient_index.sql.
+  meal_ingredient_tokens: {
+    /**
+     * (Re)index meals: `[{ id, userId, lineCount, rows: [{ lineNo, token }] }]`.
+     * Returns how many meals were indexed.
+     */
+    async replaceForMeals(entries) {
+      if (!entries.length) return 0;
+      const ids = entries.map((e) => e.id);
+      try {
+        const { error: delError } = await supabaseAdmin
+          .from('meal_ingredient_tokens')
+          .delete()
+          .in('meal_id', ids);
+        if (delError) throw delError;
+
+        const rows = entries.flatMap((e) => e.rows.map((r) => ({
+          meal_id:    e.id,
+          user_id:    e.userId,
+          line_no:    r.lineNo,
+          token:      r.token,
+          line_count: e.lineCount,
+        })));
+        for (let i = 0; i < rows.length; i += INDEX_WRITE_BATCH) {
+          const { error } = await supabaseAdmin
+            .from('meal_ingredient_tokens')
+            .insert(rows.slice(i, i + INDEX_WRITE_BATCH));
+          if (error) throw error;
+        }
+
+        // One UPDATE per distinct line count rather than one per meal.
+        const byCount = new Map();
+        for (const e of entries) byCount.set(e.lineCount, [...(byCount.get(e.lineCount) || []), e.id]);
+        for (const [lineCount, mealIds] of byCount) {
+          const { error } = await supabaseAdmin
+            .from('meals')
+            .update({ ingredient_line_count: lineCount })
+            .in('id', mealIds);
+          if (error) throw error;
+        }
+        return entries.length;
+      } catch (err) {
+        console.warn('[meal_ingredient_tokens] replace failed:', err?.message || err);
+        await supabaseAdmin.from('meals').update({ ingredient_line_count: null }).in('id', ids);
+        return 0;
+      }
+    },
+
+    /** Meals not indexed yet, oldest first: `[{ id, userId, ingredients }]`. */
+    async findUnindexed({ userId, limit = 200 } = {}) {
+      let qb = supabaseAdmin
+        .from('meals')
+        .select('id, user_id, ingredients')
+        .is('ingredient_line_count', null)
+        .order('created_at', { ascending: true })
+        .limit(limit);
+      if (userId) qb = qb.eq('user_id', userId);
+      const { data, error } = await qb;
+      if (error) {
+        console.warn('[meal_ingredient_tokens] findUnindexed error:', error.message);
+        return [];
+      }
+      return (data || []).map((m) => ({ id: m.id, userId: m.user_id, ingredients: m.ingredients }));
+    },
+
+    /**
+     * Every posting for `tokens`, optionally limited to one user's meals:
+     * `[{ mealId, lineNo, token, lineCount }]`. Paged because PostgREST
+     * caps a response at 1000 rows and "salt" alone can exceed that.
+     */
+    async postings(tokens, { userId } = {}) {
+      const out = [];
+      for (let from = 0; ; from += POSTINGS_PAGE) {
+        let qb = supabaseAdmin
+          .from('meal_ingredient_tokens')
+          .select('meal_id, line_no, token, line_count')
+          .in('token', tokens);
+        if (userId) qb = qb.eq('user_id', userId);
+        const { data, error } = await qb
+          .order('meal_id')
+          .order('line_no')
+          .order('token')
+          .range(from, from + POSTINGS_PAGE - 1);
+        if (error) throw error;
+        for (const row of data || []) {
+          out.push({ mealId: row.meal_id, lineNo: row.line_no, token: row.token, lineCount: row.line_count });
+        }
+        if (!data || data.length < POSTINGS_PAGE) return out;
+      }
+    },
+  },
+
+  // -------------------------------------------------------------------
+  // Structured ingredients, parsed once at meal save time.
+  // -------------------------------------------------------------------
+  // Rows come from lib/ingredient-parser.js; meals.ingredients stays the
+  // source of truth and meals.ingredients_parser_version records which
+  // parser produced the rows (null / older → backfill re-parses).
+  // Writes are best-effort like meal_ingredient_tokens.
+  //
+  // See db/migrations/009_meal_ingredients.sql.
+  meal_ingredients: {
+    /**
+     * Replace the parsed rows of `entries` (`[{ id, userId, rows }]`,
+     * rows from parseIngredients()) and stamp `version` on the meals.
+     * Returns how many meals were written.
+     */
+    async replaceForMeals(entries, version) {
+      if (!entries.length) return 0;
+      const ids = entries.map((e) => e.id);
+      try {
+        const { error: delError } = await supabaseAdmin
+          .from('meal_ingredients')
+          .delete()
+          .in('meal_id', ids);
+        if (delError) throw delError;
+
+        const rows = entries.flatMap((e) => e.rows.map((r) => ({
+          meal_id:         e.id,
+          user_id:         e.userId,
+          position:        r.position,
+          raw:             r.raw,
+          quantity:        r.quantity,
+          unit:            r.unit,
+          metric_quantity: r.metricQuantity,
+          metric_unit:     r.metricUnit,
+          item:            r.item,
+          name:            r.name,
+          note:            r.note,
+        })));
+        for (let i = 0; i < rows.length; i += INDEX_WRITE_BATCH) {
+          const { error } = await supabaseAdmin
+            .from('meal_ingredients')
+            .insert(rows.slice(i, i + INDEX_WRITE_BATCH));
+          if (error) throw error;
+        }
+
+        const { error } = await supabaseAdmin
+          .from('meals')
+          .update({ ingredients_parser_version: version })
+          .in('id', ids);
+        if (error) throw error;
+        return entries.length;
+      } catch (err) {
+        console.warn('[meal_ingredients] replace failed:', err?.message || err);
+        await supabaseAdmin.from('meals').update({ ingredients_parser_version: null }).in('id', ids);
+        return 0;
+      }
+    },
+
+    /** Parsed rows for these meals, in line order: `[{ mealId, position, … }]`. */
+    async findByMealIds(mealIds) {
+      if (!mealIds.length) return [];
+      const { data, error } = await supabaseAdmin
+        .from('meal_ingredients')
+        .select('*')
+        .in('meal_id', mealIds)
+        .order('meal_id')
+        .order('position');
+      if (error) throw error;
+      return (data || []).map((row) => ({
+        mealId:         row.meal_id,
+        position:       row.position,
+        raw:            row.raw,
+        quantity:       row.quantity === null ? null : Number(row.quantity),
+        unit:           row.unit,
+        metricQuantity: row.metric_quantity === null ? null : Number(row.metric_quantity),
+        metricUnit:     row.metric_unit,
+        item:           row.item,
+        name:           row.name,
+        note:           row.note,
+      }));
+    },
+
+    /** Ids of meals that use the canonical ingredient `name`. */
+    async findMealIdsByName(name, { userId } = {}) {
+      let qb = supabaseAdmin
+        .from('meal_ingredients')
+        .select('meal_id')
+        .eq('name', name);
+      if (userId) qb = qb.eq('user_id', userId);
+      const { data, error } = await qb;
+      if (error) throw error;
+      return [...new Set((data || []).map((row) => row.meal_id))];
+    },
+
+    /**
+     * Meals whose rows are missing or were produced by a parser older
+     * than `version`, oldest first: `[{ id, userId, ingredients }]`.
+     * `count` is how many such meals there are in total.
+     */
+    async findStale(version, { userId, limit = 200 } = {}) {
+      let qb = supabaseAdmin
+        .from('meals')
+        .select('id, user_id, ingredients', { count: 'exact' })
+        .or(`ingredients_parser_version.is.null,ingredients_parser_version.lt.${version}`)
+        .order('created_at', { ascending: true })
+        .limit(limit);
+      if (userId) qb = qb.eq('user_id', userId);
+      const { data, count, error } = await qb;
+      if (error) throw error;
+      return {
+        meals: (data || []).map((m) => ({ id: m.id, userId: m.user_id, ingredients: m.ingredients })),
+        count: count || 0,
+      };
+    },
+  },
+
+  // ---------------------------------------------------------------------
+  // user_data — GET /api/export and POST /api/import (lib/user-data.js)
+  // ---------------------------------------------------------------------
+  // Whole collections for one user, in API (camelCase) shape restricted
+  // to USER_DATA_COLUMNS. galleryImages travels as an array.
+  user_data: {
+    /**
+     * One keyset page of `collection` for `userId`, in id order, after
+     * `afterId` (null for the first page). Seeks on the primary key
+     * instead of OFFSET, so every page costs the same however deep the
+     * export is.
+     */
+    async page(collection, userId, { afterId = null, limit = 1000 } = {}) {
+      const columns = USER_DATA_COLUMNS[collection];
+      let qb = supabaseAdmin
+        .from(collection)
+        .select(Object.values(columns).join(','))
+        .eq('user_id', userId)
+        .order('id', { ascending: true })
+        .limit(limit);
+      if (afterId) qb = qb.gt('id', afterId);
+
+      const { data, error } = await qb;
+      if (error) throw error;
+      return (data || []).map((row) => {
+        const record = {};
+        for (const [field, column] of Object.entries(columns)) record[field] = row[column] ?? null;
+        if (collection === 'meals') {
+          record.galleryImages = record.galleryImages ? JSON.parse(record.galleryImages) : [];
+        }
+        return record;
+      });
+    },
+
+    /**
+     * Multi-row insert of `records` for `userId`, one request. Rows that
+     * conflict (USER_DATA_CONFLICT) are skipped, so importing the same
+     * file twice inserts nothing the second time. Returns
+     * `{ inserted, skipped }`.
+     */
+    async insertMany(collection, userId, records) {
+      if (!records.length) return { inserted: 0, skipped: 0 };
+      const columns = USER_DATA_COLUMNS[collection];
+      const rows = records.map((record) => {
+        const row = { user_id: userId };
+        for (const [field, column] of Object.entries(columns)) {
+          if (record[field] !== undefined) row[column] = record[field];
+        }
+        if (collection === 'meals') {
+          row.gallery_images = record.galleryImages?.length ? JSON.stringify(record.galleryImages) : null;
+        }
+        return row;
+      });
+
+      try {
+        const { data, error } = await supabaseAdmin
+          .from(collection)
+          .upsert(rows, { onConflict: USER_DATA_CONFLICT[collection], ignoreDuplicates: true, defaultToNull: false })
+          .select('id');
+        if (error) throw error;
+        const inserted = data ? data.length : 0;
+        return { inserted, skipped: rows.length - inserted };
+      } finally {
+        // Outside the wrapped CRUD methods, so invalidate by hand (see
+        // the read cache below).
+        await collectionCache.invalidate(collection, [
+          `${collection}:${userId}`,
+          ...(collection === 'meals' ? ['meal_plans'] : []),
+        ]);
+      }
+    },
+  },
+
+  // Shared token buckets for lib/rate-limit.js (migration 010).
+  rate_limit_buckets: {
+    /**
+     * Refill, check and debit `buckets` (`[{ key, capacity, refillPerSec }]`)
+     * atomically in Postgres. Returns `{ allowed, tokens }` with the
+     * tokens left per bucket, in input order. Throws on error; the
+     * limiter decides what a failure means.
+     */
+    async take(buckets, cost = 1) {
+      const { data, error } = await supabaseAdmin.rpc('rate_limit_take', {
+        p_keys: buckets.map((b) => b.key),
+        p_capacities: buckets.map((b) => b.capacity),
+        p_refill_per_sec: buckets.map((b) => b.refillPerSec),
+        p_cost: cost,
+      });
+      if (error) throw error;
+      const rows = data || [];
+      return {
+        allowed: rows.length > 0 && rows[0].allowed,
+        tokens: rows.map((r) => Number(r.tokens)),
+      };
+    },
+  },
+}
+
+// ---------------------------------------------------------------------
+// Per-user read cache (lib/collection-cache.js)
+// ---------------------------------------------------------------------
+// The list reads below go through collectionCache when they're scoped
+// to one user and filter on nothing row-specific (`id`, `ids`,
+// `barcode`, `$or` search always hit the database). Each depends on two
+// version tags: `<collection>:<userId>` and `<collection>` itself.
+//
+// Every write method (CACHE_WRITES) bumps the writer's tag once the
+// write settles (success or not), or the whole collection's tag when
+// the call names no userId. Meal writes also
+// bump every meal plan: plans embed the meal's title and image, and
+// anyone may plan a community meal.
+const CACHED_READS = {
+  meals:               { reads: ['findAll', 'page'], alsoInvalidates: ['meal_plans'] },
+  meal_plans:          { reads: ['find'] },
+  pantry_items:        { reads: ['find'] },
+  shopping_list_items: { reads: ['find'] },
+}
+const CACHE_WRITES = ['insertOne', 'insertMany', 'updateOne', 'deleteOne', 'upsertMany', 'deleteRange']
+const UNCACHED_FILTERS = ['id', 'ids', 'barcode', '$or']
+
+for (const [name, { reads, alsoInvalidates = [] }] of Object.entries(CACHED_READS)) {
+  const collection = db[name]
+
+  for (const method of reads) {
+    const read = collection[method]
+    collection[method] = function (query = {}, ...rest) {
+      if (!query.userId || UNCACHED_FILTERS.some((f) => query[f] !== undefined)) {
+        return read.call(this, query, ...rest)
+      }
+      return collectionCache.read(
+        name,
+        [name, `${name}:${query.userId}`],
+        `${method}:${JSON.stringify([query, ...rest])}`,
+        () => read.call(this, query, ...rest)
+      )
+    }
+  }
+
+  for (const method of CACHE_WRITES) {
+    const write = collection[method]
+    if (!write) continue
+    collection[method] = async function (...args) {
+      try {
+        return await write.apply(this, args)
+      } finally {
+        // insertMany / upsertMany / deleteRange take the userId first;
+        // the rest take an object.
+        const userId = typeof args[0] === 'string' ? args[0] : args[0]?.userId
+        await collectionCache.invalidate(name, [userId ? `${name}:${userId}` : name, ...alsoInvalidates])
+      }
+    }
   }
 }
 
@@ -0,0 +1,315 @@
+/**
+ * lib/traffic-capture.js
+ * ----------------------
+ * Opt-in recorder of API request SHAPES, for replaying real workloads
+ * against a test server (tests/bench_replay.py). The synthetic
+ * benchmarks send hand-picked payloads; production traffic is bursts of
+ * scans and week-flipping in the planner, and this captures that mix.
+ *
+ * One NDJSON line per request:
+ *
+ *   { ts, method, route, query, body, status, ms, reqBytes, resBytes, user, auth }
+ *
+ *   route     the path with ids replaced: 'meals/:id', 'pantry/:id'
+ *   query     shapeOf(search params); body: shapeOf(JSON body)
+ *   ms        time until the handler returned its Response
+ *   reqBytes  / resBytes — null when unknown (streams, chunked uploads)
+ *   user      a salted hash of the JWT's userId, stable for this
+ *             process (or across processes with TRAFFIC_CAPTURE_SALT)
+ *   auth      'none' | 'user' | 'invalid'
+ *
+ * What is NOT recorded: tokens, IPs, headers, passwords, names, notes,
+ * search text, meal content. shapeOf() keeps values only where they
+ * describe the workload rather than the person:
+ *
+ *   * enumerations (op, mealType, include, scope, …), booleans, short
+ *     numbers → as-is
+ *   * 'YYYY-MM-DD' → { days } relative to the day of the request, so a
+ *     replay next month still asks for "this week" and "next week"
+ *   * barcodes (code, barcode) → { code: <hash>, len }; repeats of one
+ *     product keep one hash, so cache hit rates survive the replay.
+ *     TRAFFIC_CAPTURE_CODES=1 keeps the digits themselves (product codes
+ *     are public) for replays against the real lookup chain
+ *   * UUIDs → { id: true }; other strings → { str: <length> }
+ *   * keys naming secrets (password, token, …) → dropped entirely
+ *
+ * Bodies are parsed only when JSON and at most MAX_BODY_BYTES; imports
+ * (NDJSON) and uploads (multipart) get sizes only.
+ *
+ * Files go to TRAFFIC_CAPTURE_DIR (default .traffic/) as
+ * traffic-<start>-<pid>-<n>.ndjson, rotated every
+ * TRAFFIC_CAPTURE_MAX_BYTES (default 10 MB), keeping the newest
+ * TRAFFIC_CAPTURE_FILES (default 10). Lines are buffered and appended
+ * off the request path; a write error is logged and the line dropped.
+ * TRAFFIC_CAPTURE_SAMPLE (0–1, default 1) records a fraction.
+ *
+ * Off unless TRAFFIC_CAPTURE=1. On Vercel only /tmp is writable.
+ */
+
+import { createHmac, randomBytes } from 'crypto';
+import { promises as fs } from 'fs';
+import path from 'path';
+
+const DEFAULT_MAX_BYTES = 10 * 1024 * 1024;
+const DEFAULT_MAX_FILES = 10;
+const MAX_BODY_BYTES = 64 * 1024;
+const FLUSH_BYTES = 64 * 1024;
+const FLUSH_MS = 250;
+const MAX_DEPTH = 4;
+const MAX_ARRAY_ITEMS = 100;
+
+const UUID = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const ISO_DATE = /^\d{4}-\d{2}-\d{2}$/;
+const SHORT_NUMBER = /^-?\d{1,6}(\.\d+)?$/;
+
+// Values kept verbatim: they pick a code path, not a person.
+const ENUM_KEYS = new Set([
+  'op', 'onConflict', 'mealType', 'mealTypes', 'include', 'includeOthers',
+  'scope', 'fresh', 'fields', 'checked', 'usePantry', 'stream', 'unit',
+  'format', 'version', 'type',
+]);
+const CODE_KEYS = new Set(['code', 'barcode']);
+const SECRET_KEY = /pass|token|secret|authorization|cookie|jwt/i;
+
+function envInt(name, fallback) {
+  const n = Number.parseInt(process.env[name] || '', 10);
+  return Number.isFinite(n) && n > 0 ? n : fallback;
+}
+
+function hash(salt, value, length) {
+  return createHmac('sha256', salt).update(String(value)).digest('hex').slice(0, length);
+}
+
+function daysBetween(fromIso, toIso) {
+  return Math.round((Date.parse(`${toIso}T00:00:00Z`) - Date.parse(`${fromIso}T00:00:00Z`)) / 86400000);
+}
+
+/** 'meals/3f2c…/ingredients' → 'meals/:id/ingredients'. */
+export function routeTemplate(pathname) {
+  return pathname
+    .replace(/^\/api\/?/, '')
+    .split('/')
+    .filter(Boolean)
+    .map((segment) => (UUID.test(segment) ? ':id' : /^[a-z][a-z-]*$/.test(segment) ? segment : ':param'))
+    .join('/');
+}
+
+/**
+ * Anonymised description of `value` (see the header). `today` is the
+ * request's 'YYYY-MM-DD'; `salt` keys the barcode hashes.
+ */
+export function shapeOf(value, { key = null, today, salt, keepCodes = false, depth = 0 } = {}) {
+  if (value === null || value === undefined) return null;
+  if (CODE_KEYS.has(key) && (typeof value === 'string' || typeof value === 'number')) {
+    const code = String(value).trim();
+    return keepCodes ? { code, len: code.length, raw: true } : { code: hash(salt, code, 12), len: code.length };
+  }
+  if (typeof value === 'boolean') return value;
+  if (typeof value === 'number') return Number.isFinite(value) ? value : null;
+  if (typeof value === 'string') {
+    if (ENUM_KEYS.has(key) && value.length <= 64) return value;
+    if (ISO_DATE.test(value) && !Number.isNaN(Date.parse(value))) return { days: daysBetween(today, value) };
+    if (UUID.test(value)) return { id: true };
+    if (SHORT_NUMBER.test(value)) return value;
+    return { str: value.length };
+  }
+  if (depth >= MAX_DEPTH) return { truncated: true };
+  const next = { today, salt, keepCodes, depth: depth + 1 };
+  if (Array.isArray(value)) {
+    // Enumerations stay whole (mealTypes); anything else keeps its
+    // length and the shapes of its first MAX_ARRAY_ITEMS items.
+    if (ENUM_KEYS.has(key) && value.every((item) => typeof item === 'string')) return value.slice(0, 16);
+    return { arr: value.length, items: value.slice(0, MAX_ARRAY_ITEMS).map((item) => shapeOf(item, { ...next, key })) };
+  }
+  if (typeof value === 'object') {
+    const shape = {};
+    for (const [k, v] of Object.entries(value)) {
+      if (SECRET_KEY.test(k)) continue;
+      shape[k] = shapeOf(v, { ...next, key: k });
+    }
+    return shape;
+  }
+  return null;
+}
+
+function bearerUserId(request) {
+  const header = request.headers.get('authorization') || '';
+  if (!header.startsWith('Bearer ')) return { auth: 'none' };
+  // Only a grouping key: the handler verifies the token, we just read it.
+  try {
+    const payload = JSON.parse(Buffer.from(header.slice(7).split('.')[1], 'base64url').toString('utf8'));
+    return payload?.userId ? { auth: 'user', userId: payload.userId } : { auth: 'invalid' };
+  } catch {
+    return { auth: 'invalid' };
+  }
+}
+
+function contentLength(headers) {
+  const raw = headers.get('content-length');
+  if (raw === null) return null;
+  const n = Number(raw);
+  return Number.isFinite(n) ? n : null;
+}
+
+/** Rotating NDJSON appender. */
+export class CaptureWriter {
+  constructor({ dir, maxBytes = DEFAULT_MAX_BYTES, maxFiles = DEFAULT_MAX_FILES, now = Date.now } = {}) {
+    this.dir = dir;
+    this.maxBytes = maxBytes;
+    this.maxFiles = maxFiles;
+    this.prefix = `traffic-${new Date(now()).toISOString().replace(/[-:]/g, '').slice(0, 15)}-${process.pid}-`;
+    this.fileIndex = 0;
+    this.fileBytes = 0;
+    this.buffer = [];
+    this.bufferBytes = 0;
+    this.timer = null;
+    this.writing = Promise.resolve();
+    this.dropped = 0;
+  }
+
+  currentFile() {
+    return path.join(this.dir, `${this.prefix}${String(this.fileIndex).padStart(4, '0')}.ndjson`);
+  }
+
+  write(record) {
+    const line = `${JSON.stringify(record)}\n`;
+    this.buffer.push(line);
+    this.bufferBytes += Buffer.byteLength(line);
+    if (this.bufferBytes >= FLUSH_BYTES) this.flush();
+    else if (!this.timer) {
+      this.timer = setTimeout(() => this.flush(), FLUSH_MS);
+      this.timer.unref?.();
+    }
+  }
+
+  /** Append the buffer; resolves when it (and earlier flushes) are on disk. */
+  flush() {
+    clearTimeout(this.timer);
+    this.timer = null;
+    if (!this.buffer.length) return this.writing;
+    const chunk = this.buffer.join('');
+    const lines = this.buffer.length;
+    this.buffer = [];
+    this.bufferBytes = 0;
+    this.writing = this.writing.then(() => this.append(chunk)).catch((error) => {
+      this.dropped += lines;
+      console.warn(`[traffic-capture] dropped ${lines} line(s):`, error?.message || error);
+    });
+    return this.writing;
+  }
+
+  async append(chunk) {
+    if (this.fileBytes === 0) await fs.mkdir(this.dir, { recursive: true });
+    await fs.appendFile(this.currentFile(), chunk);
+    this.fileBytes += Buffer.byteLength(chunk);
+    if (this.fileBytes >= this.maxBytes) {
+      this.fileIndex += 1;
+      this.fileBytes = 0;
+      await this.prune();
+    }
+  }
+
+  /** Delete the oldest capture files beyond maxFiles (names sort by age). */
+  async prune() {
+    const files = (await fs.readdir(this.dir)).filter((name) => /^traffic-.*\.ndjson$/.test(name)).sort();
+    await Promise.all(files.slice(0, Math.max(0, files.length - this.maxFiles))
+      .map((name) => fs.unlink(path.join(this.dir, name)).catch(() => {})));
+  }
+}
+
+export class TrafficCapture {
+  constructor({ writer, salt = randomBytes(16).toString('hex'), sample = 1, keepCodes = false, now = Date.now } = {}) {
+    this.writer = writer;
+    this.salt = salt;
+    this.sample = sample;
+    this.keepCodes = keepCodes;
+    this.now = now;
+  }
+
+  /** Wrap a route handler; the Response is passed through untouched. */
+  wrap(handler) {
+    return async (request, context) => {
+      if (this.sample < 1 && Math.random() >= this.sample) return handler(request, context);
+      const started = performance.now();
+      const ts = this.now();
+      // Read a copy of the body before the handler consumes the original.
+      const bodyText = this.readableBody(request) ? request.clone().text().catch(() => null) : null;
+      const response = await handler(request, context);
+      const ms = Math.round((performance.now() - started) * 10) / 10;
+      this.record(request, response, { ts, ms, bodyText }).catch((error) => {
+        console.warn('[traffic-capture] record failed:', error?.message || error);
+      });
+      return response;
+    };
+  }
+
+  readableBody(request) {
+    if (request.method === 'GET' || request.method === 'HEAD' || !request.body) return false;
+    const length = contentLength(request.headers);
+    return (request.headers.get('content-type') || '').includes('application/json')
+      && length !== null && length <= MAX_BODY_BYTES;
+  }
+
+  async record(request, response, { ts, ms, bodyText }) {
+    const url = new URL(request.url);
+    const today = new Date(ts).toISOString().slice(0, 10);
+    const options = { today, salt: this.salt, keepCodes: this.keepCodes };
+    const { auth, userId } = bearerUserId(request);
+
+    let body = null;
+    const text = await bodyText;
+    if (text) {
+      try { body = shapeOf(JSON.parse(text), options); }
+      catch { body = { invalidJson: true }; }
+    }
+
+    const type = response.headers.get('content-type') || '';
+    let resBytes = contentLength(response.headers);
+    // Attachments (heap snapshots) can be huge; leave their size unknown.
+    if (resBytes === null && type.includes('application/json') && response.body
+      && !response.headers.has('content-disposition')) {
+      resBytes = (await response.clone().arrayBuffer()).byteLength;
+    }
+
+    this.writer.write({
+      ts,
+      method: request.method,
+      route: routeTemplate(url.pathname),
+      query: url.search ? shapeOf(Object.fromEntries(url.searchParams), options) : null,
+      body,
+      status: response.status,
+      ms,
+      reqBytes: contentLength(request.headers),
+      resBytes,
+      user: userId ? hash(this.salt, userId, 12) : null,
+      auth,
+    });
+  }
+}
+
+let shared = null;
+
+/** TrafficCapture from the environment, or null when capture is off. */
+export function trafficCaptureFromEnv() {
+  if (process.env.TRAFFIC_CAPTURE !== '1') return null;
+  if (!shared) {
+    const sample = Number(process.env.TRAFFIC_CAPTURE_SAMPLE);
+    shared = new TrafficCapture({
+      writer: new CaptureWriter({
+        dir: path.resolve(process.env.TRAFFIC_CAPTURE_DIR || '.traffic'),
+        maxBytes: envInt('TRAFFIC_CAPTURE_MAX_BYTES', DEFAULT_MAX_BYTES),
+        maxFiles: envInt('TRAFFIC_CAPTURE_FILES', DEFAULT_MAX_FILES),
+      }),
+      salt: process.env.TRAFFIC_CAPTURE_SALT || undefined,
+      sample: sample >= 0 && sample <= 1 ? sample : 1,
+      keepCodes: process.env.TRAFFIC_CAPTURE_CODES === '1',
+    });
+  }
+  return shared;
+}
+
+/** Route-handler wrapper: records when TRAFFIC_CAPTURE=1, else a no-op. */
+export function withTrafficCapture(handler) {
+  const capture = trafficCaptureFromEnv();
+  return capture ? capture.wrap(handler) : handler;
+}
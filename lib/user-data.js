@@ -0,0 +1,335 @@
+/**
+ * lib/user-data.js
+ * ----------------
+ * GET /api/export and POST /api/import: one user's meals, meal plans,
+ * pantry and shopping list as NDJSON (one JSON object per line).
+ *
+ *   {"type":"header","format":"forkcast-export","version":1,"exportedAt":"…"}
+ *   {"type":"meals","data":{"id":"…","title":"…",…}}
+ *   {"type":"meal_plans","data":{"id":"…","date":"2030-01-07",…}}
+ *   …
+ *   {"type":"footer","counts":{"meals":120,"meal_plans":40,…}}
+ *
+ * Collections are written in EXPORT_ORDER, meals first, because plans
+ * and shopping-list items point at meals. `data` is the API shape
+ * without `userId`: an import always belongs to the caller.
+ *
+ * Export pages through each collection with keyset cursors
+ * (db.user_data.page, EXPORT_PAGE rows a time) and only fetches the next
+ * page when the client has read the last one, so memory stays flat
+ * however many rows a user has. A truncated download has no footer; an
+ * error after the 200 ends the stream with a {"type":"error"} line.
+ *
+ * Import reads the request body as a stream, validates every line and
+ * writes IMPORT_BATCH rows per multi-row insert. Ids are kept, and rows
+ * that already exist are skipped, so re-running an import (after a
+ * failure partway, say) is safe. A bad line stops the import with an
+ * ImportError naming the line; batches before it stay written.
+ */
+
+const FORMAT = 'forkcast-export';
+const FORMAT_VERSION = 1;
+
+export const EXPORT_ORDER = ['meals', 'meal_plans', 'pantry_items', 'shopping_list_items'];
+const EXPORT_PAGE = 1000;
+const IMPORT_BATCH = 500;
+const MAX_LINE_BYTES = 1024 * 1024;
+
+const MEAL_TYPES = ['breakfast', 'lunch', 'dinner'];
+const UUID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const ISO_DATE_RE = /^\d{4}-\d{2}-\d{2}$/;
+
+/** A line the import can't accept. `line` is 1-based. */
+export class ImportError extends Error {
+  constructor(message, line) {
+    super(message);
+    this.name = 'ImportError';
+    this.line = line;
+  }
+}
+
+// ---------------------------------------------------------------------------
+// Export
+// ---------------------------------------------------------------------------
+
+/** Header, every row of every collection, footer — as an async iterable. */
+export async function* exportRecords(db, userId) {
+  yield { type: 'header', format: FORMAT, version: FORMAT_VERSION, exportedAt: new Date().toISOString() };
+  const counts = {};
+  for (const collection of EXPORT_ORDER) {
+    counts[collection] = 0;
+    let afterId = null;
+    for (;;) {
+      const page = await db.collection('user_data').page(collection, userId, { afterId, limit: EXPORT_PAGE });
+      for (const data of page) yield { type: collection, data };
+      counts[collection] += page.length;
+      if (page.length < EXPORT_PAGE) break;
+      afterId = page[page.length - 1].id;
+    }
+  }
+  yield { type: 'footer', counts };
+}
+
+/** NDJSON download of the user's data. Pull-based: one page in memory at a time. */
+export function exportResponse(db, userId) {
+  const encoder = new TextEncoder();
+  const iterator = exportRecords(db, userId)[Symbol.asyncIterator]();
+  const body = new ReadableStream({
+    async pull(controller) {
+      try {
+        // Batch small rows into one chunk per page-ish instead of one per row.
+        let chunk = '';
+        while (chunk.length < 64 * 1024) {
+          const { done, value } = await iterator.next();
+          if (done) {
+            if (chunk) controller.enqueue(encoder.encode(chunk));
+            controller.close();
+            return;
+          }
+          chunk += JSON.stringify(value) + '\n';
+        }
+        controller.enqueue(encoder.encode(chunk));
+      } catch (error) {
+        console.error('Export stream error:', error);
+        controller.enqueue(encoder.encode(JSON.stringify({ type: 'error', error: 'Export failed' }) + '\n'));
+        controller.close();
+      }
+    },
+    cancel() {
+      iterator.return?.();
+    },
+  });
+  const day = new Date().toISOString().slice(0, 10);
+  return new Response(body, {
+    headers: {
+      'Content-Type': 'application/x-ndjson; charset=utf-8',
+      'Content-Disposition': `attachment; filename="forkcast-export-${day}.ndjson"`,
+      'Cache-Control': 'no-store',
+      'X-Accel-Buffering': 'no',
+    },
+  });
+}
+
+// ---------------------------------------------------------------------------
+// Import
+// ---------------------------------------------------------------------------
+
+/**
+ * Split a byte stream into text lines (`{ text, number }`), skipping
+ * blank ones. Holds at most one partial line; longer than
+ * MAX_LINE_BYTES is an ImportError.
+ */
+export async function* ndjsonLines(body) {
+  const decoder = new TextDecoder();
+  const reader = body.getReader();
+  let buffered = '';
+  let number = 0;
+  try {
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffered += done ? decoder.decode() : decoder.decode(value, { stream: true });
+      let start = 0;
+      let newline;
+      while ((newline = buffered.indexOf('\n', start)) !== -1) {
+        number += 1;
+        const text = buffered.slice(start, newline).trim();
+        start = newline + 1;
+        if (text) yield { text, number };
+      }
+      buffered = buffered.slice(start);
+      if (buffered.length > MAX_LINE_BYTES) {
+        throw new ImportError(`Line longer than ${MAX_LINE_BYTES} bytes`, number + 1);
+      }
+      if (done) break;
+    }
+    if (buffered.trim()) yield { text: buffered.trim(), number: number + 1 };
+  } finally {
+    reader.releaseLock();
+  }
+}
+
+function isIsoDate(value) {
+  if (typeof value !== 'string' || !ISO_DATE_RE.test(value)) return false;
+  const parsed = new Date(`${value}T00:00:00Z`);
+  return !Number.isNaN(parsed.getTime()) && parsed.toISOString().slice(0, 10) === value;
+}
+
+function isTimestamp(value) {
+  return typeof value === 'string' && !Number.isNaN(Date.parse(value));
+}
+
+function text(value, field, { required = false } = {}) {
+  if (value === undefined || value === null || value === '') {
+    if (required) throw new Error(`${field} is required`);
+    return null;
+  }
+  if (typeof value !== 'string') throw new Error(`${field} must be a string`);
+  if (required && !value.trim()) throw new Error(`${field} is required`);
+  return value;
+}
+
+function uuid(value, field, { required = false } = {}) {
+  if (value === undefined || value === null) {
+    if (required) throw new Error(`${field} is required`);
+    return null;
+  }
+  if (typeof value !== 'string' || !UUID_RE.test(value)) throw new Error(`${field} must be a UUID`);
+  return value.toLowerCase();
+}
+
+function timestamp(value, field, fallback) {
+  if (value === undefined || value === null) return fallback;
+  if (!isTimestamp(value)) throw new Error(`${field} must be an ISO timestamp`);
+  return value;
+}
+
+function int(value, field) {
+  if (value === undefined || value === null) return null;
+  if (!Number.isInteger(value) || value < 0) throw new Error(`${field} must be a non-negative integer`);
+  return value;
+}
+
+/** Validate `data` for `collection`; returns the record to insert or throws. */
+function normalise(collection, data, now) {
+  if (!data || typeof data !== 'object' || Array.isArray(data)) throw new Error('data must be an object');
+  const id = uuid(data.id, 'id', { required: true });
+
+  if (collection === 'meals') {
+    const gallery = data.galleryImages ?? [];
+    if (!Array.isArray(gallery) || gallery.some((url) => typeof url !== 'string')) {
+      throw new Error('galleryImages must be an array of URLs');
+    }
+    const createdAt = timestamp(data.createdAt, 'createdAt', now);
+    return {
+      id,
+      title: text(data.title, 'title', { required: true }).trim(),
+      ingredients: text(data.ingredients, 'ingredients', { required: true }),
+      instructions: text(data.instructions, 'instructions', { required: true }),
+      imageUrl: text(data.imageUrl, 'imageUrl'),
+      imageWidth: int(data.imageWidth, 'imageWidth'),
+      imageHeight: int(data.imageHeight, 'imageHeight'),
+      imagePublicId: text(data.imagePublicId, 'imagePublicId'),
+      imagePlaceholder: text(data.imagePlaceholder, 'imagePlaceholder'),
+      galleryImages: gallery,
+      createdAt,
+      updatedAt: timestamp(data.updatedAt, 'updatedAt', createdAt),
+    };
+  }
+
+  if (collection === 'meal_plans') {
+    if (!isIsoDate(data.date)) throw new Error('date must be YYYY-MM-DD');
+    if (!MEAL_TYPES.includes(data.mealType)) throw new Error(`mealType must be one of ${MEAL_TYPES.join(', ')}`);
+    return {
+      id,
+      date: data.date,
+      mealType: data.mealType,
+      mealId: uuid(data.mealId, 'mealId', { required: true }),
+      createdAt: timestamp(data.createdAt, 'createdAt', now),
+    };
+  }
+
+  if (collection === 'pantry_items') {
+    if (data.quantity !== undefined && data.quantity !== null && !Number.isFinite(data.quantity)) {
+      throw new Error('quantity must be a number');
+    }
+    if (data.expiresAt !== undefined && data.expiresAt !== null && !isIsoDate(data.expiresAt)) {
+      throw new Error('expiresAt must be YYYY-MM-DD');
+    }
+    return {
+      id,
+      name: text(data.name, 'name', { required: true }).trim(),
+      barcode: text(data.barcode, 'barcode'),
+      quantity: data.quantity ?? null,
+      unit: text(data.unit, 'unit'),
+      expiresAt: data.expiresAt ?? null,
+      addedAt: timestamp(data.addedAt, 'addedAt', now),
+    };
+  }
+
+  // shopping_list_items
+  if (data.checked !== undefined && typeof data.checked !== 'boolean') throw new Error('checked must be a boolean');
+  return {
+    id,
+    name: text(data.name, 'name', { required: true }).trim(),
+    barcode: text(data.barcode, 'barcode'),
+    checked: data.checked ?? false,
+    sourceMealId: uuid(data.sourceMealId, 'sourceMealId'),
+    addedAt: timestamp(data.addedAt, 'addedAt', now),
+  };
+}
+
+/**
+ * Import an NDJSON export from `body` (a ReadableStream of bytes) into
+ * `userId`'s account. Resolves with `{ lines, inserted, skipped }`,
+ * counts per collection. Rejects with ImportError for a malformed file;
+ * `error.result` then holds the counts written before the bad line.
+ */
+export async function importNdjson(db, userId, body) {
+  const now = new Date().toISOString();
+  const inserted = Object.fromEntries(EXPORT_ORDER.map((c) => [c, 0]));
+  const skipped = Object.fromEntries(EXPORT_ORDER.map((c) => [c, 0]));
+  const pending = Object.fromEntries(EXPORT_ORDER.map((c) => [c, []]));
+  let lines = 0;
+  let sawHeader = false;
+
+  const flush = async (collection, line) => {
+    // Plans and shopping-list items may point at meals still queued.
+    if (collection !== 'meals' && pending.meals.length) await flush('meals', line);
+    const batch = pending[collection];
+    if (!batch.length) return;
+    pending[collection] = [];
+    try {
+      const result = await db.collection('user_data').insertMany(collection, userId, batch);
+      inserted[collection] += result.inserted;
+      skipped[collection] += result.skipped;
+    } catch (error) {
+      // 23503: a meal_id / source_meal_id that doesn't exist (or isn't
+      // in the file before it). 23505: an id taken by another account.
+      if (error?.code === '23503' || error?.code === '23505') {
+        throw new ImportError(`${collection} batch ending at line ${line}: ${error.message}`, line);
+      }
+      throw error;
+    }
+  };
+
+  try {
+    for await (const { text: raw, number } of ndjsonLines(body)) {
+      lines = number;
+      let record;
+      try {
+        record = JSON.parse(raw);
+      } catch {
+        throw new ImportError('Not valid JSON', number);
+      }
+
+      if (!sawHeader) {
+        if (record?.type !== 'header' || record.format !== FORMAT) {
+          throw new ImportError(`First line must be a ${FORMAT} header`, number);
+        }
+        if (record.version !== FORMAT_VERSION) {
+          throw new ImportError(`Unsupported export version ${record.version}`, number);
+        }
+        sawHeader = true;
+        continue;
+      }
+      if (record?.type === 'footer') continue;
+      if (!EXPORT_ORDER.includes(record?.type)) {
+        throw new ImportError(`Unknown record type ${JSON.stringify(record?.type)}`, number);
+      }
+
+      try {
+        pending[record.type].push(normalise(record.type, record.data, now));
+      } catch (error) {
+        throw new ImportError(`${record.type}: ${error.message}`, number);
+      }
+      if (pending[record.type].length >= IMPORT_BATCH) await flush(record.type, number);
+    }
+    if (!sawHeader) throw new ImportError('Empty import', 1);
+    for (const collection of EXPORT_ORDER) await flush(collection, lines);
+  } catch (error) {
+    if (error instanceof ImportError) error.result = { lines, inserted, skipped };
+    throw error;
+  }
+
+  return { lines, inserted, skipped };
+}
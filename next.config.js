@@ -10,7 +10,10 @@ const nextConfig = {
   },
   experimental: {
     // Remove if not using Server Components
-    serverComponentsExternalPackages: ['mongodb'],
+    // bcryptjs: lib/password-pool.js require()s it inside eval'd workers,
+    // which file tracing can't see. Listing it keeps it out of the
+    // bundle and in .next/standalone/node_modules.
+    serverComponentsExternalPackages: ['mongodb', 'bcryptjs'],
   },
   webpack(config, { dev }) {
     if (dev) {
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the barcode lookup upstreams.
+
+Impersonates the four Open Facts hosts and the UPCitemdb trial API in
+the path-prefixed shape lib/barcode-lookup.js uses when
+BARCODE_UPSTREAM_URL is set:
+
+  GET /<open-facts-host>/api/v2/product/<code>.json
+      → {"status": 1, "product": {...}}  or  {"status": 0}
+  GET /api.upcitemdb.com/prod/trial/lookup?upc=<code>
+      → {"items": [{...}]}  or  {"items": []}
+
+Every code is a miss until a product is registered for it. Products,
+latency and failures are set per (host, code) over a small control
+API, so parallel pytest workers (each using its own random codes) can
+share one stub without stepping on each other:
+
+  POST /__stub/products   {"host", "code", "product": {...} | null,
+                           "latency_ms": 0, "statuses": [503, ...]}
+      `statuses` are answered first, one per request, before the
+      normal reply (e.g. [503] = fail once, then succeed).
+  GET  /__stub/requests?code=<code>
+      → [{"host", "code", "status", "at"}, ...] in arrival order
+
+Point the dev server at it:
+
+    BARCODE_UPSTREAM_URL=http://127.0.0.1:8767 yarn dev
+
+Run standalone with `python tests/barcode_stub.py --port 8767`, or
+import `start_barcode_stub()` to run it in-process (tests/conftest.py
+does this once per pytest session).
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+OPEN_FACTS_HOSTS = [
+    'world.openfoodfacts.org',
+    'world.openbeautyfacts.org',
+    'world.openproductsfacts.org',
+    'world.openpetfoodfacts.org',
+]
+UPCITEMDB_HOST = 'api.upcitemdb.com'
+HOST_IDS = {
+    'off': 'world.openfoodfacts.org',
+    'obf': 'world.openbeautyfacts.org',
+    'opf': 'world.openproductsfacts.org',
+    'opff': 'world.openpetfoodfacts.org',
+    'upcitemdb': UPCITEMDB_HOST,
+}
+
+
+def make_handler(default_latency, state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/__stub/requests':
+                code = parse_qs(url.query).get('code', [None])[0]
+                with state['lock']:
+                    seen = [r for r in state['requests'] if code is None or r['code'] == code]
+                return self._json(200, seen)
+
+            host, _, rest = url.path.lstrip('/').partition('/')
+            if host in OPEN_FACTS_HOSTS and rest.startswith('api/v2/product/'):
+                code = rest[len('api/v2/product/'):].removesuffix('.json')
+            elif host == UPCITEMDB_HOST and rest == 'prod/trial/lookup':
+                code = parse_qs(url.query).get('upc', [''])[0]
+            else:
+                return self._json(404, {'error': 'unknown upstream'})
+
+            with state['lock']:
+                entry = state['products'].get((host, code), {})
+                statuses = entry.get('statuses', [])
+                status = statuses.pop(0) if statuses else 200
+                state['requests'].append({'host': host, 'code': code, 'status': status, 'at': time.time()})
+            time.sleep(entry.get('latency_ms', default_latency * 1000) / 1000)
+
+            if status != 200:
+                return self._json(status, {'error': f'stub {status}'})
+            product = entry.get('product')
+            if host == UPCITEMDB_HOST:
+                return self._json(200, {'items': [product] if product else []})
+            return self._json(200, {'status': 1, 'product': product} if product else {'status': 0})
+
+        def do_POST(self):
+            if self.path != '/__stub/products':
+                return self._json(404, {'error': 'unknown control endpoint'})
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            host = HOST_IDS.get(body['host'], body['host'])
+            with state['lock']:
+                state['products'][(host, body['code'])] = {
+                    'product': body.get('product'),
+                    'latency_ms': body.get('latency_ms', default_latency * 1000),
+                    'statuses': list(body.get('statuses') or []),
+                }
+            return self._json(200, {'ok': True})
+
+        def _json(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+class BarcodeStubClient:
+    """Talks to a running stub over its control API (works from any process)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def add_product(self, host, code, product=None, latency_ms=None, statuses=None):
+        """Register `product` (None = miss) for `code` on `host` ('off', 'upcitemdb', … or a hostname)."""
+        body = {'host': host, 'code': code, 'product': product, 'statuses': statuses or []}
+        if latency_ms is not None:
+            body['latency_ms'] = latency_ms
+        requests.post(f"{self.base_url}/__stub/products", json=body, timeout=5).raise_for_status()
+
+    def requests_for(self, code):
+        r = requests.get(f"{self.base_url}/__stub/requests", params={'code': code}, timeout=5)
+        r.raise_for_status()
+        return r.json()
+
+    def is_up(self):
+        try:
+            return requests.get(f"{self.base_url}/__stub/requests", params={'code': '-'}, timeout=1).ok
+        except requests.RequestException:
+            return False
+
+
+class BarcodeStub(BarcodeStubClient):
+    """In-process stub server."""
+
+    def __init__(self, server, port):
+        super().__init__(f"http://127.0.0.1:{port}")
+        self.server = server
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+def start_barcode_stub(port=8767, latency=0.0):
+    state = {'lock': threading.Lock(), 'products': {}, 'requests': []}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return BarcodeStub(server, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency", type=float, default=0.0, help="default seconds per upstream reply")
+    args = parser.parse_args()
+    stub = start_barcode_stub(args.port, args.latency)
+    print(f"Barcode stub listening on {stub.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
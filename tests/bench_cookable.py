@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Cookable Meals Benchmark
+Seeds a large meal catalogue and times GET /api/meals/cookable.
+
+Needs the dev server on localhost:3000 with a real Supabase database
+(migration 008 applied). A fresh user is registered per run; the meals
+it seeds stay in the database, so point this at a scratch project.
+
+    python tests/bench_cookable.py --meals 5000 --requests 50
+
+Reports:
+1. Seed throughput (meals/s, each POST also writes the index rows)
+2. First query latency (may include lazily indexing older meals)
+3. Warm query latency p50 / p95 / max over --requests calls, for both
+   scope=mine and scope=community
+Exits 1 when the warm p95 is above --budget-ms (default 250).
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'http://localhost:3000')
+API_BASE = f"{BASE_URL}/api"
+
+INGREDIENTS = [
+    'eggs', 'whole milk', 'butter', 'plain flour', 'caster sugar', 'olive oil',
+    'vegetable oil', 'garlic cloves', 'red onion', 'cherry tomatoes', 'spinach',
+    'cheddar cheese', 'chicken thighs', 'basmati rice', 'soy sauce', 'ginger',
+    'spring onions', 'chickpeas', 'coconut milk', 'lemon', 'parsley', 'cumin',
+    'smoked paprika', 'potatoes', 'carrots', 'celery', 'beef mince', 'pasta',
+    'parmesan', 'mushrooms', 'bell peppers', 'black beans', 'tortillas', 'honey',
+]
+QUANTITIES = ['1', '2', '200g', '1 cup', '2 tbsp', '1 tsp', '400g', 'a pinch of', '3']
+PANTRY = ['Eggs', 'Milk', 'Butter', 'Olive oil', 'Garlic', 'Cherry tomatoes',
+          'Spinach', 'Rice', 'Soy sauce', 'Lemon', 'Pasta', 'Parmesan']
+
+HEADERS = {}
+
+
+def register():
+    username = f"bench_{uuid.uuid4().hex[:10]}"
+    r = requests.post(f"{API_BASE}/auth/register",
+                      json={'username': username, 'password': 'testpass123'}, timeout=10)
+    r.raise_for_status()
+    HEADERS['Authorization'] = f"Bearer {r.json()['token']}"
+
+
+def make_meal(rng, i):
+    lines = rng.sample(INGREDIENTS, rng.randint(4, 12))
+    return {
+        'title': f"Bench meal {i}",
+        'ingredients': "\n".join(f"{rng.choice(QUANTITIES)} {line}" for line in lines),
+        'instructions': 'Combine and cook.',
+    }
+
+
+def seed(count, workers, rng):
+    meals = [make_meal(rng, i) for i in range(count)]
+    session = requests.Session()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        codes = list(pool.map(
+            lambda meal: session.post(f"{API_BASE}/meals", headers=HEADERS, json=meal, timeout=30).status_code,
+            meals))
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for c in codes if c != 200)
+    print(f"Seeded {count - failed}/{count} meals in {elapsed:.1f}s ({count / elapsed:.0f} meals/s)")
+    for name in PANTRY:
+        requests.post(f"{API_BASE}/pantry", headers=HEADERS, json={'name': name}, timeout=10).raise_for_status()
+    return failed == 0
+
+
+def time_query(scope, n):
+    url = f"{API_BASE}/meals/cookable?scope={scope}&limit=20"
+    timings = []
+    body = None
+    for _ in range(n):
+        started = time.perf_counter()
+        r = requests.get(url, headers=HEADERS, timeout=60)
+        timings.append((time.perf_counter() - started) * 1000)
+        r.raise_for_status()
+        body = r.json()
+    return timings, body
+
+
+def report(label, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{label}: p50={statistics.median(ordered):.1f}ms p95={p95:.1f}ms max={ordered[-1]:.1f}ms "
+          f"(n={len(ordered)})")
+    return p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument('--meals', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--budget-ms', type=float, default=250)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("COOKABLE MEALS BENCHMARK")
+    print("="*80)
+
+    register()
+    if not seed(args.meals, args.workers, random.Random(args.seed)):
+        print("❌ FAIL: some meals could not be seeded")
+        return 1
+
+    first, body = time_query('mine', 1)
+    print(f"First query: {first[0]:.1f}ms (backfilled={body.get('backfilled')})")
+    top = body['meals'][0] if body['meals'] else None
+    if top:
+        print(f"Top match: {top['title']} — {top['coveredLines']}/{top['totalLines']} lines "
+              f"(coverage {top['coverage']})")
+
+    mine_p95 = report("Warm scope=mine", time_query('mine', args.requests)[0])
+    report("Warm scope=community", time_query('community', args.requests)[0])
+
+    passed = mine_p95 <= args.budget_ms and top is not None
+    status = "✅ PASS" if passed else "❌ FAIL"
+    print(f"{status}: scope=mine p95 {mine_p95:.1f}ms (budget {args.budget_ms:.0f}ms)")
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Export / Import Benchmark
+Times POST /api/import and GET /api/export (lib/user-data.js) on one
+user with --rows rows (default 50,000) spread over meals, meal plans,
+pantry and shopping list.
+
+Needs the dev server on localhost:3000 with a real Supabase database. A
+fresh user is registered per run and its rows stay in the database, so
+point this at a scratch project.
+
+    python tests/bench_export_import.py --rows 50000
+    python tests/bench_export_import.py --server-pid $(pgrep -f "next dev" | head -1)
+
+Steps:
+1. Import: a generated NDJSON file, streamed as a chunked upload (the
+   client never holds it either) → rows/s
+2. Re-import the same file → every row skipped, nothing inserted
+3. Export: time to first byte, total time, rows/s; the rows and the
+   footer counts must match what was imported
+With --server-pid, the server's RSS is sampled during the export (Linux
+/proc) and its growth reported; it should stay flat as --rows grows.
+Exits 1 when a count doesn't match.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import requests
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'http://localhost:3000')
+API_BASE = f"{BASE_URL}/api"
+
+COLLECTIONS = ['meals', 'meal_plans', 'pantry_items', 'shopping_list_items']
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner']
+
+HEADERS = {}
+
+
+def print_result(passed, message):
+    status = "✅ PASS" if passed else "❌ FAIL"
+    print(f"{status}: {message}")
+
+
+def register():
+    username = f"bench_{uuid.uuid4().hex[:10]}"
+    r = requests.post(f"{API_BASE}/auth/register",
+                      json={'username': username, 'password': 'testpass123'}, timeout=10)
+    r.raise_for_status()
+    HEADERS['Authorization'] = f"Bearer {r.json()['token']}"
+
+
+def split(rows):
+    """Row counts per collection: 20% meals, 20% plans, 30% pantry, 30% shopping."""
+    meals = plans = rows // 5
+    pantry = (rows - meals - plans) // 2
+    return {'meals': meals, 'meal_plans': plans, 'pantry_items': pantry,
+            'shopping_list_items': rows - meals - plans - pantry}
+
+
+def generate(counts):
+    """NDJSON lines (bytes) for `counts`; meal ids are kept so plans can point at them."""
+    now = datetime.now(timezone.utc).isoformat()
+    yield json.dumps({'type': 'header', 'format': 'forkcast-export', 'version': 1, 'exportedAt': now}).encode() + b'\n'
+    meal_ids = []
+    for i in range(counts['meals']):
+        meal_ids.append(str(uuid.uuid4()))
+        yield json.dumps({'type': 'meals', 'data': {
+            'id': meal_ids[-1], 'title': f"Bench meal {i}",
+            'ingredients': "2 eggs\n1 cup whole milk\n200g plain flour",
+            'instructions': "Whisk, rest, fry.", 'galleryImages': [], 'createdAt': now,
+        }}).encode() + b'\n'
+    start = date(2030, 1, 1)
+    for i in range(counts['meal_plans']):
+        yield json.dumps({'type': 'meal_plans', 'data': {
+            'id': str(uuid.uuid4()), 'date': (start + timedelta(days=i // 3)).isoformat(),
+            'mealType': MEAL_TYPES[i % 3], 'mealId': meal_ids[i % len(meal_ids)],
+        }}).encode() + b'\n'
+    for i in range(counts['pantry_items']):
+        yield json.dumps({'type': 'pantry_items', 'data': {
+            'id': str(uuid.uuid4()), 'name': f"Pantry item {i}", 'quantity': i % 7, 'unit': 'pcs',
+        }}).encode() + b'\n'
+    for i in range(counts['shopping_list_items']):
+        yield json.dumps({'type': 'shopping_list_items', 'data': {
+            'id': str(uuid.uuid4()), 'name': f"Shopping item {i}", 'checked': i % 2 == 0,
+        }}).encode() + b'\n'
+
+
+class Chunked:
+    """Group generated lines into ~64 KiB chunks for the upload."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def __iter__(self):
+        chunk = []
+        size = 0
+        for line in self.lines:
+            chunk.append(line)
+            size += len(line)
+            if size >= 64 * 1024:
+                yield b''.join(chunk)
+                chunk, size = [], 0
+        if chunk:
+            yield b''.join(chunk)
+
+
+def do_import(lines):
+    started = time.perf_counter()
+    r = requests.post(f"{API_BASE}/import", headers={**HEADERS, 'Content-Type': 'application/x-ndjson'},
+                      data=iter(Chunked(lines)), timeout=1800)
+    elapsed = time.perf_counter() - started
+    if r.status_code != 200:
+        raise SystemExit(f"Import failed: {r.status_code} {r.text[:500]}")
+    return r.json(), elapsed
+
+
+def rss_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def sample_rss(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(rss_kb(pid))
+        time.sleep(0.1)
+
+
+def do_export(server_pid):
+    samples, stop = [], threading.Event()
+    sampler = None
+    if server_pid:
+        samples.append(rss_kb(server_pid))
+        sampler = threading.Thread(target=sample_rss, args=(server_pid, samples, stop), daemon=True)
+        sampler.start()
+
+    counts = {c: 0 for c in COLLECTIONS}
+    footer = None
+    started = time.perf_counter()
+    first_byte = None
+    with requests.get(f"{API_BASE}/export", headers=HEADERS, stream=True, timeout=1800) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            if not line:
+                continue
+            record = json.loads(line)
+            if record['type'] in counts:
+                counts[record['type']] += 1
+            elif record['type'] == 'footer':
+                footer = record['counts']
+            elif record['type'] == 'error':
+                raise SystemExit(f"Export failed midway: {record}")
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    if sampler:
+        sampler.join()
+    return counts, footer, first_byte or elapsed, elapsed, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--server-pid', type=int, help='sample this process\'s RSS during the export (Linux)')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("EXPORT / IMPORT BENCHMARK")
+    print("="*80)
+
+    register()
+    counts = split(args.rows)
+    print(f"rows: {args.rows} ({', '.join(f'{c}={n}' for c, n in counts.items())})")
+
+    # Generated once and kept as bytes so both imports send the same ids.
+    lines = list(generate(counts))
+
+    result, elapsed = do_import(lines)
+    first_ok = result['inserted'] == counts
+    print_result(first_ok, f"import: {elapsed:.1f}s, {args.rows / elapsed:,.0f} rows/s, inserted={result['inserted']}")
+
+    result, elapsed = do_import(lines)
+    again_ok = not any(result['inserted'].values()) and result['skipped'] == counts
+    print_result(again_ok, f"re-import: {elapsed:.1f}s, inserted={result['inserted']}, skipped={result['skipped']}")
+
+    exported, footer, ttfb, elapsed, samples = do_export(args.server_pid)
+    export_ok = exported == counts and footer == counts
+    print_result(export_ok, f"export: first byte {ttfb * 1000:.0f} ms, {elapsed:.1f}s, "
+                            f"{args.rows / elapsed:,.0f} rows/s, rows={exported}, footer={footer}")
+    if samples:
+        print(f"server RSS during export: start {samples[0] / 1024:.0f} MiB, "
+              f"peak {max(samples) / 1024:.0f} MiB (+{(max(samples) - samples[0]) / 1024:.0f} MiB)")
+
+    passed = first_ok and again_ok and export_ok
+    print(f"\n{'all checks passed' if passed else 'count mismatch'}")
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Login Storm Benchmark
+Fires a burst of concurrent POST /api/auth/login calls and measures
+GET /api/pantry latency while the storm is running. With bcrypt on the
+password worker pool (lib/password-pool.js), logins should stop
+holding up unrelated requests.
+
+Needs the dev server on localhost:3000 with a real Supabase database.
+One user is registered per run. To check the 503 path, shrink the
+queue:
+
+    BCRYPT_POOL_SIZE=2 BCRYPT_MAX_QUEUE=8 yarn dev
+    python tests/bench_login_storm.py --logins 200 --concurrency 64
+
+Reports:
+1. Baseline GET /api/pantry latency (no storm) p50 / p95
+2. The same probe during the storm, plus login outcomes: 200s, 503s
+   (each must carry Retry-After) and anything else
+3. GET /api/auth/stats: pool size, peak queue depth, hash time
+Exits 1 when the storm p95 exceeds max(2 × baseline p95,
+baseline p95 + --slack-ms), when a 503 lacks Retry-After, or when a
+login fails with any other status.
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'http://localhost:3000')
+API_BASE = f"{BASE_URL}/api"
+
+HEADERS = {}
+PASSWORD = 'testpass123'
+
+
+def register():
+    username = f"storm_{uuid.uuid4().hex[:10]}"
+    r = requests.post(f"{API_BASE}/auth/register",
+                      json={'username': username, 'password': PASSWORD}, timeout=30)
+    r.raise_for_status()
+    HEADERS['Authorization'] = f"Bearer {r.json()['token']}"
+    return username
+
+
+def probe(stop, interval):
+    """GET /api/pantry every `interval` seconds until `stop` is set."""
+    session = requests.Session()
+    timings = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        r = session.get(f"{API_BASE}/pantry", headers=HEADERS, timeout=30)
+        timings.append((time.perf_counter() - started) * 1000)
+        r.raise_for_status()
+        time.sleep(interval)
+    return timings
+
+
+def login(username):
+    r = requests.post(f"{API_BASE}/auth/login",
+                      json={'username': username, 'password': PASSWORD}, timeout=60)
+    return r.status_code, r.headers.get('Retry-After')
+
+
+def report(label, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{label}: p50={statistics.median(ordered):.1f}ms p95={p95:.1f}ms max={ordered[-1]:.1f}ms "
+          f"(n={len(ordered)})")
+    return p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--baseline-s', type=float, default=3.0)
+    parser.add_argument('--probe-interval-ms', type=float, default=50)
+    parser.add_argument('--slack-ms', type=float, default=50)
+    args = parser.parse_args()
+    interval = args.probe_interval_ms / 1000
+
+    print("\n" + "="*80)
+    print("LOGIN STORM BENCHMARK")
+    print("="*80)
+
+    username = register()
+
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        baseline = pool.submit(probe, stop, interval)
+        time.sleep(args.baseline_s)
+        stop.set()
+        baseline_p95 = report("Baseline GET /api/pantry", baseline.result())
+
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as probe_pool:
+        during = probe_pool.submit(probe, stop, interval)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as storm:
+            outcomes = list(storm.map(lambda _: login(username), range(args.logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        storm_p95 = report("During storm GET /api/pantry", during.result())
+
+    ok = sum(1 for code, _ in outcomes if code == 200)
+    busy = [retry for code, retry in outcomes if code == 503]
+    other = sorted({code for code, _ in outcomes if code not in (200, 503)})
+    print(f"Logins: {args.logins} in {elapsed:.1f}s → {ok} × 200, {len(busy)} × 503"
+          f"{f', other statuses {other}' if other else ''}")
+
+    stats = requests.get(f"{API_BASE}/auth/stats", headers=HEADERS, timeout=10).json().get('passwordPool', {})
+    print(f"Pool: size={stats.get('size')} rejected={stats.get('rejected')} "
+          f"jobMs p50={stats.get('jobMs', {}).get('p50')} p95={stats.get('jobMs', {}).get('p95')} "
+          f"inline={stats.get('inline')}")
+
+    budget = max(2 * baseline_p95, baseline_p95 + args.slack_ms)
+    flat = storm_p95 <= budget
+    retry_after = all(retry and retry.isdigit() for retry in busy)
+    passed = flat and retry_after and not other and ok > 0
+    status = "✅ PASS" if passed else "❌ FAIL"
+    print(f"{status}: pantry p95 during storm {storm_p95:.1f}ms (budget {budget:.1f}ms), "
+          f"503s with Retry-After: {retry_after}")
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    exit(main())
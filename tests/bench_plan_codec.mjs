@@ -0,0 +1,121 @@
+#!/usr/bin/env node
+/**
+ * Plan Codec Benchmark
+ * Size and speed of lib/plan-codec.js against the JSON payload it
+ * replaced, on realistic week plans.
+ *
+ *     node tests/bench_plan_codec.mjs            (Node ≥ 20.19)
+ *     node tests/bench_plan_codec.mjs --iterations 2000
+ *
+ * Scenarios: a light week (7 dinners), a typical week (14 meals, some
+ * repeats) and a busy week (21 meals, long titles and ingredient
+ * lists). For each one it reports:
+ *   1. JSON bytes vs codec bytes and the ratio
+ *   2. QR: whether the payload fits one code (version 40, ECC L —
+ *      qrcode.react's default) in byte mode (JSON) vs alphanumeric
+ *      mode (base45)
+ *   3. BLE: reads / notifications needed at the default 23-byte ATT MTU
+ *      and at a negotiated 185-byte MTU
+ *   4. Encode / decode round trips per second
+ * Exits 1 if any round trip differs or the typical/busy ratio is < 3×.
+ */
+
+import { encodePlan, decodePlan, encodePlanText, decodePlanText } from '../lib/plan-codec.js';
+
+const QR_V40_L_BYTES = 2953;
+const QR_V40_L_ALNUM = 4296;
+const MIN_RATIO = 3;
+
+const args = process.argv.slice(2);
+const iterations = Number(args[args.indexOf('--iterations') + 1]) || 500;
+
+const RECIPES = [
+  ['Spaghetti carbonara', '400g spaghetti\n150g pancetta, diced\n3 large eggs\n50g pecorino romano, finely grated\n50g parmesan, finely grated\n2 garlic cloves, peeled\nFreshly ground black pepper\nSalt'],
+  ['Chicken tikka masala with basmati rice', '600g boneless chicken thighs\n150g natural yoghurt\n2 tbsp tikka paste\n1 onion, finely chopped\n3 garlic cloves, crushed\nThumb-sized piece of ginger, grated\n400g can chopped tomatoes\n150ml double cream\n300g basmati rice\nFresh coriander, to serve'],
+  ['Overnight oats', '80g rolled oats\n200ml milk\n2 tbsp greek yoghurt\n1 tbsp chia seeds\n1 tbsp honey\nHandful of blueberries'],
+  ['Roasted vegetable and halloumi traybake', '2 red peppers, chunks\n1 courgette, sliced\n1 red onion, wedges\n250g cherry tomatoes\n225g halloumi, sliced\n3 tbsp olive oil\n1 tsp dried oregano\n1 lemon, juiced'],
+  ['Black bean tacos', '2 x 400g cans black beans, drained\n1 tsp ground cumin\n1 tsp smoked paprika\n8 small corn tortillas\n1 avocado\n1 lime\n100g feta, crumbled\nPickled red onion\nHot sauce'],
+  ['Shakshuka', '2 tbsp olive oil\n1 onion, sliced\n1 red pepper, sliced\n2 garlic cloves\n1 tsp cumin\n1 tsp paprika\n400g can chopped tomatoes\n4 eggs\nParsley, to serve\nCrusty bread'],
+  ['Thai green curry with prawns', '1 tbsp vegetable oil\n2 tbsp green curry paste\n400ml coconut milk\n300g raw king prawns\n150g green beans, trimmed\n1 tbsp fish sauce\n1 tsp brown sugar\nThai basil\nJasmine rice'],
+  ['Avocado toast with poached egg', '2 slices sourdough\n1 ripe avocado\n2 eggs\nChilli flakes\nLemon juice\nSalt and pepper'],
+  ['Lentil soup', '1 tbsp olive oil\n1 onion\n2 carrots\n2 celery sticks\n200g red lentils\n1.2l vegetable stock\n1 tsp cumin\n1 lemon'],
+  ['Grilled salmon, new potatoes and green beans', '2 salmon fillets\n500g new potatoes\n200g green beans\n1 tbsp butter\n1 lemon\nFresh dill'],
+];
+const LONG_SUFFIX = ' — slow-cooked weekend version with homemade sides and extras for lunchboxes';
+
+function makePlan({ days, types, repeatEvery, long }) {
+  const weekStart = '2025-11-03';
+  const entries = [];
+  let n = 0;
+  for (let d = 0; d < days; d++) {
+    const date = new Date(Date.parse(`${weekStart}T00:00:00Z`) + d * 86400000).toISOString().slice(0, 10);
+    for (const type of types) {
+      const [title, ingredients] = RECIPES[(repeatEvery ? n % repeatEvery : n) % RECIPES.length];
+      entries.push({
+        key: `${date}-${type}`,
+        title: long ? title + LONG_SUFFIX : title,
+        ingredients: long ? `${ingredients}\n${ingredients.split('\n').map((l) => `${l} (extra)`).join('\n')}` : ingredients,
+      });
+      n++;
+    }
+  }
+  return { title: 'Week of Nov 3, 2025', weekStart, entries };
+}
+
+const SCENARIOS = {
+  light: makePlan({ days: 7, types: ['dinner'], repeatEvery: 0, long: false }),
+  typical: makePlan({ days: 7, types: ['lunch', 'dinner'], repeatEvery: 9, long: false }),
+  busy: makePlan({ days: 7, types: ['breakfast', 'lunch', 'dinner'], repeatEvery: 0, long: true }),
+};
+
+function printResult(passed, message) {
+  console.log(`${passed ? '✅ PASS' : '❌ FAIL'}: ${message}`);
+}
+
+async function opsPerSecond(fn) {
+  const started = performance.now();
+  for (let i = 0; i < iterations; i++) await fn();
+  return Math.round(iterations / ((performance.now() - started) / 1000));
+}
+
+async function main() {
+  console.log(`\n${'='.repeat(80)}\nPLAN CODEC BENCHMARK\n${'='.repeat(80)}`);
+  let allPassed = true;
+
+  for (const [name, plan] of Object.entries(SCENARIOS)) {
+    const json = JSON.stringify(plan);
+    const jsonBytes = new TextEncoder().encode(json).length;
+    const bytes = await encodePlan(plan);
+    const qrText = await encodePlanText(plan);
+    const linkText = await encodePlanText(plan, { format: 'link' });
+
+    const sameBinary = JSON.stringify(await decodePlan(bytes)) === json;
+    const sameQr = JSON.stringify(await decodePlanText(qrText)) === json;
+    const sameLink = JSON.stringify(await decodePlanText(linkText)) === json;
+    const legacy = JSON.stringify(await decodePlanText(json)) === json;
+    const ratio = jsonBytes / bytes.length;
+
+    const encodeOps = await opsPerSecond(() => encodePlan(plan));
+    const decodeOps = await opsPerSecond(() => decodePlan(bytes));
+    const reads = (size, mtu) => Math.ceil(size / (mtu - 3));
+
+    console.log(`\n[${name}] ${plan.entries.length} entries`);
+    console.log(`  size      JSON ${jsonBytes} B → codec ${bytes.length} B (${ratio.toFixed(1)}×), `
+      + `QR text ${qrText.length} chars, link ${linkText.length} chars`);
+    console.log(`  QR        JSON fits one code: ${jsonBytes <= QR_V40_L_BYTES}, `
+      + `base45 fits one code: ${qrText.length <= QR_V40_L_ALNUM}`);
+    console.log(`  BLE       MTU 23: ${reads(jsonBytes + 1, 23)} → ${reads(bytes.length, 23)} chunks, `
+      + `MTU 185: ${reads(jsonBytes + 1, 185)} → ${reads(bytes.length, 185)} chunks`);
+    console.log(`  speed     encode ${encodeOps}/s, decode ${decodeOps}/s`);
+
+    const roundTrip = sameBinary && sameQr && sameLink && legacy;
+    const ratioOk = name === 'light' || ratio >= MIN_RATIO;
+    printResult(roundTrip, `${name}: round trip (binary, base45, base64url, legacy JSON)`);
+    printResult(ratioOk, `${name}: ${ratio.toFixed(1)}× smaller${name === 'light' ? ' (not gated)' : ` (need ≥ ${MIN_RATIO}×)`}`);
+    allPassed = allPassed && roundTrip && ratioOk;
+  }
+
+  return allPassed ? 0 : 1;
+}
+
+process.exit(await main());
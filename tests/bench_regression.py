@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+API Performance Regression Gate
+Times a fixed set of API scenarios and compares them to a stored baseline.
+
+Catches the slow creep nobody notices in review, such as an extra
+findOne in PUT /api/meals or a new sequential upstream call in the
+barcode chain. Needs the dev server with a real Supabase database,
+with barcode lookups pointed at the stub (see docs/operations/testing.md):
+
+    RATE_LIMIT_DISABLED=1 BARCODE_UPSTREAM_URL=http://127.0.0.1:8767 yarn dev
+    python tests/bench_regression.py --update     # record tests/perf_baselines/baseline.json
+    python tests/bench_regression.py              # compare a fresh run against it
+    python tests/bench_regression.py --compare old.json new.json   # offline, no server
+
+Each scenario runs --warmup untimed requests, then --samples timed
+ones, one at a time, against a freshly seeded user: a few meals, a
+planned week, pantry and shopping items. Baselines are versioned JSON.
+They keep the raw samples, so thresholds can change without re-recording.
+
+A metric (median or p95) counts as regressed only when all of these hold:
+1. The new bootstrap 95% CI sits entirely above the baseline's CI
+2. It is slower by more than --median-pct / --p95-pct (default 15% / 30%)
+3. It is slower by more than --min-ms (default 3 ms), so tiny endpoints
+   don't flap on scheduler noise
+The barcode scenario also records upstream calls per request, counted
+exactly by the stub. Any increase is a regression.
+
+Reports a diff table per scenario. Exit codes: 0 = no regression,
+1 = regression, 2 = no usable baseline / server or database unavailable.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from barcode_stub import BarcodeStubClient, start_barcode_stub  # noqa: E402
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'http://localhost:3000')
+API_BASE = f"{BASE_URL}/api"
+STUB_PORT = int(os.getenv('BARCODE_STUB_PORT', '8767'))
+
+BASELINE_VERSION = 1
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'perf_baselines' / 'baseline.json'
+BOOTSTRAP_RESAMPLES = 2000
+UPSTREAM_LATENCY_MS = 20   # per stubbed upstream reply; an extra sequential call costs this much
+
+
+# -------------------------------------------------------------------------
+# Seed data + scenarios
+# -------------------------------------------------------------------------
+
+def seed():
+    """Register a user and give it enough data for every scenario to do real work."""
+    session = requests.Session()
+    username = f"perf_{uuid.uuid4().hex[:10]}"
+    r = session.post(f"{API_BASE}/auth/register", json={'username': username, 'password': 'testpass123'}, timeout=30)
+    r.raise_for_status()
+    session.headers['Authorization'] = f"Bearer {r.json()['token']}"
+
+    meal_ids = []
+    for i in range(8):
+        r = session.post(f"{API_BASE}/meals", json={
+            'title': f"Perf meal {i}",
+            'ingredients': "2 eggs\n200g pasta\n1 tbsp olive oil\n50g parmesan\n1 garlic clove",
+            'instructions': 'Combine and cook.',
+        }, timeout=30)
+        r.raise_for_status()
+        meal_ids.append(r.json()['id'])
+
+    monday = date.today() - timedelta(days=date.today().weekday())
+    for day in range(7):
+        session.post(f"{API_BASE}/meal-plans", json={
+            'date': (monday + timedelta(days=day)).isoformat(),
+            'mealType': 'dinner',
+            'mealId': meal_ids[day % len(meal_ids)],
+        }, timeout=30).raise_for_status()
+    for name in ['Eggs', 'Pasta', 'Olive oil', 'Parmesan', 'Garlic']:
+        session.post(f"{API_BASE}/pantry", json={'name': name}, timeout=30).raise_for_status()
+        session.post(f"{API_BASE}/shopping-list", json={'name': name}, timeout=30).raise_for_status()
+
+    return {
+        'session': session,
+        'meal_id': meal_ids[0],
+        'week': (monday.isoformat(), (monday + timedelta(days=6)).isoformat()),
+        'counter': 0,
+    }
+
+
+def _update_meal(ctx):
+    ctx['counter'] += 1
+    return ctx['session'].put(f"{API_BASE}/meals/{ctx['meal_id']}",
+                              json={'title': f"Perf meal 0 (rev {ctx['counter']})"}, timeout=30)
+
+
+def _barcode_miss(ctx):
+    # A fresh, pre-registered miss every time: walks the whole source chain.
+    code = ctx['barcodes'].pop()
+    r = ctx['session'].get(f"{API_BASE}/barcode-lookup", params={'code': code, 'bypassCache': '1'}, timeout=30)
+    r.barcode = code
+    return r
+
+
+# name → (description, request function). Add scenarios at the end;
+# renaming one orphans its baseline entry.
+SCENARIOS = {
+    'health': ('GET /api/health', lambda ctx: ctx['session'].get(f"{API_BASE}/health", timeout=30)),
+    'meals_list': ('GET /api/meals', lambda ctx: ctx['session'].get(f"{API_BASE}/meals", timeout=30)),
+    'meal_detail': ('GET /api/meals/:id',
+                    lambda ctx: ctx['session'].get(f"{API_BASE}/meals/{ctx['meal_id']}", timeout=30)),
+    'meal_update': ('PUT /api/meals/:id (title only)', _update_meal),
+    'meal_plans_week': ('GET /api/meal-plans?startDate&endDate', lambda ctx: ctx['session'].get(
+        f"{API_BASE}/meal-plans", params={'startDate': ctx['week'][0], 'endDate': ctx['week'][1]}, timeout=30)),
+    'pantry_list': ('GET /api/pantry', lambda ctx: ctx['session'].get(f"{API_BASE}/pantry", timeout=30)),
+    'shopping_list': ('GET /api/shopping-list',
+                      lambda ctx: ctx['session'].get(f"{API_BASE}/shopping-list", timeout=30)),
+    'cookable': ('GET /api/meals/cookable?scope=mine',
+                 lambda ctx: ctx['session'].get(f"{API_BASE}/meals/cookable", params={'scope': 'mine'}, timeout=30)),
+    'barcode_miss': ('GET /api/barcode-lookup (stubbed miss, bypassCache)', _barcode_miss),
+}
+
+
+# -------------------------------------------------------------------------
+# Statistics
+# -------------------------------------------------------------------------
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def bootstrap_ci(values, stat, rng, level=0.95):
+    """Percentile-bootstrap confidence interval for `stat(values)`."""
+    estimates = sorted(stat(rng.choices(values, k=len(values))) for _ in range(BOOTSTRAP_RESAMPLES))
+    tail = (1 - level) / 2
+    return [estimates[int(tail * len(estimates))], estimates[int((1 - tail) * len(estimates)) - 1]]
+
+
+def summarise(samples, seed_value):
+    rng = random.Random(seed_value)
+    return {
+        'n': len(samples),
+        'median': round(statistics.median(samples), 2),
+        'median_ci': [round(v, 2) for v in bootstrap_ci(samples, statistics.median, rng)],
+        'p95': round(percentile(samples, 0.95), 2),
+        'p95_ci': [round(v, 2) for v in bootstrap_ci(samples, lambda s: percentile(s, 0.95), rng)],
+    }
+
+
+def judge(metric, base, new, pct, min_ms):
+    """'slower', 'faster' or 'same' for one metric of one scenario."""
+    b, n = base[metric], new[metric]
+    b_lo, b_hi = base[f"{metric}_ci"]
+    n_lo, n_hi = new[f"{metric}_ci"]
+    if n_lo > b_hi and n - b > max(min_ms, b * pct / 100):
+        return 'slower'
+    if n_hi < b_lo and b - n > max(min_ms, b * pct / 100):
+        return 'faster'
+    return 'same'
+
+
+# -------------------------------------------------------------------------
+# Running + comparing
+# -------------------------------------------------------------------------
+
+def server_ready():
+    try:
+        health = requests.get(f"{API_BASE}/health", timeout=5).json()
+    except (requests.RequestException, ValueError):
+        print(f"❌ Forkcast server not reachable at {BASE_URL}")
+        return False
+    if health.get('db') != 'ok':
+        print(f"❌ Database unavailable behind {BASE_URL}: {health.get('error')}")
+        return False
+    return True
+
+
+def barcode_stub(ctx, count):
+    """Stub client with `count` slow misses registered, or None if the server isn't using it."""
+    stub = BarcodeStubClient(f"http://127.0.0.1:{STUB_PORT}")
+    if not stub.is_up():
+        stub = start_barcode_stub(STUB_PORT)
+    probe = '5' + str(uuid.uuid4().int)[:12]
+    ctx['session'].get(f"{API_BASE}/barcode-lookup", params={'code': probe, 'bypassCache': '1'}, timeout=30)
+    if not stub.requests_for(probe):
+        return None
+    ctx['barcodes'] = ['5' + str(uuid.uuid4().int)[:12] for _ in range(count)]
+    for code in ctx['barcodes']:
+        for host in ['off', 'obf', 'opf', 'opff', 'upcitemdb']:
+            stub.add_product(host, code, None, latency_ms=UPSTREAM_LATENCY_MS)
+    return stub
+
+
+def run(names, samples, warmup):
+    ctx = seed()
+    ctx['stub'] = barcode_stub(ctx, samples + warmup) if 'barcode_miss' in names else None
+    results = {}
+    for name in names:
+        description, fn = SCENARIOS[name]
+        if name == 'barcode_miss' and not ctx['stub']:
+            print(f"  {name:<16} skipped: start the server with BARCODE_UPSTREAM_URL=http://127.0.0.1:{STUB_PORT}")
+            continue
+        for _ in range(warmup):
+            fn(ctx).raise_for_status()
+        timings, upstream = [], set()
+        for _ in range(samples):
+            started = time.perf_counter()
+            r = fn(ctx)
+            timings.append(round((time.perf_counter() - started) * 1000, 2))
+            r.raise_for_status()
+            if hasattr(r, 'barcode'):
+                upstream.add(len(ctx['stub'].requests_for(r.barcode)))
+        results[name] = {'description': description, 'samples_ms': timings, **summarise(timings, name)}
+        if upstream:
+            results[name]['upstream_calls'] = max(upstream)
+        print(f"  {name:<16} median {results[name]['median']:>8.1f} ms   p95 {results[name]['p95']:>8.1f} ms")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_report(results, args):
+    return {
+        'version': BASELINE_VERSION,
+        'createdAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'baseUrl': BASE_URL,
+        'host': {'platform': platform.platform(), 'cpus': os.cpu_count(), 'python': platform.python_version()},
+        'config': {'samples': args.samples, 'warmup': args.warmup},
+        'scenarios': results,
+    }
+
+
+def load_report(path):
+    try:
+        report = json.loads(Path(path).read_text())
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read {path}: {e}")
+        return None
+    if report.get('version') != BASELINE_VERSION:
+        print(f"❌ {path} is format version {report.get('version')}, expected {BASELINE_VERSION}; "
+              f"re-record it with --update")
+        return None
+    # Re-derive stats from the raw samples, so bootstrap changes never
+    # leave an old baseline on different maths.
+    for name, scenario in report['scenarios'].items():
+        scenario.update(summarise(scenario['samples_ms'], name))
+    return report
+
+
+def compare(base, new, args):
+    """Print the diff table; return True if anything regressed."""
+    if base['host'] != new['host']:
+        print(f"⚠️  Baseline recorded on {base['host']}, this run on {new['host']}; timings may not be comparable")
+    print(f"\nBaseline {base.get('git') or '?'} ({base['createdAt']}) → run {new.get('git') or '?'} "
+          f"({new['createdAt']})\n")
+    header = f"{'scenario':<16} {'median base → new':>24} {'Δ':>8}   {'p95 base → new':>24} {'Δ':>8}   verdict"
+    print(header)
+    print('-' * len(header))
+
+    regressed = False
+    for name in SCENARIOS:
+        b, n = base['scenarios'].get(name), new['scenarios'].get(name)
+        if not b or not n:
+            print(f"{name:<16} {'(missing from ' + ('baseline' if not b else 'run') + ')':>24}")
+            continue
+        verdicts = {
+            'median': judge('median', b, n, args.median_pct, args.min_ms),
+            'p95': judge('p95', b, n, args.p95_pct, args.min_ms),
+        }
+        notes = [f"{metric} slower" for metric, v in verdicts.items() if v == 'slower']
+        if n.get('upstream_calls', 0) > b.get('upstream_calls', 0):
+            notes.append(f"upstream calls {b.get('upstream_calls', 0)} → {n['upstream_calls']}")
+        if notes:
+            regressed = True
+            verdict = '❌ ' + ', '.join(notes)
+        elif 'faster' in verdicts.values():
+            verdict = '🚀 faster'
+        else:
+            verdict = '✅ same'
+        cells = []
+        for metric in ('median', 'p95'):
+            delta = (n[metric] - b[metric]) / b[metric] * 100 if b[metric] else 0.0
+            cells.append(f"{b[metric]:>9.1f} → {n[metric]:>9.1f} ms {delta:>+7.1f}%")
+        print(f"{name:<16} {cells[0]}   {cells[1]}   {verdict}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--update', action='store_true', help='record this run as the new baseline')
+    parser.add_argument('--output', help='also write this run to a JSON file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='compare two stored runs, no server')
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--samples', type=int, default=60)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--median-pct', type=float, default=15)
+    parser.add_argument('--p95-pct', type=float, default=30)
+    parser.add_argument('--min-ms', type=float, default=3)
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("API PERFORMANCE REGRESSION GATE")
+    print("="*80)
+
+    if args.compare:
+        base, new = load_report(args.compare[0]), load_report(args.compare[1])
+        if not base or not new:
+            return 2
+        return 1 if compare(base, new, args) else 0
+
+    names = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"❌ Unknown scenarios: {', '.join(unknown)} (known: {', '.join(SCENARIOS)})")
+        return 2
+    base = None
+    if not args.update:
+        base = load_report(args.baseline)
+        if not base:
+            print("   Record one first: python tests/bench_regression.py --update")
+            return 2
+    elif args.only and Path(args.baseline).exists():
+        # --only re-records a subset: keep every other scenario's entry,
+        # or the gate would silently stop checking them.
+        base = load_report(args.baseline)
+        if not base:
+            print("   Re-record every scenario (--update without --only) instead")
+            return 2
+    if not server_ready():
+        return 2
+
+    report = make_report(run(names, args.samples, args.warmup), args)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if args.update:
+        if base:
+            kept = [name for name in base['scenarios'] if name not in report['scenarios']]
+            report['scenarios'] = {**base['scenarios'], **report['scenarios']}
+            if kept:
+                print(f"\n   Kept from the old baseline: {', '.join(kept)}")
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.baseline).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return 0
+
+    regressed = compare(base, report, args)
+    status = "❌ FAIL: performance regression" if regressed else "✅ PASS: no regression"
+    print(f"\n{status}")
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Traffic Replay Benchmark
+Re-issues a workload recorded by lib/traffic-capture.js against a
+server, keeping the original timing (or N× faster), and compares
+latencies per route with the ones recorded.
+
+Capture on the instance whose traffic you want (see
+docs/operations/testing.md), then replay against a test server:
+
+    TRAFFIC_CAPTURE=1 yarn start               # writes .traffic/*.ndjson
+    python tests/bench_replay.py .traffic/
+    python tests/bench_replay.py .traffic/ --speed 4 --workers 64
+    python tests/bench_replay.py capture.ndjson --routes 'scan|bootstrap' --json result.json
+
+Setup (before the clock starts):
+1. One real user per captured user hash, registered on the target; its
+   requests carry a freshly minted dev JWT for that user (JWT_SECRET must
+   match the server's, as in tests/conftest.py)
+2. Per user, a meal, a pantry item and a shopping-list item for routes
+   with :id and for mealId references; one extra item per captured
+   DELETE so deletes never hit an object another request still uses
+Then each record is sent at (ts - first ts) / speed seconds from the
+start. Shapes are turned back into values: day offsets become dates
+relative to today, barcode hashes become stable synthetic EAN-13s (same
+hash → same code), strings become filler of the recorded length.
+
+Not replayed (counted as skipped): uploads and imports (only their size
+was captured), and requests captured with an invalid token when
+--skip-invalid is given.
+
+Reports, per method + route: count, recorded p50/p95, replay p50/p95,
+the p95 delta, and how many statuses differ (2xx vs not). With
+--max-regression PCT, exits 1 when a route with ≥ 20 requests has a
+replay p95 more than PCT% above its recorded p95. Scheduler lag (how
+late requests left because --workers were busy) is reported too: if it
+is large, the replay under-drives the target.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import jwt
+import requests
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'http://localhost:3000')
+JWT_SECRET = os.getenv('JWT_SECRET', 'dev-only-insecure-secret-do-not-use-in-prod')
+PASSWORD = 'testpass123'
+
+UNREPLAYABLE = {('POST', 'upload'), ('POST', 'import')}
+# First path segment → the seeded object kind its :id refers to.
+ID_KINDS = {'meals': 'meal', 'pantry': 'pantry', 'shopping-list': 'shopping'}
+# Body keys holding a meal id.
+MEAL_REF_KEYS = {'mealId', 'sourceMealId'}
+MIN_COMPARE = 20
+
+
+def print_result(passed, message):
+    status = "✅ PASS" if passed else "❌ FAIL"
+    print(f"{status}: {message}")
+
+
+def mint_headers(user_id, username):
+    """Authorization header with a dev JWT for `user_id` (as tests/conftest.py mints them)."""
+    token = jwt.encode({'userId': user_id, 'username': username,
+                        'exp': datetime.utcnow() + timedelta(days=1)}, JWT_SECRET, algorithm='HS256')
+    return {'Authorization': f"Bearer {token}"}
+
+
+def load_records(paths, routes=None):
+    pattern = re.compile(routes) if routes else None
+    files = []
+    for p in map(Path, paths):
+        files.extend(sorted(p.glob('traffic-*.ndjson')) if p.is_dir() else [p])
+    records = []
+    for f in files:
+        with open(f) as fh:
+            for line in fh:
+                if line.strip():
+                    record = json.loads(line)
+                    if not pattern or pattern.search(record['route']):
+                        records.append(record)
+    records.sort(key=lambda r: r['ts'])
+    return records
+
+
+def ean13(token, length):
+    """Stable synthetic barcode for a hashed code: same token → same digits, valid check digit."""
+    digits = str(int(hashlib.sha256(token.encode()).hexdigest(), 16))[:max(length, 2) - 1]
+    if length != 13:
+        return (digits + '0')[:length]
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+
+class Materialiser:
+    """Turns captured shapes back into concrete values for one user."""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.today = date.today()
+
+    def value(self, shape, key=None):
+        if isinstance(shape, list):
+            return [self.value(item, key) for item in shape]
+        if not isinstance(shape, dict):
+            return shape
+        if 'days' in shape and len(shape) == 1:
+            return (self.today + timedelta(days=shape['days'])).isoformat()
+        if 'code' in shape and 'len' in shape:
+            return shape['code'] if shape.get('raw') else ean13(shape['code'], shape['len'])
+        if shape.get('id') is True:
+            return self.objects['meal'] if key in MEAL_REF_KEYS else str(uuid.uuid4())
+        if 'str' in shape and len(shape) == 1:
+            return 'x' * shape['str']
+        if 'arr' in shape and 'items' in shape:
+            # Only the first items were captured; repeat the last for the rest.
+            items = shape['items'] or [None]
+            return [self.value(items[min(i, len(items) - 1)], key) for i in range(shape['arr'])]
+        if shape.get('truncated') or shape.get('invalidJson'):
+            return None
+        return {k: self.value(v, k) for k, v in shape.items()}
+
+
+class Replay:
+    def __init__(self, target, records, args):
+        self.api = f"{target.rstrip('/')}/api"
+        self.records = records
+        self.args = args
+        self.users = {}          # capture hash → {'id', 'username', 'headers', 'objects', 'spares'}
+        self.login_user = None
+        self.session = requests.Session()
+        self.session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=args.workers))
+        self.results = []        # (record, replay_ms, replay_status, lag_ms)
+        self.skipped = defaultdict(int)
+        self.lock = threading.Lock()
+
+    # ----- setup ---------------------------------------------------------
+
+    def register(self):
+        username = f"replay_{uuid.uuid4().hex[:10]}"
+        r = self.session.post(f"{self.api}/auth/register",
+                              json={'username': username, 'password': PASSWORD}, timeout=30)
+        r.raise_for_status()
+        user_id = r.json()['user']['id']
+        return {'id': user_id, 'username': username, 'headers': mint_headers(user_id, username)}
+
+    def create(self, user, kind):
+        path, body = {
+            'meal': ('meals', {'title': 'Replay meal', 'ingredients': '2 eggs\n1 cup milk',
+                               'instructions': 'Whisk and cook.'}),
+            'pantry': ('pantry', {'name': 'Replay eggs', 'quantity': 6}),
+            'shopping': ('shopping-list', {'name': 'Replay milk'}),
+        }[kind]
+        r = self.session.post(f"{self.api}/{path}", headers=user['headers'], json=body, timeout=30)
+        r.raise_for_status()
+        return r.json()['id']
+
+    def setup(self):
+        deletes = defaultdict(lambda: defaultdict(int))
+        for record in self.records:
+            first = record['route'].split('/')[0]
+            if record['method'] == 'DELETE' and ':id' in record['route'] and first in ID_KINDS:
+                deletes[record['user']][ID_KINDS[first]] += 1
+            if record['route'] == 'auth/login':
+                self.login_user = self.login_user or self.register()
+
+        hashes = sorted({r['user'] for r in self.records if r['user']})
+        for n, user_hash in enumerate(hashes, 1):
+            user = self.register()
+            user['objects'] = {kind: self.create(user, kind) for kind in ('meal', 'pantry', 'shopping')}
+            user['spares'] = {kind: [self.create(user, kind) for _ in range(count)]
+                              for kind, count in deletes[user_hash].items()}
+            self.users[user_hash] = user
+            print(f"\rsetup: {n}/{len(hashes)} users", end='', flush=True)
+        print()
+        # Requests captured with a token whose user isn't known (expired
+        # account, another environment) go out as a token-only user.
+        self.anonymous = {'headers': mint_headers(str(uuid.uuid4()), 'replay_anon'),
+                          'objects': {'meal': str(uuid.uuid4()), 'pantry': str(uuid.uuid4()),
+                                      'shopping': str(uuid.uuid4())},
+                          'spares': {}}
+
+    # ----- requests ------------------------------------------------------
+
+    def build(self, record):
+        """(method, url, headers, json body) for a record, or None to skip it."""
+        method, route = record['method'], record['route']
+        if (method, route) in UNREPLAYABLE:
+            return None
+        if record['auth'] == 'invalid':
+            if self.args.skip_invalid:
+                return None
+            user = {'headers': {'Authorization': 'Bearer invalid'}, 'objects': self.anonymous['objects'], 'spares': {}}
+        elif record['auth'] == 'user':
+            user = self.users.get(record['user'], self.anonymous)
+        else:
+            user = {'headers': {}, 'objects': self.anonymous['objects'], 'spares': {}}
+
+        materialise = Materialiser(user['objects'])
+        segments = route.split('/')
+        kind = ID_KINDS.get(segments[0])
+        if ':id' in segments:
+            with self.lock:
+                spares = user['spares'].get(kind) if method == 'DELETE' else None
+                object_id = spares.pop() if spares else user['objects'].get(kind, str(uuid.uuid4()))
+            segments = [object_id if s == ':id' else s for s in segments]
+
+        body = materialise.value(record['body']) if record['body'] is not None else None
+        if route == 'auth/register' and isinstance(body, dict):
+            body = {**body, 'username': f"replay_{uuid.uuid4().hex[:10]}", 'password': PASSWORD}
+        elif route == 'auth/login' and isinstance(body, dict):
+            body = {**body, 'username': self.login_user['username'], 'password': PASSWORD}
+
+        query = materialise.value(record['query']) if record['query'] else None
+        url = f"{self.api}/{'/'.join(segments)}"
+        return method, url, user['headers'], query, body
+
+    def send(self, record, request, due):
+        method, url, headers, query, body = request
+        lag = max(0.0, time.perf_counter() - due) * 1000
+        started = time.perf_counter()
+        try:
+            r = self.session.request(method, url, headers=headers, params=query,
+                                     json=body if body is not None else None, timeout=60)
+            status = r.status_code
+            r.content  # streamed responses: time the whole body, as the capture can't
+        except requests.RequestException:
+            status = None
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.results.append((record, elapsed, status, lag))
+
+    def run(self):
+        first_ts = self.records[0]['ts']
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.workers) as pool:
+            for n, record in enumerate(self.records, 1):
+                request = self.build(record)
+                if request is None:
+                    self.skipped[f"{record['method']} {record['route']}"] += 1
+                    continue
+                due = start + (record['ts'] - first_ts) / 1000 / self.args.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.send, record, request, due)
+                if n % 500 == 0:
+                    print(f"\rsent {n}/{len(self.records)}", end='', flush=True)
+        print()
+        return time.perf_counter() - start
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def ok(status):
+    return status is not None and 200 <= status < 300
+
+
+def report(results, max_regression):
+    by_route = defaultdict(list)
+    for record, ms, status, _ in results:
+        by_route[f"{record['method']} {record['route']}"].append((record, ms, status))
+
+    print(f"\n{'request':<34}{'n':>6}{'rec p50':>9}{'rec p95':>9}{'rep p50':>9}{'rep p95':>9}{'Δ p95':>9}{'status≠':>9}")
+    summary, regressed = {}, []
+    for name in sorted(by_route, key=lambda k: -len(by_route[k])):
+        rows = by_route[name]
+        recorded = [r['ms'] for r, _, _ in rows]
+        replayed = [ms for _, ms, _ in rows]
+        mismatched = sum(1 for r, _, status in rows if ok(r['status']) != ok(status))
+        rec95, rep95 = percentile(recorded, 95), percentile(replayed, 95)
+        delta = (rep95 - rec95) / rec95 * 100 if rec95 else 0.0
+        summary[name] = {'count': len(rows), 'recordedP50': statistics.median(recorded), 'recordedP95': rec95,
+                         'replayP50': statistics.median(replayed), 'replayP95': rep95,
+                         'p95DeltaPct': round(delta, 1), 'statusMismatches': mismatched}
+        if max_regression is not None and len(rows) >= MIN_COMPARE and delta > max_regression:
+            regressed.append(name)
+        print(f"{name[:33]:<34}{len(rows):>6}{statistics.median(recorded):>9.1f}{rec95:>9.1f}"
+              f"{statistics.median(replayed):>9.1f}{rep95:>9.1f}{delta:>+8.0f}%{mismatched:>9}")
+    return summary, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('captures', nargs='+', help='capture files or directories of traffic-*.ndjson')
+    parser.add_argument('--target', default=BASE_URL)
+    parser.add_argument('--speed', type=float, default=1.0, help='N× the recorded pace (default 1)')
+    parser.add_argument('--workers', type=int, default=32, help='concurrent requests at most')
+    parser.add_argument('--routes', help='only replay routes matching this regex')
+    parser.add_argument('--limit', type=int, help='replay only the first N records')
+    parser.add_argument('--skip-invalid', action='store_true', help='skip requests captured with a bad token')
+    parser.add_argument('--max-regression', type=float, help='fail when a route\'s p95 grew by more than PCT%%')
+    parser.add_argument('--json', help='write the per-route summary here')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("TRAFFIC REPLAY BENCHMARK")
+    print("="*80)
+
+    records = load_records(args.captures, args.routes)[:args.limit]
+    if not records:
+        print("No records to replay")
+        return 1
+    span = (records[-1]['ts'] - records[0]['ts']) / 1000
+    print(f"records: {len(records)} over {span:.0f}s recorded → ~{span / args.speed:.0f}s at {args.speed:g}×, "
+          f"target {args.target}")
+
+    replay = Replay(args.target, records, args)
+    replay.setup()
+    elapsed = replay.run()
+
+    results = replay.results
+    lags = [lag for *_, lag in results]
+    failed = sum(1 for *_, status, _ in results if status is None)
+    print(f"replayed {len(results)} in {elapsed:.1f}s ({len(results) / elapsed:.1f} req/s); "
+          f"scheduler lag p50 {percentile(lags, 50):.0f} ms, p95 {percentile(lags, 95):.0f} ms")
+    if replay.skipped:
+        print(f"skipped: {dict(replay.skipped)}")
+
+    summary, regressed = report(results, args.max_regression)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'speed': args.speed, 'replayed': len(results), 'elapsedS': elapsed,
+                       'skipped': replay.skipped, 'routes': summary}, f, indent=2)
+
+    print()
+    print_result(not failed, f"{failed} request(s) failed to connect or timed out")
+    if args.max_regression is not None:
+        print_result(not regressed, f"p95 within +{args.max_regression:g}% of the recording"
+                                    + (f" (over: {', '.join(regressed)})" if regressed else ''))
+    return 1 if failed or regressed else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Database Round-Trip Benchmark
+Counts the PostgREST requests behind the meal and kitchen item hot paths.
+
+Start the dev server with the counter on; every API response then
+carries X-DB-Round-Trips (lib/supabase-db.js, withDbRoundTrips):
+
+    DB_ROUND_TRIP_HEADER=1 yarn dev
+    python tests/bench_roundtrips.py
+
+A fresh user is registered and seeds one meal, one pantry item and one
+shopping-list item, then each request below is made --repeat times:
+
+1. GET  /api/meals/:id             meal + owner, one embedded join
+2. PUT  /api/meals/:id             title only (no ingredient re-index)
+3. PUT  /api/pantry/:id            quantity
+4. PUT  /api/shopping-list/:id     checked
+
+Reports round trips and latency p50 per request next to the counts
+before the writes returned their row (check → update → re-read).
+Exits 1 when any request needs more round trips than --max (default 1).
+"""
+
+import argparse
+import os
+import statistics
+import time
+import uuid
+
+import requests
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'http://localhost:3000')
+API_BASE = f"{BASE_URL}/api"
+
+# Round trips per request before update ... returning and the embedded owner.
+BEFORE = {
+    'GET meals/:id': 2,
+    'PUT meals/:id': 3,
+    'PUT pantry/:id': 2,
+    'PUT shopping-list/:id': 2,
+}
+
+HEADERS = {}
+
+
+def register():
+    username = f"bench_{uuid.uuid4().hex[:10]}"
+    r = requests.post(f"{API_BASE}/auth/register",
+                      json={'username': username, 'password': 'testpass123'}, timeout=10)
+    r.raise_for_status()
+    HEADERS['Authorization'] = f"Bearer {r.json()['token']}"
+
+
+def create(path, body):
+    r = requests.post(f"{API_BASE}/{path}", headers=HEADERS, json=body, timeout=10)
+    r.raise_for_status()
+    return r.json()
+
+
+def measure(method, path, body_for, repeat):
+    trips, timings = [], []
+    for i in range(repeat):
+        started = time.perf_counter()
+        r = requests.request(method, f"{API_BASE}/{path}", headers=HEADERS,
+                             json=body_for(i) if body_for else None, timeout=10)
+        timings.append((time.perf_counter() - started) * 1000)
+        r.raise_for_status()
+        header = r.headers.get('X-DB-Round-Trips')
+        if header is None:
+            raise SystemExit("No X-DB-Round-Trips header; start the server with DB_ROUND_TRIP_HEADER=1")
+        trips.append(int(header))
+    return max(trips), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max', type=int, default=1, help='round-trip budget per request')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("DATABASE ROUND-TRIP BENCHMARK")
+    print("="*80)
+
+    register()
+    meal = create('meals', {'title': 'Round-trip meal', 'ingredients': '2 eggs\n1 cup milk',
+                            'instructions': 'Whisk and cook.'})
+    pantry = create('pantry', {'name': 'Eggs', 'quantity': 6})
+    shopping = create('shopping-list', {'name': 'Milk'})
+
+    cases = [
+        ('GET meals/:id', 'GET', f"meals/{meal['id']}", None),
+        ('PUT meals/:id', 'PUT', f"meals/{meal['id']}", lambda i: {'title': f"Round-trip meal {i}"}),
+        ('PUT pantry/:id', 'PUT', f"pantry/{pantry['id']}", lambda i: {'quantity': i + 1}),
+        ('PUT shopping-list/:id', 'PUT', f"shopping-list/{shopping['id']}", lambda i: {'checked': i % 2 == 0}),
+    ]
+
+    print(f"\n{'request':<24}{'before':>8}{'after':>8}{'p50 ms':>10}")
+    over = []
+    before_total = after_total = 0
+    for name, method, path, body_for in cases:
+        trips, p50 = measure(method, path, body_for, args.repeat)
+        before_total += BEFORE[name]
+        after_total += trips
+        if trips > args.max:
+            over.append(name)
+        print(f"{name:<24}{BEFORE[name]:>8}{trips:>8}{p50:>10.1f}")
+    print(f"{'total':<24}{before_total:>8}{after_total:>8}")
+
+    if over:
+        print(f"\n❌ FAIL: more than {args.max} round trip(s) for {', '.join(over)}")
+        return 1
+    print(f"\n✅ PASS: every request within {args.max} round trip(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+Soak Test With Leak Detection
+Drives mixed API traffic against one server for hours and watches its
+memory and event loop for slow growth that short benchmarks never see.
+
+Start the server with the debug endpoints on (lib/runtime-stats.js) and,
+ideally, --expose-gc so every sample is taken right after a full GC:
+
+    export DEBUG_RUNTIME_TOKEN=$(openssl rand -hex 32)
+    DEBUG_RUNTIME=1 RATE_LIMIT_DISABLED=1 NODE_OPTIONS=--expose-gc yarn start
+    python tests/bench_soak.py --duration 4h
+    python tests/bench_soak.py --duration 30m --interval 15 --rps 50 --snapshots
+    python tests/bench_soak.py --analyse soak-20300101-120000/     # offline, no server
+
+Traffic: --workers threads share --rps across a weighted mix on a few
+seeded users: planner weeks (bootstrap, meal plans, bulk copy/clear),
+meal list / detail / create / delete, pantry and shopping-list CRUD,
+named scans (no upstream lookups), logins, and unauthenticated 401s.
+
+Every --interval seconds GET /api/debug/runtime records RSS, heapUsed,
+old-space, external memory, event-loop lag p99 and the sizes of the
+module-level caches and queues. Samples go to <out>/samples.ndjson as
+they arrive, so a run cut short can still be analysed.
+
+After --warmup (default 10% of the run, JIT and caches settling), each
+series gets:
+1. Mann-Kendall trend test: is it monotonically increasing? (p < --alpha)
+2. Theil-Sen slope: by how much per hour? (robust to GC sawtooth)
+A series is a LEAK when both the test is significant and the slope is
+over its budget (--rss-mb-per-hour, --heap-mb-per-hour, --lag-ms-per-hour;
+cache sizes are reported, not judged: they grow until their cap).
+
+With --snapshots, heap snapshots are taken after the warmup and at the
+end, and diffed by constructor: the top growers by retained-by-self
+bytes, each with its most common retainers (which object and field
+holds them), which is usually enough to find the Map that never shrinks.
+
+Exit codes: 0 = no leak, 1 = leak flagged, 2 = server or debug endpoint
+unavailable.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import requests
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'http://localhost:3000')
+API_BASE = f"{BASE_URL}/api"
+PASSWORD = 'testpass123'
+# Operator token for the debug endpoints; must match the server's.
+DEBUG_HEADERS = {'X-Debug-Token': os.getenv('DEBUG_RUNTIME_TOKEN', '')}
+
+SEED_USERS = 4
+MB = 1024 * 1024
+# Mann-Kendall and Theil-Sen are O(n²); longer series are thinned evenly.
+MAX_TREND_POINTS = 400
+TOP_GROWERS = 15
+TOP_RETAINERS = 3
+
+# (label, sample path, unit divisor, budget arg) — budget None: report only.
+SERIES = [
+    ('rss', ('memory', 'rss'), MB, 'rss_mb_per_hour'),
+    ('heapUsed', ('memory', 'heapUsed'), MB, 'heap_mb_per_hour'),
+    ('oldSpace', ('spaces', 'old_space'), MB, 'heap_mb_per_hour'),
+    ('external', ('memory', 'external'), MB, 'heap_mb_per_hour'),
+    ('lagP99', ('eventLoopLag', 'p99Ms'), 1, 'lag_ms_per_hour'),
+    ('detachedContexts', ('heap', 'detachedContexts'), 1, None),
+    ('collectionCache', ('state', 'collectionCacheEntries'), 1, None),
+    ('suggestionCache', ('state', 'suggestionCacheEntries'), 1, None),
+    ('rateLimitKeys', ('state', 'rateLimitKeys'), 1, None),
+]
+
+
+def print_result(passed, message):
+    status = "✅ PASS" if passed else "❌ FAIL"
+    print(f"{status}: {message}")
+
+
+def parse_duration(text):
+    """'90' → 90 s, '30m' → 1800 s, '4h' → 14400 s."""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smh]?)', text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"bad duration {text!r}; use e.g. 90, 30m, 4h")
+    return float(match.group(1)) * {'': 1, 's': 1, 'm': 60, 'h': 3600}[match.group(2)]
+
+
+# -------------------------------------------------------------------------
+# Traffic
+# -------------------------------------------------------------------------
+
+class SoakUser:
+    def __init__(self, session):
+        self.session = session
+        self.username = f"soak_{uuid.uuid4().hex[:10]}"
+        r = session.post(f"{API_BASE}/auth/register",
+                         json={'username': self.username, 'password': PASSWORD}, timeout=30)
+        r.raise_for_status()
+        self.headers = {'Authorization': f"Bearer {r.json()['token']}"}
+        self.meal_id = self.post('meals', {'title': 'Soak meal', 'ingredients': '2 eggs\n1 cup milk\n1 onion',
+                                           'instructions': 'Whisk and cook.'})['id']
+
+    def post(self, path, body):
+        r = self.session.post(f"{API_BASE}/{path}", headers=self.headers, json=body, timeout=30)
+        r.raise_for_status()
+        return r.json()
+
+
+def monday(offset_weeks=0):
+    today = date.today()
+    return today - timedelta(days=today.weekday()) + timedelta(weeks=offset_weeks)
+
+
+def far_week():
+    """A Monday in 2031, so bulk writes never touch weeks anyone looks at."""
+    return (date(2031, 1, 6) + timedelta(weeks=random.randrange(50))).isoformat()
+
+
+def scenario_week(s, u):
+    week = monday(random.randint(-4, 4)).isoformat()
+    return s.get(f"{API_BASE}/bootstrap", params={'week': week, 'include': 'plans'}, headers=u.headers, timeout=30)
+
+
+def scenario_bootstrap(s, u):
+    return s.get(f"{API_BASE}/bootstrap", params={'week': monday().isoformat()}, headers=u.headers, timeout=30)
+
+
+def scenario_meal_plans(s, u):
+    start = monday(random.randint(-2, 2))
+    return s.get(f"{API_BASE}/meal-plans", headers=u.headers, timeout=30, params={
+        'startDate': start.isoformat(), 'endDate': (start + timedelta(days=6)).isoformat()})
+
+
+def scenario_plan_bulk(s, u):
+    start = far_week()
+    if random.random() < 0.5:
+        return s.post(f"{API_BASE}/meal-plans/bulk", headers=u.headers, timeout=30, json={
+            'op': 'apply-template', 'start': start, 'onConflict': 'replace',
+            'slots': [{'day': d, 'mealType': 'dinner', 'mealId': u.meal_id} for d in range(7)]})
+    end = (date.fromisoformat(start) + timedelta(days=6)).isoformat()
+    return s.post(f"{API_BASE}/meal-plans/bulk", headers=u.headers, timeout=30,
+                  json={'op': 'clear-range', 'start': start, 'end': end})
+
+
+def scenario_meals(s, u):
+    return s.get(f"{API_BASE}/meals", params={'limit': 20}, timeout=30)
+
+
+def scenario_meal_detail(s, u):
+    return s.get(f"{API_BASE}/meals/{u.meal_id}", timeout=30)
+
+
+def scenario_meal_churn(s, u):
+    r = s.post(f"{API_BASE}/meals", headers=u.headers, timeout=30, json={
+        'title': f"Soak churn {uuid.uuid4().hex[:6]}", 'ingredients': '200g rice\n1 tbsp oil',
+        'instructions': 'Boil.'})
+    if r.status_code != 200:
+        return r
+    return s.delete(f"{API_BASE}/meals/{r.json()['id']}", headers=u.headers, timeout=30)
+
+
+def scenario_pantry(s, u):
+    r = s.post(f"{API_BASE}/pantry", headers=u.headers, timeout=30,
+               json={'name': f"Soak item {random.randrange(1000)}", 'quantity': random.randint(1, 9)})
+    if r.status_code != 200:
+        return r
+    item_id = r.json()['id']
+    s.put(f"{API_BASE}/pantry/{item_id}", headers=u.headers, json={'quantity': 1}, timeout=30)
+    s.get(f"{API_BASE}/pantry", headers=u.headers, timeout=30)
+    return s.delete(f"{API_BASE}/pantry/{item_id}", headers=u.headers, timeout=30)
+
+
+def scenario_shopping(s, u):
+    r = s.post(f"{API_BASE}/shopping-list", headers=u.headers, timeout=30,
+               json={'name': f"Soak milk {random.randrange(1000)}"})
+    if r.status_code != 200:
+        return r
+    item_id = r.json()['id']
+    s.put(f"{API_BASE}/shopping-list/{item_id}", headers=u.headers, json={'checked': True}, timeout=30)
+    return s.delete(f"{API_BASE}/shopping-list/{item_id}", headers=u.headers, timeout=30)
+
+
+def scenario_scan(s, u):
+    # `name` given: matched by trigram against the list, no upstream lookup.
+    code = ''.join(random.choice('0123456789') for _ in range(13))
+    return s.post(f"{API_BASE}/shopping-list/scan", headers=u.headers, timeout=30,
+                  json={'code': code, 'name': 'Soak milk'})
+
+
+def scenario_login(s, u):
+    return s.post(f"{API_BASE}/auth/login", json={'username': u.username, 'password': PASSWORD}, timeout=30)
+
+
+def scenario_unauthorised(s, u):
+    return s.get(f"{API_BASE}/pantry", timeout=30)
+
+
+MIX = [
+    (scenario_week, 20),
+    (scenario_bootstrap, 8),
+    (scenario_meal_plans, 8),
+    (scenario_plan_bulk, 4),
+    (scenario_meals, 12),
+    (scenario_meal_detail, 10),
+    (scenario_meal_churn, 3),
+    (scenario_pantry, 8),
+    (scenario_shopping, 8),
+    (scenario_scan, 12),
+    (scenario_login, 1),
+    (scenario_unauthorised, 6),
+]
+
+
+class Traffic:
+    def __init__(self, users, workers, rps):
+        self.users = users
+        self.workers = workers
+        self.interval = workers / rps
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.threads = []
+
+    def worker(self):
+        session = requests.Session()
+        scenarios, weights = zip(*MIX)
+        # Stagger so the workers don't fire in lockstep.
+        next_at = time.perf_counter() + random.random() * self.interval
+        while not self.stop.is_set():
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                self.stop.wait(delay)
+            next_at += self.interval
+            scenario = random.choices(scenarios, weights)[0]
+            try:
+                r = scenario(session, random.choice(self.users))
+                outcome = 'ok' if r.status_code < 500 else f"http {r.status_code}"
+            except requests.RequestException as error:
+                outcome = type(error).__name__
+            with self.lock:
+                self.counts[(scenario.__name__[len('scenario_'):], outcome)] += 1
+
+    def start(self):
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self.worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def finish(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join(timeout=60)
+
+
+# -------------------------------------------------------------------------
+# Samples and trends
+# -------------------------------------------------------------------------
+
+def take_sample(headers, gc):
+    r = requests.get(f"{API_BASE}/debug/runtime", params={'gc': '1'} if gc else None,
+                     headers=headers, timeout=60)
+    r.raise_for_status()
+    return r.json()
+
+
+def take_snapshot(headers, path):
+    started = time.perf_counter()
+    with requests.get(f"{API_BASE}/debug/heap-snapshot", headers=headers, stream=True, timeout=600) as r:
+        r.raise_for_status()
+        with open(path, 'wb') as f:
+            for chunk in r.iter_content(1024 * 1024):
+                f.write(chunk)
+    print(f"heap snapshot → {path} ({path.stat().st_size / MB:.0f} MiB, {time.perf_counter() - started:.0f}s)")
+
+
+def dig(sample, keys):
+    for key in keys:
+        if not isinstance(sample, dict) or key not in sample:
+            return None
+        sample = sample[key]
+    return sample
+
+
+def thin(points, limit=MAX_TREND_POINTS):
+    if len(points) <= limit:
+        return points
+    step = len(points) / limit
+    return [points[int(i * step)] for i in range(limit)]
+
+
+def mann_kendall(values):
+    """(S, two-sided p) for a monotonic trend; ties handled in the variance."""
+    n = len(values)
+    s = sum((values[j] > values[i]) - (values[j] < values[i]) for i in range(n - 1) for j in range(i + 1, n))
+    ties = Counter(values).values()
+    var = (n * (n - 1) * (2 * n + 5) - sum(t * (t - 1) * (2 * t + 5) for t in ties)) / 18
+    if var <= 0:
+        return s, 1.0
+    z = (s - (s > 0) + (s < 0)) / math.sqrt(var)
+    return s, math.erfc(abs(z) / math.sqrt(2))
+
+
+def theil_sen(points):
+    """Median pairwise slope of [(hours, value)] in value per hour."""
+    slopes = [(y2 - y1) / (x2 - x1) for i, (x1, y1) in enumerate(points) for x2, y2 in points[i + 1:] if x2 != x1]
+    return statistics.median(slopes) if slopes else 0.0
+
+
+def analyse_trends(samples, warmup_s, args):
+    start_ts = samples[0]['ts']
+    steady = [s for s in samples if (s['ts'] - start_ts) / 1000 >= warmup_s]
+    print(f"\ntrend over {len(steady)} samples after a {warmup_s / 60:.0f} min warmup (α = {args.alpha})")
+    if len(steady) < 8:
+        print("too few samples for a trend test; run longer or sample more often")
+        return {}, []
+
+    print(f"{'series':<20}{'first':>10}{'last':>10}{'slope/h':>11}{'budget/h':>10}{'p':>10}  verdict")
+    results, leaks = {}, []
+    for label, keys, divisor, budget_arg in SERIES:
+        points = [((s['ts'] - start_ts) / 3600000, dig(s, keys) / divisor)
+                  for s in steady if dig(s, keys) is not None]
+        if len(points) < 8:
+            continue
+        points = thin(points)
+        _, p = mann_kendall([v for _, v in points])
+        slope = theil_sen(points)
+        budget = getattr(args, budget_arg) if budget_arg else None
+        leak = budget is not None and p < args.alpha and slope > budget
+        verdict = 'LEAK' if leak else ('growing' if p < args.alpha and slope > 0 else 'flat')
+        if leak:
+            leaks.append(label)
+        results[label] = {'first': points[0][1], 'last': points[-1][1], 'slopePerHour': slope,
+                          'budgetPerHour': budget, 'p': p, 'verdict': verdict}
+        print(f"{label:<20}{points[0][1]:>10.1f}{points[-1][1]:>10.1f}{slope:>+11.2f}"
+              f"{budget if budget is not None else '-':>10}{p:>10.1e}  {verdict}")
+    return results, leaks
+
+
+# -------------------------------------------------------------------------
+# Heap snapshot diff
+# -------------------------------------------------------------------------
+
+class HeapSnapshot:
+    """Per-constructor totals and retainers from a V8 .heapsnapshot."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        meta = data['snapshot']['meta']
+        self.strings = data['strings']
+        self.nodes = data['nodes']
+        self.edges = data['edges']
+        self.node_fields = len(meta['node_fields'])
+        self.edge_fields = len(meta['edge_fields'])
+        self.node_types = meta['node_types'][0]
+        self.edge_types = meta['edge_types'][0]
+        nf = meta['node_fields']
+        self.f_type, self.f_name = nf.index('type'), nf.index('name')
+        self.f_size, self.f_edges = nf.index('self_size'), nf.index('edge_count')
+        ef = meta['edge_fields']
+        self.e_type, self.e_name, self.e_to = ef.index('type'), ef.index('name_or_index'), ef.index('to_node')
+
+    def label(self, node):
+        kind = self.node_types[self.nodes[node + self.f_type]]
+        name = self.strings[self.nodes[node + self.f_name]]
+        if kind in ('object', 'closure', 'native'):
+            return name if kind == 'object' else f"{name} ({kind})"
+        return f"({kind})"
+
+    def totals(self):
+        """label → [count, self bytes]"""
+        out = defaultdict(lambda: [0, 0])
+        for node in range(0, len(self.nodes), self.node_fields):
+            entry = out[self.label(node)]
+            entry[0] += 1
+            entry[1] += self.nodes[node + self.f_size]
+        return out
+
+    def retainers(self, labels):
+        """label → Counter of 'Retainer.field' holding nodes with that label (weak edges skipped)."""
+        wanted = set(labels)
+        out = defaultdict(Counter)
+        edge = 0
+        for node in range(0, len(self.nodes), self.node_fields):
+            for _ in range(self.nodes[node + self.f_edges]):
+                kind = self.edge_types[self.edges[edge + self.e_type]]
+                to = self.edges[edge + self.e_to]
+                edge += self.edge_fields
+                if kind == 'weak':
+                    continue
+                target = self.label(to)
+                if target in wanted:
+                    name = self.edges[edge - self.edge_fields + self.e_name]
+                    field = '[]' if kind in ('element', 'hidden') else f".{self.strings[name]}"
+                    if field[1:].isdigit():
+                        field = '[]'  # slots of a Map / Set backing store
+                    out[target][f"{self.label(node)}{field}"] += 1
+        return out
+
+
+def diff_snapshots(before_path, after_path):
+    print(f"\nheap diff: {before_path.name} → {after_path.name}")
+    before = HeapSnapshot(before_path).totals()
+    after_snapshot = HeapSnapshot(after_path)
+    after = after_snapshot.totals()
+    growth = sorted(((label, after[label][0] - before.get(label, [0, 0])[0],
+                      after[label][1] - before.get(label, [0, 0])[1]) for label in after),
+                    key=lambda row: -row[2])[:TOP_GROWERS]
+    growth = [row for row in growth if row[2] > 0]
+    if not growth:
+        print("nothing grew")
+        return []
+    retainers = after_snapshot.retainers([label for label, _, _ in growth[:5]])
+    print(f"{'constructor':<44}{'+count':>10}{'+KiB':>10}  top retainers")
+    rows = []
+    for label, count, size in growth:
+        top = retainers.get(label, Counter()).most_common(TOP_RETAINERS)
+        print(f"{label[:43]:<44}{count:>+10}{size / 1024:>+10.0f}  "
+              + ', '.join(f"{name[:40]} ×{n}" for name, n in top))
+        rows.append({'constructor': label, 'countDelta': count, 'bytesDelta': size,
+                     'retainers': [{'retainer': name, 'count': n} for name, n in top]})
+    return rows
+
+
+# -------------------------------------------------------------------------
+
+def analyse(out, warmup_s, args):
+    samples = [json.loads(line) for line in open(out / 'samples.ndjson') if line.strip()]
+    if not samples:
+        print("no samples")
+        return 2
+    trends, leaks = analyse_trends(samples, warmup_s, args)
+    snapshots = sorted(out.glob('*.heapsnapshot'))
+    heap_diff = diff_snapshots(snapshots[0], snapshots[-1]) if len(snapshots) >= 2 else []
+    with open(out / 'report.json', 'w') as f:
+        json.dump({'samples': len(samples), 'warmupS': warmup_s, 'trends': trends, 'leaks': leaks,
+                   'heapDiff': heap_diff}, f, indent=2)
+
+    print()
+    print_result(not leaks, "no series growing past its budget" + (f" (leaking: {', '.join(leaks)})" if leaks else ''))
+    if samples and not samples[-1].get('gcAvailable'):
+        print("note: server without --expose-gc; samples include uncollected garbage, expect more noise")
+    return 1 if leaks else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=parse_duration, default=parse_duration('2h'))
+    parser.add_argument('--interval', type=parse_duration, default=60.0, help='seconds between samples')
+    parser.add_argument('--warmup', type=parse_duration, help='ignored by the trend test (default 10%% of --duration)')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rps', type=float, default=20.0, help='total request rate across workers')
+    parser.add_argument('--snapshots', action='store_true', help='heap snapshots after warmup and at the end')
+    parser.add_argument('--no-gc', action='store_true', help="don't ask the server to GC before each sample")
+    parser.add_argument('--alpha', type=float, default=0.01)
+    parser.add_argument('--rss-mb-per-hour', type=float, default=20.0)
+    parser.add_argument('--heap-mb-per-hour', type=float, default=5.0)
+    parser.add_argument('--lag-ms-per-hour', type=float, default=5.0)
+    parser.add_argument('--out', type=Path, help='output directory (default soak-<timestamp>/)')
+    parser.add_argument('--analyse', type=Path, metavar='DIR', help='re-analyse a finished run, no server')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SOAK TEST")
+    print("="*80)
+
+    warmup_s = args.warmup if args.warmup is not None else args.duration * 0.1
+    if args.analyse:
+        return analyse(args.analyse, warmup_s, args)
+
+    out = args.out or Path(f"soak-{datetime.now():%Y%m%d-%H%M%S}")
+    out.mkdir(parents=True, exist_ok=True)
+
+    session = requests.Session()
+    try:
+        users = [SoakUser(session) for _ in range(SEED_USERS)]
+        take_sample(DEBUG_HEADERS, gc=False)
+    except requests.RequestException as error:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        hint = {
+            404: ' (start the server with DEBUG_RUNTIME=1 and DEBUG_RUNTIME_TOKEN)',
+            401: " (export the server's DEBUG_RUNTIME_TOKEN here too)",
+        }.get(status, '')
+        print(f"Server or debug endpoint unavailable: {error}{hint}")
+        return 2
+    headers = DEBUG_HEADERS
+
+    print(f"{args.duration / 3600:.2f} h at {args.rps:g} req/s over {args.workers} workers, "
+          f"sample every {args.interval:g}s, warmup {warmup_s / 60:.0f} min → {out}/")
+    traffic = Traffic(users, args.workers, args.rps)
+    traffic.start()
+
+    started = time.monotonic()
+    warm_snapshot_taken = False
+    with open(out / 'samples.ndjson', 'a') as samples_file:
+        while True:
+            elapsed = time.monotonic() - started
+            try:
+                sample = take_sample(headers, gc=not args.no_gc)
+                samples_file.write(json.dumps(sample) + '\n')
+                samples_file.flush()
+                print(f"\r{elapsed / 60:6.1f} min  rss {sample['memory']['rss'] / MB:7.1f} MiB  "
+                      f"heap {sample['memory']['heapUsed'] / MB:7.1f} MiB  "
+                      f"lag p99 {sample['eventLoopLag']['p99Ms']} ms  "
+                      f"requests {sum(traffic.counts.values())}", end='', flush=True)
+            except requests.RequestException as error:
+                print(f"\nsample failed: {error}")
+            if args.snapshots and not warm_snapshot_taken and elapsed >= warmup_s:
+                print()
+                take_snapshot(headers, out / '1-warm.heapsnapshot')
+                warm_snapshot_taken = True
+            if elapsed >= args.duration:
+                break
+            time.sleep(min(args.interval, args.duration - elapsed))
+    print()
+
+    traffic.finish()
+    if args.snapshots:
+        take_snapshot(headers, out / '2-end.heapsnapshot')
+
+    errors = {key: n for key, n in traffic.counts.items() if key[1] != 'ok'}
+    total = sum(traffic.counts.values())
+    print(f"\nrequests: {total}, errors: {sum(errors.values())}"
+          + (f" {dict((f'{k[0]}: {k[1]}', n) for k, n in errors.items())}" if errors else ''))
+    return analyse(out, warmup_s, args)
+
+
+if __name__ == '__main__':
+    exit(main())
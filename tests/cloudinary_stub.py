@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Cloudinary upload API.
+
+Answers the upload call lib/image-upload.js makes when the server runs
+with CLOUDINARY_UPLOAD_PREFIX pointed here, and serves the eager
+placeholder image it then fetches:
+
+  POST /v1_1/<cloud>/image/upload
+      → {"public_id", "secure_url", "width", "height", "eager": [...]}
+  GET  /placeholder.jpg
+      → a few JPEG bytes
+
+Each upload is held open for `upload_delay` seconds so concurrent
+requests overlap. The app names every upload `meal-<userId>-<ms>`, so
+uploads are recorded per user and parallel pytest workers (each using
+its own fresh users) can share one stub:
+
+  GET  /__stub/uploads?user=<userId>
+      → [{"user", "public_id", "at"}, ...] in arrival order
+
+Point the dev server at it:
+
+    CLOUDINARY_UPLOAD_PREFIX=http://127.0.0.1:8765 \\
+    NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME=stub \\
+    CLOUDINARY_API_KEY=stub CLOUDINARY_API_SECRET=stub \\
+    yarn dev
+
+Run standalone with `python tests/cloudinary_stub.py --port 8765`, or
+import `start_cloudinary_stub()` to run it in-process (tests/conftest.py
+does this once per pytest session).
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+# Starts with the JPEG SOI/EOI markers; nobody decodes it.
+PLACEHOLDER_JPEG = b"\xff\xd8\xff\xe0forkcast-stub-placeholder\xff\xd9"
+
+UPLOAD_NAME = re.compile(rb"meal-([0-9a-fA-F-]{36})-\d+")
+
+
+def make_handler(port, upload_delay, state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/__stub/uploads':
+                user = parse_qs(url.query).get('user', [None])[0]
+                with state['lock']:
+                    seen = [u for u in state['uploads'] if user is None or u['user'] == user]
+                return self._json(200, seen)
+            if url.path == '/placeholder.jpg':
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(PLACEHOLDER_JPEG)))
+                self.end_headers()
+                self.wfile.write(PLACEHOLDER_JPEG)
+                return
+            return self._json(404, {'error': 'unknown path'})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length)
+            if not urlparse(self.path).path.endswith('/image/upload'):
+                return self._json(404, {'error': {'message': 'unknown endpoint'}})
+
+            name = UPLOAD_NAME.search(body)
+            with state['lock']:
+                n = len(state['uploads']) + 1
+                public_id = f"forkcast/meals/{name.group(0).decode() if name else f'stub-{n}'}"
+                state['uploads'].append({
+                    'user': name.group(1).decode() if name else None,
+                    'public_id': public_id,
+                    'at': time.time(),
+                })
+            time.sleep(upload_delay)
+            return self._json(200, {
+                'public_id': public_id,
+                'secure_url': f"https://res.cloudinary.com/stub/image/upload/v1/{public_id}.jpg",
+                'width': 1,
+                'height': 1,
+                'eager': [{'secure_url': f"http://127.0.0.1:{port}/placeholder.jpg"}],
+            })
+
+        def _json(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+class CloudinaryStubClient:
+    """Talks to a running stub over its control API (works from any process)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def uploads_for(self, user_id):
+        r = requests.get(f"{self.base_url}/__stub/uploads", params={'user': user_id}, timeout=5)
+        r.raise_for_status()
+        return r.json()
+
+    def is_up(self):
+        try:
+            return requests.get(f"{self.base_url}/__stub/uploads", params={'user': '-'}, timeout=1).ok
+        except requests.RequestException:
+            return False
+
+
+class CloudinaryStub(CloudinaryStubClient):
+    """In-process stub server."""
+
+    def __init__(self, server, port):
+        super().__init__(f"http://127.0.0.1:{port}")
+        self.server = server
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+def start_cloudinary_stub(port=8765, upload_delay=0.5):
+    state = {'lock': threading.Lock(), 'uploads': []}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(port, upload_delay, state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return CloudinaryStub(server, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upload-delay", type=float, default=0.5, help="seconds each upload is held open")
+    args = parser.parse_args()
+    stub = start_cloudinary_stub(args.port, args.upload_delay)
+    print(f"Cloudinary stub listening on {stub.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
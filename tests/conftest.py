@@ -0,0 +1,310 @@
+"""
+Shared pytest fixtures for the API suite.
+
+The suite talks to a running Forkcast server (`yarn dev`) and never to
+the real barcode databases. Start the server pointed at the barcode
+stub, then run pytest in parallel:
+
+    BARCODE_UPSTREAM_URL=http://127.0.0.1:8767 \
+    EMERGENT_LLM_KEY=stub EMERGENT_LLM_BASE_URL=http://127.0.0.1:8766/v1 \
+    CLOUDINARY_UPLOAD_PREFIX=http://127.0.0.1:8765 NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME=stub \
+    CLOUDINARY_API_KEY=stub CLOUDINARY_API_SECRET=stub yarn dev
+    pytest -n auto
+
+The stubs (tests/barcode_stub.py, tests/llm_stub.py,
+tests/cloudinary_stub.py) are started once per session by the xdist
+controller (or the single process without -n). Workers reach them over
+their control APIs, so every test uses its own random barcodes, prompt
+markers or users and parallel tests never share upstream state.
+
+If the server is down, every test is skipped. Tests marked `db` also
+skip when /api/health reports the database unreachable. Barcode, LLM
+and upload tests skip when the server isn't using their stub, and
+rate-limit tests when it wasn't started with RATE_LIMIT_TEST_POLICIES. A skip means that part
+was not checked, not that it passed.
+
+Environment:
+  NEXT_PUBLIC_BASE_URL   server under test (default http://localhost:3000)
+  BARCODE_STUB_PORT      stub port (default 8767)
+  LLM_STUB_PORT          LLM stub port (default 8766)
+  CLOUDINARY_STUB_PORT   Cloudinary stub port (default 8765)
+  SUPABASE_STANDIN_URL   tests/supabase_standin.py, if the server uses it
+                         (default http://127.0.0.1:54321)
+  JWT_SECRET             must match the server's (default: lib/auth.js dev fallback)
+"""
+
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+import requests
+
+try:
+    from tests.barcode_stub import BarcodeStubClient, start_barcode_stub
+    from tests.cloudinary_stub import CloudinaryStubClient, start_cloudinary_stub
+    from tests.llm_stub import LLMStubClient, start_llm_stub
+    from tests.supabase_standin import StandinClient
+except ImportError:  # rootdir is tests/
+    from barcode_stub import BarcodeStubClient, start_barcode_stub
+    from cloudinary_stub import CloudinaryStubClient, start_cloudinary_stub
+    from llm_stub import LLMStubClient, start_llm_stub
+    from supabase_standin import StandinClient
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'http://localhost:3000')
+JWT_SECRET = os.getenv('JWT_SECRET', 'dev-only-insecure-secret-do-not-use-in-prod')
+STUB_PORT = int(os.getenv('BARCODE_STUB_PORT', '8767'))
+LLM_STUB_PORT = int(os.getenv('LLM_STUB_PORT', '8766'))
+CLOUDINARY_STUB_PORT = int(os.getenv('CLOUDINARY_STUB_PORT', '8765'))
+STANDIN_URL = os.getenv('SUPABASE_STANDIN_URL', 'http://127.0.0.1:54321')
+
+# Small, known limiter policies for tests/test_rate_limit.py. Start the
+# server with RATE_LIMIT_POLICIES set to json.dumps() of this. Only the
+# user buckets bind on barcode-lookup, only the IP bucket on
+# barcode-diagnose.
+RATE_LIMIT_TEST_POLICIES = {
+    'barcode-lookup': {'user': {'burst': 10, 'perMinute': 6}, 'ip': {'burst': 1000, 'perMinute': 1000}},
+    'barcode-diagnose': {'user': {'burst': 1000, 'perMinute': 1000}, 'ip': {'burst': 5, 'perMinute': 1}},
+}
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'db: needs a reachable database behind the server')
+    config.addinivalue_line('markers', 'barcode_stub: needs the server pointed at tests/barcode_stub.py')
+    config.addinivalue_line('markers', 'llm_stub: needs the server pointed at tests/llm_stub.py')
+    config.addinivalue_line('markers', 'cloudinary_stub: needs the server pointed at tests/cloudinary_stub.py')
+    config.addinivalue_line('markers', 'standin: needs the server pointed at tests/supabase_standin.py')
+    config.addinivalue_line('markers', 'rate_limit: needs the server started with RATE_LIMIT_TEST_POLICIES')
+    is_worker = hasattr(config, 'workerinput')
+    if not is_worker and not BarcodeStubClient(f"http://127.0.0.1:{STUB_PORT}").is_up():
+        config._barcode_stub = start_barcode_stub(STUB_PORT)
+    if not is_worker and not LLMStubClient(f"http://127.0.0.1:{LLM_STUB_PORT}").is_up():
+        config._llm_stub = start_llm_stub(LLM_STUB_PORT)
+    if not is_worker and not CloudinaryStubClient(f"http://127.0.0.1:{CLOUDINARY_STUB_PORT}").is_up():
+        config._cloudinary_stub = start_cloudinary_stub(CLOUDINARY_STUB_PORT)
+
+
+def pytest_unconfigure(config):
+    for name in ('_barcode_stub', '_llm_stub', '_cloudinary_stub'):
+        stub = getattr(config, name, None)
+        if stub:
+            stub.shutdown()
+
+
+# -------------------------------------------------------------------------
+# Server + auth
+# -------------------------------------------------------------------------
+
+@pytest.fixture(scope='session')
+def health():
+    try:
+        r = requests.get(f"{BASE_URL}/api/health", timeout=5)
+        return r.json()
+    except (requests.RequestException, ValueError):
+        pytest.skip(f"Forkcast server not reachable at {BASE_URL}")
+
+
+@pytest.fixture(scope='session')
+def api_base(health):
+    return f"{BASE_URL}/api"
+
+
+@pytest.fixture(autouse=True)
+def _db_marker(request):
+    if request.node.get_closest_marker('db'):
+        if request.getfixturevalue('health').get('db') != 'ok':
+            pytest.skip('database behind the server is unavailable')
+
+
+@pytest.fixture(scope='session')
+def mint_token():
+    """mint_token(user_id=None, username=None) → dev JWT the server accepts."""
+    def mint(user_id=None, username=None):
+        user_id = user_id or str(uuid.uuid4())
+        payload = {
+            'userId': user_id,
+            'username': username or f"test_{user_id[:8]}",
+            'exp': datetime.utcnow() + timedelta(days=1),
+        }
+        return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
+    return mint
+
+
+@pytest.fixture
+def auth_headers(mint_token):
+    """Headers for a token-only user (no row in `users`; fine for guard/validation tests)."""
+    return {'Authorization': f"Bearer {mint_token()}"}
+
+
+@pytest.fixture
+def writer_headers(request, health, auth_headers):
+    """Headers for tests whose writes reach the database layer.
+
+    With a database, a real user (registered_user): rows reference
+    users(id), so a token-only user's insert breaks the foreign key.
+    Without one, the minted token is enough to get past validation.
+    """
+    if health.get('db') == 'ok':
+        return request.getfixturevalue('registered_user')['headers']
+    return auth_headers
+
+
+@pytest.fixture
+def registered_user(api_base):
+    """A fresh real user: {'id', 'username', 'token', 'headers'}."""
+    username = f"pytest_{uuid.uuid4().hex[:10]}"
+    r = requests.post(f"{api_base}/auth/register",
+                      json={'username': username, 'password': 'testpass123'}, timeout=30)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    return {
+        'id': body['user']['id'],
+        'username': username,
+        'token': body['token'],
+        'headers': {'Authorization': f"Bearer {body['token']}"},
+    }
+
+
+@pytest.fixture
+def seeded_meal(api_base, registered_user):
+    """A meal owned by `registered_user`."""
+    r = requests.post(f"{api_base}/meals", headers=registered_user['headers'], json={
+        'title': 'Test Meal for Update',
+        'ingredients': 'Original ingredients list',
+        'instructions': 'Original cooking instructions',
+    }, timeout=10)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+# -------------------------------------------------------------------------
+# Barcode stub
+# -------------------------------------------------------------------------
+
+@pytest.fixture(scope='session')
+def barcode_stub(api_base, mint_token):
+    """Client for the session's barcode stub; skips unless the server uses it."""
+    stub = BarcodeStubClient(f"http://127.0.0.1:{STUB_PORT}")
+    if not stub.is_up():
+        pytest.skip(f"barcode stub not running on port {STUB_PORT}")
+    probe = _random_ean13(random.Random())
+    requests.get(f"{api_base}/barcode-lookup", params={'code': probe},
+                 headers={'Authorization': f"Bearer {mint_token()}"}, timeout=30)
+    if not stub.requests_for(probe):
+        pytest.skip(f"server is not using the barcode stub; start it with "
+                    f"BARCODE_UPSTREAM_URL=http://127.0.0.1:{STUB_PORT}")
+    return stub
+
+
+def _random_ean13(rng):
+    # Leading 4–9: never a GS1 in-store (02 / 20–29) or UPC-derived (0) prefix.
+    return str(rng.randint(4, 9)) + ''.join(str(rng.randint(0, 9)) for _ in range(12))
+
+
+@pytest.fixture
+def fresh_barcode():
+    """fresh_barcode(digits=13) → a code no other test (or earlier run's server cache) has used."""
+    rng = random.Random(uuid.uuid4().int)
+
+    def make(digits=13):
+        code = _random_ean13(rng)
+        return code[:digits] if digits < 13 else code
+    return make
+
+
+# -------------------------------------------------------------------------
+# LLM stub
+# -------------------------------------------------------------------------
+
+@pytest.fixture(scope='session')
+def llm_stub(api_base, mint_token):
+    """Client for the session's LLM stub; skips unless the server uses it."""
+    stub = LLMStubClient(f"http://127.0.0.1:{LLM_STUB_PORT}")
+    if not stub.is_up():
+        pytest.skip(f"LLM stub not running on port {LLM_STUB_PORT}")
+    marker = f"probe-{uuid.uuid4().hex}"
+    requests.post(f"{api_base}/meal-suggestions", json={'prompt': marker},
+                  headers={'Authorization': f"Bearer {mint_token()}"}, timeout=30)
+    if not stub.requests_for(marker):
+        pytest.skip(f"server is not using the LLM stub; start it with EMERGENT_LLM_KEY=stub "
+                    f"EMERGENT_LLM_BASE_URL=http://127.0.0.1:{LLM_STUB_PORT}/v1")
+    return stub
+
+
+@pytest.fixture
+def prompt_marker():
+    """A random marker to put in a prompt, so llm_stub.requests_for(marker) sees only this test's calls."""
+    return f"t{uuid.uuid4().hex[:12]}"
+
+
+# -------------------------------------------------------------------------
+# Cloudinary stub
+# -------------------------------------------------------------------------
+
+@pytest.fixture(scope='session')
+def cloudinary_stub(health, api_base, mint_token):
+    """Client for the session's Cloudinary stub; skips unless the server uploads to it."""
+    stub = CloudinaryStubClient(f"http://127.0.0.1:{CLOUDINARY_STUB_PORT}")
+    if health.get('db') != 'ok':
+        # Uploads look up image_assets before they reach Cloudinary.
+        pytest.skip('database behind the server is unavailable')
+    if not stub.is_up():
+        pytest.skip(f"Cloudinary stub not running on port {CLOUDINARY_STUB_PORT}")
+    user_id = str(uuid.uuid4())
+    requests.post(f"{api_base}/upload", headers={'Authorization': f"Bearer {mint_token(user_id)}"},
+                  files={'file': ('probe.jpg', b"\xff\xd8probe" + uuid.uuid4().bytes, 'image/jpeg')},
+                  timeout=30)
+    if not stub.uploads_for(user_id):
+        pytest.skip(f"server is not uploading to the Cloudinary stub; start it with "
+                    f"CLOUDINARY_UPLOAD_PREFIX=http://127.0.0.1:{CLOUDINARY_STUB_PORT} "
+                    f"NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME=stub CLOUDINARY_API_KEY=stub CLOUDINARY_API_SECRET=stub")
+    return stub
+
+
+# -------------------------------------------------------------------------
+# Supabase stand-in
+# -------------------------------------------------------------------------
+
+@pytest.fixture(scope='session')
+def standin(health):
+    """Client for tests/supabase_standin.py; skips unless the server's database is behind it."""
+    client = StandinClient(STANDIN_URL)
+    if not client.is_up():
+        pytest.skip(f"Supabase stand-in not running at {STANDIN_URL}")
+    before = client.stats().get('targets', {})
+    requests.get(f"{BASE_URL}/api/health", timeout=10)
+    after = client.stats().get('targets', {})
+    if sum(t['requests'] for t in after.values()) <= sum(t['requests'] for t in before.values()):
+        pytest.skip(f"server is not using the stand-in; start it with "
+                    f"NEXT_PUBLIC_SUPABASE_URL={STANDIN_URL}")
+    return client
+
+
+# -------------------------------------------------------------------------
+# Rate limiter
+# -------------------------------------------------------------------------
+
+def _policy_header(bucket, scope):
+    # lib/rate-limit.js: "<burst>;w=<seconds to refill>;scope=<scope>"
+    return f"{bucket['burst']};w={round(bucket['burst'] * 60 / bucket['perMinute'])};scope={scope}"
+
+
+@pytest.fixture(scope='session')
+def rate_limit_policies(api_base, mint_token):
+    """RATE_LIMIT_TEST_POLICIES; skips unless the server was started with them."""
+    # A fresh user and a TEST-NET-3 address, so the probe spends nobody's tokens.
+    headers = {'Authorization': f"Bearer {mint_token()}",
+               'X-Forwarded-For': f"203.0.113.{random.randint(1, 254)}"}
+    expected = {
+        'barcode-lookup': _policy_header(RATE_LIMIT_TEST_POLICIES['barcode-lookup']['user'], 'user'),
+        'barcode-diagnose': _policy_header(RATE_LIMIT_TEST_POLICIES['barcode-diagnose']['ip'], 'ip'),
+    }
+    for route, policy in expected.items():
+        r = requests.get(f"{api_base}/{route}", params={'code': 'not-a-barcode'}, headers=headers, timeout=10)
+        if r.headers.get('RateLimit-Policy') != policy:
+            pytest.skip(f"server is not using the test rate-limit policies ({route} sent "
+                        f"RateLimit-Policy: {r.headers.get('RateLimit-Policy')}); start it with "
+                        f"RATE_LIMIT_POLICIES='{json.dumps(RATE_LIMIT_TEST_POLICIES, separators=(',', ':'))}'")
+    return RATE_LIMIT_TEST_POLICIES
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Emergent LLM (OpenAI-compatible) API.
+
+Implements just enough of POST /v1/chat/completions for Forkcast:
+  * non-streaming → {"choices": [{"message": {"content": ...}}]}
+  * "stream": true → text/event-stream of chat.completion.chunk deltas,
+    terminated by `data: [DONE]`
+
+Latency is configurable so tests can tell "first token" from "whole
+response" and so burst tests have something slow to queue behind:
+  --first-token-delay   seconds before the first byte (default 0.3)
+  --token-delay         seconds between streamed tokens (default 0.05)
+
+Requests are recorded and failures injected per MATCH, a substring of
+the prompt (case-insensitive), over a small control API. Parallel
+pytest workers each put their own random marker in their prompts, so
+they can share one stub without stepping on each other:
+
+  POST /__stub/faults     {"match", "statuses": [429, ...], "retry_after": 0.2}
+      The next requests whose prompt contains `match` are answered with
+      `statuses`, one per request, before the normal reply.
+  GET  /__stub/requests?match=<text>
+      → [{"stream", "status", "started", "finished"}, ...] in arrival order
+
+Point the dev server at it:
+
+    EMERGENT_LLM_KEY=stub EMERGENT_LLM_BASE_URL=http://127.0.0.1:8766/v1 yarn dev
+
+Run standalone with `python tests/llm_stub.py --port 8766`, or import
+`start_llm_stub()` to run it in-process (tests/conftest.py does this
+once per pytest session).
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+REPLY = """Here are some meal ideas from the local stub:
+
+1. **Stub Shakshuka**
+   - Description: Eggs poached in a spiced tomato sauce
+   - Key ingredients: Eggs, tomatoes, peppers, cumin
+   - Cooking time: 20 minutes
+   - Difficulty: Easy
+
+2. **Stub Fried Rice**
+   - Description: Day-old rice tossed with whatever is in the fridge
+   - Key ingredients: Rice, eggs, spring onion, soy sauce
+   - Cooking time: 15 minutes
+   - Difficulty: Easy
+"""
+
+
+def make_handler(first_token_delay, token_delay, state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/__stub/requests":
+                return self._json(404, {"error": "unknown control endpoint"})
+            match = parse_qs(url.query).get("match", [""])[0].lower()
+            with state["lock"]:
+                seen = [{k: v for k, v in r.items() if k != "prompt"}
+                        for r in state["requests"] if match in r["prompt"]]
+            return self._json(200, seen)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/__stub/faults":
+                with state["lock"]:
+                    state["faults"].append({
+                        "match": body["match"].lower(),
+                        "statuses": list(body.get("statuses") or []),
+                        "retry_after": body.get("retry_after", 0.2),
+                    })
+                return self._json(200, {"ok": True})
+            if not self.path.endswith("/chat/completions"):
+                return self._json(404, {"error": "unknown upstream"})
+
+            prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", [])).lower()
+            record = {"prompt": prompt, "stream": bool(body.get("stream")), "status": 200,
+                      "started": time.time(), "finished": None}
+            with state["lock"]:
+                fault = next((f for f in state["faults"] if f["statuses"] and f["match"] in prompt), None)
+                if fault:
+                    record["status"] = fault["statuses"].pop(0)
+                state["requests"].append(record)
+            try:
+                if record["status"] != 200:
+                    return self._failed(record["status"], fault["retry_after"])
+                time.sleep(first_token_delay)
+                if record["stream"]:
+                    self._stream()
+                else:
+                    self._complete()
+            finally:
+                record["finished"] = time.time()
+
+        def _failed(self, status, retry_after):
+            payload = json.dumps({"error": {"message": f"Stub {status}"}}).encode()
+            self.send_response(status)
+            self.send_header("Retry-After", str(retry_after))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _complete(self):
+            time.sleep(token_delay * len(REPLY.split(" ")))
+            payload = json.dumps({
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}}],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i, word in enumerate(REPLY.split(" ")):
+                delta = word if i == 0 else " " + word
+                chunk = {
+                    "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {"content": delta}}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(token_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+        def _json(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+class LLMStubClient:
+    """Talks to a running stub over its control API (works from any process)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def fail_next(self, match, statuses, retry_after=0.2):
+        """Answer the next requests whose prompt contains `match` with `statuses` (e.g. [429])."""
+        body = {"match": match, "statuses": statuses, "retry_after": retry_after}
+        requests.post(f"{self.base_url}/__stub/faults", json=body, timeout=5).raise_for_status()
+
+    def requests_for(self, match):
+        r = requests.get(f"{self.base_url}/__stub/requests", params={"match": match}, timeout=5)
+        r.raise_for_status()
+        return r.json()
+
+    def max_in_flight(self, match):
+        """Most matching requests the stub was serving at the same moment."""
+        edges = []
+        for r in self.requests_for(match):
+            edges += [(r["started"], 1), (r["finished"] or float("inf"), -1)]
+        peak = current = 0
+        for _, step in sorted(edges):
+            current += step
+            peak = max(peak, current)
+        return peak
+
+    def is_up(self):
+        try:
+            return requests.get(f"{self.base_url}/__stub/requests", params={"match": "-"}, timeout=1).ok
+        except requests.RequestException:
+            return False
+
+
+class LLMStub(LLMStubClient):
+    """In-process stub server."""
+
+    def __init__(self, server, port):
+        super().__init__(f"http://127.0.0.1:{port}")
+        self.server = server
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+def start_llm_stub(port=8766, first_token_delay=0.3, token_delay=0.05):
+    state = {"lock": threading.Lock(), "faults": [], "requests": []}
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(first_token_delay, token_delay, state)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return LLMStub(server, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    args = parser.parse_args()
+    stub = start_llm_stub(args.port, args.first_token_delay, args.token_delay)
+    print(f"LLM stub listening on {stub.base_url}/v1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,670 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Supabase's REST API, with latency and fault injection.
+
+Without a database every suite stops at the validation layer: requests
+"pass" on `500 Database is unavailable` and no query path is exercised
+or timed. The stand-in is the real thing, run locally:
+
+  * a throwaway Postgres (initdb into a temp dir), or --database-url,
+    loaded with db/schema.sql then db/migrations/*.sql in order, plus
+    the anon / authenticated / service_role roles Supabase provides;
+  * PostgREST in front of it, which is what supabase-js talks to;
+  * a proxy on --port serving /rest/v1/* like a Supabase project URL,
+    which injects faults before forwarding.
+
+With --upstream the first two are skipped and the proxy fronts an
+existing PostgREST instead (e.g. `supabase start`:
+--upstream http://127.0.0.1:54321/rest/v1).
+
+Faults are rules over the control API. A rule applies to requests for
+one `target` (a table, `rpc/<function>`, or `*`), optionally only for
+one `method` and only when `match` occurs in the path, query or body,
+so parallel tests scope their faults to their own user id or barcode:
+
+  POST   /__standin/faults   {"target": "barcode_cache", "match": "<code>",
+                              "latency_ms": 2000, "jitter_ms": 0,
+                              "error_rate": 0.0, "error_status": 503,
+                              "statuses": [503, ...],
+                              "max_concurrent": null, "queue_timeout_ms": 1000}
+      → {"id": "<rule id>"}
+      `statuses` are answered first, one per request (like the barcode
+      stub); `error_rate` then fails that fraction at random. Injected
+      errors carry PostgREST-shaped bodies ({code, message, details,
+      hint}). `max_concurrent` caps in-flight requests for the rule;
+      a request that waits longer than `queue_timeout_ms` for a slot
+      gets 504 PGRST003, as from an exhausted PostgREST pool.
+  GET    /__standin/faults
+  DELETE /__standin/faults[/<id>]
+  PUT    /__standin/limits   {"max_connections": 4, "queue_timeout_ms": 1000}
+      the same cap across all requests (null = unlimited)
+  GET    /__standin/stats    per target: requests, injected errors,
+                             upstream errors, rejections, p50/p95 ms
+  DELETE /__standin/stats
+  POST   /__standin/analyze  refresh planner statistics after seeding
+                             (needs the database, so not with --upstream)
+  GET    /__standin/health
+
+PostgREST runs with db-plan-enabled, so a request with
+`Accept: application/vnd.pgrst.plan+json; options=analyze|buffers`
+returns the EXPLAIN of the query it would run (tests/test_query_plans.py).
+
+Start it, then point the dev server at it with the printed env:
+
+    python tests/supabase_standin.py --port 54321
+    NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321 \\
+    SUPABASE_SERVICE_ROLE_KEY=<printed> yarn dev
+
+Needs `initdb`, `pg_ctl` and `psql` (PATH or --pg-bin) and `postgrest`
+(PATH or --postgrest-bin) unless --database-url / --upstream say
+otherwise. pg_trgm must be available (postgresql-contrib).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import jwt
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCHEMA = REPO_ROOT / 'db' / 'schema.sql'
+MIGRATIONS = REPO_ROOT / 'db' / 'migrations'
+
+# Supabase CLI's local default, so keys minted here look like the usual ones.
+DEFAULT_JWT_SECRET = 'super-secret-jwt-token-with-at-least-32-characters-long'
+
+REST_PREFIX = '/rest/v1'
+CONTROL_PREFIX = '/__standin'
+LATENCY_SAMPLES = 2000
+
+# Forwarded as-is in both directions; everything else is hop-by-hop or
+# recomputed (Content-Length, Content-Encoding after requests decodes).
+FORWARD_REQUEST_HEADERS = {
+    'accept', 'accept-profile', 'authorization', 'apikey', 'content-profile',
+    'content-type', 'prefer', 'range', 'range-unit', 'x-client-info',
+}
+FORWARD_RESPONSE_HEADERS = {
+    'content-type', 'content-range', 'content-location', 'location', 'preference-applied',
+}
+
+# What each injected status looks like coming from PostgREST.
+INJECTED_ERRORS = {
+    500: ('57014', 'canceling statement due to statement timeout'),
+    503: ('PGRST000', 'Could not connect with the database due to an incorrect URI or due to a network issue'),
+    504: ('PGRST003', 'Timed out acquiring connection from connection pool.'),
+}
+
+# Run before schema.sql: the roles PostgREST switches into, as on Supabase.
+BOOTSTRAP_SQL = """
+do $$
+begin
+    if not exists (select 1 from pg_roles where rolname = 'anon') then
+        create role anon nologin noinherit;
+    end if;
+    if not exists (select 1 from pg_roles where rolname = 'authenticated') then
+        create role authenticated nologin noinherit;
+    end if;
+    if not exists (select 1 from pg_roles where rolname = 'service_role') then
+        create role service_role nologin noinherit bypassrls;
+    end if;
+    if not exists (select 1 from pg_roles where rolname = 'authenticator') then
+        create role authenticator login noinherit;
+    end if;
+end
+$$;
+grant anon, authenticated, service_role to authenticator;
+grant usage on schema public to anon, authenticated, service_role;
+"""
+
+# Run after the migrations: the server's key must reach every table.
+GRANTS_SQL = """
+grant all on all tables in schema public to service_role;
+grant all on all sequences in schema public to service_role;
+grant execute on all functions in schema public to service_role;
+notify pgrst, 'reload schema';
+"""
+
+
+# -------------------------------------------------------------------------
+# Postgres + PostgREST
+# -------------------------------------------------------------------------
+
+def _bin(directory, name):
+    path = Path(directory) / name if directory else shutil.which(name)
+    if not path or not Path(path).exists():
+        raise SystemExit(f"{name} not found; install it or pass its directory (--pg-bin / --postgrest-bin)")
+    return str(path)
+
+
+def _wait_until(check, what, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return
+        time.sleep(0.2)
+    raise SystemExit(f"{what} did not come up within {timeout}s")
+
+
+class LocalPostgres:
+    """A throwaway cluster in a temp dir, trust auth, listening on 127.0.0.1."""
+
+    def __init__(self, pg_bin=None, port=54329, max_connections=100):
+        self.pg_bin = pg_bin
+        self.port = port
+        self.max_connections = max_connections
+        self.data_dir = None
+
+    @property
+    def url(self):
+        return f"postgres://postgres@127.0.0.1:{self.port}/postgres"
+
+    @property
+    def authenticator_url(self):
+        # PostgREST connects as authenticator and SET ROLEs per request, as on Supabase.
+        return f"postgres://authenticator@127.0.0.1:{self.port}/postgres"
+
+    def start(self):
+        self.data_dir = tempfile.mkdtemp(prefix='forkcast-pg-')
+        subprocess.run([_bin(self.pg_bin, 'initdb'), '-D', self.data_dir, '-U', 'postgres',
+                        '--auth=trust', '--encoding=UTF8', '--no-sync'],
+                       check=True, stdout=subprocess.DEVNULL)
+        options = (f"-p {self.port} -c listen_addresses=127.0.0.1 -k {self.data_dir} "
+                   f"-c max_connections={self.max_connections} -c fsync=off")
+        subprocess.run([_bin(self.pg_bin, 'pg_ctl'), '-D', self.data_dir, '-o', options,
+                        '-l', os.path.join(self.data_dir, 'postgres.log'), '-w', 'start'],
+                       check=True, stdout=subprocess.DEVNULL)
+        return self
+
+    def stop(self, keep=False):
+        if not self.data_dir:
+            return
+        subprocess.run([_bin(self.pg_bin, 'pg_ctl'), '-D', self.data_dir, '-m', 'fast', 'stop'],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if not keep:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+def load_schema(database_url, pg_bin=None):
+    """Roles, db/schema.sql, every migration in order, then the service_role grants."""
+    psql = [_bin(pg_bin, 'psql'), database_url, '-q', '-v', 'ON_ERROR_STOP=1', '-X']
+
+    def run(args, **kwargs):
+        subprocess.run(psql + args, check=True, stdout=subprocess.DEVNULL, **kwargs)
+
+    run(['-c', BOOTSTRAP_SQL])
+    for path in [SCHEMA, *sorted(MIGRATIONS.glob('*.sql'))]:
+        print(f"  loading {path.relative_to(REPO_ROOT)}")
+        run(['-f', str(path)])
+    run(['-c', GRANTS_SQL])
+
+
+class PostgREST:
+    """The postgrest binary, configured through PGRST_* env vars."""
+
+    def __init__(self, db_uri, jwt_secret, port=54330, pool=10, binary=None):
+        self.db_uri = db_uri
+        self.jwt_secret = jwt_secret
+        self.port = port
+        self.pool = pool
+        self.binary = binary
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        env = {
+            **os.environ,
+            'PGRST_DB_URI': self.db_uri,
+            'PGRST_DB_SCHEMAS': 'public',
+            'PGRST_DB_ANON_ROLE': 'anon',
+            'PGRST_DB_POOL': str(self.pool),
+            'PGRST_JWT_SECRET': self.jwt_secret,
+            'PGRST_SERVER_HOST': '127.0.0.1',
+            'PGRST_SERVER_PORT': str(self.port),
+            'PGRST_DB_PLAN_ENABLED': 'true',
+        }
+        binary = self.binary or _bin(None, 'postgrest')
+        self.process = subprocess.Popen([binary], env=env, stdout=subprocess.DEVNULL)
+        _wait_until(lambda: _reachable(self.url), f"PostgREST on port {self.port}")
+        return self
+
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+def _reachable(url):
+    try:
+        return requests.get(url, timeout=1).status_code < 500
+    except requests.RequestException:
+        return False
+
+
+def mint_key(role, jwt_secret):
+    """A long-lived API key for `role`, like the ones in a Supabase project's settings."""
+    now = int(time.time())
+    payload = {'iss': 'supabase-standin', 'role': role, 'iat': now, 'exp': now + 10 * 365 * 86400}
+    return jwt.encode(payload, jwt_secret, algorithm='HS256')
+
+
+# -------------------------------------------------------------------------
+# Fault proxy
+# -------------------------------------------------------------------------
+
+class Gate:
+    """A counting semaphore whose capacity can change; None = unlimited."""
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.in_use = 0
+        self.peak = 0
+        self.cond = threading.Condition()
+
+    def resize(self, capacity):
+        with self.cond:
+            self.capacity = capacity
+            self.cond.notify_all()
+
+    def acquire(self, timeout):
+        with self.cond:
+            ok = self.cond.wait_for(lambda: self.capacity is None or self.in_use < self.capacity, timeout)
+            if ok:
+                self.in_use += 1
+                self.peak = max(self.peak, self.in_use)
+            return ok
+
+    def release(self):
+        with self.cond:
+            self.in_use -= 1
+            self.cond.notify()
+
+
+class FaultRule:
+    def __init__(self, spec):
+        self.id = spec.get('id') or uuid.uuid4().hex[:12]
+        self.target = spec.get('target') or '*'
+        self.method = (spec.get('method') or '').upper() or None
+        self.match = spec.get('match')
+        self.latency_ms = float(spec.get('latency_ms') or 0)
+        self.jitter_ms = float(spec.get('jitter_ms') or 0)
+        self.error_rate = float(spec.get('error_rate') or 0)
+        self.error_status = int(spec.get('error_status') or 503)
+        self.statuses = deque(spec.get('statuses') or [])
+        self.queue_timeout_ms = float(spec.get('queue_timeout_ms') or 1000)
+        self.gate = Gate(spec['max_concurrent']) if spec.get('max_concurrent') else None
+
+    def applies(self, method, target, haystack):
+        return ((self.target == '*' or self.target == target)
+                and (self.method is None or self.method == method)
+                and (self.match is None or self.match in haystack))
+
+    def describe(self):
+        return {
+            'id': self.id, 'target': self.target, 'method': self.method, 'match': self.match,
+            'latency_ms': self.latency_ms, 'jitter_ms': self.jitter_ms,
+            'error_rate': self.error_rate, 'error_status': self.error_status,
+            'statuses': list(self.statuses),
+            'max_concurrent': self.gate.capacity if self.gate else None,
+            'queue_timeout_ms': self.queue_timeout_ms,
+        }
+
+
+def _target_of(rest_path):
+    """'meals' for /meals?..., 'rpc/rate_limit_take' for /rpc/rate_limit_take."""
+    parts = rest_path.split('?', 1)[0].strip('/').split('/')
+    return '/'.join(parts[:2]) if parts[0] == 'rpc' else parts[0]
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+def make_handler(upstream, default_latency_ms, state):
+    session_local = threading.local()
+
+    def session():
+        if not hasattr(session_local, 'session'):
+            session_local.session = requests.Session()
+        return session_local.session
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_HEAD(self):
+            self._dispatch('HEAD')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+        def do_PATCH(self):
+            self._dispatch('PATCH')
+
+        def do_PUT(self):
+            self._dispatch('PUT')
+
+        def do_DELETE(self):
+            self._dispatch('DELETE')
+
+        def do_OPTIONS(self):
+            self._dispatch('OPTIONS')
+
+        def _dispatch(self, method):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            if self.path.startswith(CONTROL_PREFIX):
+                return self._control(method, self.path[len(CONTROL_PREFIX):].split('?', 1)[0], body)
+            if self.path.startswith(REST_PREFIX + '/'):
+                return self._proxy(method, self.path[len(REST_PREFIX):], body)
+            return self._json(404, {'message': 'the stand-in only serves /rest/v1'})
+
+        # --- control API ---------------------------------------------------
+
+        def _control(self, method, path, body):
+            spec = json.loads(body or b'{}')
+            if path == '/health' and method == 'GET':
+                return self._json(200, {'ok': True, 'upstream': upstream, 'upstreamUp': _reachable(upstream)})
+            if path == '/faults' and method == 'GET':
+                with state['lock']:
+                    return self._json(200, [rule.describe() for rule in state['rules']])
+            if path == '/faults' and method == 'POST':
+                rule = FaultRule(spec)
+                with state['lock']:
+                    state['rules'].append(rule)
+                return self._json(200, {'id': rule.id})
+            if path == '/faults' and method == 'DELETE':
+                with state['lock']:
+                    state['rules'].clear()
+                return self._json(200, {'ok': True})
+            if path.startswith('/faults/') and method == 'DELETE':
+                rule_id = path[len('/faults/'):]
+                with state['lock']:
+                    state['rules'] = [rule for rule in state['rules'] if rule.id != rule_id]
+                return self._json(200, {'ok': True})
+            if path == '/analyze' and method == 'POST':
+                if not state['database_url']:
+                    return self._json(501, {'error': 'no database to analyze (--upstream)'})
+                psql = [_bin(state['pg_bin'], 'psql'), state['database_url'], '-q', '-X', '-c', 'analyze']
+                done = subprocess.run(psql, capture_output=True, text=True)
+                if done.returncode:
+                    return self._json(500, {'error': done.stderr.strip()})
+                return self._json(200, {'ok': True})
+            if path == '/limits' and method == 'PUT':
+                state['gate'].resize(spec.get('max_connections'))
+                state['queue_timeout_ms'] = float(spec.get('queue_timeout_ms') or 1000)
+                return self._json(200, {'ok': True})
+            if path == '/stats' and method == 'GET':
+                return self._json(200, self._stats())
+            if path == '/stats' and method == 'DELETE':
+                with state['lock']:
+                    state['stats'].clear()
+                return self._json(200, {'ok': True})
+            return self._json(404, {'error': 'unknown control endpoint'})
+
+        def _stats(self):
+            with state['lock']:
+                targets = {
+                    target: {
+                        **{k: v for k, v in entry.items() if k != 'ms'},
+                        'p50Ms': _percentile(entry['ms'], 0.50),
+                        'p95Ms': _percentile(entry['ms'], 0.95),
+                    }
+                    for target, entry in state['stats'].items()
+                }
+            gate = state['gate']
+            return {
+                'targets': targets,
+                'inFlight': gate.in_use,
+                'peakInFlight': gate.peak,
+                'maxConnections': gate.capacity,
+            }
+
+        # --- proxy -----------------------------------------------------------
+
+        def _proxy(self, method, rest_path, body):
+            started = time.monotonic()
+            target = _target_of(rest_path)
+            haystack = rest_path + '\n' + body.decode('utf-8', 'replace')
+            with state['lock']:
+                rules = [rule for rule in state['rules'] if rule.applies(method, target, haystack)]
+                entry = state['stats'][target]
+                entry['requests'] += 1
+
+            held = []
+            try:
+                gates = [(state['gate'], state['queue_timeout_ms'])]
+                gates += [(rule.gate, rule.queue_timeout_ms) for rule in rules if rule.gate]
+                for gate, timeout_ms in gates:
+                    if not gate.acquire(timeout_ms / 1000):
+                        self._record(target, started, rejected=True)
+                        return self._injected(504)
+                    held.append(gate)
+
+                delay_ms = default_latency_ms
+                injected = None
+                with state['lock']:
+                    for rule in rules:
+                        delay_ms += rule.latency_ms + random.uniform(0, rule.jitter_ms)
+                        if injected is None and rule.statuses:
+                            injected = rule.statuses.popleft()
+                        elif injected is None and random.random() < rule.error_rate:
+                            injected = rule.error_status
+                time.sleep(delay_ms / 1000)
+
+                if injected and injected >= 400:
+                    self._record(target, started, injected=True)
+                    return self._injected(injected)
+
+                headers = {k: v for k, v in self.headers.items() if k.lower() in FORWARD_REQUEST_HEADERS}
+                try:
+                    upstream_response = session().request(
+                        method, upstream + rest_path, data=body or None, headers=headers, timeout=60)
+                except requests.RequestException:
+                    self._record(target, started, upstream_error=True)
+                    return self._injected(503)
+                self._record(target, started, upstream_error=upstream_response.status_code >= 500)
+                return self._relay(upstream_response)
+            finally:
+                for gate in held:
+                    gate.release()
+
+        def _record(self, target, started, injected=False, upstream_error=False, rejected=False):
+            with state['lock']:
+                entry = state['stats'][target]
+                entry['injectedErrors'] += injected
+                entry['upstreamErrors'] += upstream_error
+                entry['rejected'] += rejected
+                entry['ms'].append((time.monotonic() - started) * 1000)
+
+        def _injected(self, status):
+            code, message = INJECTED_ERRORS.get(status, ('PGRST000', f'injected {status}'))
+            return self._json(status, {'code': code, 'message': message, 'details': None,
+                                       'hint': 'injected by tests/supabase_standin.py'})
+
+        def _relay(self, upstream_response):
+            data = upstream_response.content
+            self.send_response(upstream_response.status_code)
+            for key, value in upstream_response.headers.items():
+                if key.lower() in FORWARD_RESPONSE_HEADERS:
+                    self.send_header(key, value)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def _new_stats():
+    return {'requests': 0, 'injectedErrors': 0, 'upstreamErrors': 0, 'rejected': 0,
+            'ms': deque(maxlen=LATENCY_SAMPLES)}
+
+
+class StandinClient:
+    """Talks to a running stand-in over its control API (works from any process)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def _call(self, method, path, body=None):
+        r = requests.request(method, f"{self.base_url}{CONTROL_PREFIX}{path}", json=body, timeout=5)
+        r.raise_for_status()
+        return r.json()
+
+    def add_fault(self, target='*', **rule):
+        """Add a rule (see the module docstring for the fields); returns its id."""
+        return self._call('POST', '/faults', {'target': target, **rule})['id']
+
+    def remove_fault(self, rule_id):
+        self._call('DELETE', f"/faults/{rule_id}")
+
+    def clear_faults(self):
+        self._call('DELETE', '/faults')
+
+    def fault(self, target='*', **rule):
+        """Context manager: the rule is in place inside the `with` block only."""
+        client = self
+
+        class _Fault:
+            def __enter__(self):
+                self.id = client.add_fault(target, **rule)
+                return self.id
+
+            def __exit__(self, *exc):
+                client.remove_fault(self.id)
+
+        return _Fault()
+
+    def set_limits(self, max_connections=None, queue_timeout_ms=1000):
+        self._call('PUT', '/limits', {'max_connections': max_connections, 'queue_timeout_ms': queue_timeout_ms})
+
+    def stats(self, target=None):
+        body = self._call('GET', '/stats')
+        return body['targets'].get(target, {}) if target else body
+
+    def analyze(self):
+        """ANALYZE the database; False when the stand-in fronts an --upstream it can't reach."""
+        r = requests.post(f"{self.base_url}{CONTROL_PREFIX}/analyze", timeout=120)
+        if r.status_code == 501:
+            return False
+        r.raise_for_status()
+        return True
+
+    def reset_stats(self):
+        self._call('DELETE', '/stats')
+
+    def is_up(self):
+        try:
+            return requests.get(f"{self.base_url}{CONTROL_PREFIX}/health", timeout=1).ok
+        except requests.RequestException:
+            return False
+
+
+class FaultProxy(StandinClient):
+    """In-process proxy server."""
+
+    def __init__(self, server, port):
+        super().__init__(f"http://127.0.0.1:{port}")
+        self.server = server
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+def start_fault_proxy(upstream, port=54321, latency_ms=0.0, database_url=None, pg_bin=None):
+    state = {
+        'database_url': database_url,
+        'pg_bin': pg_bin,
+        'lock': threading.Lock(),
+        'rules': [],
+        'stats': defaultdict(_new_stats),
+        'gate': Gate(),
+        'queue_timeout_ms': 1000.0,
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(upstream.rstrip('/'), latency_ms, state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return FaultProxy(server, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=54321, help="proxy port (the Supabase URL)")
+    parser.add_argument("--upstream", help="existing PostgREST base URL; skips Postgres and PostgREST")
+    parser.add_argument("--database-url", help="existing Postgres to load and serve instead of a temp cluster")
+    parser.add_argument("--no-load", action="store_true", help="with --database-url: don't load the schema")
+    parser.add_argument("--pg-bin", help="directory with initdb, pg_ctl and psql")
+    parser.add_argument("--pg-port", type=int, default=54329)
+    parser.add_argument("--max-connections", type=int, default=100, help="Postgres max_connections")
+    parser.add_argument("--postgrest-bin", help="path to the postgrest binary")
+    parser.add_argument("--postgrest-port", type=int, default=54330)
+    parser.add_argument("--pool", type=int, default=10, help="PostgREST connection pool size")
+    parser.add_argument("--jwt-secret", default=os.getenv('SUPABASE_JWT_SECRET', DEFAULT_JWT_SECRET))
+    parser.add_argument("--latency", type=float, default=0.0, help="default ms added to every request")
+    parser.add_argument("--keep", action="store_true", help="keep the temp cluster's data dir on exit")
+    args = parser.parse_args()
+
+    postgres = postgrest = database_url = None
+    try:
+        upstream = args.upstream
+        if not upstream:
+            database_url = db_uri = args.database_url
+            if not database_url:
+                postgres = LocalPostgres(args.pg_bin, args.pg_port, args.max_connections).start()
+                database_url, db_uri = postgres.url, postgres.authenticator_url
+                print(f"Postgres running in {postgres.data_dir}")
+            if not args.no_load:
+                load_schema(database_url, args.pg_bin)
+            postgrest = PostgREST(db_uri, args.jwt_secret, args.postgrest_port,
+                                  args.pool, args.postgrest_bin).start()
+            upstream = postgrest.url
+
+        proxy = start_fault_proxy(upstream, args.port, args.latency,
+                                  database_url=database_url, pg_bin=args.pg_bin)
+        print(f"\nSupabase stand-in on {proxy.base_url} → {upstream} (Ctrl+C to stop)\n")
+        print(f"NEXT_PUBLIC_SUPABASE_URL={proxy.base_url}")
+        print(f"SUPABASE_SERVICE_ROLE_KEY={mint_key('service_role', args.jwt_secret)}")
+        print(f"NEXT_PUBLIC_SUPABASE_ANON_KEY={mint_key('anon', args.jwt_secret)}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            proxy.shutdown()
+    finally:
+        if postgrest:
+            postgrest.stop()
+        if postgres:
+            postgres.stop(keep=args.keep)
+
+
+if __name__ == "__main__":
+    main()
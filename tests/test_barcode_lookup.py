@@ -0,0 +1,137 @@
+"""
+GET /api/barcode-lookup against the local barcode stub.
+
+Replaces the old live-upstream script: every product, miss, slow reply
+and upstream failure is set up on tests/barcode_stub.py, so results are
+deterministic and the suite runs offline. Each test uses fresh random
+codes plus ?bypassCache=1, so neither parallel workers nor the
+Supabase barcode_cache can leak state between tests.
+
+Scenarios:
+1. Auth guard: 401 without Authorization
+2. Validation: 400 'Invalid barcode' for missing / non-numeric / short / long codes
+3. Hit on Open Food Facts → source 'off', triedVariants [code]
+4. Miss everywhere → found false, source 'none', every source queried
+5. 12-digit UPC-A → tries [code, '0' + code]; hit on the padded variant
+6. Fallthrough: OFF miss, UPCitemdb hit → source 'upcitemdb'
+7. Empty OFF record (no name, no brand) is skipped, not returned
+8. Upstream 503 once → retried, still a hit
+9. Timing: a 1.5 s upstream (under SOURCE_TIMEOUT_MS) still hits, in under 10 s
+"""
+
+import time
+
+import pytest
+import requests
+
+pytestmark = pytest.mark.barcode_stub
+
+PRODUCT = {
+    'product_name': 'Lichte Basterdsuiker',
+    'brands': 'Van Gilse',
+    'image_thumb_url': 'https://images.example/vangilse.jpg',
+    'quantity': '600 g',
+}
+ALL_SOURCES = ['off', 'obf', 'opf', 'opff', 'upcitemdb']
+
+
+def lookup(api_base, headers, code, timeout=15):
+    return requests.get(f"{api_base}/barcode-lookup",
+                        params={'code': code, 'bypassCache': '1'},
+                        headers=headers, timeout=timeout)
+
+
+def test_requires_auth(api_base):
+    r = requests.get(f"{api_base}/barcode-lookup", params={'code': '1234567890123'}, timeout=10)
+    assert r.status_code == 401
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'code': 'ABCDEF'},
+    {'code': '12345'},
+    {'code': '123456789012345'},
+], ids=['missing', 'non-numeric', 'too-short', 'too-long'])
+def test_rejects_invalid_codes(api_base, auth_headers, params):
+    r = requests.get(f"{api_base}/barcode-lookup", params=params, headers=auth_headers, timeout=10)
+    assert r.status_code == 400
+    assert 'Invalid barcode' in r.json()['error']
+
+
+def test_hit_on_open_food_facts(api_base, auth_headers, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+    barcode_stub.add_product('off', code, PRODUCT)
+
+    r = lookup(api_base, auth_headers, code)
+    assert r.status_code == 200
+    data = r.json()
+    assert data['found'] is True
+    assert data['source'] == 'off'
+    assert data['name'] == 'Lichte Basterdsuiker'
+    assert data['brand'] == 'Van Gilse'
+    assert data['triedVariants'] == [code]
+    assert [req['host'] for req in barcode_stub.requests_for(code)] == ['world.openfoodfacts.org']
+
+
+def test_miss_tries_every_source(api_base, auth_headers, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+
+    r = lookup(api_base, auth_headers, code)
+    assert r.status_code == 200
+    data = r.json()
+    assert data['found'] is False
+    assert data['source'] == 'none'
+    assert data['triedVariants'] == [code]
+    assert data['triedSources'] == ALL_SOURCES
+    assert len(barcode_stub.requests_for(code)) == len(ALL_SOURCES)
+
+
+def test_upc_a_tries_padded_variant(api_base, auth_headers, barcode_stub, fresh_barcode):
+    code = fresh_barcode(12)
+    barcode_stub.add_product('off', '0' + code, PRODUCT)
+
+    data = lookup(api_base, auth_headers, code).json()
+    assert data['found'] is True
+    assert data['code'] == '0' + code
+    assert data['triedVariants'] == [code, '0' + code]
+
+
+def test_falls_through_to_upcitemdb(api_base, auth_headers, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+    barcode_stub.add_product('upcitemdb', code, {'title': 'Pasta', 'brand': 'Barilla', 'images': []})
+
+    data = lookup(api_base, auth_headers, code).json()
+    assert data['found'] is True
+    assert data['source'] == 'upcitemdb'
+    assert data['name'] == 'Pasta'
+
+
+def test_empty_open_facts_record_is_skipped(api_base, auth_headers, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+    barcode_stub.add_product('off', code, {'product_name': '', 'brands': '', 'image_thumb_url': 'x.jpg'})
+    barcode_stub.add_product('obf', code, PRODUCT)
+
+    data = lookup(api_base, auth_headers, code).json()
+    assert data['found'] is True
+    assert data['source'] == 'obf'
+
+
+def test_upstream_5xx_is_retried(api_base, auth_headers, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+    barcode_stub.add_product('off', code, PRODUCT, statuses=[503])
+
+    data = lookup(api_base, auth_headers, code).json()
+    assert data['found'] is True
+    assert data['source'] == 'off'
+    assert [req['status'] for req in barcode_stub.requests_for(code)] == [503, 200]
+
+
+def test_slow_upstream_stays_within_budget(api_base, auth_headers, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+    barcode_stub.add_product('off', code, PRODUCT, latency_ms=1500)
+
+    started = time.perf_counter()
+    data = lookup(api_base, auth_headers, code).json()
+    elapsed = time.perf_counter() - started
+    assert data['found'] is True
+    assert 1.5 <= elapsed < 10
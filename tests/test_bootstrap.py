@@ -0,0 +1,73 @@
+"""
+GET /api/bootstrap: the app shell + planner payload in one call.
+
+Scenarios:
+1. Auth guard: 401 without Authorization
+2. Validation: 400 for a bad week, unknown include section, bad limit
+3. Full payload for a user with a meal planned this week: user (no
+   password), the meal in both lists, the plan in week.plans, kitchen counts
+4. ?include=plans returns only the week
+"""
+
+from datetime import date, timedelta
+
+import pytest
+import requests
+
+
+def test_requires_auth(api_base):
+    r = requests.get(f"{api_base}/bootstrap", timeout=10)
+    assert r.status_code == 401
+
+
+@pytest.mark.parametrize('params, message', [
+    ({'week': '2024-02-31'}, 'week'),
+    ({'week': 'monday'}, 'week must be YYYY-MM-DD'),
+    ({'include': 'meals,recipes'}, 'recipes'),
+    ({'limit': '0'}, 'limit'),
+    ({'limit': '101'}, 'limit'),
+], ids=['impossible-week', 'malformed-week', 'unknown-section', 'limit-zero', 'limit-too-big'])
+def test_rejects_bad_params(api_base, auth_headers, params, message):
+    r = requests.get(f"{api_base}/bootstrap", params=params, headers=auth_headers, timeout=10)
+    assert r.status_code == 400
+    assert message in r.json()['error']
+
+
+@pytest.fixture
+def planned_week(api_base, registered_user, seeded_meal):
+    monday = date.today() - timedelta(days=date.today().weekday())
+    r = requests.post(f"{api_base}/meal-plans", headers=registered_user['headers'], json={
+        'date': (monday + timedelta(days=2)).isoformat(),
+        'mealType': 'dinner',
+        'mealId': seeded_meal['id'],
+    }, timeout=10)
+    assert r.status_code == 200, r.text
+    return monday.isoformat()
+
+
+@pytest.mark.db
+def test_full_payload(api_base, registered_user, seeded_meal, planned_week):
+    r = requests.get(f"{api_base}/bootstrap", params={'week': planned_week},
+                     headers=registered_user['headers'], timeout=10)
+    assert r.status_code == 200, r.text
+    data = r.json()
+
+    assert data['user']['id'] == registered_user['id']
+    assert 'password' not in data['user']
+    assert [m['id'] for m in data['meals']['mine']] == [seeded_meal['id']]
+    assert seeded_meal['id'] in [m['id'] for m in data['meals']['community']]
+    assert data['week']['start'] == planned_week
+    assert data['week']['end'] == (date.fromisoformat(planned_week) + timedelta(days=6)).isoformat()
+    assert [(p['mealId'], p['isOwn']) for p in data['week']['plans']] == [(seeded_meal['id'], True)]
+    assert data['kitchen'] == {'pantryCount': 0, 'expiringCount': 0, 'shoppingCount': 0,
+                               'shoppingUncheckedCount': 0}
+
+
+@pytest.mark.db
+def test_include_plans_only(api_base, registered_user, planned_week):
+    r = requests.get(f"{api_base}/bootstrap", params={'week': planned_week, 'include': 'plans'},
+                     headers=registered_user['headers'], timeout=10)
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert list(data) == ['week']
+    assert len(data['week']['plans']) == 1
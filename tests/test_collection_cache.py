@@ -0,0 +1,70 @@
+"""
+Per-user read cache (lib/collection-cache.js) behind the list endpoints.
+
+Repeated reads are served from the cache and every write is visible on
+the next read: the write invalidates the writer's cached lists. Needs a
+real database; the hit-counting test also needs the cache turned on
+(COLLECTION_CACHE_BACKEND=memory) and skips otherwise.
+"""
+
+import pytest
+import requests
+
+pytestmark = pytest.mark.db
+
+
+def cache_stats(api_base, headers):
+    r = requests.get(f"{api_base}/cache/stats", headers=headers, timeout=10)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def stats(api_base, headers, collection):
+    return cache_stats(api_base, headers)['collections'].get(collection, {'hits': 0, 'misses': 0})
+
+
+def test_stats_requires_auth(api_base):
+    r = requests.get(f"{api_base}/cache/stats", timeout=10)
+    assert r.status_code == 401
+
+
+def test_repeat_read_is_a_hit(api_base, registered_user):
+    headers = registered_user['headers']
+    if not cache_stats(api_base, headers)['enabled']:
+        pytest.skip('collection cache is off; start the server with COLLECTION_CACHE_BACKEND=memory')
+    requests.get(f"{api_base}/pantry", headers=headers, timeout=10)
+    before = stats(api_base, headers, 'pantry_items')
+    r = requests.get(f"{api_base}/pantry", headers=headers, timeout=10)
+    assert r.status_code == 200
+    assert stats(api_base, headers, 'pantry_items')['hits'] > before['hits']
+
+
+def test_writes_invalidate_cached_lists(api_base, registered_user):
+    headers = registered_user['headers']
+    assert requests.get(f"{api_base}/shopping-list", headers=headers, timeout=10).json() == []
+
+    item = requests.post(f"{api_base}/shopping-list", headers=headers, json={'name': 'lentils'}, timeout=10).json()
+    listed = requests.get(f"{api_base}/shopping-list", headers=headers, timeout=10).json()
+    assert [i['id'] for i in listed] == [item['id']]
+
+    requests.put(f"{api_base}/shopping-list/{item['id']}", headers=headers, json={'checked': True}, timeout=10)
+    listed = requests.get(f"{api_base}/shopping-list", headers=headers, timeout=10).json()
+    assert listed[0]['checked'] is True
+
+    requests.delete(f"{api_base}/shopping-list/{item['id']}", headers=headers, timeout=10)
+    assert requests.get(f"{api_base}/shopping-list", headers=headers, timeout=10).json() == []
+
+
+def test_meal_edit_reaches_cached_plans(api_base, registered_user, seeded_meal):
+    headers = registered_user['headers']
+    r = requests.post(f"{api_base}/meal-plans", headers=headers, json={
+        'date': '2030-01-07', 'mealType': 'dinner', 'mealId': seeded_meal['id'],
+    }, timeout=10)
+    assert r.status_code == 200, r.text
+    params = {'startDate': '2030-01-07', 'endDate': '2030-01-13'}
+    plans = requests.get(f"{api_base}/meal-plans", headers=headers, params=params, timeout=10).json()
+    assert plans[0]['meal']['title'] == seeded_meal['title']
+
+    requests.put(f"{api_base}/meals/{seeded_meal['id']}", headers=headers, json={'title': 'Renamed'}, timeout=10)
+    plans = requests.get(f"{api_base}/meal-plans", headers=headers, params=params, timeout=10).json()
+    assert plans[0]['meal']['title'] == 'Renamed'
@@ -0,0 +1,99 @@
+"""
+Graceful degradation under database faults, against tests/supabase_standin.py.
+
+The server's NEXT_PUBLIC_SUPABASE_URL points at the stand-in, which
+forwards to a real PostgREST and injects latency, errors and
+connection limits per table. Every fault is scoped with `match` to
+this test's barcode or meal id, so parallel workers and the rest of
+the suite are unaffected.
+
+Scenarios:
+1. Slow barcode_cache (5 s) → lookup falls through to the upstream
+   chain within BARCODE_CACHE_TIMEOUT_MS per cache call, still a hit
+2. barcode_cache erroring → lookup still a hit (cache fails open)
+3. meals outage → meal detail is a clean JSON 500, and 200 once it ends
+4. Injected latency shows up in the response time
+5. Per-table connection cap of 1 → concurrent requests either succeed
+   or fail fast with JSON errors; none hang
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+pytestmark = [pytest.mark.db, pytest.mark.standin]
+
+PRODUCT = {'product_name': 'Haverdrink Naturel', 'brands': 'Oatly', 'quantity': '1 l'}
+
+
+def lookup(api_base, headers, code, timeout=15):
+    # No bypassCache: these tests are about the cache read and write.
+    return requests.get(f"{api_base}/barcode-lookup", params={'code': code},
+                        headers=headers, timeout=timeout)
+
+
+def test_slow_barcode_cache_falls_through(api_base, auth_headers, standin, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+    barcode_stub.add_product('off', code, PRODUCT)
+    with standin.fault('barcode_cache', match=code, latency_ms=5000):
+        started = time.monotonic()
+        r = lookup(api_base, auth_headers, code)
+        elapsed = time.monotonic() - started
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body['found'] is True and body['source'] == 'off'
+    assert not body.get('fromCache')
+    # One bounded read, one bounded write (1.5 s each by default), one stub hit.
+    assert elapsed < 4.5, f"lookup waited on the slow cache: {elapsed:.1f}s"
+
+
+def test_barcode_cache_errors_fail_open(api_base, auth_headers, standin, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+    barcode_stub.add_product('off', code, PRODUCT)
+    with standin.fault('barcode_cache', match=code, error_rate=1.0, error_status=503):
+        r = lookup(api_base, auth_headers, code)
+    assert r.status_code == 200, r.text
+    assert r.json()['found'] is True
+    assert len(barcode_stub.requests_for(code)) == 1
+
+
+def test_table_outage_is_a_clean_500_and_recovers(api_base, standin, seeded_meal):
+    url = f"{api_base}/meals/{seeded_meal['id']}"
+    with standin.fault('meals', match=seeded_meal['id'], error_rate=1.0, error_status=503):
+        r = requests.get(url, timeout=10)
+    assert r.status_code == 500
+    assert 'error' in r.json()
+
+    r = requests.get(url, timeout=10)
+    assert r.status_code == 200, r.text
+    assert r.json()['id'] == seeded_meal['id']
+
+
+def test_latency_is_applied(api_base, standin, seeded_meal):
+    url = f"{api_base}/meals/{seeded_meal['id']}"
+    with standin.fault('meals', match=seeded_meal['id'], latency_ms=400):
+        started = time.monotonic()
+        r = requests.get(url, timeout=10)
+        elapsed = time.monotonic() - started
+    assert r.status_code == 200, r.text
+    assert elapsed >= 0.4
+
+
+def test_connection_cap_fails_fast(api_base, standin, seeded_meal):
+    url = f"{api_base}/meals/{seeded_meal['id']}"
+    rejected_before = standin.stats('meals').get('rejected', 0)
+    with standin.fault('meals', match=seeded_meal['id'], latency_ms=800,
+                       max_concurrent=1, queue_timeout_ms=200):
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(lambda _: requests.get(url, timeout=10), range(4)))
+        elapsed = time.monotonic() - started
+
+    statuses = sorted(r.status_code for r in responses)
+    assert set(statuses) <= {200, 500}, statuses
+    assert 200 in statuses and 500 in statuses, statuses
+    assert all('error' in r.json() for r in responses if r.status_code == 500)
+    assert elapsed < 5, f"requests queued instead of failing fast: {elapsed:.1f}s"
+    assert standin.stats('meals')['rejected'] > rejected_before
@@ -0,0 +1,85 @@
+"""
+GET /api/export and POST /api/import (lib/user-data.js).
+
+Exports a seeded user as NDJSON, checks the footer against the rows,
+then imports the same file back: every row already exists, so nothing
+is inserted. Malformed files answer 400 with the offending line.
+"""
+
+import json
+import uuid
+
+import pytest
+import requests
+
+
+def export_lines(api_base, headers):
+    r = requests.get(f"{api_base}/export", headers=headers, timeout=30)
+    assert r.status_code == 200, r.text
+    assert r.headers['Content-Type'].startswith('application/x-ndjson')
+    return [json.loads(line) for line in r.text.splitlines() if line]
+
+
+def do_import(api_base, headers, lines):
+    body = ''.join(json.dumps(line) + '\n' for line in lines)
+    return requests.post(f"{api_base}/import", headers={**headers, 'Content-Type': 'application/x-ndjson'},
+                         data=body.encode(), timeout=30)
+
+
+@pytest.mark.parametrize('method, endpoint', [('GET', 'export'), ('POST', 'import')])
+def test_requires_auth(api_base, method, endpoint):
+    r = requests.request(method, f"{api_base}/{endpoint}", timeout=10)
+    assert r.status_code == 401
+
+
+@pytest.mark.db
+def test_export_then_reimport_is_a_no_op(api_base, registered_user, seeded_meal):
+    headers = registered_user['headers']
+    requests.post(f"{api_base}/pantry", headers=headers, json={'name': 'Eggs', 'quantity': 6}, timeout=10)
+
+    lines = export_lines(api_base, headers)
+    assert lines[0]['type'] == 'header' and lines[0]['version'] == 1
+    assert lines[-1]['type'] == 'footer'
+    rows = lines[1:-1]
+    assert [r['data']['id'] for r in rows if r['type'] == 'meals'] == [seeded_meal['id']]
+    assert lines[-1]['counts'] == {'meals': 1, 'meal_plans': 0, 'pantry_items': 1, 'shopping_list_items': 0}
+    assert all('userId' not in r['data'] for r in rows)
+
+    r = do_import(api_base, headers, lines)
+    assert r.status_code == 200, r.text
+    assert sum(r.json()['inserted'].values()) == 0
+    assert r.json()['skipped']['meals'] == 1
+
+
+@pytest.mark.db
+def test_import_adds_rows(api_base, registered_user):
+    meal_id = str(uuid.uuid4())
+    lines = [
+        {'type': 'header', 'format': 'forkcast-export', 'version': 1},
+        {'type': 'meals', 'data': {'id': meal_id, 'title': 'Imported', 'ingredients': '1 egg',
+                                   'instructions': 'Boil.'}},
+        {'type': 'meal_plans', 'data': {'id': str(uuid.uuid4()), 'date': '2030-02-04',
+                                        'mealType': 'lunch', 'mealId': meal_id}},
+        {'type': 'shopping_list_items', 'data': {'id': str(uuid.uuid4()), 'name': 'eggs',
+                                                 'sourceMealId': meal_id}},
+    ]
+    r = do_import(api_base, registered_user['headers'], lines)
+    assert r.status_code == 200, r.text
+    assert r.json()['inserted'] == {'meals': 1, 'meal_plans': 1, 'pantry_items': 0, 'shopping_list_items': 1}
+
+    listed = requests.get(f"{api_base}/shopping-list", headers=registered_user['headers'], timeout=10).json()
+    assert [i['name'] for i in listed] == ['eggs']
+
+
+@pytest.mark.parametrize('lines, line, message', [
+    ([{'type': 'meals', 'data': {}}], 1, 'header'),
+    ([{'type': 'header', 'format': 'forkcast-export', 'version': 2}], 1, 'version'),
+    ([{'type': 'header', 'format': 'forkcast-export', 'version': 1}, {'type': 'users', 'data': {}}], 2, 'Unknown'),
+    ([{'type': 'header', 'format': 'forkcast-export', 'version': 1},
+      {'type': 'pantry_items', 'data': {'id': 'not-a-uuid', 'name': 'x'}}], 2, 'UUID'),
+], ids=['no-header', 'bad-version', 'unknown-type', 'bad-id'])
+def test_rejects_malformed_files(api_base, auth_headers, lines, line, message):
+    r = do_import(api_base, auth_headers, lines)
+    assert r.status_code == 400, r.text
+    assert r.json()['line'] == line
+    assert message in r.json()['error']
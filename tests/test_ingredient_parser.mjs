@@ -0,0 +1,87 @@
+#!/usr/bin/env node
+/**
+ * Ingredient Parser Test
+ * Checks parseIngredientLine and aggregateIngredients from
+ * lib/ingredient-parser.js directly. No server or database needed.
+ *
+ *     node tests/test_ingredient_parser.mjs
+ *
+ * Test scenarios:
+ * 1. Plain quantities and units, including "400g" with no space
+ * 2. Slash fractions and mixed numbers ("1/2", "1 1/2")
+ * 3. Unicode fractions ("½", "1 ½", "1½")
+ * 4. Ranges take the upper bound ("2-3", "2 to 3")
+ * 5. Parenthesised sizes and comma notes become notes
+ * 6. Decimal comma ("1,5 l") is a quantity, not a note
+ * 7. Aggregation sums metric amounts across units and meals, keeps
+ *    incompatible units apart, and lists unquantified items bare
+ */
+
+import { parseIngredientLine, aggregateIngredients } from '../lib/ingredient-parser.js';
+
+let failures = 0;
+
+function printResult(passed, message) {
+  console.log(`${passed ? '✅ PASS' : '❌ FAIL'}: ${message}`);
+  if (!passed) failures += 1;
+}
+
+// Compares only the fields given in `expected`.
+function checkLine(line, expected) {
+  const parsed = parseIngredientLine(line);
+  const got = Object.fromEntries(Object.keys(expected).map((key) => [key, parsed[key]]));
+  const passed = JSON.stringify(got) === JSON.stringify(expected);
+  printResult(passed, `${JSON.stringify(line)} → ${JSON.stringify(got)}`);
+}
+
+function main() {
+  console.log('\n' + '='.repeat(80));
+  console.log('INGREDIENT PARSER TEST');
+  console.log('='.repeat(80));
+
+  checkLine('400g spaghetti', { quantity: 400, unit: 'g', metricQuantity: 400, name: 'spaghetti' });
+  checkLine('2 tbsp olive oil', { quantity: 2, unit: 'tbsp', metricQuantity: 30, metricUnit: 'ml' });
+  checkLine('3 eggs', { quantity: 3, unit: null, name: 'egg' });
+  checkLine('Salt to taste', { quantity: null, name: 'salt', note: 'to taste' });
+
+  checkLine('1/2 cup sugar', { quantity: 0.5, unit: 'cup', metricQuantity: 120, name: 'sugar' });
+  checkLine('3/4 tsp salt', { quantity: 0.75, unit: 'tsp' });
+  checkLine('1 1/2 cups flour', { quantity: 1.5, unit: 'cup', name: 'flour' });
+
+  checkLine('½ onion', { quantity: 0.5, name: 'onion' });
+  checkLine('1 ½ cups whole milk', { quantity: 1.5, unit: 'cup', metricQuantity: 360, item: 'whole milk' });
+  checkLine('1½ cups rice', { quantity: 1.5, unit: 'cup' });
+
+  checkLine('2-3 garlic cloves, crushed', { quantity: 3, unit: 'clove', name: 'garlic', note: 'crushed' });
+  checkLine('2 to 3 carrots', { quantity: 3, name: 'carrot' });
+
+  checkLine('1 can (400 g) chopped tomatoes', { quantity: 1, unit: 'can', note: '400 g' });
+  checkLine('2 onions (about 300 g), finely chopped', { quantity: 2, name: 'onion', note: 'about 300 g; finely chopped' });
+
+  checkLine('1,5 l water', { quantity: 1.5, unit: 'l', metricQuantity: 1500, name: 'water', note: null });
+  checkLine('0,5 kg potatoes, peeled', { quantity: 0.5, unit: 'kg', metricQuantity: 500, note: 'peeled' });
+
+  const rows = [
+    ['400g spaghetti', 'm1'], ['200 g Spaghetti', 'm2'], ['1 kg spaghetti', 'm3'],
+    ['1 cup milk', 'm1'], ['2 tbsp milk', 'm2'],
+    ['2 garlic cloves', 'm1'], ['50 g garlic', 'm2'],
+    ['Salt to taste', 'm1'],
+  ].map(([line, mealId]) => ({ ...parseIngredientLine(line), mealId }));
+  const byName = Object.fromEntries(aggregateIngredients(rows).map((entry) => [entry.name, entry]));
+  printResult(
+    byName.spaghetti?.label === 'spaghetti (1.6 kg)'
+      && JSON.stringify(byName.spaghetti.mealIds) === '["m1","m2","m3"]',
+    `aggregate: metric sum across meals → ${byName.spaghetti?.label}`,
+  );
+  printResult(byName.milk?.label === 'milk (270 ml)', `aggregate: cup + tbsp in ml → ${byName.milk?.label}`);
+  printResult(
+    JSON.stringify(byName.garlic?.amounts) === '["2 clove","50 g"]',
+    `aggregate: incompatible units listed apart → ${JSON.stringify(byName.garlic?.amounts)}`,
+  );
+  printResult(byName.salt?.label === 'Salt', `aggregate: no quantity → ${byName.salt?.label}`);
+
+  console.log(`\n${failures ? `${failures} check(s) failed` : 'all checks passed'}`);
+  return failures ? 1 : 0;
+}
+
+process.exit(main());
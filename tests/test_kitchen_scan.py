@@ -0,0 +1,129 @@
+"""
+POST /api/shopping-list/scan and POST /api/pantry/scan.
+
+The server resolves a scan in one request: exact barcode match first,
+then the product name (sent by the client, or looked up upstream)
+ranked by pg_trgm similarity. The match tests need a real database with
+migration 011 applied; the lookup test also needs the barcode stub.
+
+Scenarios:
+1. Auth guard (401) and barcode validation (400) on both endpoints
+2. Name ranking: "Alpro Oat Milk" picks "oat milk" over "milk"
+3. Barcode match wins over name and doesn't call the upstream chain
+4. Checked items are never matched; unrelated names → no match
+5. No name from the client → lookup chain runs, its name is matched
+6. Pantry: barcode match on an existing item
+"""
+
+import pytest
+import requests
+
+SCAN_ENDPOINTS = ['shopping-list/scan', 'pantry/scan']
+
+
+def scan(api_base, headers, endpoint, code, name=None):
+    body = {'code': code}
+    if name is not None:
+        body['name'] = name
+    return requests.post(f"{api_base}/{endpoint}", headers=headers, json=body, timeout=20)
+
+
+def add_shopping(api_base, user, name, barcode=None):
+    r = requests.post(f"{api_base}/shopping-list", headers=user['headers'],
+                      json={'name': name, 'barcode': barcode}, timeout=10)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+@pytest.mark.parametrize('endpoint', SCAN_ENDPOINTS)
+def test_requires_auth(api_base, endpoint):
+    r = requests.post(f"{api_base}/{endpoint}", json={'code': '8710437003216'}, timeout=10)
+    assert r.status_code == 401
+
+
+@pytest.mark.parametrize('endpoint', SCAN_ENDPOINTS)
+@pytest.mark.parametrize('code', [None, '', 'abc123', '12345', '123456789012345'],
+                         ids=['missing', 'empty', 'letters', 'too-short', 'too-long'])
+def test_rejects_invalid_codes(api_base, auth_headers, endpoint, code):
+    r = requests.post(f"{api_base}/{endpoint}", headers=auth_headers, json={'code': code}, timeout=10)
+    assert r.status_code == 400
+    assert 'Invalid barcode' in r.json()['error']
+
+
+@pytest.mark.db
+def test_ranks_closest_name_first(api_base, registered_user, fresh_barcode):
+    add_shopping(api_base, registered_user, 'milk')
+    oat = add_shopping(api_base, registered_user, 'oat milk')
+    add_shopping(api_base, registered_user, 'toothpaste')
+
+    r = scan(api_base, registered_user['headers'], 'shopping-list/scan', fresh_barcode(), name='Alpro Oat Milk')
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert data['product'] is None  # name supplied, no lookup
+    assert data['match']['item']['id'] == oat['id']
+    assert data['match']['matchedBy'] == 'name'
+    assert 0.6 <= data['match']['confidence'] <= 1
+    assert [c['item']['name'] for c in data['candidates']] == ['oat milk', 'milk']
+
+
+@pytest.mark.db
+def test_barcode_match_wins(api_base, registered_user, fresh_barcode):
+    code = fresh_barcode()
+    add_shopping(api_base, registered_user, 'Lichte Basterdsuiker')
+    scanned = add_shopping(api_base, registered_user, 'Sugar', barcode=code)
+
+    r = scan(api_base, registered_user['headers'], 'shopping-list/scan', code, name='Lichte Basterdsuiker')
+    data = r.json()
+    assert data['match']['item']['id'] == scanned['id']
+    assert data['match']['matchedBy'] == 'barcode'
+    assert data['match']['confidence'] == 1
+
+
+@pytest.mark.db
+def test_checked_and_unrelated_items_never_match(api_base, registered_user, fresh_barcode):
+    bread = add_shopping(api_base, registered_user, 'bread')
+    requests.put(f"{api_base}/shopping-list/{bread['id']}", headers=registered_user['headers'],
+                 json={'checked': True}, timeout=10)
+    add_shopping(api_base, registered_user, 'washing powder')
+
+    r = scan(api_base, registered_user['headers'], 'shopping-list/scan', fresh_barcode(), name='Wholemeal Bread')
+    data = r.json()
+    assert data['match'] is None
+    assert data['candidates'] == []
+    assert data['name'] == 'Wholemeal Bread'
+
+
+@pytest.mark.db
+@pytest.mark.barcode_stub
+def test_lookup_runs_only_without_a_match(api_base, registered_user, barcode_stub, fresh_barcode):
+    code = fresh_barcode()
+    barcode_stub.add_product('off', code, {'product_name': 'Organic Oat Milk', 'brands': 'Oatly'})
+    oat = add_shopping(api_base, registered_user, 'oat milk')
+
+    r = scan(api_base, registered_user['headers'], 'shopping-list/scan', code)
+    data = r.json()
+    assert data['product']['found'] is True
+    assert data['name'] == 'Organic Oat Milk'
+    assert data['match']['item']['id'] == oat['id']
+    assert len(barcode_stub.requests_for(code)) == 1
+
+    # Same code once it's on the list by barcode: no upstream call.
+    tagged = add_shopping(api_base, registered_user, 'Organic Oat Milk', barcode=code)
+    r = scan(api_base, registered_user['headers'], 'shopping-list/scan', code)
+    assert r.json()['match']['item']['id'] == tagged['id']
+    assert len(barcode_stub.requests_for(code)) == 1
+
+
+@pytest.mark.db
+def test_pantry_matches_existing_item_by_barcode(api_base, registered_user, fresh_barcode):
+    code = fresh_barcode()
+    r = requests.post(f"{api_base}/pantry", headers=registered_user['headers'],
+                      json={'name': 'Basmati rice', 'barcode': code, 'quantity': 1}, timeout=10)
+    assert r.status_code == 200, r.text
+    item = r.json()
+
+    r = scan(api_base, registered_user['headers'], 'pantry/scan', code)
+    data = r.json()
+    assert data['match']['item']['id'] == item['id']
+    assert data['match']['matchedBy'] == 'barcode'
+    assert data['product'] is None
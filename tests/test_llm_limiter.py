@@ -0,0 +1,112 @@
+"""
+The shared LLM concurrency limiter behind POST /api/meal-suggestions,
+against the LLM stub (tests/llm_stub.py; each call takes a few
+seconds). Start the server with a small limiter so a burst overflows
+it; the `limiter` fixture skips otherwise:
+
+    EMERGENT_LLM_KEY=stub EMERGENT_LLM_BASE_URL=http://127.0.0.1:8766/v1 \\
+    LLM_MAX_IN_FLIGHT=2 LLM_MAX_QUEUE=4 LLM_MAX_QUEUE_PER_USER=2 \\
+    yarn dev
+
+Scenarios:
+1. Burst of 12 requests from 6 users → never more than 2 upstream calls
+   at once; overflow answered 503 + Retry-After, the rest 200
+2. Fairness: a user queued behind a busy user is served before that
+   user's own backlog drains
+3. Provider 429 → retried after Retry-After, request still succeeds
+4. GET /api/meal-suggestions/stats reports queue depth and wait times
+
+Other LLM tests running in parallel share the limiter, so counts are
+bounds ("at most 2 at once", "some 503s"), not exact numbers.
+"""
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+pytestmark = pytest.mark.llm_stub
+
+MAX_IN_FLIGHT = 2
+MAX_QUEUE = 4
+
+
+@pytest.fixture(scope='module')
+def limiter(api_base, mint_token, llm_stub):
+    """The server's limiter stats; skips unless it runs with the small limits above."""
+    r = requests.get(f"{api_base}/meal-suggestions/stats",
+                     headers={'Authorization': f"Bearer {mint_token()}"}, timeout=10)
+    limits = r.json().get('limiter', {}) if r.ok else {}
+    if (limits.get('maxInFlight'), limits.get('maxQueue')) != (MAX_IN_FLIGHT, MAX_QUEUE):
+        pytest.skip(f"server limiter is {limits.get('maxInFlight')}/{limits.get('maxQueue')}; start it with "
+                    f"LLM_MAX_IN_FLIGHT={MAX_IN_FLIGHT} LLM_MAX_QUEUE={MAX_QUEUE} LLM_MAX_QUEUE_PER_USER=2")
+    return limits
+
+
+@pytest.fixture
+def suggest(api_base, prompt_marker):
+    """suggest(token, label) → (label, response, finished_at) for a never-cached prompt."""
+    def post(token, label):
+        r = requests.post(
+            f"{api_base}/meal-suggestions",
+            headers={'Authorization': f"Bearer {token}"},
+            json={'prompt': f"burst {prompt_marker} {label} {uuid.uuid4().hex}"},
+            timeout=60,
+        )
+        return label, r, time.monotonic()
+    return post
+
+
+def test_burst_overflow_is_rejected(limiter, llm_stub, suggest, mint_token, prompt_marker):
+    tokens = [mint_token() for _ in range(6)]
+    jobs = [(tokens[i % 6], f"u{i % 6}-{i}") for i in range(12)]
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(lambda job: suggest(*job), jobs))
+
+    codes = [r.status_code for _, r, _ in results]
+    busy = [r for _, r, _ in results if r.status_code == 503]
+    assert codes.count(200) > 0 and busy, codes
+    assert codes.count(200) + len(busy) == len(jobs), codes
+    assert all(r.headers.get('Retry-After', '').isdigit() for r in busy)
+    assert llm_stub.max_in_flight(prompt_marker) <= MAX_IN_FLIGHT
+
+
+def test_queued_user_is_not_starved(limiter, suggest, mint_token):
+    heavy, light = mint_token(), mint_token()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        # Heavy user fills both slots and their personal queue…
+        futures = [pool.submit(suggest, heavy, f"heavy-{i}") for i in range(MAX_IN_FLIGHT + 2)]
+        time.sleep(0.3)
+        # …then a second user arrives and must not wait for all of it.
+        futures.append(pool.submit(suggest, light, "light"))
+        results = [f.result() for f in futures]
+
+    finished = {label: at for label, r, at in results if r.status_code == 200}
+    heavy_done = sorted(at for label, at in finished.items() if label.startswith('heavy'))
+    assert 'light' in finished and len(heavy_done) == MAX_IN_FLIGHT + 2, \
+        {label: r.status_code for label, r, _ in results}
+    assert finished['light'] < heavy_done[-1], f"completion order: {sorted(finished, key=finished.get)}"
+
+
+def test_provider_429_is_retried(limiter, llm_stub, suggest, mint_token, prompt_marker):
+    llm_stub.fail_next(prompt_marker, [429])
+    _, r, _ = suggest(mint_token(), "429")
+    assert r.status_code == 200, r.text
+    assert [call['status'] for call in llm_stub.requests_for(prompt_marker)] == [429, 200]
+
+
+def test_stats_report_queue_and_waits(api_base, limiter, suggest, mint_token):
+    # Make sure something has queued and been rejected, whatever ran first.
+    token = mint_token()
+    with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT + MAX_QUEUE + 2) as pool:
+        list(pool.map(lambda i: suggest(token, f"stats-{i}"), range(MAX_IN_FLIGHT + MAX_QUEUE + 2)))
+
+    r = requests.get(f"{api_base}/meal-suggestions/stats",
+                     headers={'Authorization': f"Bearer {mint_token()}"}, timeout=10)
+    assert r.status_code == 200, r.text
+    stats = r.json()['limiter']
+    assert 'queueDepth' in stats
+    assert stats.get('rejected', 0) > 0
+    assert stats.get('waitMs', {}).get('max', 0) > 0
@@ -0,0 +1,119 @@
+"""
+Structured meal ingredients (migration 009) against a real database.
+Each test gets a fresh user with two meals (`spaghetti_meals`); skips
+when /api/health reports the database unreachable.
+
+Scenarios:
+1. POST /api/meals → GET /api/meals/:id/ingredients returns parsed rows
+   (quantity, unit, metric amount, canonical name, note)
+2. PUT /api/meals/:id with new ingredients → rows re-parsed
+3. GET /api/meals?ingredient=Spaghetti → indexed lookup finds both meals
+4. POST /api/shopping-list/generate → same ingredient merged across
+   meals with summed metric quantity; re-generating inserts nothing
+5. POST /api/meal-ingredients/backfill → nothing left for this user;
+   scope "all" without the operator token → 403
+6. Slash fractions and a decimal comma: "1/2 cup", "3/4 tsp",
+   "1 1/2 cups", "1,5 l" parse to 0.5, 0.75, 1.5 and 1.5
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+pytestmark = pytest.mark.db
+
+
+@pytest.fixture
+def spaghetti_meals(api_base, registered_user):
+    """IDs of two meals, owned by `registered_user`, that both use spaghetti."""
+    ids = []
+    for title, ingredients in [
+        ('Carbonara', "400g spaghetti\n3 eggs\n1 ½ cups grated parmesan\nSalt to taste"),
+        ('Garlic pasta', "200 g Spaghetti\n2-3 garlic cloves, crushed\n2 tbsp olive oil"),
+    ]:
+        r = requests.post(f"{api_base}/meals", headers=registered_user['headers'], json={
+            'title': title, 'ingredients': ingredients, 'instructions': 'Cook.',
+        }, timeout=10)
+        assert r.status_code == 200, r.text
+        ids.append(r.json()['id'])
+    return ids
+
+
+def parsed_rows(api_base, meal_id):
+    """{name: row} from GET /api/meals/:id/ingredients."""
+    r = requests.get(f"{api_base}/meals/{meal_id}/ingredients", timeout=10)
+    assert r.status_code == 200, r.text
+    assert r.json().get('parsed') is True
+    return {row['name']: row for row in r.json()['ingredients']}
+
+
+def test_parsed_on_create(api_base, spaghetti_meals):
+    rows = parsed_rows(api_base, spaghetti_meals[0])
+    assert (rows['spaghetti']['metricQuantity'], rows['spaghetti']['metricUnit']) == (400, 'g')
+    assert (rows['parmesan']['quantity'], rows['parmesan']['unit']) == (1.5, 'cup')
+    assert rows['parmesan']['metricQuantity'] == 360
+    assert rows['egg']['quantity'] == 3
+    assert (rows['salt']['quantity'], rows['salt']['note']) == (None, 'to taste')
+
+
+def test_reparsed_on_update(api_base, registered_user, spaghetti_meals):
+    r = requests.put(f"{api_base}/meals/{spaghetti_meals[1]}", headers=registered_user['headers'], json={
+        'ingredients': "200 g Spaghetti\n2-3 garlic cloves, crushed\n2 tbsp olive oil\n1 lemon",
+    }, timeout=10)
+    assert r.status_code == 200, r.text
+    rows = parsed_rows(api_base, spaghetti_meals[1])
+    assert 'lemon' in rows
+    garlic = rows['garlic']
+    assert (garlic['quantity'], garlic['unit'], garlic['note']) == (3, 'clove', 'crushed')
+
+
+def test_ingredient_search(api_base, registered_user, spaghetti_meals):
+    r = requests.get(f"{api_base}/meals", params={'ingredient': 'Spaghetti', 'userId': registered_user['id']},
+                     timeout=10)
+    assert r.status_code == 200, r.text
+    assert sorted(m['id'] for m in r.json()) == sorted(spaghetti_meals)
+
+
+def test_shopping_list_aggregation(api_base, registered_user, spaghetti_meals):
+    headers = registered_user['headers']
+    today = datetime.utcnow().date()
+    for offset, meal_id in enumerate(spaghetti_meals):
+        r = requests.post(f"{api_base}/meal-plans", headers=headers, json={
+            'date': (today + timedelta(days=offset)).isoformat(), 'mealType': 'dinner', 'mealId': meal_id,
+        }, timeout=10)
+        assert r.status_code == 200, r.text
+    payload = {'startDate': today.isoformat(), 'endDate': (today + timedelta(days=6)).isoformat()}
+
+    first = requests.post(f"{api_base}/shopping-list/generate", headers=headers, json=payload, timeout=10)
+    assert first.status_code == 200, first.text
+    names = [item['name'] for item in first.json().get('items', [])]
+    assert [n for n in names if 'paghetti' in n] == ['spaghetti (600 g)'], names
+
+    again = requests.post(f"{api_base}/shopping-list/generate", headers=headers, json=payload, timeout=10)
+    assert again.json().get('inserted') == 0
+
+
+def test_backfill(api_base, registered_user, spaghetti_meals):
+    headers = registered_user['headers']
+    r = requests.post(f"{api_base}/meal-ingredients/backfill", headers=headers, json={'scope': 'mine'}, timeout=30)
+    assert r.status_code == 200, r.text
+    assert r.json().get('remaining') == 0 and 'version' in r.json()
+
+    r = requests.post(f"{api_base}/meal-ingredients/backfill", headers=headers, json={'limit': 0}, timeout=10)
+    assert r.status_code == 400, r.text
+
+    # Every user's meals: operator token only.
+    r = requests.post(f"{api_base}/meal-ingredients/backfill", headers=headers, json={'scope': 'all'}, timeout=10)
+    assert r.status_code == 403, r.text
+
+
+def test_fractions_and_decimal_comma(api_base, registered_user):
+    r = requests.post(f"{api_base}/meals", headers=registered_user['headers'], json={
+        'title': 'Pancakes', 'ingredients': "1/2 cup sugar\n3/4 tsp salt\n1 1/2 cups flour\n1,5 l water",
+        'instructions': 'Whisk.',
+    }, timeout=10)
+    assert r.status_code == 200, r.text
+    rows = parsed_rows(api_base, r.json()['id'])
+    got = {name: (row['quantity'], row['unit']) for name, row in rows.items()}
+    assert got == {'sugar': (0.5, 'cup'), 'salt': (0.75, 'tsp'), 'flour': (1.5, 'cup'), 'water': (1.5, 'l')}
@@ -0,0 +1,131 @@
+"""
+POST /api/meal-plans/bulk: copy a week, apply a template, clear a range.
+
+Scenarios:
+1. Auth guard: 401 without Authorization
+2. Validation: 400 for an unknown op, bad dates, a range over 31 days,
+   duplicate template slots, a bad meal type, a bad onConflict
+3. copy-week shifts last week's plans onto the target week and returns
+   the target week; a second copy skips every slot
+4. onConflict 'replace' overwrites a planned slot, 'skip' keeps it
+5. apply-template with a meal id that doesn't exist → 400
+6. clear-range removes only the requested meal types
+"""
+
+import uuid
+
+import pytest
+import requests
+
+SOURCE = '2030-01-07'   # a Monday
+TARGET = '2030-01-14'
+
+
+def bulk(api_base, headers, body):
+    return requests.post(f"{api_base}/meal-plans/bulk", headers=headers, json=body, timeout=10)
+
+
+def test_requires_auth(api_base):
+    r = requests.post(f"{api_base}/meal-plans/bulk", json={'op': 'clear-range'}, timeout=10)
+    assert r.status_code == 401
+
+
+@pytest.mark.parametrize('body, message', [
+    ({'op': 'move-week'}, 'op must be'),
+    ({'op': 'copy-week', 'source': {'start': '2030-02-30'}, 'target': {'start': TARGET}}, 'source.start'),
+    ({'op': 'copy-week', 'source': {'start': SOURCE}}, 'target.start'),
+    ({'op': 'copy-week', 'source': {'start': SOURCE, 'end': '2030-03-01'}, 'target': {'start': TARGET}}, '31 days'),
+    ({'op': 'clear-range', 'start': TARGET, 'end': SOURCE}, '31 days'),
+    ({'op': 'clear-range', 'start': SOURCE, 'end': TARGET, 'mealTypes': ['brunch']}, 'mealTypes'),
+    ({'op': 'apply-template', 'start': SOURCE, 'slots': []}, 'slots'),
+    ({'op': 'apply-template', 'start': SOURCE, 'slots': [
+        {'day': 0, 'mealType': 'lunch', 'mealId': 'a'},
+        {'day': 0, 'mealType': 'lunch', 'mealId': 'b'},
+    ]}, 'Two slots'),
+    ({'op': 'apply-template', 'start': SOURCE, 'slots': [{'day': 0, 'mealType': 'supper', 'mealId': 'a'}]}, 'mealType'),
+    ({'op': 'copy-week', 'source': {'start': SOURCE}, 'target': {'start': TARGET}, 'onConflict': 'merge'}, 'onConflict'),
+], ids=['unknown-op', 'impossible-date', 'no-target', 'too-long', 'end-before-start',
+        'bad-meal-type-filter', 'no-slots', 'duplicate-slot', 'bad-slot-meal-type', 'bad-on-conflict'])
+def test_rejects_bad_bodies(api_base, auth_headers, body, message):
+    r = bulk(api_base, auth_headers, body)
+    assert r.status_code == 400
+    assert message in r.json()['error']
+
+
+def slots(week):
+    return sorted((p['date'], p['mealType'], p['mealId']) for p in week['plans'])
+
+
+@pytest.fixture
+def source_week(api_base, registered_user, seeded_meal):
+    r = bulk(api_base, registered_user['headers'], {
+        'op': 'apply-template', 'start': SOURCE,
+        'slots': [
+            {'day': 0, 'mealType': 'breakfast', 'mealId': seeded_meal['id']},
+            {'day': 2, 'mealType': 'dinner', 'mealId': seeded_meal['id']},
+            {'day': 6, 'mealType': 'lunch', 'mealId': seeded_meal['id']},
+        ],
+    })
+    assert r.status_code == 200, r.text
+    assert r.json()['written'] == 3
+    return r.json()['week']
+
+
+@pytest.mark.db
+def test_copy_week(api_base, registered_user, seeded_meal, source_week):
+    body = {'op': 'copy-week', 'source': {'start': SOURCE}, 'target': {'start': TARGET}}
+    r = bulk(api_base, registered_user['headers'], body)
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert (data['written'], data['skipped']) == (3, 0)
+    assert (data['week']['start'], data['week']['end']) == (TARGET, '2030-01-20')
+    meal = seeded_meal['id']
+    assert slots(data['week']) == [('2030-01-14', 'breakfast', meal), ('2030-01-16', 'dinner', meal),
+                                   ('2030-01-20', 'lunch', meal)]
+    assert all(p['isOwn'] and p['meal']['id'] == meal for p in data['week']['plans'])
+
+    # Same shape as GET /api/meal-plans.
+    listed = requests.get(f"{api_base}/meal-plans", params={'startDate': TARGET, 'endDate': '2030-01-20'},
+                          headers=registered_user['headers'], timeout=10).json()
+    assert slots({'plans': listed}) == slots(data['week'])
+
+    again = bulk(api_base, registered_user['headers'], body).json()
+    assert (again['written'], again['skipped']) == (0, 3)
+
+
+@pytest.mark.db
+def test_on_conflict(api_base, registered_user, seeded_meal, source_week):
+    other = requests.post(f"{api_base}/meals", headers=registered_user['headers'], json={
+        'title': 'Other meal', 'ingredients': '1 onion', 'instructions': 'Chop.',
+    }, timeout=10).json()
+    template = {'op': 'apply-template', 'start': SOURCE,
+                'slots': [{'day': 0, 'mealType': 'breakfast', 'mealId': other['id']}]}
+
+    kept = bulk(api_base, registered_user['headers'], template).json()
+    assert (kept['written'], kept['skipped']) == (0, 1)
+    assert ('2030-01-07', 'breakfast', seeded_meal['id']) in slots(kept['week'])
+
+    replaced = bulk(api_base, registered_user['headers'], {**template, 'onConflict': 'replace'}).json()
+    assert replaced['written'] == 1
+    assert ('2030-01-07', 'breakfast', other['id']) in slots(replaced['week'])
+
+
+@pytest.mark.db
+def test_unknown_meal(api_base, registered_user):
+    r = bulk(api_base, registered_user['headers'], {
+        'op': 'apply-template', 'start': SOURCE,
+        'slots': [{'day': 0, 'mealType': 'lunch', 'mealId': str(uuid.uuid4())}],
+    })
+    assert r.status_code == 400
+    assert r.json()['error'] == 'Unknown meal in slots'
+
+
+@pytest.mark.db
+def test_clear_range(api_base, registered_user, seeded_meal, source_week):
+    r = bulk(api_base, registered_user['headers'], {
+        'op': 'clear-range', 'start': SOURCE, 'end': '2030-01-13', 'mealTypes': ['breakfast', 'lunch'],
+    })
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert data['deleted'] == 2
+    assert slots(data['week']) == [('2030-01-09', 'dinner', seeded_meal['id'])]
@@ -0,0 +1,95 @@
+"""
+POST /api/meal-suggestions cache and streaming, against the LLM stub
+(tests/llm_stub.py). Start the server pointed at it:
+
+    EMERGENT_LLM_KEY=stub EMERGENT_LLM_BASE_URL=http://127.0.0.1:8766/v1 yarn dev
+
+Every prompt carries this test's `prompt_marker`, so upstream calls are
+counted per test and an already-warm server can't answer from cache.
+
+Scenarios:
+1. First JSON request → one upstream call, cached: false
+2. Same request, different case/whitespace/ingredient order → cached: true, no upstream call
+3. Streaming request → SSE tokens arrive before the stream finishes
+4. Streaming request for a cached combination → single token event, done.cached true
+"""
+
+import json
+import time
+
+import pytest
+import requests
+
+try:
+    from tests.llm_stub import REPLY
+except ImportError:  # rootdir is tests/
+    from llm_stub import REPLY
+
+pytestmark = pytest.mark.llm_stub
+
+
+@pytest.fixture
+def suggest(api_base, auth_headers):
+    """suggest(body, accept=None) → response; waits out a busy limiter (503 + Retry-After)."""
+    def post(body, accept=None):
+        headers = {**auth_headers, **({'Accept': accept} if accept else {})}
+        for _ in range(5):
+            r = requests.post(f"{api_base}/meal-suggestions", headers=headers, json=body,
+                              stream=bool(accept or body.get('stream')), timeout=60)
+            if r.status_code != 503:
+                return r
+            time.sleep(int(r.headers.get('Retry-After') or 1))
+        return r
+    return post
+
+
+def read_sse(response):
+    """Yield (event, data, seconds_since_request) tuples from an SSE response."""
+    started = time.monotonic()
+    event, data = None, None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith('event: '):
+            event = line[7:]
+        elif line.startswith('data: '):
+            data = json.loads(line[6:])
+        elif line == '' and event:
+            yield event, data, time.monotonic() - started
+            event, data = None, None
+
+
+def test_cold_request_then_normalised_hit(suggest, llm_stub, prompt_marker):
+    prompt = f"Something quick with eggs ({prompt_marker})"
+    r = suggest({'prompt': prompt, 'ingredients': ['Eggs', 'tomatoes'], 'dietary': 'any', 'mealType': 'dinner'})
+    assert r.status_code == 200, r.text
+    assert r.json() == {'suggestions': REPLY, 'cached': False}
+    assert len(llm_stub.requests_for(prompt_marker)) == 1
+
+    r = suggest({'prompt': f"  {prompt.upper()}  ", 'ingredients': ['tomatoes ', 'eggs', 'EGGS'],
+                 'mealType': 'Dinner'})
+    assert r.status_code == 200, r.text
+    assert r.json()['cached'] is True
+    assert len(llm_stub.requests_for(prompt_marker)) == 1
+
+
+def test_streaming_then_cached_stream(suggest, llm_stub, prompt_marker):
+    prompt = f"Something quick with eggs ({prompt_marker}) streamed"
+    r = suggest({'prompt': prompt, 'stream': True})
+    assert r.status_code == 200, r.text
+    assert r.headers.get('content-type', '').startswith('text/event-stream')
+    events = list(read_sse(r))
+    tokens = [e for e in events if e[0] == 'token']
+    done = [e for e in events if e[0] == 'done']
+    assert len(tokens) > 1 and done, [e[0] for e in events]
+    assert ''.join(e[1]['text'] for e in tokens) == REPLY
+    assert done[0][1].get('cached') is False
+    assert tokens[0][2] < done[0][2] / 2, f"first token after {tokens[0][2]:.2f}s of {done[0][2]:.2f}s"
+
+    # Same prompt, SSE via the Accept header: answered from the cache.
+    r = suggest({'prompt': prompt}, accept='text/event-stream')
+    assert r.status_code == 200, r.text
+    events = list(read_sse(r))
+    tokens = [e for e in events if e[0] == 'token']
+    done = [e for e in events if e[0] == 'done']
+    assert [e[1]['text'] for e in tokens] == [REPLY]
+    assert done and done[0][1].get('cached') is True
+    assert len(llm_stub.requests_for(prompt_marker)) == 1
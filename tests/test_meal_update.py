@@ -0,0 +1,76 @@
+"""
+PUT /api/meals/:id round trip against a real database.
+
+Registers a user, creates a meal (seeded_meal) and updates its title,
+ingredients and instructions, and its image. Skips when /api/health
+reports the database unreachable.
+"""
+
+import pytest
+import requests
+
+pytestmark = pytest.mark.db
+
+
+def test_update_meal(api_base, registered_user, seeded_meal):
+    update = {
+        'title': 'Updated Test Meal Title',
+        'ingredients': 'Updated ingredients list with new items',
+        'instructions': 'Updated cooking instructions with more details',
+    }
+    r = requests.put(f"{api_base}/meals/{seeded_meal['id']}", headers=registered_user['headers'],
+                     json=update, timeout=10)
+    assert r.status_code == 200, r.text
+    meal = r.json()
+    assert meal['id'] == seeded_meal['id']
+    for field, value in update.items():
+        assert meal[field] == value
+
+
+def test_update_someone_elses_meal_is_rejected(api_base, seeded_meal, auth_headers):
+    r = requests.put(f"{api_base}/meals/{seeded_meal['id']}", headers=auth_headers,
+                     json={'title': 'Hijacked'}, timeout=10)
+    assert r.status_code in (403, 404), r.text
+
+
+def test_update_returns_row_and_detail_embeds_owner(api_base, registered_user, seeded_meal):
+    r = requests.put(f"{api_base}/meals/{seeded_meal['id']}", headers=registered_user['headers'],
+                     json={'title': 'Renamed'}, timeout=10)
+    assert r.status_code == 200, r.text
+    assert r.json()['user']['id'] == r.json()['userId']
+
+    r = requests.get(f"{api_base}/meals/{seeded_meal['id']}", timeout=10)
+    assert r.status_code == 200, r.text
+    assert r.json()['title'] == 'Renamed'
+    assert set(r.json()['user']) == {'id', 'username'}
+
+
+IMAGE_META = {
+    'width': 800, 'height': 600, 'publicId': 'forkcast/meals/old-image',
+    'placeholder': 'data:image/webp;base64,UklGRg==',
+}
+IMAGE_FIELDS = ('imagePublicId', 'imagePlaceholder', 'imageWidth', 'imageHeight')
+
+
+def test_new_image_url_clears_old_image_meta(api_base, registered_user, seeded_meal):
+    url = f"{api_base}/meals/{seeded_meal['id']}"
+    headers = registered_user['headers']
+    r = requests.put(url, headers=headers, timeout=10, json={
+        'imageUrl': 'https://res.cloudinary.com/demo/image/upload/forkcast/meals/old-image.webp',
+        'imageMeta': IMAGE_META,
+    })
+    assert r.status_code == 200, r.text
+    assert r.json()['imagePublicId'] == 'forkcast/meals/old-image'
+
+    # An edit that leaves the image alone omits imageUrl: meta kept.
+    r = requests.put(url, headers=headers, timeout=10, json={'title': 'Same image'})
+    assert r.status_code == 200, r.text
+    assert r.json()['imagePlaceholder'] == IMAGE_META['placeholder']
+
+    r = requests.put(url, headers=headers, timeout=10, json={
+        'imageUrl': 'https://res.cloudinary.com/demo/image/upload/forkcast/meals/new-image.webp',
+    })
+    assert r.status_code == 200, r.text
+    meal = r.json()
+    assert meal['imageUrl'].endswith('new-image.webp')
+    assert {field: meal[field] for field in IMAGE_FIELDS} == dict.fromkeys(IMAGE_FIELDS)
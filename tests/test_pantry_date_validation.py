@@ -0,0 +1,81 @@
+"""
+Pantry `expiresAt` validation (validateIsoDate in the API route).
+
+POST /api/pantry and PUT /api/pantry/:id accept strict `YYYY-MM-DD`
+calendar dates only. Guard order is 401 (auth) → 400 (validation) →
+DB, so a valid date reaches the DB layer: 200 with a database, 500
+'Database is unavailable' without one. Requests that get that far use
+`writer_headers`, a real user when there is a database.
+
+Scenarios:
+1. Valid dates (incl. leap-day 2024-02-29) are not rejected
+2. Impossible calendar dates → 400 (incl. non-leap 2023-02-29)
+3. Malformed strings → 400 'expiresAt must be YYYY-MM-DD'
+4. An empty expiresAt on POST means "no expiry", not a 400
+5. PUT partial updates without expiresAt skip validation (404 / 500)
+6. PUT with an invalid expiresAt → 400
+7. No auth + invalid date → 401, not 400
+"""
+
+import pytest
+import requests
+
+VALID = ['2025-11-03', '2024-02-29', '2024-12-31', '2025-01-01']
+IMPOSSIBLE = ['2024-13-45', '2024-02-31', '2024-04-31', '2023-02-29', '2024-11-31', '2024-00-15', '2024-06-00']
+MALFORMED = ['hello', '2024-1-1', '20241203', '2024/12/03', '2024-12', '12-03-2024', '2024-12-03T00:00:00Z']
+
+
+def post_item(api_base, headers, expires_at):
+    return requests.post(f"{api_base}/pantry", headers=headers,
+                         json={'name': 'Test Item', 'expiresAt': expires_at}, timeout=10)
+
+
+def assert_not_a_validation_error(r, allowed=(200, 500)):
+    assert r.status_code in allowed, r.text
+    if r.status_code == 500:
+        assert 'Database is unavailable' in r.json().get('error', '')
+
+
+@pytest.mark.parametrize('date', VALID)
+def test_valid_dates_are_accepted(api_base, writer_headers, date):
+    assert_not_a_validation_error(post_item(api_base, writer_headers, date))
+
+
+@pytest.mark.parametrize('date', IMPOSSIBLE)
+def test_impossible_dates_are_rejected(api_base, auth_headers, date):
+    r = post_item(api_base, auth_headers, date)
+    assert r.status_code == 400
+    assert 'expiresAt' in r.json()['error']
+
+
+@pytest.mark.parametrize('date', MALFORMED)
+def test_malformed_dates_are_rejected(api_base, auth_headers, date):
+    r = post_item(api_base, auth_headers, date)
+    assert r.status_code == 400
+    assert 'YYYY-MM-DD' in r.json()['error']
+
+
+def test_empty_date_means_no_expiry(api_base, writer_headers):
+    assert_not_a_validation_error(post_item(api_base, writer_headers, ''))
+
+
+@pytest.mark.parametrize('update', [
+    {'name': 'Updated Name'},
+    {'expiresAt': '2025-12-31'},
+    {'expiresAt': None},
+], ids=['name-only', 'valid-date', 'clear-date'])
+def test_put_partial_updates_skip_validation(api_base, auth_headers, update):
+    r = requests.put(f"{api_base}/pantry/fake-item-id", headers=auth_headers, json=update, timeout=10)
+    assert r.status_code in (404, 500), r.text
+
+
+def test_put_rejects_invalid_date(api_base, auth_headers):
+    r = requests.put(f"{api_base}/pantry/fake-item-id", headers=auth_headers,
+                     json={'expiresAt': '2024-02-31'}, timeout=10)
+    assert r.status_code == 400
+    assert 'expiresAt' in r.json()['error']
+
+
+def test_auth_is_checked_before_validation(api_base):
+    r = post_item(api_base, {}, '2024-13-45')
+    assert r.status_code == 401
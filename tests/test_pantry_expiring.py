@@ -0,0 +1,75 @@
+"""
+Server-side pantry expiry filters (migration 007) against a real
+database. Each test stocks a fresh user's pantry with ITEMS; skips when
+/api/health reports the database unreachable.
+
+Scenarios:
+1. GET /api/pantry/expiring?within=3 → only items due today..+3, soonest first
+2. GET /api/pantry/expiring?within=<bad> → 400
+3. GET /api/pantry?fresh=true → expired items dropped, undated items kept
+4. GET /api/pantry?fresh=true&fields=name → rows carry only `name`
+5. GET /api/pantry/expiring/summary → counts match (live fallback is fine)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+pytestmark = pytest.mark.db
+
+# The server compares against the UTC calendar date.
+TODAY = datetime.utcnow().date()
+ITEMS = {
+    'Old milk': TODAY - timedelta(days=1),
+    'Spinach': TODAY,
+    'Yoghurt': TODAY + timedelta(days=2),
+    'Cheddar': TODAY + timedelta(days=10),
+    'Rice': None,
+}
+
+
+@pytest.fixture
+def pantry_headers(api_base, registered_user):
+    """Auth headers for a fresh user whose pantry holds ITEMS."""
+    headers = registered_user['headers']
+    for name, expires in ITEMS.items():
+        r = requests.post(f"{api_base}/pantry", headers=headers, json={
+            'name': name, 'expiresAt': expires.isoformat() if expires else None,
+        }, timeout=10)
+        assert r.status_code == 200, r.text
+    return headers
+
+
+def test_expiring_window(api_base, pantry_headers):
+    r = requests.get(f"{api_base}/pantry/expiring?within=3", headers=pantry_headers, timeout=10)
+    assert r.status_code == 200, r.text
+    assert [i['name'] for i in r.json()] == ['Spinach', 'Yoghurt']
+
+
+@pytest.mark.parametrize('within', ['abc', '-1', '61', '2.5'])
+def test_bad_window_is_rejected(api_base, registered_user, within):
+    r = requests.get(f"{api_base}/pantry/expiring?within={within}",
+                     headers=registered_user['headers'], timeout=10)
+    assert r.status_code == 400, r.text
+
+
+def test_fresh_filter(api_base, pantry_headers):
+    r = requests.get(f"{api_base}/pantry?fresh=true", headers=pantry_headers, timeout=10)
+    assert r.status_code == 200, r.text
+    assert sorted(i['name'] for i in r.json()) == sorted(n for n in ITEMS if n != 'Old milk')
+
+
+def test_name_projection(api_base, pantry_headers):
+    r = requests.get(f"{api_base}/pantry?fresh=true&fields=name", headers=pantry_headers, timeout=10)
+    assert r.status_code == 200, r.text
+    rows = r.json()
+    assert len(rows) == 4 and all(set(row) == {'name'} for row in rows), rows
+
+
+def test_summary(api_base, pantry_headers):
+    r = requests.get(f"{api_base}/pantry/expiring/summary", headers=pantry_headers, timeout=10)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body.get('expiringCount'), body.get('expiredCount')) == (2, 1), body
+    assert [i['name'] for i in body.get('items', [])] == ['Spinach', 'Yoghurt']
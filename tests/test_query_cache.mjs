@@ -0,0 +1,144 @@
+#!/usr/bin/env node
+/**
+ * Query Cache Test
+ * Drives the query cache in lib/api-client.js against a fake fetch that
+ * counts requests and can hold responses back. No server needed.
+ *
+ *     node tests/test_query_cache.mjs
+ *
+ * Test scenarios:
+ * 1. Cache keys: query parameter order doesn't matter
+ * 2. Identical reads in flight share one request
+ * 3. A fresh entry answers with no request; a stale one refetches
+ * 4. Failures are not cached
+ * 5. A mutation invalidates its resource's tag, or the tags it names,
+ *    and leaves other entries cached
+ * 6. A read in flight when its tags are invalidated is not stored
+ * 7. setQueryData / peekQuery, and clearQueryCache dropping everything
+ * 8. Only QUERY_CACHE_MAX entries are kept, least recently used first
+ */
+
+import {
+  apiDelete, apiPost, apiQuery, clearQueryCache, invalidateQueries,
+  peekQuery, queryKey, resourceOf, setQueryData,
+} from '../lib/api-client.js';
+
+let failures = 0;
+
+function printResult(passed, message) {
+  console.log(`${passed ? '✅ PASS' : '❌ FAIL'}: ${message}`);
+  if (!passed) failures += 1;
+}
+
+// Fake fetch: every call is recorded; `hold()` makes the next GET wait
+// until the returned release function is called.
+const calls = [];
+let failNext = false;
+let held = null;
+
+globalThis.fetch = async (path, init = {}) => {
+  calls.push(`${init.method} ${path}`);
+  if (init.method === 'GET' && held) {
+    const gate = held;
+    held = null;
+    await gate;
+  }
+  const status = failNext ? 503 : 200;
+  failNext = false;
+  return new Response(JSON.stringify({ path, n: calls.length }), {
+    status,
+    headers: { 'content-type': 'application/json' },
+  });
+};
+
+function hold() {
+  let release;
+  held = new Promise((resolve) => { release = resolve; });
+  return release;
+}
+
+const gets = (path) => calls.filter((call) => call === `GET ${path}`).length;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+async function main() {
+  console.log('\n' + '='.repeat(80));
+  console.log('QUERY CACHE TEST');
+  console.log('='.repeat(80));
+
+  printResult(
+    queryKey('/api/bootstrap?week=2030-01-07&include=plans') === queryKey('/api/bootstrap?include=plans&week=2030-01-07')
+      && resourceOf('/api/meal-plans/bulk?x=1') === 'meal-plans',
+    'keys: parameter order ignored, resource from the first path segment',
+  );
+
+  const [a, b] = await Promise.all([apiQuery('/api/meals?userId=1'), apiQuery('/api/meals?userId=1')]);
+  printResult(gets('/api/meals?userId=1') === 1 && a.data.n === b.data.n, 'dedup: two reads in flight, one request');
+
+  await apiQuery('/api/meals?userId=1');
+  printResult(gets('/api/meals?userId=1') === 1, 'fresh: served from the cache');
+
+  await apiQuery('/api/pantry', { staleMs: 20 });
+  await sleep(30);
+  printResult(peekQuery('/api/pantry')?.stale === true, 'stale: peekQuery still returns the entry, flagged stale');
+  await apiQuery('/api/pantry', { staleMs: 20 });
+  printResult(gets('/api/pantry') === 2, 'stale: next read refetches');
+
+  failNext = true;
+  const failed = await apiQuery('/api/shopping-list');
+  await apiQuery('/api/shopping-list');
+  printResult(!failed.ok && gets('/api/shopping-list') === 2, 'failure: not cached, next read retries');
+
+  await apiPost('/api/meals', { title: 'Soup' });
+  await apiQuery('/api/meals?userId=1');
+  await apiQuery('/api/shopping-list');
+  printResult(
+    gets('/api/meals?userId=1') === 2 && gets('/api/shopping-list') === 2,
+    'mutation: POST /api/meals invalidates meals only',
+  );
+
+  const week1 = '/api/bootstrap?include=plans&week=2030-01-07';
+  const week2 = '/api/bootstrap?include=plans&week=2030-01-14';
+  await apiQuery(week1, { tags: ['meal-plans:2030-01-08'] });
+  await apiQuery(week2, { tags: ['meal-plans:2030-01-15'] });
+  await apiDelete('/api/meal-plans', { body: { date: '2030-01-15' }, invalidates: ['meal-plans:2030-01-15'] });
+  printResult(
+    peekQuery(week1) !== null && peekQuery(week2) === null,
+    'mutation: `invalidates` drops only the tagged week',
+  );
+
+  const release = hold();
+  const inflight = apiQuery('/api/user', { tags: ['user'] });
+  invalidateQueries(['user']);
+  release();
+  await inflight;
+  printResult(peekQuery('/api/user') === null, 'in flight: invalidated read is not stored');
+
+  setQueryData('/api/bootstrap?week=2030-02-04&include=plans', { week: { plans: [] } }, { tags: ['meal-plans'] });
+  const before = calls.length;
+  const seeded = await apiQuery('/api/bootstrap?include=plans&week=2030-02-04');
+  printResult(calls.length === before && Array.isArray(seeded.data.week.plans), 'setQueryData: answers the read');
+
+  const release2 = hold();
+  const beforeLogout = apiQuery('/api/meals?userId=2');
+  clearQueryCache();
+  release2();
+  await beforeLogout;
+  printResult(
+    peekQuery(week1) === null && peekQuery('/api/meals?userId=2') === null,
+    'clearQueryCache: entries and reads in flight dropped',
+  );
+
+  for (let i = 0; i < 101; i += 1) setQueryData(`/api/meals/${i}`, { i });
+  await apiQuery('/api/meals/1');
+  for (let i = 101; i < 103; i += 1) setQueryData(`/api/meals/${i}`, { i });
+  printResult(
+    peekQuery('/api/meals/0') === null && peekQuery('/api/meals/2') === null
+      && peekQuery('/api/meals/1') !== null && peekQuery('/api/meals/102') !== null,
+    'LRU: oldest entries evicted, a recently read one kept',
+  );
+
+  console.log(`\n${failures ? `${failures} check(s) failed` : 'all checks passed'}`);
+  return failures ? 1 : 0;
+}
+
+process.exit(await main());
@@ -0,0 +1,237 @@
+"""
+Query plans for the data layer's hot reads, against tests/supabase_standin.py.
+
+Seeds the stand-in's database with enough rows that the planner has
+real choices (SEED_USERS users, each with a few hundred meals, pantry
+and shopping-list items and a year of meal plans), runs ANALYZE, then
+sends each read below exactly as lib/supabase-db.js builds it, asking
+PostgREST for its plan instead of its rows:
+
+    Accept: application/vnd.pgrst.plan+json; options=analyze|buffers
+
+A test fails when the plan has a Seq Scan on one of the large tables,
+or a Sort node where the index (db/migrations/012_index_audit.sql)
+should return rows in order. The failure message shows the plan with
+row counts and buffers.
+
+Search and the keyset export are allowed to sort (marked `sorts`):
+search filters a user's meals down to a few rows first, and an export
+is rare. Functions called by RPC (scan matching,
+rate limiting) aren't covered; PostgREST only shows them as a Function
+Scan.
+
+Needs only the stand-in (no Forkcast server):
+
+    python tests/supabase_standin.py
+    pytest tests/test_query_plans.py
+
+Environment:
+  SUPABASE_STANDIN_URL       default http://127.0.0.1:54321
+  SUPABASE_JWT_SECRET        the stand-in's --jwt-secret, if changed
+  SUPABASE_STANDIN_ANALYZED  1 = with --upstream, you ran ANALYZE after seeding
+"""
+
+import os
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+import requests
+
+try:
+    from tests.supabase_standin import DEFAULT_JWT_SECRET, StandinClient, mint_key
+except ImportError:  # rootdir is tests/
+    from supabase_standin import DEFAULT_JWT_SECRET, StandinClient, mint_key
+
+pytestmark = pytest.mark.standin
+
+STANDIN_URL = os.getenv('SUPABASE_STANDIN_URL', 'http://127.0.0.1:54321')
+JWT_SECRET = os.getenv('SUPABASE_JWT_SECRET', DEFAULT_JWT_SECRET)
+
+LARGE_TABLES = {'meals', 'meal_plans', 'pantry_items', 'shopping_list_items'}
+SEED_USERS = 60
+MEALS_PER_USER = 250
+ITEMS_PER_USER = 200
+PLAN_DAYS = 365
+PLAN_START = date(2031, 1, 1)
+BATCH = 1000
+
+# Sequential ids, inserted user by user: each user's rows sit together
+# on disk, as a table that's been VACUUMed and CLUSTERed would have
+# them. The planner then picks by which indexes exist, not by a random
+# physical layout.
+SEED_NS = uuid.UUID('5eed0000-0000-4000-8000-000000000000')
+USER = str(uuid.UUID(int=SEED_NS.int))
+MEAL = str(uuid.UUID(int=SEED_NS.int + 1_000_000))
+
+MEAL_SELECT = '*,user:users(id,username)'
+PLAN_SELECT = ('*,meal:meals(id,title,image_url,image_placeholder,ingredients,instructions),'
+               'user:users(id,username)')
+EXPORT_MEAL_COLUMNS = ('id,title,ingredients,instructions,image_url,image_width,image_height,'
+                       'image_public_id,image_placeholder,gallery_images,created_at,updated_at')
+
+# (id, table, params, sorts) — params as lib/supabase-db.js sends them.
+READS = [
+    ('meals.findAll(userId)', 'meals',
+     [('select', MEAL_SELECT), ('order', 'created_at.desc'), ('user_id', f'eq.{USER}')], False),
+    ('meals.page(userId)', 'meals',
+     [('select', MEAL_SELECT), ('order', 'created_at.desc'), ('offset', '0'), ('limit', '20'),
+      ('user_id', f'eq.{USER}')], False),
+    ('meals.page(feed)', 'meals',
+     [('select', MEAL_SELECT), ('order', 'created_at.desc'), ('offset', '0'), ('limit', '20')], False),
+    ('meals.findOne(id)', 'meals',
+     [('select', MEAL_SELECT), ('id', f'eq.{MEAL}')], False),
+    ('meals.findAll(search)', 'meals',
+     [('select', MEAL_SELECT), ('order', 'created_at.desc'), ('user_id', f'eq.{USER}'),
+      ('or', '(title.ilike.%curry%,ingredients.ilike.%curry%,instructions.ilike.%curry%)')], True),
+    ('meal_plans.find(week)', 'meal_plans',
+     [('select', PLAN_SELECT), ('user_id', f'eq.{USER}'),
+      ('date', 'gte.2031-03-03'), ('date', 'lte.2031-03-09'), ('order', 'date.asc')], False),
+    ('meal_plans.find(date)', 'meal_plans',
+     [('select', PLAN_SELECT), ('user_id', f'eq.{USER}'), ('date', 'eq.2031-03-03'),
+      ('order', 'date.asc')], False),
+    ('pantry_items.find', 'pantry_items',
+     [('select', '*'), ('user_id', f'eq.{USER}'), ('order', 'added_at.desc')], False),
+    ('pantry_items.find(names)', 'pantry_items',
+     [('select', 'name'), ('user_id', f'eq.{USER}'), ('order', 'added_at.desc')], False),
+    ('pantry_items.find(fresh)', 'pantry_items',
+     [('select', '*'), ('user_id', f'eq.{USER}'), ('or', '(expires_at.is.null,expires_at.gte.2031-01-10)'),
+      ('order', 'added_at.desc')], False),
+    ('pantry_items.find(expiring)', 'pantry_items',
+     [('select', '*'), ('user_id', f'eq.{USER}'), ('expires_at', 'gte.2031-01-10'),
+      ('expires_at', 'lte.2031-01-13'), ('order', 'expires_at.asc')], False),
+    ('pantry_items.count', 'pantry_items',
+     [('select', 'id'), ('user_id', f'eq.{USER}')], False),
+    ('shopping_list_items.find', 'shopping_list_items',
+     [('select', '*'), ('order', 'checked.asc,added_at.asc'), ('user_id', f'eq.{USER}')], False),
+    ('shopping_list_items.find(unchecked)', 'shopping_list_items',
+     [('select', '*'), ('order', 'checked.asc,added_at.asc'), ('user_id', f'eq.{USER}'),
+      ('checked', 'eq.false')], False),
+    ('shopping_list_items.count(checked)', 'shopping_list_items',
+     [('select', 'id'), ('user_id', f'eq.{USER}'), ('checked', 'eq.true')], False),
+    ('user_data.page(meals)', 'meals',
+     [('select', EXPORT_MEAL_COLUMNS), ('user_id', f'eq.{USER}'), ('order', 'id.asc'),
+      ('limit', '1000')], True),
+]
+
+
+def seed_rows():
+    """{table: [rows]} for every seed user, deterministic."""
+    rng = random.Random(2031)
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    rows = {'users': [], 'meals': [], 'meal_plans': [], 'pantry_items': [], 'shopping_list_items': []}
+    words = ['curry', 'pasta', 'salad', 'soup', 'stew', 'tacos', 'risotto', 'bake']
+
+    def seq(offset, n):
+        return str(uuid.UUID(int=SEED_NS.int + offset + n))
+
+    for u in range(SEED_USERS):
+        user_id = seq(0, u)
+        rows['users'].append({'id': user_id, 'username': f'plan_seed_{u:03d}', 'password': 'x'})
+        meal_ids = []
+        for m in range(MEALS_PER_USER):
+            meal_id = seq(1_000_000, u * MEALS_PER_USER + m)
+            meal_ids.append(meal_id)
+            word = rng.choice(words)
+            rows['meals'].append({
+                'id': meal_id, 'user_id': user_id, 'title': f'{word.title()} #{m}',
+                'ingredients': f'{word} base\nonion\ngarlic', 'instructions': f'Cook the {word}.',
+                'created_at': (base + timedelta(hours=u * MEALS_PER_USER + m)).isoformat(),
+            })
+        for d in range(PLAN_DAYS):
+            for k, meal_type in enumerate(('lunch', 'dinner')):
+                rows['meal_plans'].append({
+                    'id': seq(10_000_000, (u * PLAN_DAYS + d) * 2 + k), 'user_id': user_id,
+                    'meal_id': rng.choice(meal_ids), 'meal_type': meal_type,
+                    'date': (PLAN_START + timedelta(days=d)).isoformat(),
+                })
+        for i in range(ITEMS_PER_USER):
+            added = (base + timedelta(minutes=u * ITEMS_PER_USER + i)).isoformat()
+            expires = PLAN_START + timedelta(days=rng.randint(0, 60))
+            rows['pantry_items'].append({
+                'id': seq(20_000_000, u * ITEMS_PER_USER + i), 'user_id': user_id,
+                'name': f'{rng.choice(words)} item {i}', 'added_at': added,
+                'expires_at': expires.isoformat() if rng.random() < 0.7 else None,
+            })
+            rows['shopping_list_items'].append({
+                'id': seq(30_000_000, u * ITEMS_PER_USER + i), 'user_id': user_id,
+                'name': f'{rng.choice(words)} item {i}', 'added_at': added,
+                'checked': rng.random() < 0.4,
+                'source_meal_id': rng.choice(meal_ids) if rng.random() < 0.3 else None,
+            })
+    return rows
+
+
+@pytest.fixture(scope='module')
+def rest():
+    """A session on the stand-in's /rest/v1 with the service key; seeded and analyzed."""
+    standin = StandinClient(STANDIN_URL)
+    if not standin.is_up():
+        pytest.skip(f"Supabase stand-in not running at {STANDIN_URL}")
+    key = mint_key('service_role', JWT_SECRET)
+    session = requests.Session()
+    session.headers.update({'apikey': key, 'Authorization': f'Bearer {key}'})
+    base = f"{STANDIN_URL}/rest/v1"
+
+    rows = seed_rows()
+    last_meal = rows['meals'][-1]['id']
+    if not session.get(f"{base}/meals", params={'select': 'id', 'id': f'eq.{last_meal}'}, timeout=10).json():
+        # ignore-duplicates: parallel workers may seed at the same time.
+        headers = {'Prefer': 'resolution=ignore-duplicates,return=minimal'}
+        for table in ('users', 'meals', 'meal_plans', 'pantry_items', 'shopping_list_items'):
+            for start in range(0, len(rows[table]), BATCH):
+                r = session.post(f"{base}/{table}", json=rows[table][start:start + BATCH],
+                                 headers=headers, timeout=60)
+                assert r.status_code in (200, 201), f"seeding {table}: {r.status_code} {r.text}"
+    if not standin.analyze() and not os.getenv('SUPABASE_STANDIN_ANALYZED'):
+        pytest.skip("the stand-in can't ANALYZE an --upstream database; run ANALYZE yourself, "
+                    "then set SUPABASE_STANDIN_ANALYZED=1")
+    return session, base
+
+
+def explain(rest, table, params):
+    session, base = rest
+    r = session.get(f"{base}/{table}", params=params, timeout=30,
+                    headers={'Accept': 'application/vnd.pgrst.plan+json; options=analyze|buffers'})
+    if r.status_code == 406:
+        pytest.skip("PostgREST plans are off; set db-plan-enabled (the stand-in does)")
+    assert r.status_code == 200, r.text
+    return r.json()[0]['Plan']
+
+
+def walk(node, depth=0):
+    yield node, depth
+    for child in node.get('Plans', []):
+        yield from walk(child, depth + 1)
+
+
+def render(plan):
+    lines = []
+    for node, depth in walk(plan):
+        relation = f" on {node['Relation Name']}" if 'Relation Name' in node else ''
+        index = f" using {node['Index Name']}" if 'Index Name' in node else ''
+        buffers = node.get('Shared Hit Blocks', 0) + node.get('Shared Read Blocks', 0)
+        lines.append(f"{'  ' * depth}{node['Node Type']}{relation}{index}"
+                     f"  (rows={node.get('Actual Rows')}, buffers={buffers})")
+    return '\n'.join(lines)
+
+
+@pytest.mark.parametrize('table, params, sorts', [r[1:] for r in READS], ids=[r[0] for r in READS])
+def test_read_uses_an_index(rest, table, params, sorts):
+    plan = explain(rest, table, params)
+    nodes = [node for node, _ in walk(plan)]
+    seq_scans = [n['Relation Name'] for n in nodes
+                 if n['Node Type'] == 'Seq Scan' and n.get('Relation Name') in LARGE_TABLES]
+    assert not seq_scans, f"Seq Scan on {', '.join(seq_scans)}:\n{render(plan)}"
+    if not sorts:
+        sort_nodes = [n for n in nodes if n['Node Type'] in ('Sort', 'Incremental Sort')]
+        assert not sort_nodes, f"explicit sort; the index should return rows in order:\n{render(plan)}"
+
+
+def test_meal_delete_follows_indexed_foreign_keys(rest):
+    """Deleting a meal looks up its plans and shopping items by index, not by scanning."""
+    plan = explain(rest, 'meal_plans', [('select', 'id'), ('meal_id', f'eq.{MEAL}')])
+    assert not any(n['Node Type'] == 'Seq Scan' for n, _ in walk(plan)), render(plan)
+    plan = explain(rest, 'shopping_list_items', [('select', 'id'), ('source_meal_id', f'eq.{MEAL}')])
+    assert not any(n['Node Type'] == 'Seq Scan' for n, _ in walk(plan)), render(plan)
@@ -0,0 +1,149 @@
+"""
+Per-user / per-IP token buckets (lib/rate-limit.js) on
+GET /api/barcode-lookup and GET /api/barcode-diagnose.
+
+The limiter runs before the barcode is validated, so every request
+here uses a malformed code: admitted requests answer 400 without
+touching any upstream, refused ones answer 429. The server must run
+with conftest's RATE_LIMIT_TEST_POLICIES (the `rate_limit_policies`
+fixture skips otherwise and prints the value to set):
+
+    RATE_LIMIT_POLICIES='{"barcode-lookup":{"user":{"burst":10,"perMinute":6},"ip":{"burst":1000,"perMinute":1000}},"barcode-diagnose":{"user":{"burst":1000,"perMinute":1000},"ip":{"burst":5,"perMinute":1}}}' \\
+    yarn dev
+
+Scenarios:
+1. RateLimit-Limit / -Remaining / -Reset / -Policy on an admitted request
+2. Burst from one user → exactly `burst` admitted (plus refill), the
+   rest 429 with Retry-After and RateLimit-Remaining: 0
+3. Fair share: 5 users burst concurrently, one of them sending 3× as
+   many requests → every user gets the same allowance (Jain index ≥ 0.99)
+4. Per-IP bucket: fresh users behind one X-Forwarded-For share its
+   allowance; another IP is unaffected
+5. Retry-After is honest: waiting that long gets the next request in
+6. Requests refused by validation after the limiter (upload without a
+   file, empty suggestion prompt) still carry RateLimit-* headers
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+pytestmark = pytest.mark.rate_limit
+
+BAD_CODE = 'not-a-barcode'
+
+
+@pytest.fixture
+def limits(rate_limit_policies):
+    user = rate_limit_policies['barcode-lookup']['user']
+    return {
+        'user_burst': user['burst'],
+        'user_per_minute': user['perMinute'],
+        'ip_burst': rate_limit_policies['barcode-diagnose']['ip']['burst'],
+    }
+
+
+@pytest.fixture
+def lookup(api_base, mint_token):
+    """lookup(token=None, route='barcode-lookup', ip=None) → response for a malformed code."""
+    def get(token=None, route='barcode-lookup', ip=None):
+        headers = {'Authorization': f"Bearer {token or mint_token()}"}
+        if ip:
+            headers['X-Forwarded-For'] = ip
+        return requests.get(f"{api_base}/{route}", params={'code': BAD_CODE}, headers=headers, timeout=10)
+    return get
+
+
+def allowance(limits, elapsed):
+    """Most requests one user bucket can admit within `elapsed` seconds."""
+    return limits['user_burst'] + int(elapsed * limits['user_per_minute'] / 60) + 1
+
+
+def test_headers_on_admitted_request(lookup, limits):
+    r = lookup()
+    burst = limits['user_burst']
+    assert r.status_code == 400, r.text
+    assert r.headers.get('RateLimit-Limit') == str(burst)
+    assert r.headers.get('RateLimit-Remaining') == str(burst - 1)
+    assert r.headers.get('RateLimit-Reset', '').isdigit()
+    assert r.headers.get('RateLimit-Policy', '').startswith(f"{burst};w=")
+
+
+def test_single_user_burst(lookup, limits, mint_token):
+    token = mint_token()
+    burst = limits['user_burst']
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        responses = list(pool.map(lambda _: lookup(token), range(burst * 3)))
+    elapsed = time.monotonic() - started
+
+    admitted = sum(1 for r in responses if r.status_code == 400)
+    limited = [r for r in responses if r.status_code == 429]
+    assert admitted + len(limited) == len(responses), sorted({r.status_code for r in responses})
+    assert burst <= admitted <= allowance(limits, elapsed), admitted
+    for r in limited:
+        assert int(r.headers.get('Retry-After', '0')) >= 1
+        assert r.headers.get('RateLimit-Remaining') == '0'
+
+
+def test_fair_share_between_users(lookup, limits, mint_token):
+    tokens = [mint_token() for _ in range(5)]
+    # User 0 sends three times as much as everyone else; interleave so
+    # nobody gets a head start.
+    jobs = []
+    for _ in range(limits['user_burst'] * 3):
+        jobs.extend(range(len(tokens)))
+        jobs.extend([0, 0])
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=25) as pool:
+        statuses = list(pool.map(lambda u: (u, lookup(tokens[u]).status_code), jobs))
+    elapsed = time.monotonic() - started
+
+    unexpected = {code for _, code in statuses if code not in (400, 429)}
+    assert not unexpected
+    admitted = [sum(1 for u, code in statuses if u == i and code == 400) for i in range(len(tokens))]
+    assert all(limits['user_burst'] <= a <= allowance(limits, elapsed) for a in admitted), admitted
+    jain = sum(admitted) ** 2 / (len(admitted) * sum(a * a for a in admitted))
+    assert jain >= 0.99, f"admitted per user={admitted} (heavy user first), Jain index={jain:.3f}"
+
+
+def test_ip_bucket_shared_by_fresh_users(lookup, limits):
+    # TEST-NET-2, fresh per run so buckets left over from a previous run don't interfere.
+    shared_ip, other_ip = random.sample([f"198.51.100.{i}" for i in range(1, 255)], 2)
+    ip_burst = limits['ip_burst']
+    responses = [lookup(route='barcode-diagnose', ip=shared_ip) for _ in range(ip_burst + 3)]
+
+    admitted = sum(1 for r in responses if r.status_code == 400)
+    limited = [r for r in responses if r.status_code == 429]
+    assert admitted == ip_burst and len(limited) == 3, [r.status_code for r in responses]
+    assert all('scope=ip' in r.headers.get('RateLimit-Policy', '') for r in limited)
+    assert lookup(route='barcode-diagnose', ip=other_ip).status_code == 400
+
+
+def test_retry_after_is_honest(lookup, limits, mint_token):
+    token = mint_token()
+    for _ in range(limits['user_burst'] * 3):
+        r = lookup(token)
+        if r.status_code != 400:
+            break
+    assert r.status_code == 429, r.text
+    retry_after = int(r.headers.get('Retry-After', '0'))
+    assert 1 <= retry_after <= 60, retry_after
+
+    time.sleep(retry_after)
+    assert lookup(token).status_code == 400
+
+
+@pytest.mark.parametrize('route, kwargs', [
+    ('upload', {'files': {'other': ('note.txt', b'not a file field', 'text/plain')}}),
+    ('meal-suggestions', {'json': {'prompt': '  '}}),
+])
+def test_validation_errors_carry_headers(api_base, rate_limit_policies, mint_token, route, kwargs):
+    r = requests.post(f"{api_base}/{route}", headers={'Authorization': f"Bearer {mint_token()}"},
+                      timeout=10, **kwargs)
+    assert r.status_code == 400, r.text
+    assert r.headers.get('RateLimit-Remaining', '').isdigit()
+    assert r.headers.get('RateLimit-Policy')
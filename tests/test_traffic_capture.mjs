@@ -0,0 +1,149 @@
+#!/usr/bin/env node
+/**
+ * Traffic Capture Test
+ * Drives lib/traffic-capture.js with in-process Requests and checks what
+ * lands on disk. No server needed.
+ *
+ *     node tests/test_traffic_capture.mjs
+ *
+ * Test scenarios:
+ * 1. Route templates: ids become :id, the /api prefix goes
+ * 2. A scan with a JWT: user hashed, barcode hashed (same code → same
+ *    hash), and neither the token nor the userId appear in the file
+ * 3. Register body: password dropped, username reduced to its length
+ * 4. Dates become day offsets; enumerations and short numbers are kept
+ * 5. The handler's Response comes back untouched and its body readable
+ * 6. Rotation: small maxBytes → several files, only maxFiles kept
+ */
+
+import { mkdtempSync, readdirSync, readFileSync, rmSync } from 'fs';
+import { tmpdir } from 'os';
+import path from 'path';
+import { CaptureWriter, TrafficCapture, routeTemplate } from '../lib/traffic-capture.js';
+
+const USER_ID = '7d3c6d1e-58a4-4e0b-9a57-0d6a2f0f9c11';
+// header.payload.signature with payload { userId, username }
+const TOKEN = ['eyJhbGciOiJIUzI1NiJ9',
+  Buffer.from(JSON.stringify({ userId: USER_ID, username: 'alice' })).toString('base64url'),
+  'c2lnbmF0dXJl'].join('.');
+const NOW = Date.parse('2030-01-09T12:00:00Z');
+
+let failures = 0;
+
+function printResult(passed, message) {
+  console.log(`${passed ? '✅ PASS' : '❌ FAIL'}: ${message}`);
+  if (!passed) failures += 1;
+}
+
+function jsonRequest(method, pathname, body, headers = {}) {
+  const text = body === undefined ? undefined : JSON.stringify(body);
+  return new Request(`http://localhost:3000${pathname}`, {
+    method,
+    headers: {
+      ...(text ? { 'content-type': 'application/json', 'content-length': String(Buffer.byteLength(text)) } : {}),
+      ...headers,
+    },
+    body: text,
+  });
+}
+
+function readRecords(dir) {
+  return readdirSync(dir).sort()
+    .flatMap((name) => readFileSync(path.join(dir, name), 'utf8').split('\n').filter(Boolean))
+    .map((line) => JSON.parse(line));
+}
+
+async function main() {
+  console.log('\n' + '='.repeat(80));
+  console.log('TRAFFIC CAPTURE TEST');
+  console.log('='.repeat(80));
+
+  printResult(
+    routeTemplate(`/api/meals/${USER_ID}/ingredients`) === 'meals/:id/ingredients'
+      && routeTemplate('/api/shopping-list/scan') === 'shopping-list/scan'
+      && routeTemplate('/api/') === '',
+    'route templates',
+  );
+
+  const dir = mkdtempSync(path.join(tmpdir(), 'traffic-'));
+  try {
+    const writer = new CaptureWriter({ dir, now: () => NOW });
+    const capture = new TrafficCapture({ writer, salt: 'test-salt', now: () => NOW });
+    const handler = capture.wrap(async (request) => {
+      const body = request.method === 'GET' ? null : await request.json();
+      return Response.json({ ok: true, echo: body }, { status: 200 });
+    });
+
+    const auth = { authorization: `Bearer ${TOKEN}` };
+    const scan = { code: '5000112637922', name: 'Semi-skimmed milk' };
+    const first = await handler(jsonRequest('POST', '/api/shopping-list/scan', scan, auth));
+    await handler(jsonRequest('POST', '/api/shopping-list/scan', scan, auth));
+    await handler(jsonRequest('POST', '/api/auth/register', { username: 'alice', password: 'hunter22' }));
+    await handler(jsonRequest('GET', '/api/bootstrap?week=2030-01-14&include=plans&limit=20', undefined, auth));
+    await handler(jsonRequest('POST', '/api/meal-plans/bulk', {
+      op: 'copy-week', source: { start: '2030-01-07' }, target: { start: '2030-01-14' },
+    }, auth));
+
+    const echoed = await first.json();
+    printResult(first.status === 200 && echoed.echo?.code === scan.code, 'handler response passed through untouched');
+
+    await new Promise((resolve) => setTimeout(resolve, 50));
+    await writer.flush();
+    const raw = readdirSync(dir).map((name) => readFileSync(path.join(dir, name), 'utf8')).join('');
+    const records = readRecords(dir);
+    const [scanA, scanB, register, bootstrap, bulk] = records;
+
+    printResult(records.length === 5, `5 records written (got ${records.length})`);
+    printResult(
+      !raw.includes(TOKEN) && !raw.includes(USER_ID) && !raw.includes('hunter22') && !raw.includes('alice')
+        && !raw.includes(scan.code) && !raw.includes('milk'),
+      'no token, userId, password, username, barcode or product name on disk',
+    );
+    printResult(
+      scanA.route === 'shopping-list/scan' && scanA.auth === 'user' && /^[0-9a-f]{12}$/.test(scanA.user)
+        && scanA.user === scanB.user && scanA.body.code.code === scanB.body.code.code
+        && scanA.body.code.len === 13 && scanA.body.name.str === scan.name.length,
+      'scan: hashed user and barcode, stable across requests; name reduced to its length',
+    );
+    printResult(
+      register.auth === 'none' && register.user === null && !('password' in register.body)
+        && register.body.username.str === 5,
+      'register: password dropped, username reduced to its length',
+    );
+    printResult(
+      bootstrap.query.week.days === 5 && bootstrap.query.include === 'plans' && bootstrap.query.limit === '20'
+        && bootstrap.reqBytes === null && bootstrap.resBytes > 0,
+      'bootstrap: week as a day offset, include and limit kept, response size measured',
+    );
+    printResult(
+      bulk.body.op === 'copy-week' && bulk.body.source.start.days === -2 && bulk.body.target.start.days === 5
+        && bulk.reqBytes > 0 && typeof bulk.ms === 'number',
+      'bulk: op kept, nested dates as day offsets',
+    );
+  } finally {
+    rmSync(dir, { recursive: true, force: true });
+  }
+
+  const rotateDir = mkdtempSync(path.join(tmpdir(), 'traffic-'));
+  try {
+    const writer = new CaptureWriter({ dir: rotateDir, maxBytes: 2000, maxFiles: 3, now: () => NOW });
+    for (let i = 0; i < 200; i += 1) {
+      writer.write({ i, pad: 'x'.repeat(80) });
+      if (i % 20 === 19) await writer.flush();
+    }
+    await writer.flush();
+    const files = readdirSync(rotateDir).sort();
+    const kept = readRecords(rotateDir);
+    printResult(
+      files.length === 3 && kept[kept.length - 1].i === 199 && kept[0].i > 0,
+      `rotation: ${files.length} files kept, newest record last (records ${kept[0]?.i}..${kept[kept.length - 1]?.i})`,
+    );
+  } finally {
+    rmSync(rotateDir, { recursive: true, force: true });
+  }
+
+  console.log(`\n${failures ? `${failures} check(s) failed` : 'all checks passed'}`);
+  return failures ? 1 : 0;
+}
+
+process.exit(await main());
@@ -0,0 +1,79 @@
+"""
+POST /api/upload transfers identical bytes to Cloudinary once, against
+the Cloudinary stub (tests/cloudinary_stub.py). Start the server
+pointed at it:
+
+    CLOUDINARY_UPLOAD_PREFIX=http://127.0.0.1:8765 \\
+    NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME=stub \\
+    CLOUDINARY_API_KEY=stub CLOUDINARY_API_SECRET=stub \\
+    yarn dev
+
+Every test uploads as a freshly registered user with unique bytes, so
+earlier runs can't pre-seed image_assets and the stub's per-user upload
+log counts only this test's transfers. The user must be real:
+image_assets.user_id references users(id), and a token-only user's
+hash could never be recorded.
+
+Scenarios:
+1. N concurrent uploads of the same file → exactly one upstream transfer
+2. Re-uploading the same file later → deduplicated, no upstream transfer
+3. A different file → a fresh upstream transfer
+"""
+
+import io
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+pytestmark = [pytest.mark.db, pytest.mark.cloudinary_stub]
+
+CONCURRENCY = 8
+
+# Starts with the JPEG SOI/EOI markers; neither the app nor the stub
+# ever decodes it, they only hash and forward the bytes.
+TINY_JPEG = b"\xff\xd8\xff\xe0forkcast-upload-dedup\xff\xd9"
+
+
+@pytest.fixture
+def uploader(api_base, registered_user, cloudinary_stub):
+    """{'upload': upload(payload) → response, 'transfers': () → count, 'payload': unique bytes} for a fresh user."""
+    user_id = registered_user['id']
+    headers = registered_user['headers']
+
+    def upload(payload):
+        files = {'file': ('photo.jpg', io.BytesIO(payload), 'image/jpeg')}
+        return requests.post(f"{api_base}/upload", headers=headers, files=files, timeout=30)
+
+    return {
+        'upload': upload,
+        'transfers': lambda: len(cloudinary_stub.uploads_for(user_id)),
+        'payload': TINY_JPEG + uuid.uuid4().bytes,
+    }
+
+
+def test_concurrent_identical_uploads(uploader):
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        responses = list(pool.map(lambda _: uploader['upload'](uploader['payload']), range(CONCURRENCY)))
+    assert [r.status_code for r in responses] == [200] * CONCURRENCY, responses[0].text
+    assert uploader['transfers']() == 1
+    assert len({r.json()['url'] for r in responses}) == 1
+
+
+def test_sequential_repeat_is_deduplicated(uploader):
+    r = uploader['upload'](uploader['payload'])
+    assert r.status_code == 200, r.text
+    r = uploader['upload'](uploader['payload'])
+    assert r.status_code == 200, r.text
+    assert r.json().get('deduplicated') is True
+    assert uploader['transfers']() == 1
+
+
+def test_different_bytes_upload_again(uploader):
+    first = uploader['upload'](uploader['payload'])
+    second = uploader['upload'](uploader['payload'] + b"\x00")
+    assert first.status_code == 200 and second.status_code == 200, second.text
+    assert not second.json().get('deduplicated')
+    assert second.json()['url'] != first.json()['url']
+    assert uploader['transfers']() == 2